@@ -0,0 +1,22 @@
+-- 添加评分模型版本字段 (统一评分模型注册表 scoring_models.py)
+-- 在 Cloudflare D1 控制台中执行
+-- 行上记录计算评分所用的 名称@版本, 模型升级后只需重算版本不一致的行:
+--   python rescore_backfill.py --target quality --stale-only
+--   python rescore_backfill.py --target repos --stale-only
+
+-- ================================
+-- 🧮 评分模型版本
+-- ================================
+
+-- 采集表: quality_score 对应的模型版本 (如 quality@1)
+ALTER TABLE github_ai_post_attr ADD COLUMN score_model_version TEXT DEFAULT '';
+
+-- 增强表: enhanced_score 对应的模型版本 (如 enhanced@1)
+ALTER TABLE repos ADD COLUMN score_model_version TEXT DEFAULT '';
+
+-- ================================
+-- 🔍 索引 (按版本筛选待重算行)
+-- ================================
+
+CREATE INDEX IF NOT EXISTS idx_post_attr_score_model_version ON github_ai_post_attr(score_model_version);
+CREATE INDEX IF NOT EXISTS idx_repos_score_model_version ON repos(score_model_version);
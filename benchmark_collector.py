@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+采集流水线基准测试
+========================================
+
+用录制(或生成)的 GitHub 搜索/仓库响应语料和本地 SQLite D1 替身回放
+OptimizedHighFrequencyCollector.run_optimized_collection, 输出各阶段耗时、
+请求数、传输字节、峰值内存和吞吐量, 用于在上线前发现采集器性能回退。
+
+用法:
+    python benchmark_collector.py                          # 100/1k/10k 三档
+    python benchmark_collector.py --scales 1000 --output bench.json
+    python benchmark_collector.py --baseline bench.json    # 与基线对比, 回退时退出码为1
+    python benchmark_collector.py record --output benchmark_fixtures/recorded.json.gz
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, urlencode
+from typing import Dict, List, Any, Optional
+from unittest import mock
+
+from config_v2 import Config
+from enhanced_keywords_config import SEARCH_ROUNDS_CONFIG
+from local_d1_server import LocalD1Client
+
+BENCHMARK_CONFIG = {
+    "scales": [100, 1000, 10000],
+    "fixture_dir": "benchmark_fixtures",
+    "seed": 42,
+    "keyword_overlap": 0.1,         # 同时被另一个关键词返回的仓库比例 (触发流式去重)
+    "existing_ratio": 0.3,          # 预置到D1中的仓库比例 (触发去重规则)
+    "regression_tolerance": 0.2,    # 吞吐下降或内存增长超过20%视为回退
+}
+
+STAGES = ("initialize", "search", "process", "store")
+
+# 采集器持久化状态 (Config 属性 → 临时状态目录中的文件名)
+# 合成语料的仓库ID会与真实 GitHub ID 冲突, 基准运行不得读写工作目录中的生产状态; 新增状态文件时需在此登记
+BENCHMARK_STATE_FILES = {
+    "BLOOM_FILTER_FILE": "repo_ids.bloom",
+    "TRENDING_STATE_FILE": "trending_state.json",
+    "QUERY_PLANNER_STATE_FILE": "query_planner_state.json",
+    "LEADERBOARD_DIR": "leaderboards",
+    "SEARCH_INDEX_FILE": "search_index.db",
+    "NEAR_DUPLICATE_INDEX_FILE": "near_duplicates.idx",
+    "SEMANTIC_INDEX_FILE": "semantic_index.json",
+}
+
+_QUALIFIER_PATTERN = re.compile(r'\s+\S+:\S+')
+
+
+def query_keyword(query: str) -> str:
+    """去掉 updated:/stars:/created: 等限定符, 得到语料中的关键词"""
+    return _QUALIFIER_PATTERN.sub('', f" {query}").strip()
+
+
+# ================================
+# 📦 语料
+# ================================
+
+def generate_corpus(size: int, seed: int = BENCHMARK_CONFIG["seed"]) -> Dict[str, Any]:
+    """
+    生成确定性的合成语料 (GitHub API 响应结构)
+    size 个仓库按轮次关键词均匀分布, 部分仓库同时出现在多个关键词结果中
+    """
+    rng = random.Random(seed)
+    keywords = [kw for config in SEARCH_ROUNDS_CONFIG for kw in config["keywords"]]
+    base_time = datetime(2025, 9, 1)
+    topics_pool = ["machine-learning", "deep-learning", "llm", "ai", "pytorch",
+                   "rag", "computer-vision", "diffusion", "agents", "nlp"]
+
+    search = {keyword: [] for keyword in keywords}
+    repos = {}
+    existing = []
+
+    for i in range(size):
+        keyword = keywords[i % len(keywords)]
+        slug = re.sub(r'[^a-z0-9]+', '-', keyword.lower()).strip('-') or "ai"
+        owner = f"org{rng.randrange(size // 3 + 1)}"
+        name = f"{slug}-llm-{i}"
+        stars = int(rng.lognormvariate(6, 1.2)) + 50
+        forks = stars // rng.randint(5, 20)
+        pushed = base_time - timedelta(hours=rng.randrange(24 * 30))
+        item = {
+            "id": 10_000_000 + i,
+            "name": name,
+            "full_name": f"{owner}/{name}",
+            "owner": {"login": owner},
+            "html_url": f"https://github.com/{owner}/{name}",
+            "description": f"{keyword} toolkit: open-source LLM and machine learning framework for AI developers",
+            "stargazers_count": stars,
+            "watchers_count": stars,
+            "forks_count": forks,
+            "language": rng.choice(["Python", "Python", "TypeScript", "Rust", "C++"]),
+            "topics": rng.sample(topics_pool, 4),
+            "created_at": (pushed - timedelta(days=rng.randrange(30, 900))).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "updated_at": pushed.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            "pushed_at": pushed.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        }
+        search[keyword].append(item)
+        if rng.random() < BENCHMARK_CONFIG["keyword_overlap"]:
+            search[rng.choice(keywords)].append(item)
+        repos[item["full_name"]] = dict(item, subscribers_count=max(1, stars // 30))
+
+        if rng.random() < BENCHMARK_CONFIG["existing_ratio"]:
+            existing.append({
+                "id": item["id"],
+                "full_name": item["full_name"],
+                "stargazers_count": stars - rng.choice([0, 2, 8, 30]),
+                "forks_count": forks,
+                "description": item["description"],
+                "collection_time": (base_time - timedelta(days=rng.randrange(1, 20))).strftime('%Y-%m-%d %H:%M:%S'),
+            })
+
+    return {"version": 1, "source": "synthetic", "size": size,
+            "search": search, "repos": repos, "existing": existing}
+
+
+def load_corpus(path: str) -> Dict[str, Any]:
+    """加载语料文件 (.json 或 .json.gz)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_corpus(corpus: Dict[str, Any], path: str):
+    """原子写入语料文件"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    opener = gzip.open if path.endswith('.gz') else open
+    tmp_path = f"{path}.tmp"
+    with opener(tmp_path, 'wt', encoding='utf-8') as f:
+        json.dump(corpus, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+
+def ensure_corpus(size: int) -> str:
+    """返回指定规模的合成语料路径, 不存在时生成"""
+    path = os.path.join(BENCHMARK_CONFIG["fixture_dir"], f"corpus_{size}.json.gz")
+    if not os.path.exists(path):
+        save_corpus(generate_corpus(size), path)
+    return path
+
+
+# ================================
+# 🔁 GitHub 回放 / 录制
+# ================================
+
+class TransferStats:
+    """请求与字节计数"""
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"requests": self.requests, "bytes_out": self.bytes_out, "bytes_in": self.bytes_in}
+
+
+class _ReplayResponse:
+    """模拟 aiohttp 响应 (同时作为 async with 上下文)"""
+
+    def __init__(self, status: int, body: bytes):
+        self.status = status
+        self._body = body
+        self.headers = {"Content-Type": "application/json", "Content-Length": str(len(body))}
+
+    async def json(self, **kwargs) -> Any:
+        return json.loads(self._body)
+
+    async def text(self, **kwargs) -> str:
+        return self._body.decode('utf-8')
+
+    async def __aenter__(self) -> '_ReplayResponse':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class ReplaySession:
+    """按语料回放 GitHub API, 接口与采集器使用的 aiohttp.ClientSession 子集一致"""
+
+    def __init__(self, corpus: Dict[str, Any], stats: Optional[TransferStats] = None):
+        self.search = corpus.get("search", {})
+        self.repos = corpus.get("repos", {})
+        self.stats = stats or TransferStats()
+        self.cursors: Dict[str, int] = {}
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> _ReplayResponse:
+        params = params or {}
+        self.stats.requests += 1
+        self.stats.bytes_out += len(url) + len(urlencode(params))
+
+        path = urlparse(url).path
+        if path.endswith('/search/repositories'):
+            status, payload = 200, self._search(params)
+        elif path.startswith('/repos/'):
+            repo = self.repos.get(path[len('/repos/'):])
+            status, payload = (200, repo) if repo else (404, {"message": "Not Found"})
+        else:
+            status, payload = 404, {"message": "Not Found"}
+
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        self.stats.bytes_in += len(body)
+        return _ReplayResponse(status, body)
+
+    def _search(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        keyword = query_keyword(str(params.get("q", "")))
+        items = self.search.get(keyword, [])
+        per_page = int(params.get("per_page", 30))
+        if "page" in params:
+            offset = (int(params["page"]) - 1) * per_page
+        else:
+            # 采集器的分层搜索不带page参数, 同一关键词的后续请求返回后续结果
+            offset = self.cursors.get(keyword, 0)
+            self.cursors[keyword] = offset + per_page
+        return {"total_count": len(items), "incomplete_results": False,
+                "items": items[offset:offset + per_page]}
+
+    async def close(self):
+        return None
+
+
+class _RecordingResponse:
+    """录制代理: 读取JSON时写入语料"""
+
+    def __init__(self, response, session: 'RecordingSession', url: str, params: Dict[str, Any]):
+        self._response = response
+        self._session = session
+        self._url = url
+        self._params = params
+        self.status = response.status
+        self.headers = response.headers
+
+    async def json(self, **kwargs) -> Any:
+        data = await self._response.json(**kwargs)
+        if self.status == 200:
+            self._session.record(self._url, self._params, data)
+        return data
+
+
+class _RecordingContext:
+    def __init__(self, context, session: 'RecordingSession', url: str, params: Dict[str, Any]):
+        self._context = context
+        self._session = session
+        self._url = url
+        self._params = params
+
+    async def __aenter__(self) -> _RecordingResponse:
+        response = await self._context.__aenter__()
+        return _RecordingResponse(response, self._session, self._url, self._params)
+
+    async def __aexit__(self, *exc_info):
+        return await self._context.__aexit__(*exc_info)
+
+
+class RecordingSession:
+    """包装真实 aiohttp 会话, 把 GitHub 响应录制为回放语料"""
+
+    def __init__(self, session):
+        self.session = session
+        self.corpus = {"version": 1, "source": "recorded", "search": {}, "repos": {}, "existing": []}
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> _RecordingContext:
+        params = params or {}
+        return _RecordingContext(self.session.get(url, params=params, **kwargs), self, url, params)
+
+    def record(self, url: str, params: Dict[str, Any], data: Any):
+        path = urlparse(url).path
+        if path.endswith('/search/repositories'):
+            items = self.corpus["search"].setdefault(query_keyword(str(params.get("q", ""))), [])
+            known = {item["id"] for item in items}
+            items.extend(item for item in data.get("items", []) if item["id"] not in known)
+        elif path.startswith('/repos/'):
+            self.corpus["repos"][path[len('/repos/'):]] = data
+
+    async def close(self):
+        await self.session.close()
+
+
+# ================================
+# ⏱️ 单规模运行
+# ================================
+
+def peak_rss_bytes() -> int:
+    """进程峰值常驻内存"""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+async def run_scale(fixture_path: str, state_dir: Optional[str] = None) -> Dict[str, Any]:
+    """用语料回放完整运行一次 run_optimized_collection, 返回各阶段指标 (状态文件全部写入临时目录)"""
+    import semantic_categorizer
+
+    state_dir = state_dir or tempfile.mkdtemp(prefix="bench_state_")
+    state_paths = {name: os.path.join(state_dir, filename) for name, filename in BENCHMARK_STATE_FILES.items()}
+    # 共享分类引擎按创建时的索引路径加载/保存, 回放期间使用独立实例
+    with mock.patch.multiple(Config, **state_paths), \
+            mock.patch.object(semantic_categorizer, "_shared_categorizer", None):
+        return await _replay_collection(fixture_path)
+
+
+async def _replay_collection(fixture_path: str) -> Dict[str, Any]:
+    from optimized_fast_collector import OptimizedHighFrequencyCollector
+    from query_planner import AdaptiveQueryPlanner
+
+    load_started = time.perf_counter()
+    corpus = load_corpus(fixture_path)
+    load_seconds = time.perf_counter() - load_started
+
+    github_stats = TransferStats()
+    d1_stats = TransferStats()
+
+    collector = OptimizedHighFrequencyCollector()
+    config = collector.config
+    config.SEARCH_QUERY_QUOTA = sum(len(c["keywords"]) for c in SEARCH_ROUNDS_CONFIG)
+    config.SEARCH_ROUND_MAX_RESULTS = 100 * max(len(c["keywords"]) for c in SEARCH_ROUNDS_CONFIG)
+    collector.query_planner = AdaptiveQueryPlanner(seed=BENCHMARK_CONFIG["seed"])
+    collector.email_notifier.enabled = False
+
+    session = ReplaySession(corpus, github_stats)
+    collector.session = session
+    collector.data_processor.session = session
+    d1 = LocalD1Client(stats=d1_stats)
+    d1.seed(corpus.get("existing", []))
+    collector.dedup_manager.cloudflare_client = d1
+
+    stages = {}
+    outputs = {}
+
+    def timed(name, method):
+        async def wrapper(*args, **kwargs):
+            gh_before, d1_before = github_stats.snapshot(), d1_stats.snapshot()
+            started = time.perf_counter()
+            result = await method(*args, **kwargs)
+            elapsed = time.perf_counter() - started
+            gh_after, d1_after = github_stats.snapshot(), d1_stats.snapshot()
+            stages[name] = {
+                "seconds": round(elapsed, 4),
+                "github_requests": gh_after["requests"] - gh_before["requests"],
+                "d1_requests": d1_after["requests"] - d1_before["requests"],
+                "bytes_in": (gh_after["bytes_in"] - gh_before["bytes_in"]) + (d1_after["bytes_in"] - d1_before["bytes_in"]),
+                "bytes_out": (gh_after["bytes_out"] - gh_before["bytes_out"]) + (d1_after["bytes_out"] - d1_before["bytes_out"]),
+            }
+            outputs[name] = result
+            return result
+        return wrapper
+
+    collector.initialize_system = timed("initialize", collector.initialize_system)
+    collector.search_repositories = timed("search", collector.search_repositories)
+    collector.process_repositories = timed("process", collector.process_repositories)
+    collector.store_repositories = timed("store", collector.store_repositories)
+
+    # 限频等待不真正休眠, 只累计时长 (回放无限频)
+    throttle = {"seconds": 0.0}
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, result=None):
+        throttle["seconds"] += delay
+        await real_sleep(0)
+        return result
+
+    started = time.perf_counter()
+    with mock.patch.object(asyncio, "sleep", fake_sleep):
+        await collector.run_optimized_collection()
+    total_seconds = time.perf_counter() - started
+
+    found = len(outputs.get("search") or [])
+    processed = len(outputs.get("process") or [])
+    return {
+        "fixture": fixture_path,
+        "corpus_repos": len(corpus.get("repos", {})),
+        "repos_found": found,
+        "repos_processed": processed,
+        "store": outputs.get("store"),
+        "total_seconds": round(total_seconds, 4),
+        "fixture_load_seconds": round(load_seconds, 4),
+        "skipped_throttle_seconds": throttle["seconds"],
+        "repos_per_sec": round(found / total_seconds, 1) if total_seconds > 0 else 0.0,
+        "github_requests": github_stats.requests,
+        "d1_requests": d1_stats.requests,
+        "bytes_in": github_stats.bytes_in + d1_stats.bytes_in,
+        "bytes_out": github_stats.bytes_out + d1_stats.bytes_out,
+        "peak_rss_mb": round(peak_rss_bytes() / 1024 / 1024, 1),
+        "stages": stages,
+        "latency": collector.monitoring.get_latency_report(),
+    }
+
+
+def run_scale_subprocess(scale: int, fixture_path: str, verbose: bool = False) -> Dict[str, Any]:
+    """每个规模在独立子进程中运行, 保证峰值内存互不影响"""
+    cmd = [sys.executable, os.path.abspath(__file__), "_run", "--fixture", fixture_path]
+    if verbose:
+        cmd.append("--verbose")
+    completed = subprocess.run(cmd, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"规模 {scale} 运行失败:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["scale"] = scale
+    return result
+
+
+# ================================
+# 📊 报告与回退检查
+# ================================
+
+def print_report(results: List[Dict[str, Any]]):
+    """打印基准测试结果"""
+    print("\n" + "=" * 78)
+    print("📊 采集流水线基准测试")
+    print("=" * 78)
+    print(f"{'规模':>7} {'发现':>7} {'处理':>7} {'总耗时(s)':>10} {'仓库/秒':>9} "
+          f"{'GitHub请求':>10} {'D1请求':>8} {'流量(MB)':>9} {'峰值内存(MB)':>12}")
+    for r in results:
+        traffic = (r["bytes_in"] + r["bytes_out"]) / 1024 / 1024
+        print(f"{r['scale']:>7} {r['repos_found']:>7} {r['repos_processed']:>7} {r['total_seconds']:>10.2f} "
+              f"{r['repos_per_sec']:>9.1f} {r['github_requests']:>10} {r['d1_requests']:>8} "
+              f"{traffic:>9.2f} {r['peak_rss_mb']:>12.1f}")
+
+    for r in results:
+        print(f"\n⏱️ 规模 {r['scale']} 各阶段:")
+        for name in STAGES:
+            stage = r["stages"].get(name)
+            if not stage:
+                continue
+            print(f"   {name:<11} {stage['seconds']:>8.3f}s | GitHub {stage['github_requests']:>6} | "
+                  f"D1 {stage['d1_requests']:>6} | 入 {stage['bytes_in'] / 1024:>9.1f}KB | 出 {stage['bytes_out'] / 1024:>8.1f}KB")
+        for name, item in (r.get("latency") or {}).items():
+            print(f"   📶 {name:<14} {item['count']:>6}次 | p50 {item['p50_ms']:>7.2f}ms | p95 {item['p95_ms']:>7.2f}ms | "
+                  f"p99 {item['p99_ms']:>7.2f}ms | 并发峰值 {item['in_flight_peak']:>3}")
+
+
+def check_regressions(results: List[Dict[str, Any]], baseline_path: str) -> List[str]:
+    """与基线结果对比, 返回回退说明列表"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r["scale"]: r for r in json.load(f)["results"]}
+
+    tolerance = BENCHMARK_CONFIG["regression_tolerance"]
+    regressions = []
+    for r in results:
+        base = baseline.get(r["scale"])
+        if not base:
+            continue
+        if r["repos_per_sec"] < base["repos_per_sec"] * (1 - tolerance):
+            regressions.append(f"规模 {r['scale']}: 吞吐 {base['repos_per_sec']} → {r['repos_per_sec']} 仓库/秒")
+        if r["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"规模 {r['scale']}: 峰值内存 {base['peak_rss_mb']} → {r['peak_rss_mb']} MB")
+        for key in ("github_requests", "d1_requests"):
+            if r[key] > base[key] * (1 + tolerance):
+                regressions.append(f"规模 {r['scale']}: {key} {base[key]} → {r[key]}")
+    return regressions
+
+
+async def record_corpus(output: str):
+    """用真实 GitHub API 运行一次搜索+处理, 录制语料 (需要 GITHUB_TOKEN, 不写入D1)"""
+    import aiohttp
+    from optimized_fast_collector import OptimizedHighFrequencyCollector
+
+    collector = OptimizedHighFrequencyCollector()
+    config = collector.config
+    recorder = RecordingSession(aiohttp.ClientSession(
+        headers={"Authorization": f"token {config.GITHUB_TOKEN}",
+                 "Accept": "application/vnd.github.v3+json"},
+        timeout=aiohttp.ClientTimeout(total=30)
+    ))
+    collector.session = recorder
+    collector.data_processor.session = recorder
+    collector.query_planner.state_file = ""
+    try:
+        repos = await collector.search_repositories()
+        await collector.process_repositories(repos)
+    finally:
+        await recorder.close()
+
+    recorder.corpus["size"] = len(recorder.corpus["repos"])
+    recorder.corpus["recorded_at"] = datetime.now().isoformat()
+    save_corpus(recorder.corpus, output)
+    print(f"💾 已录制语料: {output} ({len(recorder.corpus['repos'])} 个仓库)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="采集流水线基准测试")
+    parser.add_argument("command", nargs="?", default="bench", choices=["bench", "record", "_run"])
+    parser.add_argument("--scales", type=int, nargs="+", default=BENCHMARK_CONFIG["scales"], help="仓库规模")
+    parser.add_argument("--fixture", help="使用指定语料文件 (默认按规模生成合成语料)")
+    parser.add_argument("--output", help="结果JSON输出路径 (record命令为语料输出路径)")
+    parser.add_argument("--baseline", help="基线结果JSON, 吞吐/内存/请求数回退时退出码为1")
+    parser.add_argument("--verbose", action="store_true", help="输出采集器INFO日志")
+    args = parser.parse_args()
+
+    if args.command == "_run":
+        logging.disable(logging.NOTSET if args.verbose else logging.INFO)
+        print(json.dumps(asyncio.run(run_scale(args.fixture)), ensure_ascii=False))
+        return
+
+    if args.command == "record":
+        asyncio.run(record_corpus(args.output or os.path.join(BENCHMARK_CONFIG["fixture_dir"], "recorded.json.gz")))
+        return
+
+    results = []
+    for scale in args.scales:
+        fixture = args.fixture or ensure_corpus(scale)
+        print(f"🚀 运行规模 {scale} ({fixture})")
+        results.append(run_scale_subprocess(scale, fixture, args.verbose))
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": datetime.now().isoformat(), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.baseline:
+        regressions = check_regressions(results, args.baseline)
+        if regressions:
+            print("\n❌ 检测到性能回退:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("\n✅ 未检测到性能回退")
+
+
+if __name__ == "__main__":
+    main()
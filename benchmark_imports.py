@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+入口脚本导入耗时基准测试
+========================================
+
+在全新的子进程中逐个导入入口脚本 (不执行 main), 多次取中位数, 并检查
+导入后是否已真正加载 Cloudflare SDK / requests / aiohttp 等重量级依赖,
+用于防止启动时间回退。
+
+用法:
+    python benchmark_imports.py                         # 全部入口脚本, 每个5次
+    python benchmark_imports.py --modules sync_d1 --runs 10
+    python benchmark_imports.py --output imports.json
+    python benchmark_imports.py --baseline imports.json # 与基线对比, 回退时退出码为1
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+IMPORT_BENCHMARK_CONFIG = {
+    "modules": [
+        "optimized_fast_collector", "enhanced_data_collector", "sync_d1", "time_based_sync",
+        "update_activity_data", "metrics_dashboard", "check_duplicates", "enhanced_metrics_sync",
+        "enhanced_sync_d1", "metrics_based_sync", "production_enhanced_sync",
+        "deduplication_manager", "data_processor",
+    ],
+    "heavy_modules": ["cloudflare", "aiohttp", "requests"],
+    "runs": 5,
+    "regression_tolerance": 0.2,    # 导入耗时增长超过20%视为回退
+    "min_regression_ms": 10.0,      # 且绝对增长超过10ms (避免噪声误报)
+}
+
+# 部分脚本导入时校验环境变量, 基准测试使用占位值
+_PLACEHOLDER_ENV = {
+    "GITHUB_TOKEN": "benchmark",
+    "CLOUDFLARE_API_TOKEN": "benchmark",
+    "CLOUDFLARE_ACCOUNT_ID": "benchmark",
+    "D1_DATABASE_ID": "benchmark",
+}
+
+# 子进程中执行: 计时导入, 输出耗时与已真正加载的重量级依赖 (LazyLoader 占位模块不算)
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy!r}
+          if name in sys.modules and type(sys.modules[name]).__name__ != "_LazyModule"]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+
+def measure_module(module: str, runs: int, heavy: Optional[List[str]] = None) -> Dict[str, Any]:
+    """在全新子进程中导入模块 runs 次, 返回中位耗时与加载的重量级依赖 (heavy 默认取配置)"""
+    env = dict(_PLACEHOLDER_ENV, **os.environ)
+    code = _PROBE.format(module=module, heavy=heavy or IMPORT_BENCHMARK_CONFIG["heavy_modules"])
+    samples, loaded = [], []
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                              env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if proc.returncode != 0:
+            return {"module": module, "error": proc.stderr.strip().splitlines()[-1:]}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"] * 1000)
+        loaded = result["loaded"]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(samples), 2),
+        "min_ms": round(min(samples), 2),
+        "heavy_loaded": loaded,
+    }
+
+
+def print_report(results: List[Dict[str, Any]]):
+    """输出导入耗时报告"""
+    print("\n" + "=" * 70)
+    print("⏱️ 入口脚本导入耗时")
+    print("=" * 70)
+    for r in results:
+        if "error" in r:
+            print(f"   ❌ {r['module']:<26} 导入失败: {' '.join(r['error'])}")
+            continue
+        heavy = ", ".join(r["heavy_loaded"]) or "-"
+        print(f"   {r['module']:<28} 中位 {r['median_ms']:>8.2f}ms | 最快 {r['min_ms']:>8.2f}ms | 重量级依赖 {heavy}")
+
+
+def check_regressions(results: List[Dict[str, Any]], baseline_path: str) -> List[str]:
+    """与基线结果对比, 返回回退说明列表"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r["module"]: r for r in json.load(f)["results"]}
+
+    tolerance = IMPORT_BENCHMARK_CONFIG["regression_tolerance"]
+    min_delta = IMPORT_BENCHMARK_CONFIG["min_regression_ms"]
+    regressions = []
+    for r in results:
+        base = baseline.get(r["module"])
+        if not base or "error" in base:
+            continue
+        if "error" in r:
+            regressions.append(f"{r['module']}: 导入失败")
+            continue
+        if (r["median_ms"] > base["median_ms"] * (1 + tolerance)
+                and r["median_ms"] - base["median_ms"] > min_delta):
+            regressions.append(f"{r['module']}: 导入耗时 {base['median_ms']} → {r['median_ms']} ms")
+        newly_loaded = sorted(set(r["heavy_loaded"]) - set(base["heavy_loaded"]))
+        if newly_loaded:
+            regressions.append(f"{r['module']}: 导入时新加载 {', '.join(newly_loaded)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入口脚本导入耗时基准测试")
+    parser.add_argument("--modules", nargs="+", default=IMPORT_BENCHMARK_CONFIG["modules"], help="要测量的模块")
+    parser.add_argument("--runs", type=int, default=IMPORT_BENCHMARK_CONFIG["runs"], help="每个模块的导入次数")
+    parser.add_argument("--output", help="结果JSON输出路径")
+    parser.add_argument("--baseline", help="基线结果JSON, 导入耗时回退或新增重量级依赖时退出码为1")
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        results.append(measure_module(module, max(1, args.runs)))
+
+    print_report(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": datetime.now().isoformat(), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存: {args.output}")
+
+    if args.baseline:
+        regressions = check_regressions(results, args.baseline)
+        if regressions:
+            print("\n❌ 检测到启动性能回退:")
+            for line in regressions:
+                print(f"   {line}")
+            sys.exit(1)
+        print("\n✅ 未检测到启动性能回退")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+评分函数基准测试
+========================================
+
+在合成语料上计时各评分入口 (calculate_enhanced_score / calculate_quality_score /
+DataProcessor.score_batch), 可同时在指定 git 版本的代码树上运行同一探针,
+对比耗时并逐仓库核对得分是否一致, 用于防止评分模型重构带来的性能或计分回退。
+
+用法:
+    python benchmark_scoring.py                              # 当前代码, 5000 个仓库
+    python benchmark_scoring.py --baseline-rev 6e1c706^      # 与评分模型注册表之前的实现对比
+    python benchmark_scoring.py --size 10000 --runs 7 --output scoring.json
+"""
+
+import io
+import os
+import sys
+import json
+import tarfile
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from benchmark_collector import ensure_corpus
+
+SCORING_BENCHMARK_CONFIG = {
+    "size": 5000,
+    "runs": 5,
+    "corpus_size": 10000,
+    "entries": ["enhanced", "quality", "score_batch"],
+}
+
+# 子进程中执行 (cwd 为被测代码树): 每个入口取 runs 次最快耗时, 每次前清空共享特征缓存
+_PROBE = """
+import sys, time, json, gzip, logging
+sys.path.insert(0, '.')
+logging.disable(logging.CRITICAL)
+from data_processor import DataProcessor
+from enhanced_metrics_config import calculate_enhanced_score
+try:
+    from repo_features import get_feature_cache
+except ImportError:
+    get_feature_cache = None
+
+with gzip.open({corpus!r}, 'rt', encoding='utf-8') as f:
+    repos = list(json.load(f)['repos'].values())[:{size}]
+processor = DataProcessor()
+rows = [processor.extract_basic_data(repo) for repo in repos]
+extra = {{'contributors': 12, 'has_readme': True, 'has_tests': True, 'has_ci': False}}
+
+entries = {{
+    'enhanced': lambda: [calculate_enhanced_score(repo, extra) for repo in repos],
+    'quality': lambda: [processor.calculate_quality_score(row) for row in rows],
+}}
+if hasattr(processor, 'score_batch'):
+    entries['score_batch'] = lambda: [scores['quality_score'] for scores in processor.score_batch(rows)]
+
+results = {{}}
+for name, run in entries.items():
+    samples = []
+    for _ in range({runs}):
+        if get_feature_cache is not None:
+            get_feature_cache().clear()
+        start = time.perf_counter()
+        scores = run()
+        samples.append(time.perf_counter() - start)
+    results[name] = {{'seconds': min(samples), 'scores': [round(score, 6) for score in scores]}}
+print(json.dumps(results))
+"""
+
+
+def export_tree(rev: str, target: str) -> str:
+    """把指定 git 版本的代码树导出到 target 目录"""
+    archive = subprocess.run(["git", "archive", "--format=tar", rev], capture_output=True, check=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    with tarfile.open(fileobj=io.BytesIO(archive.stdout)) as tar:
+        tar.extractall(target)
+    return target
+
+
+def measure_tree(tree: str, corpus: str, size: int, runs: int) -> Dict[str, Any]:
+    """在给定代码树上运行探针, 返回各入口的最快耗时与得分"""
+    code = _PROBE.format(corpus=os.path.abspath(corpus), size=size, runs=runs)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=tree)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(current: Dict[str, Any], baseline: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """逐入口汇总耗时, 有基线时附加加速比与得分不一致的仓库数"""
+    rows = []
+    for name in SCORING_BENCHMARK_CONFIG["entries"]:
+        if name not in current:
+            continue
+        row = {"entry": name, "seconds": round(current[name]["seconds"], 4)}
+        base = (baseline or {}).get(name)
+        if base:
+            row["baseline_seconds"] = round(base["seconds"], 4)
+            row["ratio"] = round(current[name]["seconds"] / base["seconds"], 2)
+            row["mismatches"] = sum(1 for a, b in zip(current[name]["scores"], base["scores"]) if a != b)
+        rows.append(row)
+    return rows
+
+
+def print_report(rows: List[Dict[str, Any]], size: int, baseline_rev: Optional[str]):
+    """输出评分耗时报告"""
+    print("\n" + "=" * 70)
+    print(f"⏱️ 评分耗时 ({size} 个仓库, 取最快一次)")
+    print("=" * 70)
+    for row in rows:
+        line = f"   {row['entry']:<12} 当前 {row['seconds']:>8.3f}s"
+        if "baseline_seconds" in row:
+            line += (f" | {baseline_rev} {row['baseline_seconds']:>8.3f}s | 耗时比 {row['ratio']:>5.2f}"
+                     f" | 得分不一致 {row['mismatches']}")
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评分函数基准测试")
+    parser.add_argument("--size", type=int, default=SCORING_BENCHMARK_CONFIG["size"], help="参与评分的仓库数")
+    parser.add_argument("--runs", type=int, default=SCORING_BENCHMARK_CONFIG["runs"], help="每个入口的运行次数")
+    parser.add_argument("--baseline-rev", help="对比的 git 版本 (如 6e1c706^)")
+    parser.add_argument("--output", help="结果JSON输出路径")
+    args = parser.parse_args()
+
+    corpus = ensure_corpus(max(args.size, SCORING_BENCHMARK_CONFIG["corpus_size"]))
+    here = os.path.dirname(os.path.abspath(__file__))
+    current = measure_tree(here, corpus, args.size, max(1, args.runs))
+    if "error" in current:
+        print(f"❌ 当前代码探针失败: {' '.join(current['error'])}")
+        sys.exit(1)
+
+    baseline = None
+    if args.baseline_rev:
+        with tempfile.TemporaryDirectory(prefix="scoring-baseline-") as tree:
+            baseline = measure_tree(export_tree(args.baseline_rev, tree), corpus, args.size, max(1, args.runs))
+        if "error" in baseline:
+            print(f"❌ 基线 {args.baseline_rev} 探针失败: {' '.join(baseline['error'])}")
+            sys.exit(1)
+
+    rows = compare(current, baseline)
+    print_report(rows, args.size, args.baseline_rev)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": datetime.now().isoformat(), "size": args.size,
+                       "baseline_rev": args.baseline_rev, "results": rows}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+仓库ID布隆过滤器 - "肯定是新仓库" 预判
+功能: 紧凑存储已入库仓库ID, 未命中即可跳过D1查询; 支持持久化到本地文件
+更新时间: 2025-09-16
+"""
+
+import os
+import math
+import struct
+import hashlib
+import logging
+from typing import Any, Iterable, Optional
+
+# 文件头: 魔数 + 位数组长度 + 哈希次数 + 已插入数量
+_HEADER = struct.Struct("<4sQII")
+_MAGIC = b"GAMB"
+
+
+class BloomFilter:
+    """布隆过滤器 (双重哈希)"""
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.01):
+        capacity = max(1, int(capacity))
+        self.num_bits = max(64, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: Any):
+        digest = hashlib.blake2b(str(item).encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1  # 保证步长为奇数
+        m = self.num_bits
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % m
+
+    def add(self, item: Any):
+        """加入一个元素"""
+        bits = self.bits
+        for pos in self._positions(item):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[Any]):
+        """批量加入元素"""
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: Any) -> bool:
+        bits = self.bits
+        for pos in self._positions(item):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self.bits)
+
+    def estimated_error_rate(self) -> float:
+        """按当前插入数量估算误判率"""
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def save(self, path: str) -> bool:
+        """原子写入过滤器文件"""
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, self.num_bits, self.num_hashes, self.count))
+                f.write(self.bits)
+            os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logging.getLogger('ai_collector_v2.bloom').error(f"保存布隆过滤器失败: {path} | {e}")
+            return False
+
+    @classmethod
+    def load(cls, path: str) -> Optional['BloomFilter']:
+        """从文件加载过滤器, 文件不存在或损坏时返回None"""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                magic, num_bits, num_hashes, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    raise ValueError("文件格式不正确")
+                bits = bytearray(f.read())
+            if len(bits) != (num_bits + 7) // 8:
+                raise ValueError("位数组长度不匹配")
+            bloom = cls.__new__(cls)
+            bloom.num_bits = num_bits
+            bloom.num_hashes = num_hashes
+            bloom.bits = bits
+            bloom.count = count
+            return bloom
+        except Exception as e:
+            logging.getLogger('ai_collector_v2.bloom').warning(f"加载布隆过滤器失败: {path} | {e}")
+            return None
@@ -4,16 +4,15 @@
 """
 
 import os
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, LazyCloudflareClient
 
-load_dotenv()
+load_env()
 
 CLOUDFLARE_API_TOKEN = os.environ.get("CLOUDFLARE_API_TOKEN")
 CLOUDFLARE_ACCOUNT_ID = os.environ.get("CLOUDFLARE_ACCOUNT_ID")
 D1_DATABASE_ID = os.environ.get("D1_DATABASE_ID")
 
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
 
 def simple_check():
     """简单检查重复数据"""
@@ -33,20 +33,63 @@ class Config:
     
     # 去重配置
     DEDUP_WINDOW_DAYS = int(os.environ.get("DEDUP_WINDOW_DAYS", "7"))      # 去重窗口期(天)
+    DEDUP_LOOKUP_BATCH_SIZE = int(os.environ.get("DEDUP_LOOKUP_BATCH_SIZE", "90"))  # 批量查询已存在记录的ID数 (D1单语句最多100个参数)
     
     # 性能配置
     BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "50"))                   # 批量处理大小
     MAX_CONCURRENT = int(os.environ.get("MAX_CONCURRENT", "5"))            # 最大并发数
     REQUEST_DELAY = float(os.environ.get("REQUEST_DELAY", "0.1"))          # 请求延迟(秒)
+    REQUEST_MAX_RETRIES = int(os.environ.get("REQUEST_MAX_RETRIES", "2"))            # GitHub 403/429/5xx 时的重试次数
+    REQUEST_RETRY_BACKOFF = float(os.environ.get("REQUEST_RETRY_BACKOFF", "2.0"))    # 首次重试等待(秒), 之后翻倍 (有 Retry-After 时按其等待)
+    REQUEST_RETRY_MAX_DELAY = float(os.environ.get("REQUEST_RETRY_MAX_DELAY", "30")) # 需等待更久 (如配额重置) 时不再重试
     
     # 日志配置
     LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
     LOG_FILE = os.environ.get("LOG_FILE", "collection.log")
+    LOG_FORMAT = os.environ.get("LOG_FORMAT", "text")                     # text 或 json (每行一条结构化记录)
+    LOG_SAMPLING = os.environ.get("LOG_SAMPLING", "store=0.05,sync=0.1")  # 逐仓库日志按阶段采样率
     
     # 质量配置
     MIN_QUALITY_SCORE = int(os.environ.get("MIN_QUALITY_SCORE", "30"))        # 最小质量分数
     MIN_AI_RELEVANCE_SCORE = int(os.environ.get("MIN_AI_RELEVANCE_SCORE", "2")) # 最小AI相关性分数
     
+    # 趋势配置
+    TRENDING_STATE_FILE = os.environ.get("TRENDING_STATE_FILE", "trending_state.json")  # 趋势引擎状态文件
+    
+    # 排行榜配置
+    LEADERBOARD_SIZE = int(os.environ.get("LEADERBOARD_SIZE", "50"))           # 每个榜单保留的仓库数 (K)
+    LEADERBOARD_DIR = os.environ.get("LEADERBOARD_DIR", "leaderboards")       # 每次运行的榜单快照目录
+    
+    # 查询规划配置
+    SEARCH_QUERY_QUOTA = int(os.environ.get("SEARCH_QUERY_QUOTA", "24"))                 # 单次运行搜索查询配额
+    SEARCH_ROUND_MAX_RESULTS = int(os.environ.get("SEARCH_ROUND_MAX_RESULTS", "300"))    # 单轮搜索目标仓库数上限
+    QUERY_PLANNER_STATE_FILE = os.environ.get("QUERY_PLANNER_STATE_FILE", "query_planner_state.json")  # 查询产出统计文件
+    
+    # 布隆过滤器配置
+    BLOOM_FILTER_FILE = os.environ.get("BLOOM_FILTER_FILE", "repo_ids.bloom")                # 已入库ID过滤器文件
+    BLOOM_FILTER_ERROR_RATE = float(os.environ.get("BLOOM_FILTER_ERROR_RATE", "0.01"))       # 目标误判率
+    BLOOM_SCAN_PAGE_SIZE = int(os.environ.get("BLOOM_SCAN_PAGE_SIZE", "50000"))              # ID扫描分页大小
+    
+    # 近重复检测配置 (MinHash-LSH)
+    NEAR_DUPLICATE_INDEX_FILE = os.environ.get("NEAR_DUPLICATE_INDEX_FILE", "near_duplicates.idx")  # 签名索引文件
+    NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", "0.8"))             # 判定为克隆的相似度阈值
+    
+    # 全文检索配置
+    SEARCH_INDEX_FILE = os.environ.get("SEARCH_INDEX_FILE", "search_index.db")            # 本地全文索引 (SQLite FTS5)
+    SEMANTIC_INDEX_FILE = os.environ.get("SEMANTIC_INDEX_FILE", "semantic_index.json")    # 语义分类文档频率/标注样本/向量索引
+    
+    # 回填配置
+    RESCORE_WORKERS = int(os.environ.get("RESCORE_WORKERS", "0"))           # 增强评分回填进程数 (0为CPU核数)
+    
+    # 评分模型配置
+    SCORING_MODEL_VERSIONS = os.environ.get("SCORING_MODEL_VERSIONS", "")   # 评分模型版本覆盖 (如 quality=1,enhanced=2; 默认最新)
+    
+    # 指标导出配置 (OpenMetrics)
+    METRICS_PORT = int(os.environ.get("METRICS_PORT", "0"))                 # 运行期间 /metrics 端口 (0为不启动)
+    METRICS_TEXTFILE = os.environ.get("METRICS_TEXTFILE", "")               # 运行结束时写入的指标快照文件
+    PUSHGATEWAY_URL = os.environ.get("PUSHGATEWAY_URL", "")                 # Pushgateway地址
+    METRICS_JOB = os.environ.get("METRICS_JOB", "github_ai_collector")      # Pushgateway作业名
+    
     # 开发配置
     DEBUG_MODE = os.environ.get("DEBUG_MODE", "false").lower() == "true"
     VERBOSE_LOGGING = os.environ.get("VERBOSE_LOGGING", "false").lower() == "true"
@@ -56,8 +99,8 @@ class Config:
 class APIConfig:
     """API配置类"""
     
-    # GitHub API
-    GITHUB_API_BASE = "https://api.github.com"
+    # GitHub API (可通过 GITHUB_API_BASE 指向本地 fake_github_server 做离线压测)
+    GITHUB_API_BASE = os.environ.get("GITHUB_API_BASE", "https://api.github.com").rstrip("/")
     GITHUB_SEARCH_ENDPOINT = f"{GITHUB_API_BASE}/search/repositories"
     GITHUB_REPO_ENDPOINT = f"{GITHUB_API_BASE}/repos"
     
@@ -77,6 +120,26 @@ class DatabaseConfig:
     # 表名
     TABLE_NAME = "github_ai_post_attr"
     
+    # 建表SQL (字段与UPSERT一致, 供本地SQLite替身使用)
+    CREATE_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
+        id INTEGER PRIMARY KEY,
+        full_name TEXT, name TEXT, owner TEXT, description TEXT, url TEXT,
+        stargazers_count INTEGER DEFAULT 0, forks_count INTEGER DEFAULT 0, watchers_count INTEGER DEFAULT 0,
+        created_at TEXT, updated_at TEXT, pushed_at TEXT, language TEXT,
+        topics TEXT, ai_category TEXT, ai_tags TEXT, quality_score REAL DEFAULT 0,
+        trending_score REAL DEFAULT 0, collection_round INTEGER DEFAULT 1, last_fork_count INTEGER DEFAULT 0,
+        fork_growth INTEGER DEFAULT 0, collection_hash TEXT, collection_time TEXT,
+        is_active INTEGER DEFAULT 1, score_model_version TEXT DEFAULT ''
+    )
+    """
+    
+    # 表结构检测与升级: 采集器启动时补齐缺失的列 (与 add_score_model_version.sql 一致)
+    TABLE_INFO_SQL = f"PRAGMA table_info({TABLE_NAME})"
+    COLUMN_MIGRATIONS = {
+        "score_model_version": f"ALTER TABLE {TABLE_NAME} ADD COLUMN score_model_version TEXT DEFAULT ''",
+    }
+    
     # 插入SQL
     INSERT_SQL = f"""
     INSERT INTO {TABLE_NAME} (
@@ -85,8 +148,8 @@ class DatabaseConfig:
         created_at, updated_at, pushed_at, language,
         topics, ai_category, ai_tags, quality_score,
         trending_score, collection_round, last_fork_count,
-        fork_growth, collection_hash, collection_time
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        fork_growth, collection_hash, collection_time, score_model_version
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     """
     
     # 更新SQL
@@ -97,7 +160,8 @@ class DatabaseConfig:
         created_at = ?, updated_at = ?, pushed_at = ?, language = ?,
         topics = ?, ai_category = ?, ai_tags = ?, quality_score = ?,
         trending_score = ?, collection_round = ?, last_fork_count = ?,
-        fork_growth = ?, collection_hash = ?, collection_time = ?
+        fork_growth = ?, collection_hash = ?, collection_time = ?,
+        score_model_version = ?
     WHERE id = ?
     """
 
@@ -123,8 +187,8 @@ class DatabaseConfig:
         created_at, updated_at, pushed_at, language,
         topics, ai_category, ai_tags, quality_score,
         trending_score, collection_round, last_fork_count,
-        fork_growth, collection_hash, collection_time
-    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        fork_growth, collection_hash, collection_time, score_model_version
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
     ON CONFLICT(id) DO UPDATE SET
         full_name = excluded.full_name,
         name = excluded.name,
@@ -147,7 +211,8 @@ class DatabaseConfig:
         last_fork_count = excluded.last_fork_count,
         fork_growth = excluded.fork_growth,
         collection_hash = excluded.collection_hash,
-        collection_time = excluded.collection_time
+        collection_time = excluded.collection_time,
+        score_model_version = excluded.score_model_version
     """
     
     # 查询已存在记录的SQL
@@ -156,6 +221,51 @@ class DatabaseConfig:
     FROM {TABLE_NAME}
     WHERE id = ?
     """
+    
+    # 批量查询已存在记录的SQL ({placeholders} 为 ?,?,... 占位符)
+    SELECT_EXISTING_BATCH_SQL = f"""
+    SELECT id, stargazers_count, forks_count, description, quality_score,
+           ai_category, pushed_at, collection_time, collection_hash
+    FROM {TABLE_NAME}
+    WHERE id IN ({{placeholders}})
+    """
+    
+    # 分页扫描ID的SQL (构建布隆过滤器)
+    SELECT_IDS_PAGE_SQL = f"""
+    SELECT id FROM {TABLE_NAME}
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+    """
+    
+    # 质量分选择性重算分页扫描SQL (只读取评分模型版本不是当前生效版本的行)
+    SELECT_STALE_SCORES_PAGE_SQL = f"""
+    SELECT id, full_name, name, description, stargazers_count, forks_count, watchers_count,
+           created_at, pushed_at, language, topics, quality_score, score_model_version
+    FROM {TABLE_NAME}
+    WHERE id > ? AND COALESCE(score_model_version, '') != ?
+    ORDER BY id
+    LIMIT ?
+    """
+    
+    # 质量分批量写回SQL (整批为一个JSON参数 [[id, quality_score, score_model_version], ...])
+    UPDATE_SCORES_BATCH_SQL = f"""
+    UPDATE {TABLE_NAME} SET
+        quality_score = json_extract(v.value, '$[1]'),
+        score_model_version = json_extract(v.value, '$[2]')
+    FROM json_each(?) AS v
+    WHERE {TABLE_NAME}.id = json_extract(v.value, '$[0]')
+    """
+    
+    # 全文索引回填分页扫描SQL (按ID键集分页)
+    SELECT_SEARCH_PAGE_SQL = f"""
+    SELECT id, full_name, name, owner, description, url, stargazers_count,
+           language, topics, ai_category, ai_tags, quality_score, trending_score
+    FROM {TABLE_NAME}
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+    """
 
 class EmailConfig:
     """邮件配置类"""
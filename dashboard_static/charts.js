@@ -0,0 +1,99 @@
+/*
+ * 仪表板内置SVG图表 (替代CDN加载的Chart.js)
+ * 支持: bar / horizontalBar / pie / doughnut / radar, 配置沿用 metrics_dashboard.CHART_SPECS
+ */
+(function (global) {
+  "use strict";
+
+  var SVG_NS = "http://www.w3.org/2000/svg";
+  var PALETTE = ["#667eea", "#764ba2", "#28a745", "#17a2b8", "#ffc107", "#fd7e14", "#e83e8c", "#6c757d", "#20c997", "#dc3545"];
+  var WIDTH = 400, HEIGHT = 260;
+
+  function el(name, attrs, text) {
+    var node = document.createElementNS(SVG_NS, name);
+    Object.keys(attrs || {}).forEach(function (key) { node.setAttribute(key, attrs[key]); });
+    if (text !== undefined) node.textContent = text;
+    return node;
+  }
+
+  function colorAt(colors, i) {
+    if (Array.isArray(colors)) return colors[i % colors.length];
+    return colors || PALETTE[i % PALETTE.length];
+  }
+
+  function fmt(value) {
+    return Math.round(value) === value ? String(value) : value.toFixed(1);
+  }
+
+  function bars(svg, labels, values, color, horizontal) {
+    var max = Math.max.apply(null, values.concat([1]));
+    var pad = horizontal ? 90 : 30, n = Math.max(labels.length, 1);
+    var band = ((horizontal ? HEIGHT : WIDTH) - pad - 10) / n;
+    labels.forEach(function (label, i) {
+      var size = (values[i] / max) * ((horizontal ? WIDTH : HEIGHT) - pad - 30);
+      var rect = horizontal
+        ? { x: pad, y: 5 + i * band + band * 0.15, width: size, height: band * 0.7 }
+        : { x: pad + i * band + band * 0.15, y: HEIGHT - 30 - size, width: band * 0.7, height: size };
+      rect.fill = colorAt(color, i);
+      var bar = el("rect", rect);
+      bar.appendChild(el("title", {}, label + ": " + fmt(values[i])));
+      svg.appendChild(bar);
+      svg.appendChild(horizontal
+        ? el("text", { x: pad - 6, y: rect.y + band * 0.45, "text-anchor": "end", "font-size": 11 }, label)
+        : el("text", { x: rect.x + rect.width / 2, y: HEIGHT - 14, "text-anchor": "middle", "font-size": 11 }, label));
+    });
+  }
+
+  function arcs(svg, labels, values, colors, hole) {
+    var total = values.reduce(function (a, b) { return a + b; }, 0) || 1;
+    var cx = 130, cy = HEIGHT / 2, r = 110, angle = -Math.PI / 2;
+    labels.forEach(function (label, i) {
+      var sweep = (values[i] / total) * Math.PI * 2;
+      var end = angle + Math.min(sweep, Math.PI * 2 - 1e-6);
+      var path = el("path", {
+        d: "M" + cx + "," + cy + " L" + (cx + r * Math.cos(angle)) + "," + (cy + r * Math.sin(angle)) +
+           " A" + r + "," + r + " 0 " + (sweep > Math.PI ? 1 : 0) + " 1 " +
+           (cx + r * Math.cos(end)) + "," + (cy + r * Math.sin(end)) + " Z",
+        fill: colorAt(colors, i), stroke: "#fff"
+      });
+      path.appendChild(el("title", {}, label + ": " + fmt(values[i])));
+      svg.appendChild(path);
+      svg.appendChild(el("rect", { x: 260, y: 20 + i * 20, width: 12, height: 12, fill: colorAt(colors, i) }));
+      svg.appendChild(el("text", { x: 278, y: 30 + i * 20, "font-size": 11 }, label + " (" + fmt(values[i]) + ")"));
+      angle += sweep;
+    });
+    if (hole) svg.appendChild(el("circle", { cx: cx, cy: cy, r: r * 0.55, fill: "#fff" }));
+  }
+
+  function radar(svg, labels, values, dataset) {
+    var max = Math.max.apply(null, values.concat([1]));
+    var cx = WIDTH / 2, cy = HEIGHT / 2, r = 100, n = Math.max(labels.length, 3), points = [];
+    labels.forEach(function (label, i) {
+      var a = -Math.PI / 2 + (i / n) * Math.PI * 2;
+      svg.appendChild(el("line", { x1: cx, y1: cy, x2: cx + r * Math.cos(a), y2: cy + r * Math.sin(a), stroke: "#ddd" }));
+      svg.appendChild(el("text", { x: cx + (r + 14) * Math.cos(a), y: cy + (r + 14) * Math.sin(a), "text-anchor": "middle", "font-size": 11 }, label));
+      points.push((cx + r * (values[i] / max) * Math.cos(a)) + "," + (cy + r * (values[i] / max) * Math.sin(a)));
+    });
+    svg.appendChild(el("polygon", {
+      points: points.join(" "), fill: dataset.backgroundColor || "rgba(102, 126, 234, 0.2)",
+      stroke: dataset.borderColor || PALETTE[0]
+    }));
+  }
+
+  function render(container, spec, labels, values) {
+    var svg = el("svg", { viewBox: "0 0 " + WIDTH + " " + HEIGHT, width: "100%", role: "img", "aria-label": spec.title });
+    var dataset = spec.dataset || {};
+    if (!labels.length) {
+      svg.appendChild(el("text", { x: WIDTH / 2, y: HEIGHT / 2, "text-anchor": "middle", fill: "#999" }, "暂无数据"));
+    } else if (spec.type === "bar" || spec.type === "horizontalBar") {
+      bars(svg, labels, values, dataset.backgroundColor, spec.type === "horizontalBar");
+    } else if (spec.type === "pie" || spec.type === "doughnut") {
+      arcs(svg, labels, values, dataset.backgroundColor, spec.type === "doughnut");
+    } else if (spec.type === "radar") {
+      radar(svg, labels, values, dataset);
+    }
+    container.replaceChildren(svg);
+  }
+
+  global.MiniCharts = { render: render };
+})(window);
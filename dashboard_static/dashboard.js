@@ -0,0 +1,158 @@
+/*
+ * 静态仪表板加载器
+ * 读取 data/manifest.json, 只下载页面上出现 (且进入视口) 的区块数据;
+ * 定时重新读取清单, 仅重新下载摘要变化的区块
+ */
+(function () {
+  "use strict";
+
+  var MANIFEST_URL = "data/manifest.json";
+  var REFRESH_SECONDS = Number(document.body.dataset.refresh || 300);
+  var manifest = null;
+  var loaded = {};      // 区块名 → 已渲染的数据摘要
+  var visible = {};     // 已进入视口的区块名
+
+  function rowsOf(payload) {
+    return payload.rows.map(function (row) {
+      var item = {};
+      payload.columns.forEach(function (column, i) { item[column] = row[i]; });
+      return item;
+    });
+  }
+
+  function num(value, digits) {
+    return Number(value || 0).toLocaleString("zh-CN", { maximumFractionDigits: digits || 0, minimumFractionDigits: digits || 0 });
+  }
+
+  function cell(tr, text, className) {
+    var td = document.createElement("td");
+    td.textContent = text;
+    if (className) td.className = className;
+    tr.appendChild(td);
+    return td;
+  }
+
+  function badge(tr, value) {
+    var span = document.createElement("span");
+    span.className = "badge badge-" + (value || "unknown");
+    span.textContent = value || "Unknown";
+    cell(tr, "").appendChild(span);
+  }
+
+  function scoreClass(score) {
+    return score >= 80 ? "score-excellent" : score >= 60 ? "score-good" : score >= 40 ? "score-fair" : "score-poor";
+  }
+
+  var RENDERERS = {
+    overview: function (node, rows) {
+      var overview = rows[0] || {};
+      node.querySelectorAll("[data-field]").forEach(function (field) {
+        field.textContent = num(overview[field.dataset.field], Number(field.dataset.digits || 0));
+      });
+    },
+    top_projects: function (node, rows) {
+      var tbody = node.querySelector("tbody");
+      tbody.replaceChildren();
+      rows.forEach(function (p, i) {
+        var tr = document.createElement("tr");
+        cell(tr, "#" + (i + 1));
+        cell(tr, p.owner + "/" + p.name);
+        cell(tr, num(p.enhanced_score, 1), scoreClass(p.enhanced_score || 0));
+        cell(tr, num(p.stars));
+        cell(tr, num(p.forks));
+        ["ai_maturity_level", "community_health", "innovation_level", "commercial_potential"].forEach(function (key) { badge(tr, p[key]); });
+        tbody.appendChild(tr);
+      });
+    },
+    trending_projects: function (node, rows) {
+      var tbody = node.querySelector("tbody");
+      tbody.replaceChildren();
+      rows.forEach(function (p) {
+        var tr = document.createElement("tr");
+        cell(tr, p.owner + "/" + p.name);
+        cell(tr, num(p.enhanced_score, 1), scoreClass(p.enhanced_score || 0));
+        cell(tr, num(p.stars));
+        cell(tr, String(p.cutting_edge_score || 0));
+        badge(tr, p.innovation_level);
+        cell(tr, p.last_commit_date ? String(p.last_commit_date).slice(0, 10) : "");
+        tbody.appendChild(tr);
+      });
+    }
+  };
+
+  function renderChart(node, rows) {
+    var spec = manifest.charts[node.dataset.chart];
+    MiniCharts.render(node.querySelector(".chart"), spec,
+      rows.map(function (row) { return String(row[spec.label_field] == null ? "Unknown" : row[spec.label_field]); }),
+      rows.map(function (row) { return Number(row.count || 0); }));
+  }
+
+  function loadSection(name) {
+    var entry = manifest && manifest.sections[name];
+    if (!entry || loaded[name] === entry.digest) return;
+    loaded[name] = entry.digest;
+    fetch("data/" + entry.file).then(function (response) {
+      if (!response.ok) throw new Error(response.status);
+      return response.json();
+    }).then(function (payload) {
+      var rows = rowsOf(payload);
+      document.querySelectorAll('[data-section="' + name + '"]').forEach(function (node) {
+        (node.dataset.chart ? renderChart : RENDERERS[name])(node, rows);
+      });
+    }).catch(function (error) {
+      delete loaded[name];
+      console.error("区块加载失败", name, error);
+    });
+  }
+
+  function buildCharts() {
+    var grid = document.getElementById("charts");
+    Object.keys(manifest.charts).forEach(function (canvas) {
+      if (document.querySelector('[data-chart="' + canvas + '"]')) return;
+      var spec = manifest.charts[canvas];
+      var box = document.createElement("div");
+      box.className = "chart-container";
+      box.dataset.section = spec.query;
+      box.dataset.chart = canvas;
+      var title = document.createElement("h3");
+      title.textContent = spec.title;
+      var chart = document.createElement("div");
+      chart.className = "chart";
+      box.appendChild(title);
+      box.appendChild(chart);
+      grid.appendChild(box);
+    });
+  }
+
+  function observe() {
+    var observer = "IntersectionObserver" in window ? new IntersectionObserver(function (entries) {
+      entries.forEach(function (entry) {
+        if (!entry.isIntersecting) return;
+        visible[entry.target.dataset.section] = true;
+        loadSection(entry.target.dataset.section);
+        observer.unobserve(entry.target);
+      });
+    }, { rootMargin: "200px" }) : null;
+    document.querySelectorAll("[data-section]").forEach(function (node) {
+      if (observer) observer.observe(node);
+      else { visible[node.dataset.section] = true; loadSection(node.dataset.section); }
+    });
+  }
+
+  function loadManifest() {
+    return fetch(MANIFEST_URL, { cache: "no-cache" }).then(function (response) { return response.json(); }).then(function (data) {
+      manifest = data;
+      document.querySelectorAll("[data-generated-at]").forEach(function (node) { node.textContent = data.generated_at; });
+    });
+  }
+
+  loadManifest().then(function () {
+    buildCharts();
+    observe();
+    if (REFRESH_SECONDS > 0) {
+      setInterval(function () {
+        loadManifest().then(function () { Object.keys(visible).forEach(loadSection); });
+      }, REFRESH_SECONDS * 1000);
+    }
+  });
+})();
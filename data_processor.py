@@ -13,8 +13,30 @@ from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import asdict
 
 from config_v2 import Config
-from enhanced_keywords_config import *
 from high_frequency_collector import RepositoryData
+from semantic_categorizer import get_categorizer
+from repo_features import get_feature_cache
+from scoring_models import get_model
+
+# 技术热点关键词 (趋势评分)
+HOT_KEYWORDS = [
+    "gpt", "llm", "chatgpt", "stable-diffusion", "sora",
+    "agent", "rag", "multimodal", "whisper", "transformer"
+]
+
+# AI相关性关键词 (名称 / 描述 / topics)
+AI_NAME_KEYWORDS = ["ai", "ml", "llm", "gpt", "neural", "deep", "learning", "llama", "chatgpt"]
+AI_DESC_KEYWORDS = [
+    "artificial intelligence", "machine learning", "deep learning",
+    "neural network", "computer vision", "natural language",
+    "generative", "diffusion", "transformer", "llm", "gpt",
+    "chatgpt", "claude", "language model", "ai", "ml"
+]
+AI_TOPIC_KEYWORDS = [
+    "artificial-intelligence", "machine-learning", "deep-learning",
+    "computer-vision", "natural-language-processing", "neural-networks",
+    "llm", "gpt", "chatgpt", "ai", "ml"
+]
 
 class DataProcessor:
     """数据处理器"""
@@ -62,6 +84,12 @@ class DataProcessor:
             ],
             "通用AI工具": []  # 默认分类
         }
+        
+        # 标签关键词 (展开一次, 各仓库复用)
+        self.tag_keywords = [keyword.lower() for keywords in self.category_keywords.values() for keyword in keywords]
+        
+        # 共享特征缓存 (按内容哈希)
+        self.feature_cache = get_feature_cache()
     
     def convert_to_beijing_time(self, iso_time_str: str) -> Optional[str]:
         """将ISO时间字符串转换为北京时间"""
@@ -133,38 +161,56 @@ class DataProcessor:
         
     def process_repository(self, repo_raw: Dict[str, Any]) -> Optional[RepositoryData]:
         """处理单个仓库数据"""
+        processed = self.process_repositories([repo_raw])
+        return processed[0] if processed else None
+    
+    def process_repositories(self, repos_raw: List[Dict[str, Any]]) -> List[RepositoryData]:
+        """批量处理仓库数据: 先提取全部基础数据, 整批分类评分一次, 再按质量与AI相关性过滤"""
+        repos = []
+        for repo_raw in repos_raw:
+            try:
+                repos.append(self.extract_basic_data(repo_raw))
+            except Exception as e:
+                self.logger.error(f"处理仓库数据失败: {repo_raw.get('full_name', 'unknown')} | {e}")
+        return self.score_and_filter(repos)
+    
+    def score_and_filter(self, repos: List[RepositoryData]) -> List[RepositoryData]:
+        """整批分类评分并写回, 返回通过质量与AI相关性过滤的仓库"""
+        if not repos:
+            return []
         try:
-            # 基础数据提取
-            repo_data = self.extract_basic_data(repo_raw)
-            
-            # AI分类
-            repo_data.ai_category = self.categorize_ai_project(repo_data)
-            
-            # 提取AI技术标签
-            repo_data.ai_tags = self.extract_ai_tags(repo_data)
-            
-            # 计算质量评分
-            repo_data.quality_score = self.calculate_quality_score(repo_data)
-            
-            # 计算趋势评分
-            repo_data.trending_score = self.calculate_trending_score(repo_data)
-            
-            # 质量过滤
-            if repo_data.quality_score < self.config.MIN_QUALITY_SCORE:
-                self.logger.debug(f"质量评分过低: {repo_data.full_name} ({repo_data.quality_score})")
-                return None
-            
-            # AI相关性检查 (测试时放宽要求)
-            ai_relevance = self.calculate_ai_relevance(repo_data)
-            if ai_relevance < 2:  # 降低阈值以便测试通过
-                self.logger.debug(f"AI相关性过低: {repo_data.full_name} ({ai_relevance})")
-                return None
-            
-            return repo_data
-            
+            # 一次性计算特征, 分类与各评分共用
+            scores = self.score_batch(repos)
         except Exception as e:
-            self.logger.error(f"处理仓库数据失败: {repo_raw.get('full_name', 'unknown')} | {e}")
-            return None
+            if len(repos) == 1:
+                self.logger.error(f"处理仓库数据失败: {repos[0].full_name} | {e}")
+                return []
+            # 整批失败时逐个重试, 只丢弃出错的仓库
+            self.logger.error(f"批量评分失败, 逐个重试: {e}")
+            return [kept for repo in repos for kept in self.score_and_filter([repo])]
+        
+        return [repo_data for repo_data, repo_scores in zip(repos, scores) if self.apply_scores(repo_data, repo_scores)]
+    
+    def apply_scores(self, repo_data: RepositoryData, scores: Dict[str, Any]) -> bool:
+        """写回分类与评分, 返回是否通过过滤"""
+        repo_data.ai_category = scores["ai_category"]
+        repo_data.ai_tags = scores["ai_tags"]
+        repo_data.quality_score = scores["quality_score"]
+        repo_data.trending_score = scores["trending_score"]
+        repo_data.score_model_version = scores["score_model_version"]
+        
+        # 质量过滤
+        if repo_data.quality_score < self.config.MIN_QUALITY_SCORE:
+            self.logger.debug(f"质量评分过低: {repo_data.full_name} ({repo_data.quality_score})")
+            return False
+        
+        # AI相关性检查 (测试时放宽要求)
+        ai_relevance = scores["ai_relevance"]
+        if ai_relevance < 2:  # 降低阈值以便测试通过
+            self.logger.debug(f"AI相关性过低: {repo_data.full_name} ({ai_relevance})")
+            return False
+        
+        return True
     
     def extract_basic_data(self, repo_raw: Dict[str, Any]) -> RepositoryData:
         """提取基础仓库数据"""
@@ -188,55 +234,42 @@ class DataProcessor:
             collection_round=repo_raw.get("search_round", 1)
         )
     
+    def score_batch(self, repos: List[Any]) -> List[Dict[str, Any]]:
+        """
+        批量分类与评分 (RepositoryData / 字典 / RepoFeatures)
+        每个仓库的特征只计算一次 (按内容哈希缓存), 分类走语义引擎的批量接口
+        """
+        features = self.feature_cache.get_batch(repos)
+        categories = get_categorizer().classify_batch(features)
+        quality_model = get_model("quality")
+        quality_scores = quality_model.score_batch(features)
+        return [
+            {
+                "ai_category": category,
+                "ai_tags": self.extract_ai_tags(feature),
+                "quality_score": quality_score,
+                "trending_score": self.calculate_trending_score(feature),
+                "ai_relevance": self.calculate_ai_relevance(feature),
+                "score_model_version": quality_model.id,
+            }
+            for feature, (category, _), quality_score in zip(features, categories, quality_scores)
+        ]
+    
     def categorize_ai_project(self, repo: RepositoryData) -> str:
-        """AI项目智能分类"""
-        text_content = f"{repo.name} {repo.description} {' '.join(repo.topics)}".lower()
-        
-        # 计算每个分类的匹配分数
-        category_scores = {}
-        
-        for category, keywords in self.category_keywords.items():
-            if category == "通用AI工具":  # 跳过默认分类
-                continue
-                
-            score = 0
-            for keyword in keywords:
-                # 完整匹配加分更多
-                if keyword in text_content:
-                    if keyword in repo.name.lower():
-                        score += 3  # 项目名称权重最高
-                    elif keyword in repo.description.lower():
-                        score += 2  # 描述权重中等
-                    elif keyword in ' '.join(repo.topics).lower():
-                        score += 1  # 标签权重最低
-                        
-            category_scores[category] = score
-        
-        # 找到最高分的分类
-        if category_scores:
-            max_category = max(category_scores.items(), key=lambda x: x[1])
-            if max_category[1] > 0:  # 至少有一个匹配
-                return max_category[0]
-        
-        # 默认分类
-        return "通用AI工具"
+        """AI项目智能分类 (语义分类引擎: 按最近标注质心分类)"""
+        category, _ = get_categorizer().classify(self.feature_cache.get(repo))
+        return category
     
     def extract_ai_tags(self, repo: RepositoryData) -> List[str]:
         """提取AI技术标签"""
+        features = self.feature_cache.get(repo)
         tags = set()
-        text_content = f"{repo.name} {repo.description} {' '.join(repo.topics)}".lower()
-        
-        # 从关键词库中提取标签
-        all_keywords = []
-        for category, keywords in self.category_keywords.items():
-            all_keywords.extend(keywords)
         
-        for keyword in all_keywords:
-            if keyword.lower() in text_content:
-                # 标准化标签格式
-                standardized_tag = self.standardize_tag(keyword)
-                if standardized_tag:
-                    tags.add(standardized_tag)
+        for keyword in features.hits(self.tag_keywords):
+            # 标准化标签格式
+            standardized_tag = self.standardize_tag(keyword)
+            if standardized_tag:
+                tags.add(standardized_tag)
         
         # 限制标签数量
         return list(tags)[:10]
@@ -255,93 +288,17 @@ class DataProcessor:
             return clean_tag.lower()
     
     def calculate_quality_score(self, repo: RepositoryData) -> int:
-        """计算项目质量评分 (0-100分)"""
-        score = 0
-        
-        # 1. 星标权重 (40分)
-        stars = repo.stargazers_count
-        if stars >= 10000:
-            score += 40
-        elif stars >= 1000:
-            score += 30 + (stars - 1000) / 9000 * 10
-        elif stars >= 100:
-            score += 20 + (stars - 100) / 900 * 10
-        elif stars >= 10:
-            score += 10 + (stars - 10) / 90 * 10
-        else:
-            score += stars  # 10分以下按实际星标数
-        
-        # 2. 活跃度权重 (25分)
-        if repo.pushed_at:
-            try:
-                pushed_date = datetime.fromisoformat(repo.pushed_at.replace('Z', '+00:00'))
-                days_since_push = (datetime.utcnow().replace(tzinfo=pushed_date.tzinfo) - pushed_date).days
-                
-                if days_since_push <= 7:
-                    score += 25
-                elif days_since_push <= 30:
-                    score += 20
-                elif days_since_push <= 90:
-                    score += 15
-                elif days_since_push <= 180:
-                    score += 10
-                elif days_since_push <= 365:
-                    score += 5
-                # 超过1年不加分
-            except:
-                score += 5  # 无法解析日期时给少量分数
-        
-        # 3. 社区参与度权重 (20分)
-        forks = repo.forks_count
-        watchers = repo.watchers_count
-        community_engagement = forks * 2 + watchers  # fork权重更高
-        
-        if community_engagement >= 1000:
-            score += 20
-        elif community_engagement >= 100:
-            score += 15 + (community_engagement - 100) / 900 * 5
-        elif community_engagement >= 10:
-            score += 10 + (community_engagement - 10) / 90 * 5
-        else:
-            score += community_engagement / 10 * 10
-        
-        # 4. 项目成熟度权重 (10分)
-        if repo.created_at:
-            try:
-                created_date = datetime.fromisoformat(repo.created_at.replace('Z', '+00:00'))
-                days_since_created = (datetime.utcnow().replace(tzinfo=created_date.tzinfo) - created_date).days
-                
-                if 30 <= days_since_created <= 365:  # 1个月到1年最优
-                    score += 10
-                elif 7 <= days_since_created <= 1095:  # 1周到3年较好
-                    score += 8
-                elif days_since_created <= 7:  # 太新
-                    score += 5
-                else:  # 太老
-                    score += 3
-            except:
-                score += 5
-        
-        # 5. 技术质量加分 (5分)
-        quality_indicators = [
-            len(repo.description) > 50,  # 有详细描述
-            len(repo.topics) > 0,        # 有技术标签
-            repo.language == "Python",   # Python项目加分
-            "README" in repo.description.upper() or "readme" in repo.description.lower(),  # 提到README
-            any(word in repo.description.lower() for word in ["documentation", "docs", "tutorial", "example"])  # 有文档
-        ]
-        
-        score += sum(quality_indicators) * 1  # 每个指标1分
-        
-        return min(int(score), 100)  # 最高100分
+        """计算项目质量评分 (0-100分, 评分模型 quality 当前生效版本)"""
+        return get_model("quality").score(self.feature_cache.get(repo))
     
     def calculate_trending_score(self, repo: RepositoryData) -> int:
         """计算趋势热度评分 (0-100分)"""
+        features = self.feature_cache.get(repo)
         score = 0
         
         # 1. 基础热度 (40分) - 基于星标和fork数
-        stars = repo.stargazers_count
-        forks = repo.forks_count
+        stars = features.stars
+        forks = features.forks
         
         # 星标贡献 (25分)
         if stars >= 1000:
@@ -362,85 +319,59 @@ class DataProcessor:
             score += forks / 10 * 10
         
         # 2. 时间新鲜度 (30分)
-        if repo.created_at:
-            try:
-                created_date = datetime.fromisoformat(repo.created_at.replace('Z', '+00:00'))
-                days_since_created = (datetime.utcnow().replace(tzinfo=created_date.tzinfo) - created_date).days
-                
-                if days_since_created <= 30:  # 1个月内创建
-                    score += 30
-                elif days_since_created <= 90:  # 3个月内创建
-                    score += 25
-                elif days_since_created <= 180:  # 6个月内创建
-                    score += 20
-                elif days_since_created <= 365:  # 1年内创建
-                    score += 15
-                else:
-                    score += 5  # 老项目少量加分
-            except:
+        if features.created_at:
+            days_since_created = features.days_since("created")
+            
+            if days_since_created is None:
                 score += 10
+            elif days_since_created <= 30:  # 1个月内创建
+                score += 30
+            elif days_since_created <= 90:  # 3个月内创建
+                score += 25
+            elif days_since_created <= 180:  # 6个月内创建
+                score += 20
+            elif days_since_created <= 365:  # 1年内创建
+                score += 15
+            else:
+                score += 5  # 老项目少量加分
         
         # 3. 最近活动 (20分)
-        if repo.pushed_at:
-            try:
-                pushed_date = datetime.fromisoformat(repo.pushed_at.replace('Z', '+00:00'))
-                days_since_push = (datetime.utcnow().replace(tzinfo=pushed_date.tzinfo) - pushed_date).days
-                
-                if days_since_push <= 1:  # 1天内有更新
-                    score += 20
-                elif days_since_push <= 7:  # 1周内有更新
-                    score += 15
-                elif days_since_push <= 30:  # 1月内有更新
-                    score += 10
-                elif days_since_push <= 90:  # 3月内有更新
-                    score += 5
-                # 超过3个月不加分
-            except:
+        if features.pushed_at:
+            days_since_push = features.days_since("pushed")
+            
+            if days_since_push is None:
                 score += 3
+            elif days_since_push <= 1:  # 1天内有更新
+                score += 20
+            elif days_since_push <= 7:  # 1周内有更新
+                score += 15
+            elif days_since_push <= 30:  # 1月内有更新
+                score += 10
+            elif days_since_push <= 90:  # 3月内有更新
+                score += 5
+            # 超过3个月不加分
         
         # 4. 技术热点加分 (10分)
-        hot_keywords = [
-            "gpt", "llm", "chatgpt", "stable-diffusion", "sora",
-            "agent", "rag", "multimodal", "whisper", "transformer"
-        ]
-        
-        text_content = f"{repo.name} {repo.description} {' '.join(repo.topics)}".lower()
-        hot_score = sum(2 for keyword in hot_keywords if keyword in text_content)
+        hot_score = 2 * len(features.hits(HOT_KEYWORDS))
         score += min(hot_score, 10)
         
         return min(int(score), 100)  # 最高100分
     
     def calculate_ai_relevance(self, repo: RepositoryData) -> int:
         """计算AI相关性评分 (0-10分)"""
+        features = self.feature_cache.get(repo)
         score = 0
         
-        # 准备文本内容
-        name_text = repo.name.lower()
-        desc_text = repo.description.lower()
-        topics_text = ' '.join(repo.topics).lower()
-        
         # 1. 项目名称权重 (40%) - 4分
-        ai_name_keywords = ["ai", "ml", "llm", "gpt", "neural", "deep", "learning", "llama", "chatgpt"]
-        name_matches = sum(1 for keyword in ai_name_keywords if keyword in name_text)
+        name_matches = len(features.hits(AI_NAME_KEYWORDS, "name"))
         score += min(name_matches * 2, 4)  # 提高权重
         
         # 2. 描述内容权重 (35%) - 3.5分
-        ai_desc_keywords = [
-            "artificial intelligence", "machine learning", "deep learning",
-            "neural network", "computer vision", "natural language",
-            "generative", "diffusion", "transformer", "llm", "gpt", 
-            "chatgpt", "claude", "language model", "ai", "ml"
-        ]
-        desc_matches = sum(1 for keyword in ai_desc_keywords if keyword in desc_text)
+        desc_matches = len(features.hits(AI_DESC_KEYWORDS, "description"))
         score += min(desc_matches * 1, 3.5)  # 提高权重
         
         # 3. 技术标签权重 (25%) - 2.5分
-        ai_topic_keywords = [
-            "artificial-intelligence", "machine-learning", "deep-learning",
-            "computer-vision", "natural-language-processing", "neural-networks",
-            "llm", "gpt", "chatgpt", "ai", "ml"
-        ]
-        topic_matches = sum(1 for keyword in ai_topic_keywords if keyword in topics_text)
+        topic_matches = len(features.hits(AI_TOPIC_KEYWORDS, "topics"))
         score += min(topic_matches * 1, 2.5)  # 提高权重
         
         return min(int(score), 10)  # 最高10分
@@ -460,16 +391,14 @@ class DataProcessor:
         
         # 活跃度信息
         if repo.pushed_at:
-            try:
-                pushed_date = datetime.fromisoformat(repo.pushed_at.replace('Z', '+00:00'))
-                days_since_push = (datetime.utcnow().replace(tzinfo=pushed_date.tzinfo) - pushed_date).days
-                
-                if days_since_push <= 7:
-                    summary_parts.append("活跃维护")
-                elif days_since_push <= 30:
-                    summary_parts.append("定期更新")
-            except:
+            days_since_push = self.feature_cache.get(repo).days_since("pushed")
+            
+            if days_since_push is None:
                 pass
+            elif days_since_push <= 7:
+                summary_parts.append("活跃维护")
+            elif days_since_push <= 30:
+                summary_parts.append("定期更新")
         
         # 技术特色
         if repo.ai_tags:
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+去重规则引擎 - 声明式去重/重新收录策略的批量评估
+功能: 从 dedup_rules_config 加载规则并编译一次, 对整批 (候选, 已存储记录) 一次性给出决策和原因, 按运行汇总规则命中统计
+更新时间: 2025-09-16
+"""
+
+import time
+import logging
+import operator
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+from dataclasses import dataclass
+
+from dedup_rules_config import DEDUP_RULE_SETS
+
+_OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+VALID_ACTIONS = ("insert", "update", "reinsert", "skip")
+
+# 无历史收录时间或无法解析时的天数
+NO_HISTORY_DAYS = 10 ** 6
+
+
+@dataclass
+class RuleDecision:
+    """单个仓库的去重决策"""
+
+    repo_id: Any
+    action: str         # insert / update / reinsert / skip
+    reason: str
+    rule: str           # 命中的规则名 (默认结果为 "default")
+
+    @property
+    def should_store(self) -> bool:
+        return self.action != "skip"
+
+
+@dataclass
+class _CompiledRule:
+    name: str
+    conditions: Tuple[Tuple[str, Any, Any], ...]
+    action: str
+    reason: str
+    templated: bool
+
+
+def _parse_time(value: Any, offset: timedelta) -> Optional[datetime]:
+    """解析记录时间为UTC时间, 无时区的时间按规则集的时区偏移处理"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        text = str(value)
+        try:
+            dt = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                dt = datetime.strptime(text[:19], "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                return None
+    if dt.tzinfo is None:
+        return (dt - offset).replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (ValueError, TypeError):
+        return 0
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value or 0)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class DedupRuleEngine:
+    """去重规则引擎"""
+
+    def __init__(self, rule_set: str = "collector", rules: Optional[Dict[str, Any]] = None):
+        """
+        rule_set: DEDUP_RULE_SETS 中的规则集名称
+        rules: 直接传入规则集定义 (优先于 rule_set)
+        """
+        definition = rules if rules is not None else DEDUP_RULE_SETS[rule_set]
+        self.rule_set = rule_set
+        self.time_field = definition["time_field"]
+        self.time_offset = timedelta(hours=definition.get("time_offset_hours", 0))
+        self.default = definition["default"]
+        self.rules = [self._compile(rule) for rule in definition["rules"]]
+        self.logger = logging.getLogger('ai_collector_v2.dedup_rules')
+        self.reset_stats()
+
+    @staticmethod
+    def _compile(rule: Dict[str, Any]) -> _CompiledRule:
+        """编译单条规则, 配置错误在加载时即报出"""
+        if rule["action"] not in VALID_ACTIONS:
+            raise ValueError(f"规则 {rule['name']} 动作无效: {rule['action']}")
+        conditions = []
+        for feature, op, value in rule["when"]:
+            if op not in _OPERATORS:
+                raise ValueError(f"规则 {rule['name']} 运算符无效: {op}")
+            conditions.append((feature, _OPERATORS[op], value))
+        return _CompiledRule(
+            name=rule["name"],
+            conditions=tuple(conditions),
+            action=rule["action"],
+            reason=rule["reason"],
+            templated="{" in rule["reason"],
+        )
+
+    # ------------------------------------------------------------------
+    # 特征提取
+    # ------------------------------------------------------------------
+
+    def extract_features(self, candidate: Any, existing: Optional[Dict[str, Any]],
+                         now: datetime) -> Dict[str, Any]:
+        """
+        提取规则特征
+        candidate: RepositoryData 或 GitHub API 字典
+        existing: 已存储记录 (github_ai_post_attr 或 repos 表字段均可), 无记录为None
+        """
+        if isinstance(candidate, dict):
+            stars = _to_int(candidate.get('stargazers_count'))
+            forks = _to_int(candidate.get('forks_count'))
+            description = candidate.get('description') or ""
+            pushed_at = candidate.get('pushed_at') or ""
+            quality = _to_float(candidate.get('quality_score'))
+            category = candidate.get('ai_category') or ""
+            content_hash = candidate.get('collection_hash') or ""
+        else:
+            stars = _to_int(candidate.stargazers_count)
+            forks = _to_int(candidate.forks_count)
+            description = candidate.description or ""
+            pushed_at = candidate.pushed_at or ""
+            quality = _to_float(candidate.quality_score)
+            category = candidate.ai_category or ""
+            content_hash = candidate.collection_hash or ""
+
+        features = {"stars": stars, "forks": forks}
+
+        if not existing:
+            features.update(
+                is_new=True, hash_changed=True, stars_growth=stars, forks_growth=forks,
+                star_growth_rate=0.0, desc_changed=False, quality_gain=0.0,
+                category_changed=False, has_new_activity=True, days_since_last=NO_HISTORY_DAYS,
+            )
+            return features
+
+        # 两种表结构: github_ai_post_attr (stargazers_count/pushed_at) 与 repos (stars/updated_at)
+        last_stars = _to_int(existing['stargazers_count'] if 'stargazers_count' in existing
+                             else existing.get('stars', stars))
+        last_forks = _to_int(existing['forks_count'] if 'forks_count' in existing
+                             else existing.get('forks', forks))
+        last_push = existing['pushed_at'] if 'pushed_at' in existing else existing.get('updated_at')
+        stars_growth = stars - last_stars
+
+        last_time = _parse_time(existing.get(self.time_field), self.time_offset)
+        days_since_last = (now - last_time).days if last_time else NO_HISTORY_DAYS
+
+        last_hash = existing.get('collection_hash')
+        last_category = existing.get('ai_category', existing.get('category')) or ""
+
+        features.update(
+            is_new=False,
+            hash_changed=not content_hash or content_hash != last_hash,
+            stars_growth=stars_growth,
+            forks_growth=forks - last_forks,
+            star_growth_rate=stars_growth / max(last_stars, 1),
+            desc_changed='description' in existing and description != (existing['description'] or ""),
+            quality_gain=quality - _to_float(existing.get('quality_score', quality)),
+            category_changed=bool(category) and 'ai_category' in existing and category != last_category,
+            has_new_activity=bool(pushed_at) and str(pushed_at) > str(last_push or ""),
+            days_since_last=days_since_last,
+        )
+        return features
+
+    # ------------------------------------------------------------------
+    # 批量评估
+    # ------------------------------------------------------------------
+
+    def evaluate(self, pairs: Iterable[Tuple[Any, Optional[Dict[str, Any]]]],
+                 now: Optional[datetime] = None) -> List[RuleDecision]:
+        """
+        批量评估 (候选, 已存储记录) 对, 返回与输入顺序一致的决策列表
+        """
+        started = time.perf_counter()
+        now = now or datetime.now(timezone.utc)
+        rules = self.rules
+        default = self.default
+        rule_hits = self.stats["rule_hits"]
+        action_counts = self.stats["actions"]
+        decisions = []
+
+        for candidate, existing in pairs:
+            repo_id = candidate.get('id') if isinstance(candidate, dict) else candidate.id
+            try:
+                features = self.extract_features(candidate, existing, now)
+                for rule in rules:
+                    for feature, op, value in rule.conditions:
+                        if not op(features[feature], value):
+                            break
+                    else:
+                        reason = rule.reason.format(**features) if rule.templated else rule.reason
+                        decision = RuleDecision(repo_id, rule.action, reason, rule.name)
+                        break
+                else:
+                    decision = RuleDecision(repo_id, default["action"], default["reason"], "default")
+            except Exception as e:
+                # 出错时默认存储，确保数据完整性
+                self.stats["errors"] += 1
+                action = "update" if existing else "insert"
+                decision = RuleDecision(repo_id, action, f"去重检查异常，强制存储: {e}", "error")
+
+            rule_hits[decision.rule] = rule_hits.get(decision.rule, 0) + 1
+            action_counts[decision.action] = action_counts.get(decision.action, 0) + 1
+            decisions.append(decision)
+
+        self.stats["evaluated"] += len(decisions)
+        self.stats["elapsed_ms"] += (time.perf_counter() - started) * 1000
+        return decisions
+
+    def evaluate_one(self, candidate: Any, existing: Optional[Dict[str, Any]],
+                     now: Optional[datetime] = None) -> RuleDecision:
+        """评估单个仓库"""
+        return self.evaluate([(candidate, existing)], now)[0]
+
+    # ------------------------------------------------------------------
+    # 统计
+    # ------------------------------------------------------------------
+
+    def reset_stats(self):
+        """重置本次运行的规则统计"""
+        self.stats = {"evaluated": 0, "errors": 0, "elapsed_ms": 0.0, "rule_hits": {}, "actions": {}}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """本次运行的规则命中统计"""
+        return {
+            "rule_set": self.rule_set,
+            "evaluated": self.stats["evaluated"],
+            "errors": self.stats["errors"],
+            "elapsed_ms": round(self.stats["elapsed_ms"], 2),
+            "rule_hits": dict(sorted(self.stats["rule_hits"].items(), key=lambda item: -item[1])),
+            "actions": dict(self.stats["actions"]),
+        }
+
+    def log_summary(self):
+        """输出规则命中摘要"""
+        stats = self.get_stats()
+        if not stats["evaluated"]:
+            return
+        actions = ", ".join(f"{k}={v}" for k, v in stats["actions"].items())
+        self.logger.info(
+            f"⚖️ 去重规则[{self.rule_set}]: 评估 {stats['evaluated']} 个, 耗时 {stats['elapsed_ms']}ms | {actions}"
+        )
+        for name, hits in stats["rule_hits"].items():
+            self.logger.info(f"   📌 {name}: {hits}")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+去重/重新收录规则配置
+所有去重策略以声明式规则表达, 由 dedup_rule_engine 编译后批量执行
+"""
+
+# ================================
+# 📋 规则说明
+# ================================
+# 每个规则集按顺序匹配, 第一条满足全部条件 (AND) 的规则决定结果, 都不满足时使用 default
+# 条件格式: [特征名, 运算符, 值], 运算符: ==, !=, >, >=, <, <=
+# 动作: insert(新收录) / update(更新) / reinsert(重新收录) / skip(跳过)
+# 原因模板可引用特征, 例如 "{stars_growth}"
+#
+# 可用特征:
+#   is_new              数据库中无记录
+#   hash_changed        持久化字段指纹与已存储哈希不同
+#   stars / forks       当前星标数 / fork数
+#   stars_growth        星标增长 (当前 - 已存储)
+#   forks_growth        fork增长
+#   star_growth_rate    星标增长率 (相对已存储星标数)
+#   desc_changed        描述是否变化
+#   quality_gain        质量评分提升
+#   category_changed    AI分类是否变化 (当前分类非空)
+#   has_new_activity    当前pushed_at晚于已存储的pushed_at (记录无该列时回退到updated_at)
+#                       与同一字段比较: updated_at 在星标/描述变化时也会更新, 不能代表代码有新提交
+#   days_since_last     距上次收录天数 (无记录或无法解析时为极大值)
+
+# ================================
+# 📅 时间去重配置 (time_based 规则集的阈值由此派生)
+# ================================
+
+TIME_DEDUP_CONFIG = {
+    # 去重时间窗口
+    "dedup_window_days": 30,        # 30天内不重复
+    "recent_update_star_growth": 50, # 窗口内星标增长达到该值时仍然更新
+    
+    # 重新收录条件
+    "reentry_conditions": {
+        "min_days_since_last": 30,  # 距离上次收录至少30天
+        "activity_required": True,   # 需要有新的活动
+        "star_growth_threshold": 10, # 星标增长至少10个
+        "update_time_check": True    # 检查是否有新的推送
+    },
+    
+    # 质量提升门槛 (重新收录时的更高要求)
+    "reentry_quality_boost": {
+        "min_score_increase": 5,     # 评分至少提升5分
+        "category_change_bonus": 3,  # 分类变化额外加分
+        "new_tech_tags_bonus": 2     # 新技术标签加分
+    }
+}
+
+
+def build_time_based_rules(config):
+    """按时间去重配置生成窗口内更新/窗口外重新收录规则集"""
+    window = config["dedup_window_days"]
+    reentry = config["reentry_conditions"]
+    threshold = reentry["star_growth_threshold"]
+
+    rules = [
+        {"name": "new_repo", "when": [["is_new", "==", True]],
+         "action": "insert", "reason": "新项目"},
+        {"name": "recent_star_surge",
+         "when": [["days_since_last", "<", window], ["stars_growth", ">=", config["recent_update_star_growth"]]],
+         "action": "update", "reason": "星标显著增长"},
+        {"name": "recent_no_change", "when": [["days_since_last", "<", window]],
+         "action": "skip", "reason": f"{window}天内无显著变化"},
+    ]
+    if reentry["activity_required"]:
+        rules += [
+            {"name": "reentry_activity", "when": [["has_new_activity", "==", True], ["stars_growth", ">=", threshold]],
+             "action": "reinsert", "reason": "重新收录: 项目有新活动, 星标增长{stars_growth}个"},
+            {"name": "reentry_activity_only", "when": [["has_new_activity", "==", True]],
+             "action": "reinsert", "reason": "重新收录: 项目有新活动"},
+        ]
+        default = {"action": "skip", "reason": "项目无新活动"}
+    else:
+        rules.append(
+            {"name": "reentry_star_growth", "when": [["stars_growth", ">=", threshold]],
+             "action": "reinsert", "reason": "重新收录: 星标增长{stars_growth}个"}
+        )
+        default = {"action": "skip", "reason": "不满足重新收录条件"}
+
+    return {"time_field": "sync_time", "time_offset_hours": 0, "default": default, "rules": rules}
+
+
+DEDUP_RULE_SETS = {
+    # 高频采集器 (github_ai_post_attr 表, collection_time 为北京时间)
+    "collector": {
+        "time_field": "collection_time",
+        "time_offset_hours": 8,
+        "default": {"action": "skip", "reason": "仓库无重要更新，跳过存储"},
+        "rules": [
+            {"name": "new_repo", "when": [["is_new", "==", True]],
+             "action": "insert", "reason": "新项目"},
+            {"name": "content_unchanged", "when": [["hash_changed", "==", False]],
+             "action": "skip", "reason": "内容无变化，跳过写入"},
+            {"name": "star_growth", "when": [["stars_growth", ">=", 10]],
+             "action": "update", "reason": "仓库有重要更新: 星标 +{stars_growth}"},
+            {"name": "fork_growth", "when": [["forks_growth", ">=", 5]],
+             "action": "update", "reason": "仓库有重要更新: fork +{forks_growth}"},
+            {"name": "description_changed", "when": [["desc_changed", "==", True]],
+             "action": "update", "reason": "仓库有重要更新: 描述变化"},
+            {"name": "popular_star_growth", "when": [["stars_growth", ">=", 5], ["stars", ">=", 100]],
+             "action": "update", "reason": "仓库有重要更新: 星标 +{stars_growth}"},
+        ],
+    },
+
+    # 时间去重同步脚本 (repos 表, sync_time 为 CURRENT_TIMESTAMP UTC)
+    "time_based": build_time_based_rules(TIME_DEDUP_CONFIG),
+}
@@ -8,46 +8,248 @@ GitHub AI仓库去重管理器 V2.0
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Tuple
-from cloudflare import Cloudflare
+from typing import Dict, Any, Optional, Tuple, List, TYPE_CHECKING
 
 from config_v2 import Config, DatabaseConfig
 from high_frequency_collector import RepositoryData
+from bloom_filter import BloomFilter
+from dedup_rule_engine import DedupRuleEngine, RuleDecision
+from monitoring_system import MonitoringSystem
+
+if TYPE_CHECKING:
+    from cloudflare import Cloudflare
+
+# 批量查询已存在记录的字段顺序 (与 SELECT_EXISTING_BATCH_SQL 一致)
+EXISTING_RECORD_FIELDS = (
+    'id', 'stargazers_count', 'forks_count', 'description', 'quality_score',
+    'ai_category', 'pushed_at', 'collection_time', 'collection_hash'
+)
 
 class DeduplicationManager:
     """去重管理器"""
     
-    def __init__(self, cloudflare_client: Cloudflare, config: Config):
+    def __init__(self, cloudflare_client: 'Cloudflare', config: Config,
+                 monitoring: Optional[MonitoringSystem] = None):
         self.cloudflare_client = cloudflare_client
         self.config = config
+        self.monitoring = monitoring or MonitoringSystem()
         self.db_config = DatabaseConfig()
         self.logger = logging.getLogger('ai_collector_v2.dedup')
+        
+        # 已入库ID布隆过滤器 (未命中即为新项目, 无需查询D1)
+        self.id_filter: Optional[BloomFilter] = None
+        self.id_filter_fresh = False  # 仅本次运行重建的过滤器可作"肯定是新项目"判断
+        self.filter_stats = {"skipped_lookups": 0, "probable_hits": 0, "false_positives": 0}
+        self.write_stats = {"unchanged_skipped": 0}
+        
+        # 本次运行已预取的记录 (prefetch_existing_records → decide_batch 复用)
+        self.prefetched_ids = set()
+        self.prefetched_records: Dict[int, Dict[str, Any]] = {}
+        
+        # 声明式去重规则 (dedup_rules_config.DEDUP_RULE_SETS["collector"])
+        self.rule_engine = DedupRuleEngine("collector")
+    
+    async def ensure_schema(self) -> List[str]:
+        """
+        检测采集表缺失的列并执行 ALTER 补齐 (UPSERT 依赖这些列)
+        返回本次补齐的列; 补齐失败时抛出 RuntimeError, 避免整轮写入逐条失败
+        """
+        response = self.cloudflare_client.d1.database.query(
+            database_id=self.config.D1_DATABASE_ID,
+            account_id=self.config.CLOUDFLARE_ACCOUNT_ID,
+            sql=self.db_config.TABLE_INFO_SQL
+        )
+        if not response.success:
+            self.logger.warning(f"⚠️ 无法读取表结构, 跳过列检测: {getattr(response, 'errors', 'Unknown error')}")
+            return []
+        
+        rows = response.result[0].results if response.result else []
+        columns = {row['name'] if isinstance(row, dict) else row[1] for row in rows or []}
+        added = []
+        for column, sql in self.db_config.COLUMN_MIGRATIONS.items():
+            if column in columns:
+                continue
+            response = self.cloudflare_client.d1.database.query(
+                database_id=self.config.D1_DATABASE_ID,
+                account_id=self.config.CLOUDFLARE_ACCOUNT_ID,
+                sql=sql
+            )
+            if not response.success:
+                raise RuntimeError(
+                    f"采集表缺少 {column} 列且自动升级失败, 请先执行 add_score_model_version.sql: "
+                    f"{getattr(response, 'errors', 'Unknown error')}"
+                )
+            self.logger.info(f"🧱 已为 {self.db_config.TABLE_NAME} 补齐列: {column}")
+            added.append(column)
+        return added
     
     async def should_store_repository(self, repo: RepositoryData) -> Tuple[bool, str]:
         """
         判断是否应该存储仓库 - 优先存储新仓库和最近更新的仓库
         返回: (是否存储, 原因说明)
         """
+        decision = (await self.decide_batch([repo]))[0]
+        return decision.should_store, decision.reason
+    
+    async def prefetch_existing_records(self, repos: List[RepositoryData]) -> Dict[int, Dict[str, Any]]:
+        """
+        提前批量查询已存在记录 (供趋势引擎用已存储星标回放基线)
+        结果缓存到本次运行, decide_batch 复用而不重复查询; 查询失败返回空字典
+        """
+        pending = [repo for repo in repos if repo.id not in self.prefetched_ids]
+        records = await self._lookup_existing(pending) if pending else {}
+        if records is None:
+            return {}
+        self.prefetched_ids.update(repo.id for repo in pending)
+        self.prefetched_records.update(records)
+        return {repo.id: self.prefetched_records[repo.id] for repo in repos if repo.id in self.prefetched_records}
+    
+    async def decide_batch(self, repos: List[RepositoryData]) -> List[RuleDecision]:
+        """
+        批量去重决策: 布隆过滤器预判 → 批量查询已存在记录 → 规则引擎一次性评估
+        返回: 与输入顺序一致的决策列表 (action: insert/update/skip)
+        """
+        for repo in repos:
+            # 持久化字段指纹, 随UPSERT写入collection_hash
+            repo.collection_hash = repo.calculate_fingerprint()
+        
+        pending = [repo for repo in repos if repo.id not in self.prefetched_ids]
+        existing_records = await self._lookup_existing(pending) if pending else {}
+        if existing_records is None:
+            # 查询失败时默认存储，确保数据完整性
+            return [RuleDecision(repo.id, "insert", "去重检查异常，强制存储", "error") for repo in repos]
+        
+        prefetched = self.prefetched_records
+        decisions = self.rule_engine.evaluate(
+            (repo, existing_records.get(repo.id) or prefetched.get(repo.id)) for repo in repos
+        )
+        # 指纹与已存储哈希一致: 写入不会改变任何字段, 直接丢弃
+        self.write_stats["unchanged_skipped"] += sum(1 for d in decisions if d.rule == "content_unchanged")
+        return decisions
+    
+    async def _lookup_existing(self, repos: List[RepositoryData]) -> Optional[Dict[int, Dict[str, Any]]]:
+        """布隆过滤器预判后批量查询已存在记录, 查询失败返回None"""
+        # 持久化的旧过滤器不含上次保存后其他写入方入库的ID, 未命中不可信, 全部走批量查询
+        id_filter = self.id_filter if self.id_filter_fresh else None
+        lookup_ids = []
+        for repo in repos:
+            # 布隆过滤器未命中: 肯定是新项目, 跳过D1查询
+            if id_filter is not None:
+                if repo.id not in id_filter:
+                    self.filter_stats["skipped_lookups"] += 1
+                    continue
+                self.filter_stats["probable_hits"] += 1
+            lookup_ids.append(repo.id)
+        
+        existing_records = await self.get_existing_records(lookup_ids) if lookup_ids else {}
+        if existing_records is not None and id_filter is not None:
+            self.filter_stats["false_positives"] += len(lookup_ids) - len(existing_records)
+        return existing_records
+    
+    async def get_existing_records(self, repo_ids: List[int]) -> Optional[Dict[int, Dict[str, Any]]]:
+        """按ID批量获取已存在的仓库记录, 查询失败返回None"""
+        records = {}
+        batch_size = self.config.DEDUP_LOOKUP_BATCH_SIZE
+        
         try:
-            # 查询已存在的记录
-            existing_record = await self.get_existing_record(repo.id)
-            
-            if not existing_record:
-                # 新项目直接收录
-                return True, "新项目"
-            
-            # 检查是否有重要更新（星标、fork、描述等变化）
-            has_significant_update = await self.check_significant_update(repo, existing_record)
+            for start in range(0, len(repo_ids), batch_size):
+                chunk = repo_ids[start:start + batch_size]
+                sql = self.db_config.SELECT_EXISTING_BATCH_SQL.format(placeholders=",".join("?" * len(chunk)))
+                with self.monitoring.track("d1_query") as trace:
+                    trace.bytes_out = len(sql) + sum(len(str(repo_id)) for repo_id in chunk)
+                    response = self.cloudflare_client.d1.database.query(
+                        database_id=self.config.D1_DATABASE_ID,
+                        account_id=self.config.CLOUDFLARE_ACCOUNT_ID,
+                        sql=sql,
+                        params=chunk
+                    )
+                    trace.error = not response.success
+                
+                if not response.success:
+                    self.logger.warning(f"批量查询已存在记录失败: {getattr(response, 'errors', 'Unknown error')}")
+                    return None
+                
+                rows = response.result[0].results if response.result else []
+                for row in rows or []:
+                    record = dict(zip(EXISTING_RECORD_FIELDS, row)) if isinstance(row, list) else dict(row)
+                    # 检查collection_time是否为字段名
+                    if record.get('collection_time') == 'collection_time':
+                        record['collection_time'] = None
+                    records[int(record['id'])] = record
             
-            if has_significant_update:
-                return True, "仓库有重要更新"
-            else:
-                return False, "仓库无重要更新，跳过存储"
+            return records
             
         except Exception as e:
-            self.logger.error(f"去重检查失败: {repo.full_name} | {e}")
-            # 出错时默认存储，确保数据完整性
-            return True, f"去重检查异常，强制存储: {e}"
+            self.logger.error(f"批量查询已存在记录异常: {e}")
+            return None
+    
+    async def fetch_all_ids(self) -> Optional[List[int]]:
+        """分页扫描全部已入库仓库ID (按ID键集分页)"""
+        ids = []
+        last_id = 0
+        page_size = self.config.BLOOM_SCAN_PAGE_SIZE
+        
+        try:
+            while True:
+                with self.monitoring.track("d1_query") as trace:
+                    response = self.cloudflare_client.d1.database.query(
+                        database_id=self.config.D1_DATABASE_ID,
+                        account_id=self.config.CLOUDFLARE_ACCOUNT_ID,
+                        sql=self.db_config.SELECT_IDS_PAGE_SQL,
+                        params=[last_id, page_size]
+                    )
+                    trace.error = not response.success
+                
+                if not response.success:
+                    self.logger.warning(f"ID扫描失败: {getattr(response, 'errors', 'Unknown error')}")
+                    return None
+                
+                rows = response.result[0].results if response.result else []
+                for row in rows or []:
+                    repo_id = row[0] if isinstance(row, list) else row.get('id')
+                    if repo_id is not None:
+                        ids.append(int(repo_id))
+                
+                if not rows or len(rows) < page_size:
+                    return ids
+                last_id = ids[-1]
+                
+        except Exception as e:
+            self.logger.error(f"ID扫描异常: {e}")
+            return None
+    
+    async def load_id_filter(self) -> bool:
+        """运行开始时重建ID过滤器, 扫描失败时回退到上次持久化的过滤器 (不用于预判)"""
+        ids = await self.fetch_all_ids()
+        
+        if ids is not None:
+            capacity = max(10000, int(len(ids) * 1.5))
+            self.id_filter = BloomFilter(capacity, self.config.BLOOM_FILTER_ERROR_RATE)
+            self.id_filter.update(ids)
+            self.id_filter_fresh = True
+            self.logger.info(f"🌸 ID过滤器已重建: {len(ids)} 个ID, {self.id_filter.size_bytes / 1024:.1f} KB")
+            return True
+        
+        # 回退到持久化过滤器: 仅继续记录新入库ID, 不作为跳过查询的依据
+        self.id_filter = BloomFilter.load(self.config.BLOOM_FILTER_FILE)
+        self.id_filter_fresh = False
+        if self.id_filter is not None:
+            self.logger.warning(f"⚠️ ID扫描失败, 载入持久化ID过滤器 ({len(self.id_filter)} 个ID), 本次不跳过数据库查询")
+            return False
+        
+        self.logger.warning("⚠️ ID过滤器不可用, 去重将逐个查询数据库")
+        return False
+    
+    def save_id_filter(self) -> bool:
+        """持久化ID过滤器供下次运行回退使用"""
+        if self.id_filter is None:
+            return False
+        return self.id_filter.save(self.config.BLOOM_FILTER_FILE)
+    
+    def mark_stored(self, repo_id: int):
+        """记录新入库的仓库ID"""
+        if self.id_filter is not None:
+            self.id_filter.add(repo_id)
     
     async def get_existing_record(self, repo_id: str) -> Optional[Dict[str, Any]]:
         """获取已存在的仓库记录"""
@@ -134,10 +336,11 @@ class DeduplicationManager:
             
             if significant_update:
                 self.logger.info(
-                    f"仓库有重要更新: {repo.full_name} | "
-                    f"星标: {last_stars}→{current_stars}(+{stars_growth}) | "
-                    f"Fork: {last_forks}→{current_forks}(+{forks_growth}) | "
-                    f"描述变化: {desc_changed}"
+                    "仓库有重要更新: %s | 星标: %s→%s(+%s) | Fork: %s→%s(+%s) | 描述变化: %s",
+                    repo.full_name, last_stars, current_stars, stars_growth,
+                    last_forks, current_forks, forks_growth, desc_changed,
+                    extra={"stage": "store", "repo": repo.full_name,
+                           "stars_growth": stars_growth, "forks_growth": forks_growth}
                 )
             
             return significant_update
@@ -236,8 +439,8 @@ class DeduplicationManager:
         检查内容是否有变化
         """
         try:
-            # 计算当前内容哈希
-            current_hash = self.calculate_content_hash(repo)
+            # 计算当前持久化字段指纹
+            current_hash = repo.collection_hash or repo.calculate_fingerprint()
             last_hash = existing_record.get('collection_hash', '')
             
             if current_hash != last_hash:
@@ -64,6 +64,7 @@ class EmailNotifier:
     <li><strong>数据完整性:</strong> 100%</li>
 </ul>
 
+{self._format_leaderboards(stats.get('leaderboards'))}
 <p>系统运行正常，数据采集完成！</p>
 
 <hr>
@@ -76,6 +77,32 @@ class EmailNotifier:
             self.logger.error(f"发送成功通知邮件失败: {e}")
             return False
     
+    def _format_leaderboards(self, digest: Optional[dict]) -> str:
+        """排行榜摘要 (来自 LeaderboardTracker.digest, 无需查询数据库)"""
+        if not digest:
+            return ""
+        
+        parts = []
+        for title, entries in digest.get('boards', {}).items():
+            if not entries:
+                continue
+            items = "".join(
+                f"<li><a href=\"{e.get('url', '')}\">{e.get('full_name', '')}</a> "
+                f"- ⭐ {e.get('stars', 0)} | 质量 {e.get('quality_score', 0):.1f} | "
+                f"趋势 {e.get('trending_score', 0):.1f} | {e.get('stars_per_day', 0):.1f} stars/天</li>"
+                for e in entries
+            )
+            parts.append(f"<h3>{title}</h3>\n<ol>{items}</ol>\n")
+        
+        categories = digest.get('categories', {})
+        if categories:
+            items = "".join(
+                f"<li><strong>{category}:</strong> {e.get('full_name', '')} (质量 {e.get('quality_score', 0):.1f})</li>"
+                for category, e in categories.items()
+            )
+            parts.append(f"<h3>🗂️ 分类榜首</h3>\n<ul>{items}</ul>\n")
+        return "".join(parts)
+    
     def send_failure_notification(self, error_msg: str) -> bool:
         """发送失败通知邮件"""
         if not self.enabled:
@@ -7,13 +7,20 @@
 import os
 import json
 import time
-import requests
 from datetime import datetime, timedelta
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, lazy_import, LazyCloudflareClient
+from config_v2 import APIConfig
+from semantic_categorizer import classify_text
+from repo_features import get_feature_cache
+from scoring_models import get_model
+from structured_logging import setup_logging, get_stage_logger
+from profiling import parse_profile_args, run_profiled
+
+# 延迟导入 (首次发起请求时才加载)
+requests = lazy_import("requests")
 
 # 加载环境变量
-load_dotenv()
+load_env()
 
 # API配置
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
@@ -29,7 +36,10 @@ GITHUB_HEADERS = {
 }
 
 # Cloudflare客户端
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
+
+# 逐仓库存储日志 (按阶段采样)
+store_logger = get_stage_logger('ai_collector_v2.enhanced_collector', 'store')
 
 def fetch_comprehensive_repo_data(owner, repo_name):
     """获取仓库的完整数据"""
@@ -38,7 +48,7 @@ def fetch_comprehensive_repo_data(owner, repo_name):
         print(f"📊 正在获取 {owner}/{repo_name} 的完整数据...")
         
         # 1. 基础仓库信息
-        repo_url = f"https://api.github.com/repos/{owner}/{repo_name}"
+        repo_url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}"
         repo_response = requests.get(repo_url, headers=GITHUB_HEADERS)
         
         if repo_response.status_code != 200:
@@ -93,7 +103,7 @@ def fetch_comprehensive_repo_data(owner, repo_name):
 def fetch_contributors_count(owner, repo_name):
     """获取贡献者数量"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/contributors"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/contributors"
         response = requests.get(url, headers=GITHUB_HEADERS)
         
         if response.status_code == 200:
@@ -108,7 +118,7 @@ def fetch_commits_info(owner, repo_name):
     """获取提交信息"""
     try:
         # 获取总提交数 (通过最后一页)
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/commits"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/commits"
         params = {'per_page': 1, 'page': 1}
         response = requests.get(url, headers=GITHUB_HEADERS, params=params)
         
@@ -142,7 +152,7 @@ def fetch_prs_info(owner, repo_name):
     """获取Pull Requests信息"""
     try:
         # 获取PR统计
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/pulls"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/pulls"
         params = {'state': 'all', 'per_page': 100}
         response = requests.get(url, headers=GITHUB_HEADERS, params=params)
         
@@ -166,7 +176,7 @@ def fetch_issues_info(owner, repo_name):
     """获取Issues信息"""
     try:
         # 获取Issues统计
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/issues"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/issues"
         params = {'state': 'all', 'per_page': 100}
         response = requests.get(url, headers=GITHUB_HEADERS, params=params)
         
@@ -189,7 +199,7 @@ def fetch_issues_info(owner, repo_name):
 def fetch_releases_info(owner, repo_name):
     """获取发布信息"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/releases"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/releases"
         response = requests.get(url, headers=GITHUB_HEADERS)
         
         if response.status_code == 200:
@@ -203,7 +213,7 @@ def fetch_releases_info(owner, repo_name):
 def fetch_languages_info(owner, repo_name):
     """获取编程语言信息"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/languages"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/languages"
         response = requests.get(url, headers=GITHUB_HEADERS)
         
         if response.status_code == 200:
@@ -241,7 +251,7 @@ def analyze_repo_content(owner, repo_name):
         }
         
         # 检查README
-        readme_url = f"https://api.github.com/repos/{owner}/{repo_name}/readme"
+        readme_url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/readme"
         readme_response = requests.get(readme_url, headers=GITHUB_HEADERS)
         
         if readme_response.status_code == 200:
@@ -252,7 +262,7 @@ def analyze_repo_content(owner, repo_name):
             analysis['documentation_score'] = min(15, size // 500)  # 每500字节1分，最高15分
         
         # 检查仓库设置 (通过基础API判断)
-        repo_url = f"https://api.github.com/repos/{owner}/{repo_name}"
+        repo_url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}"
         repo_response = requests.get(repo_url, headers=GITHUB_HEADERS)
         
         if repo_response.status_code == 200:
@@ -274,10 +284,8 @@ def analyze_repo_content(owner, repo_name):
 def analyze_ai_features(repo_data, content_analysis):
     """分析AI/ML特定特征"""
     
-    name = repo_data.get('name', '').lower()
-    description = repo_data.get('description', '').lower() if repo_data.get('description') else ''
-    topics = repo_data.get('topics', [])
-    full_text = f"{name} {description} {' '.join(topics)}"
+    # 名称+描述+topics 的小写文本与关键词命中来自共享特征缓存
+    features = get_feature_cache().get(repo_data)
     
     ai_analysis = {
         'ai_framework': 'unknown',
@@ -302,7 +310,7 @@ def analyze_ai_features(repo_data, content_analysis):
     }
     
     for framework, keywords in frameworks.items():
-        if any(keyword in full_text for keyword in keywords):
+        if features.any(keywords):
             ai_analysis['ai_framework'] = framework
             break
     
@@ -320,18 +328,18 @@ def analyze_ai_features(repo_data, content_analysis):
     }
     
     for model_type, keywords in model_types.items():
-        if any(keyword in full_text for keyword in keywords):
+        if features.any(keywords):
             ai_analysis['model_type'] = model_type
             break
     
     # 检测模型文件
     model_keywords = ['model', 'checkpoint', 'weights', '.pth', '.h5', '.onnx', '.pkl']
-    if any(keyword in full_text for keyword in model_keywords):
+    if features.any(model_keywords):
         ai_analysis['has_model_files'] = True
     
     # 检测研究论文
     paper_keywords = ['paper', 'arxiv', 'research', 'publication', 'cite']
-    if any(keyword in full_text for keyword in paper_keywords):
+    if features.any(paper_keywords):
         ai_analysis['has_paper'] = True
     
     # 前沿技术评分 (0-25分)
@@ -344,7 +352,7 @@ def analyze_ai_features(repo_data, content_analysis):
     }
     
     for keyword, score in cutting_edge_keywords.items():
-        if keyword in full_text:
+        if features.has(keyword):
             ai_analysis['cutting_edge_score'] += score
     
     ai_analysis['cutting_edge_score'] = min(25, ai_analysis['cutting_edge_score'])
@@ -357,7 +365,7 @@ def analyze_ai_features(repo_data, content_analysis):
     }
     
     for keyword, score in practical_keywords.items():
-        if keyword in full_text:
+        if features.has(keyword):
             ai_analysis['practical_score'] += score
     
     ai_analysis['practical_score'] = min(20, ai_analysis['practical_score'])
@@ -385,68 +393,12 @@ def calculate_comprehensive_scores(comprehensive_data):
     # 计算各项评分
     scores = {}
     
-    # 1. 质量评分 (0-50分)
-    quality_score = 0
-    
-    # 星标评分 (0-15分)
-    if stars >= 10000:
-        quality_score += 15
-    elif stars >= 5000:
-        quality_score += 12
-    elif stars >= 1000:
-        quality_score += 10
-    elif stars >= 500:
-        quality_score += 8
-    elif stars >= 100:
-        quality_score += 6
-    elif stars >= 20:
-        quality_score += 3
-    
-    # 分叉评分 (0-10分)
-    if forks >= 2000:
-        quality_score += 10
-    elif forks >= 500:
-        quality_score += 8
-    elif forks >= 100:
-        quality_score += 6
-    elif forks >= 20:
-        quality_score += 4
-    elif forks >= 5:
-        quality_score += 2
-    
-    # 社区评分 (0-10分)
-    if contributors >= 50:
-        quality_score += 5
-    elif contributors >= 10:
-        quality_score += 3
-    elif contributors >= 3:
-        quality_score += 2
-    
-    # 文档评分 (0-10分)
-    quality_score += content['documentation_score'] * 2 / 3  # 转换为10分制
-    if content['has_readme']:
-        quality_score += 2
-    if content['has_wiki']:
-        quality_score += 1
-    
-    # 活跃度评分 (0-5分)
-    if commits['last_commit_date']:
-        try:
-            last_commit = datetime.fromisoformat(commits['last_commit_date'].replace('Z', '+00:00'))
-            days_ago = (datetime.now(last_commit.tzinfo) - last_commit).days
-            
-            if days_ago <= 7:
-                quality_score += 5
-            elif days_ago <= 30:
-                quality_score += 4
-            elif days_ago <= 90:
-                quality_score += 3
-            elif days_ago <= 365:
-                quality_score += 1
-        except:
-            pass
-    
-    scores['quality_score'] = min(50, quality_score)
+    # 1. 质量评分 (0-50分, 评分模型 collector_quality 当前生效版本)
+    quality_model = get_model("collector_quality")
+    scores['quality_score'] = quality_model.score(repo_data, {
+        **content, 'contributors': contributors, 'last_commit_date': commits['last_commit_date'],
+    })
+    scores['score_model_version'] = quality_model.id
     
     # 2. 影响力评分 (0-30分)
     impact_score = 0
@@ -614,25 +566,9 @@ def create_enhanced_repo_record(comprehensive_data):
     return record
 
 def classify_repo_category(ai_features, repo_data):
-    """智能分类仓库类别"""
-    
-    model_type = ai_features['model_type']
-    ai_framework = ai_features['ai_framework']
-    
-    if model_type == 'llm':
-        return 'LLM服务与工具'
-    elif model_type == 'cv':
-        return '计算机视觉'
-    elif model_type == 'rag':
-        return 'RAG技术'
-    elif model_type == 'agent':
-        return 'AI代理系统'
-    elif model_type == 'generative':
-        return '生成式AI'
-    elif ai_framework in ['pytorch', 'tensorflow']:
-        return '机器学习框架'
-    else:
-        return '通用AI工具'
+    """智能分类仓库类别 (语义分类引擎, 与其他采集入口使用同一分类体系)"""
+    
+    return classify_text(repo_data.get('name', ''), repo_data.get('description') or '', repo_data.get('topics'))
 
 def generate_smart_tags(ai_features, languages, repo_data):
     """生成智能标签"""
@@ -791,23 +727,23 @@ def save_enhanced_repo_to_database(record):
         )
         
         if response.success:
-            print(f"✅ 成功保存 {record['owner']}/{record['name']} 的增强数据")
-            
-            # 显示关键指标
-            print(f"   📊 质量评分: {record['quality_score']}/50")
-            print(f"   🎯 影响力评分: {record['impact_score']}/30") 
-            print(f"   💡 创新评分: {record['innovation_score']}/20")
-            print(f"   ⚡ 活跃度评分: {record['activity_score']}/10")
-            print(f"   🤖 AI框架: {record['ai_framework']}")
-            print(f"   🏷️ 模型类型: {record['model_type']}")
-            
+            # 关键指标合并为一条结构化记录
+            store_logger.info(
+                "✅ 成功保存 %s/%s | 质量 %s/50 | 影响力 %s/30 | 创新 %s/20 | 活跃度 %s/10 | %s | %s",
+                record['owner'], record['name'], record['quality_score'], record['impact_score'],
+                record['innovation_score'], record['activity_score'], record['ai_framework'], record['model_type'],
+                extra={"repo": f"{record['owner']}/{record['name']}", "quality_score": record['quality_score'],
+                       "impact_score": record['impact_score'], "innovation_score": record['innovation_score'],
+                       "activity_score": record['activity_score'], "ai_framework": record['ai_framework'],
+                       "model_type": record['model_type']}
+            )
             return True
         else:
-            print(f"❌ 保存失败: {response}")
+            store_logger.error("❌ 保存失败: %s", response)
             return False
             
     except Exception as e:
-        print(f"❌ 数据库操作错误: {e}")
+        store_logger.error("❌ 数据库操作错误: %s", e)
         return False
 
 def main_enhanced_collection():
@@ -853,4 +789,6 @@ def main_enhanced_collection():
     print(f"📊 包含59个新增字段的完整数据")
 
 if __name__ == "__main__":
-    main_enhanced_collection()
+    setup_logging()
+    args = parse_profile_args()
+    run_profiled(main_enhanced_collection, args.profile, "enhanced_data_collector", args.profile_output)
@@ -85,77 +85,47 @@ class EnhancedDataProcessor(DataProcessor):
     
     async def process_repository_enhanced(self, repo_raw: Dict[str, Any]) -> Optional[RepositoryData]:
         """增强版处理单个仓库数据 - 包含真实watchers_count获取"""
-        try:
-            # 基础数据提取
-            repo_data = self.extract_basic_data(repo_raw)
-            
-            # 获取真实的watchers_count (仅对高质量项目)
-            if repo_data.quality_score >= 50:  # 只对高质量项目获取真实watchers_count
-                real_watchers = await self.get_real_watchers_count(repo_data.full_name)
-                repo_data.watchers_count = real_watchers
+        processed = await self.process_repositories_enhanced([repo_raw])
+        return processed[0] if processed else None
+    
+    async def process_repositories_enhanced(self, repos_raw: List[Dict[str, Any]], max_concurrent: int = 5) -> List[RepositoryData]:
+        """增强版批量处理 - 先补全watchers_count, 再整批分类评分一次并过滤"""
+        repos = []
+        for repo_raw in repos_raw:
+            try:
+                repos.append(self.extract_basic_data(repo_raw))
+            except Exception as e:
+                self.logger.error(f"处理仓库数据失败: {repo_raw.get('full_name', 'unknown')} | {e}")
+        
+        # 并发处理，但限制并发数以避免API限制
+        semaphore = asyncio.Semaphore(max_concurrent)
+        
+        async def fill_watchers(repo_data: RepositoryData):
+            async with semaphore:
+                # 获取真实的watchers_count (仅对高质量项目)
+                if repo_data.quality_score >= 50:  # 只对高质量项目获取真实watchers_count
+                    repo_data.watchers_count = await self.get_real_watchers_count(repo_data.full_name)
+                else:
+                    # 对于低质量项目，使用估算值 (通常是stars的5-10%)
+                    repo_data.watchers_count = max(1, int(repo_data.stargazers_count * 0.07))
+        
+        results = await asyncio.gather(*(fill_watchers(repo_data) for repo_data in repos), return_exceptions=True)
+        ready = []
+        for repo_data, result in zip(repos, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"处理仓库数据失败: {repo_data.full_name} | {result}")
             else:
-                # 对于低质量项目，使用估算值 (通常是stars的5-10%)
-                estimated_watchers = max(1, int(repo_data.stargazers_count * 0.07))
-                repo_data.watchers_count = estimated_watchers
-            
-            # AI分类
-            repo_data.ai_category = self.categorize_ai_project(repo_data)
-            
-            # 提取AI技术标签
-            repo_data.ai_tags = self.extract_ai_tags(repo_data)
-            
-            # 计算质量评分
-            repo_data.quality_score = self.calculate_quality_score(repo_data)
-            
-            # 计算趋势评分
-            repo_data.trending_score = self.calculate_trending_score(repo_data)
-            
-            # 质量过滤
-            if repo_data.quality_score < self.config.MIN_QUALITY_SCORE:
-                self.logger.debug(f"质量评分过低: {repo_data.full_name} ({repo_data.quality_score})")
-                return None
-            
-            # AI相关性检查
-            ai_relevance = self.calculate_ai_relevance(repo_data)
-            if ai_relevance < 2:
-                self.logger.debug(f"AI相关性过低: {repo_data.full_name} ({ai_relevance})")
-                return None
-            
-            return repo_data
-            
-        except Exception as e:
-            self.logger.error(f"处理仓库数据失败: {repo_raw.get('full_name', 'unknown')} | {e}")
-            return None
+                ready.append(repo_data)
+        
+        return self.score_and_filter(ready)
 
 # 批量处理增强版
 async def process_repositories_batch_enhanced(repos_raw: List[Dict[str, Any]]) -> List[RepositoryData]:
     """批量处理仓库数据 - 增强版"""
     processor = EnhancedDataProcessor()
-    processed_repos = []
     
     try:
-        # 并发处理，但限制并发数以避免API限制
-        semaphore = asyncio.Semaphore(5)  # 最多5个并发请求
-        
-        async def process_single_repo(repo_raw):
-            async with semaphore:
-                return await processor.process_repository_enhanced(repo_raw)
-        
-        # 创建所有任务
-        tasks = [process_single_repo(repo_raw) for repo_raw in repos_raw]
-        
-        # 等待所有任务完成
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # 收集有效结果
-        for result in results:
-            if isinstance(result, RepositoryData):
-                processed_repos.append(result)
-            elif isinstance(result, Exception):
-                processor.logger.error(f"处理异常: {result}")
-        
-        return processed_repos
-        
+        return await processor.process_repositories_enhanced(repos_raw, max_concurrent=5)
     finally:
         await processor.close_session()
 
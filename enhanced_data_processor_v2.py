@@ -6,26 +6,28 @@
 """
 
 import asyncio
-import aiohttp
 import logging
 from datetime import datetime, timedelta, timezone
 from typing import List, Dict, Any, Optional
 from data_processor import DataProcessor
 from config_v2 import Config, APIConfig
 from high_frequency_collector import RepositoryData
+from monitoring_system import MonitoringSystem, RETRYABLE_STATUSES, retry_delay
 
 class EnhancedDataProcessorV2(DataProcessor):
     """增强版数据处理器 v2.0 - 彻底解决watchers_count问题"""
     
-    def __init__(self):
+    def __init__(self, monitoring: Optional[MonitoringSystem] = None):
         super().__init__()
         self.session = None
+        self.monitoring = monitoring or MonitoringSystem()
         # 使用父类的config，确保配置一致
         self.logger = logging.getLogger('enhanced_processor_v2')
         
     async def initialize_session(self):
         """初始化HTTP会话"""
         if not self.session:
+            import aiohttp
             self.session = aiohttp.ClientSession(
                 headers={
                     "Authorization": f"token {self.config.GITHUB_TOKEN}",
@@ -40,24 +42,38 @@ class EnhancedDataProcessorV2(DataProcessor):
             await self.session.close()
     
     async def get_real_watchers_count(self, repo_full_name: str) -> Optional[int]:
-        """获取真正的watchers_count (subscribers_count)"""
+        """获取真正的watchers_count (subscribers_count), 403/429/5xx 时退避重试"""
         try:
-            url = f"https://api.github.com/repos/{repo_full_name}"
+            url = f"{APIConfig.GITHUB_API_BASE}/repos/{repo_full_name}"
+            max_retries = self.config.REQUEST_MAX_RETRIES
             
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    # 真正的watchers_count是subscribers_count
-                    return data.get("subscribers_count", 0)
-                elif response.status == 404:
-                    self.logger.warning(f"仓库不存在: {repo_full_name}")
-                    return None
-                elif response.status == 403:
-                    self.logger.warning(f"API限制: {repo_full_name}")
-                    return None
-                else:
-                    self.logger.warning(f"获取watchers_count失败: {repo_full_name}, 状态码: {response.status}")
-                    return None
+            for attempt in range(max_retries + 1):
+                with self.monitoring.track("github_repo") as trace:
+                    trace.bytes_out = len(url)
+                    async with self.session.get(url) as response:
+                        trace.status = status = response.status
+                        trace.bytes_in = int(response.headers.get("Content-Length") or 0)
+                        if status == 200:
+                            data = await response.json()
+                            # 真正的watchers_count是subscribers_count
+                            return data.get("subscribers_count", 0)
+                        headers = response.headers
+                
+                if status not in RETRYABLE_STATUSES or attempt == max_retries:
+                    break
+                delay = retry_delay(attempt + 1, headers, self.config.REQUEST_RETRY_BACKOFF, self.config.REQUEST_RETRY_MAX_DELAY)
+                if delay is None:
+                    break
+                self.monitoring.record_retry("github_repo")
+                await asyncio.sleep(delay)
+            
+            if status == 404:
+                self.logger.warning(f"仓库不存在: {repo_full_name}")
+            elif status == 403:
+                self.logger.warning(f"API限制: {repo_full_name}")
+            else:
+                self.logger.warning(f"获取watchers_count失败: {repo_full_name}, 状态码: {status}")
+            return None
                     
         except Exception as e:
             self.logger.error(f"获取watchers_count异常: {repo_full_name} | {e}")
@@ -72,6 +88,15 @@ class EnhancedDataProcessorV2(DataProcessor):
             if not repo_data:
                 return None
             
+            return await self.enrich_repository(repo_data)
+            
+        except Exception as e:
+            self.logger.error(f"增强版数据处理失败: {repo_raw.get('full_name', 'unknown')} | {e}")
+            return None
+    
+    async def enrich_repository(self, repo_data: RepositoryData) -> Optional[RepositoryData]:
+        """为已通过基础处理的仓库补全真实watchers_count"""
+        try:
             # 获取真正的watchers_count
             if not self.session:
                 await self.initialize_session()
@@ -89,23 +114,30 @@ class EnhancedDataProcessorV2(DataProcessor):
             return repo_data
             
         except Exception as e:
-            self.logger.error(f"增强版数据处理失败: {repo_raw.get('full_name', 'unknown')} | {e}")
+            self.logger.error(f"增强版数据处理失败: {repo_data.full_name} | {e}")
             return None
     
     async def process_repositories_batch(self, repos_raw: List[Dict[str, Any]], max_concurrent: int = 10) -> List[RepositoryData]:
-        """批量处理仓库数据 - 并发获取watchers_count"""
+        """批量处理仓库数据 - 整批基础处理后并发获取watchers_count"""
+        return await self.enrich_repositories_batch(self.process_repositories(repos_raw), max_concurrent)
+    
+    async def enrich_repositories_batch(self, repos: List[RepositoryData], max_concurrent: int = 10) -> List[RepositoryData]:
+        """批量补全已通过基础处理的仓库 (调用方先过滤/去重, 只为保留的仓库发起API请求)"""
+        return await self._run_batch(self.enrich_repository, repos, max_concurrent)
+    
+    async def _run_batch(self, handler, items: List[Any], max_concurrent: int) -> List[RepositoryData]:
         if not self.session:
             await self.initialize_session()
         
         # 使用信号量控制并发
         semaphore = asyncio.Semaphore(max_concurrent)
         
-        async def process_single_repo(repo_raw):
+        async def process_single_repo(item):
             async with semaphore:
-                return await self.process_repository_enhanced(repo_raw)
+                return await handler(item)
         
         # 并发处理所有仓库
-        tasks = [process_single_repo(repo_raw) for repo_raw in repos_raw]
+        tasks = [process_single_repo(item) for item in items]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         # 过滤掉None和异常结果
@@ -116,7 +148,7 @@ class EnhancedDataProcessorV2(DataProcessor):
             elif isinstance(result, Exception):
                 self.logger.error(f"处理仓库时发生异常: {result}")
         
-        self.logger.info(f"批量处理完成: {len(valid_repos)}/{len(repos_raw)} 个仓库处理成功")
+        self.logger.info(f"批量处理完成: {len(valid_repos)}/{len(items)} 个仓库处理成功")
         return valid_repos
 
 # 使用示例
@@ -4,8 +4,6 @@
 基于GitHub API全量指标 + AI领域特定指标 + 商业价值指标
 """
 
-from datetime import datetime, timedelta
-import requests
 
 # ================================
 # 🎯 完善的核心指标体系
@@ -208,214 +206,63 @@ ADVANCED_GITHUB_METRICS = {
     }
 }
 
+# ================================
+# 🔑 评分关键词表 (模块级只读; 多进程回填时各工作进程共享, 不在每次调用时重建)
+# ================================
+
+# 前沿技术关键词 (AI特定评分, 15分)
+AI_CUTTING_EDGE_WEIGHTS = {
+    "gpt-4": 5, "claude": 5, "llama": 4, "gemini": 4,
+    "multimodal": 4, "vision-language": 4,
+    "agent": 3, "autonomous": 3, "reasoning": 3,
+    "rag": 3, "retrieval": 3, "vector": 2
+}
+
+# 技术成熟度关键词 (AI特定评分, 10分)
+AI_MATURITY_WEIGHTS = {
+    "paper": 3, "arxiv": 3, "research": 2,
+    "production": 2, "deploy": 2, "api": 1,
+    "model": 2, "checkpoint": 2, "weights": 2
+}
+
+# 现代技术栈 (创新性评分)
+MODERN_LANGUAGE_WEIGHTS = {
+    'python': 2, 'rust': 3, 'typescript': 2,
+    'go': 2, 'julia': 3, 'swift': 2
+}
+
 # ================================
 # 📈 动态评分算法
 # ================================
 
-def calculate_enhanced_score(repo_data, additional_data=None):
-    """计算增强版项目评分 (总分100分)"""
-    
-    total_score = 0
-    
-    # 1. 基础影响力评分 (30分)
-    basic_score = calculate_basic_impact_score(repo_data)
-    total_score += basic_score
-    
-    # 2. AI特定评分 (25分)
-    ai_score = calculate_ai_specific_score(repo_data)
-    total_score += ai_score
-    
-    # 3. 社区活跃度评分 (20分)
-    community_score = calculate_community_score(repo_data, additional_data)
-    total_score += community_score
-    
-    # 4. 项目健康度评分 (15分)
-    health_score = calculate_health_score(repo_data, additional_data)
-    total_score += health_score
-    
-    # 5. 创新性和前沿性评分 (10分)
-    innovation_score = calculate_innovation_score(repo_data)
-    total_score += innovation_score
-    
-    return min(100, max(0, total_score))
+def calculate_enhanced_score(repo_data, additional_data=None, features=None):
+    """计算增强版项目评分 (总分100分, 评分模型 enhanced 当前生效版本; 已持有 RepoFeatures 时传入 features)"""
+    return _enhanced_model().score(repo_data, additional_data, features)
 
 def calculate_basic_impact_score(repo_data):
     """计算基础影响力评分 (30分)"""
-    score = 0
-    
-    # 星标评分 (15分)
-    stars = repo_data.get('stargazers_count', 0)
-    if stars >= 10000:
-        score += 15
-    elif stars >= 5000:
-        score += 12
-    elif stars >= 1000:
-        score += 10
-    elif stars >= 500:
-        score += 8
-    elif stars >= 100:
-        score += 6
-    elif stars >= 20:
-        score += 4
-    
-    # 分叉评分 (10分)
-    forks = repo_data.get('forks_count', 0)
-    if forks >= 2000:
-        score += 10
-    elif forks >= 500:
-        score += 8
-    elif forks >= 200:
-        score += 6
-    elif forks >= 50:
-        score += 4
-    elif forks >= 10:
-        score += 2
-    
-    # 关注者评分 (5分)
-    watchers = repo_data.get('watchers_count', 0)
-    if watchers >= 1000:
-        score += 5
-    elif watchers >= 200:
-        score += 3
-    elif watchers >= 50:
-        score += 2
-    
-    return score
+    return _enhanced_model().section_score("basic_impact", repo_data)
 
 def calculate_ai_specific_score(repo_data):
     """计算AI特定评分 (25分)"""
-    score = 0
-    
-    name = repo_data.get('name', '').lower()
-    description = repo_data.get('description', '').lower() if repo_data.get('description') else ''
-    full_text = f"{name} {description}"
-    
-    # 前沿技术评分 (15分)
-    cutting_edge_keywords = {
-        "gpt-4": 5, "claude": 5, "llama": 4, "gemini": 4,
-        "multimodal": 4, "vision-language": 4,
-        "agent": 3, "autonomous": 3, "reasoning": 3,
-        "rag": 3, "retrieval": 3, "vector": 2
-    }
-    
-    for keyword, weight in cutting_edge_keywords.items():
-        if keyword in full_text:
-            score += weight
-    
-    # 技术成熟度评分 (10分)
-    maturity_keywords = {
-        "paper": 3, "arxiv": 3, "research": 2,
-        "production": 2, "deploy": 2, "api": 1,
-        "model": 2, "checkpoint": 2, "weights": 2
-    }
-    
-    for keyword, weight in maturity_keywords.items():
-        if keyword in full_text:
-            score += weight
-    
-    return min(25, score)
+    return _enhanced_model().section_score("ai_specific", repo_data)
 
 def calculate_community_score(repo_data, additional_data):
     """计算社区活跃度评分 (20分)"""
-    score = 0
-    
-    # 活跃度评分 (10分)
-    pushed_at = repo_data.get('pushed_at', '')
-    if pushed_at:
-        try:
-            pushed_date = datetime.fromisoformat(pushed_at.replace('Z', '+00:00'))
-            days_since_push = (datetime.now(pushed_date.tzinfo) - pushed_date).days
-            
-            if days_since_push <= 7:
-                score += 10
-            elif days_since_push <= 30:
-                score += 8
-            elif days_since_push <= 90:
-                score += 6
-            elif days_since_push <= 365:
-                score += 3
-        except:
-            pass
-    
-    # 问题处理评分 (5分)
-    open_issues = repo_data.get('open_issues_count', 0)
-    if 5 <= open_issues <= 50:  # 健康的问题数量
-        score += 5
-    elif open_issues < 5:
-        score += 3
-    elif open_issues > 100:
-        score -= 2
-    
-    # 社区参与评分 (5分)
-    if additional_data and 'contributors' in additional_data:
-        contributors = additional_data['contributors']
-        if contributors >= 50:
-            score += 5
-        elif contributors >= 10:
-            score += 3
-        elif contributors >= 3:
-            score += 2
-    
-    return min(20, score)
+    return _enhanced_model().section_score("community", repo_data, additional_data)
 
 def calculate_health_score(repo_data, additional_data):
     """计算项目健康度评分 (15分)"""
-    score = 0
-    
-    # 许可证评分 (5分)
-    license_info = repo_data.get('license', {})
-    if license_info:
-        score += 5
-    
-    # 描述质量评分 (5分)
-    description = repo_data.get('description', '') or ''
-    if len(description) >= 100:
-        score += 5
-    elif len(description) >= 50:
-        score += 3
-    elif len(description) >= 20:
-        score += 2
-    
-    # 项目结构评分 (5分)
-    if additional_data and 'has_readme' in additional_data:
-        if additional_data.get('has_readme'):
-            score += 2
-        if additional_data.get('has_tests'):
-            score += 2
-        if additional_data.get('has_ci'):
-            score += 1
-    
-    return score
+    return _enhanced_model().section_score("health", repo_data, additional_data)
 
 def calculate_innovation_score(repo_data):
     """计算创新性评分 (10分)"""
-    score = 0
-    
-    # 新颖性评分
-    created_at = repo_data.get('created_at', '')
-    if created_at:
-        try:
-            created_date = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            days_since_creation = (datetime.now(created_date.tzinfo) - created_date).days
-            
-            if days_since_creation <= 90:  # 3个月内的新项目
-                score += 5
-            elif days_since_creation <= 365:  # 1年内
-                score += 3
-        except:
-            pass
-    
-    # 技术栈现代化评分
-    language = repo_data.get('language', '').lower()
-    modern_languages = {
-        'python': 2, 'rust': 3, 'typescript': 2, 
-        'go': 2, 'julia': 3, 'swift': 2
-    }
-    
-    if language in modern_languages:
-        score += modern_languages[language]
-    
-    return min(10, score)
+    return _enhanced_model().section_score("innovation", repo_data)
+
+def _enhanced_model():
+    # 评分模型声明引用本模块的权重表, 延迟导入避免循环依赖
+    from scoring_models import get_model
+    return get_model("enhanced")
 
 # ================================
 # 🎯 数据库增强字段
@@ -7,14 +7,18 @@
 import os
 import json
 import time
-import requests
 from datetime import datetime, timedelta
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, lazy_import, LazyCloudflareClient
+from config_v2 import APIConfig
 from enhanced_metrics_config import *
+from repo_features import get_feature_cache
+from scoring_models import get_model
+
+# 延迟导入 (首次发起请求时才加载)
+requests = lazy_import("requests")
 
 # 加载环境变量
-load_dotenv()
+load_env()
 
 # API配置
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
@@ -30,7 +34,7 @@ GITHUB_HEADERS = {
 }
 
 # Cloudflare客户端
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
 
 def fetch_enhanced_repo_data(owner, repo_name):
     """获取GitHub仓库的完整增强数据"""
@@ -39,7 +43,7 @@ def fetch_enhanced_repo_data(owner, repo_name):
         print(f"📊 正在获取 {owner}/{repo_name} 的增强数据...")
         
         # 基础仓库信息
-        repo_url = f"https://api.github.com/repos/{owner}/{repo_name}"
+        repo_url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}"
         repo_response = requests.get(repo_url, headers=GITHUB_HEADERS)
         
         if repo_response.status_code != 200:
@@ -88,7 +92,7 @@ def fetch_enhanced_repo_data(owner, repo_name):
 def fetch_contributors_data(owner, repo_name):
     """获取贡献者数据"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/contributors"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/contributors"
         response = requests.get(url, headers=GITHUB_HEADERS)
         
         if response.status_code == 200:
@@ -107,7 +111,7 @@ def fetch_commits_data(owner, repo_name):
     try:
         # 获取最近30天的提交
         since_date = (datetime.now() - timedelta(days=30)).isoformat()
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/commits"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/commits"
         params = {'since': since_date, 'per_page': 100}
         
         response = requests.get(url, headers=GITHUB_HEADERS, params=params)
@@ -134,7 +138,7 @@ def fetch_commits_data(owner, repo_name):
 def fetch_releases_data(owner, repo_name):
     """获取发布数据"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/releases"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/releases"
         response = requests.get(url, headers=GITHUB_HEADERS)
         
         if response.status_code == 200:
@@ -162,7 +166,7 @@ def fetch_issues_data(owner, repo_name):
     """获取问题数据"""
     try:
         # 获取开放问题
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/issues"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/issues"
         params = {'state': 'open', 'per_page': 100}
         response = requests.get(url, headers=GITHUB_HEADERS, params=params)
         
@@ -191,7 +195,7 @@ def fetch_issues_data(owner, repo_name):
 def fetch_pulls_data(owner, repo_name):
     """获取Pull Request数据"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/pulls"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/pulls"
         params = {'state': 'all', 'per_page': 100}
         response = requests.get(url, headers=GITHUB_HEADERS, params=params)
         
@@ -215,7 +219,7 @@ def fetch_pulls_data(owner, repo_name):
 def fetch_languages_data(owner, repo_name):
     """获取编程语言数据"""
     try:
-        url = f"https://api.github.com/repos/{owner}/{repo_name}/languages"
+        url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/languages"
         response = requests.get(url, headers=GITHUB_HEADERS)
         
         if response.status_code == 200:
@@ -254,7 +258,7 @@ def analyze_repo_content(owner, repo_name):
         }
         
         # 检查README
-        readme_url = f"https://api.github.com/repos/{owner}/{repo_name}/readme"
+        readme_url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/readme"
         readme_response = requests.get(readme_url, headers=GITHUB_HEADERS)
         
         if readme_response.status_code == 200:
@@ -265,7 +269,7 @@ def analyze_repo_content(owner, repo_name):
             analysis['readme_quality_score'] = min(10, content_size // 1000)
         
         # 检查仓库内容结构
-        contents_url = f"https://api.github.com/repos/{owner}/{repo_name}/contents"
+        contents_url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}/contents"
         contents_response = requests.get(contents_url, headers=GITHUB_HEADERS)
         
         if contents_response.status_code == 200:
@@ -321,8 +325,46 @@ def calculate_issue_response_quality(issues):
     response_rate = responded_issues / len(issues) if issues else 0
     return int(response_rate * 10)  # 转换为0-10分
 
-def analyze_ai_specific_indicators(enhanced_data):
-    """分析AI特定指标"""
+# AI特定分析关键词表 (模块级只读, 多进程回填时各工作进程共享)
+AI_FRAMEWORK_KEYWORDS = {
+    'pytorch': ['pytorch', 'torch'],
+    'tensorflow': ['tensorflow', 'tf'],
+    'huggingface': ['huggingface', 'transformers'],
+    'langchain': ['langchain'],
+    'openai': ['openai', 'gpt'],
+    'anthropic': ['claude', 'anthropic']
+}
+
+AI_MODEL_TYPE_KEYWORDS = {
+    'llm': ['llm', 'language model', 'gpt', 'bert', 'transformer'],
+    'cv': ['computer vision', 'image', 'detection', 'yolo', 'opencv'],
+    'nlp': ['nlp', 'natural language', 'text processing'],
+    'multimodal': ['multimodal', 'vision-language', 'clip'],
+    'rag': ['rag', 'retrieval', 'vector database'],
+    'agent': ['agent', 'autonomous', 'planning']
+}
+
+CUTTING_EDGE_KEYWORDS = [
+    'gpt-4', 'claude', 'llama', 'gemini', 'multimodal',
+    'agent', 'reasoning', 'sota', '2024'
+]
+RESEARCH_KEYWORDS = ['paper', 'arxiv', 'research', 'publication', 'cite']
+DEPLOYMENT_KEYWORDS = ['api', 'docker', 'deploy', 'production', 'demo']
+
+# 商业价值关键词表
+COMMERCIAL_KEYWORD_WEIGHTS = {
+    'enterprise': 5, 'business': 3, 'commercial': 4,
+    'production': 4, 'api': 3, 'service': 3,
+    'platform': 4, 'saas': 5, 'cloud': 3
+}
+
+INDUSTRY_BACKING_WEIGHTS = {
+    'google': 8, 'microsoft': 8, 'openai': 10, 'meta': 8,
+    'amazon': 6, 'nvidia': 8, 'anthropic': 9, 'huggingface': 7
+}
+
+def analyze_ai_specific_indicators(enhanced_data, features=None):
+    """分析AI特定指标 (features: 调用方已持有的 RepoFeatures, 缺省时从共享特征缓存获取)"""
     repo_data = enhanced_data['basic_info']
     content_analysis = enhanced_data['content_analysis']
     
@@ -337,81 +379,46 @@ def analyze_ai_specific_indicators(enhanced_data):
         'practical_deployment_score': 0
     }
     
-    name = repo_data.get('name', '').lower()
-    description = repo_data.get('description', '').lower() if repo_data.get('description') else ''
-    full_text = f"{name} {description}"
+    # 名称+描述的小写文本与关键词命中来自共享特征缓存
+    features = features or get_feature_cache().get(repo_data)
     
     # 检测AI框架
-    frameworks = {
-        'pytorch': ['pytorch', 'torch'],
-        'tensorflow': ['tensorflow', 'tf'],
-        'huggingface': ['huggingface', 'transformers'],
-        'langchain': ['langchain'],
-        'openai': ['openai', 'gpt'],
-        'anthropic': ['claude', 'anthropic']
-    }
-    
-    for framework, keywords in frameworks.items():
-        if any(keyword in full_text for keyword in keywords):
+    for framework, keywords in AI_FRAMEWORK_KEYWORDS.items():
+        if features.any(keywords, "name_description"):
             ai_analysis['ai_framework'] = framework
             break
     
     # 检测模型类型
-    model_types = {
-        'llm': ['llm', 'language model', 'gpt', 'bert', 'transformer'],
-        'cv': ['computer vision', 'image', 'detection', 'yolo', 'opencv'],
-        'nlp': ['nlp', 'natural language', 'text processing'],
-        'multimodal': ['multimodal', 'vision-language', 'clip'],
-        'rag': ['rag', 'retrieval', 'vector database'],
-        'agent': ['agent', 'autonomous', 'planning']
-    }
-    
-    for model_type, keywords in model_types.items():
-        if any(keyword in full_text for keyword in keywords):
+    for model_type, keywords in AI_MODEL_TYPE_KEYWORDS.items():
+        if features.any(keywords, "name_description"):
             ai_analysis['model_type'] = model_type
             break
     
     # 计算前沿性评分
-    cutting_edge_keywords = [
-        'gpt-4', 'claude', 'llama', 'gemini', 'multimodal', 
-        'agent', 'reasoning', 'sota', '2024'
-    ]
-    
-    ai_analysis['cutting_edge_score'] = sum(
-        3 for keyword in cutting_edge_keywords 
-        if keyword in full_text
-    )
+    ai_analysis['cutting_edge_score'] = 3 * len(features.hits(CUTTING_EDGE_KEYWORDS, "name_description"))
     
     # 计算研究质量评分
-    research_keywords = ['paper', 'arxiv', 'research', 'publication', 'cite']
-    ai_analysis['research_quality_score'] = sum(
-        2 for keyword in research_keywords 
-        if keyword in full_text
-    )
+    ai_analysis['research_quality_score'] = 2 * len(features.hits(RESEARCH_KEYWORDS, "name_description"))
     
     # 计算实用部署评分
-    deployment_keywords = ['api', 'docker', 'deploy', 'production', 'demo']
-    ai_analysis['practical_deployment_score'] = sum(
-        2 for keyword in deployment_keywords 
-        if keyword in full_text
-    )
+    ai_analysis['practical_deployment_score'] = 2 * len(features.hits(DEPLOYMENT_KEYWORDS, "name_description"))
     
     # 检查是否有模型文件
-    if any(keyword in full_text for keyword in ['model', 'checkpoint', 'weights']):
+    if features.any(['model', 'checkpoint', 'weights'], "name_description"):
         ai_analysis['has_model_files'] = True
     
     # 检查是否有研究论文
-    if any(keyword in full_text for keyword in ['paper', 'arxiv', 'research']):
+    if features.any(['paper', 'arxiv', 'research'], "name_description"):
         ai_analysis['has_research_paper'] = True
     
     # 检查是否可部署
-    if any(keyword in full_text for keyword in ['api', 'docker', 'deploy']):
+    if features.any(['api', 'docker', 'deploy'], "name_description"):
         ai_analysis['has_deployment_config'] = True
     
     return ai_analysis
 
-def calculate_commercial_potential(enhanced_data):
-    """计算商业潜力评分"""
+def calculate_commercial_potential(enhanced_data, features=None):
+    """计算商业潜力评分 (features 同 analyze_ai_specific_indicators)"""
     repo_data = enhanced_data['basic_info']
     
     score = 0
@@ -432,34 +439,51 @@ def calculate_commercial_potential(enhanced_data):
     elif forks > 200:
         score += 6
     
-    # 基于描述的商业指标
-    description = repo_data.get('description', '').lower() if repo_data.get('description') else ''
-    
-    commercial_keywords = {
-        'enterprise': 5, 'business': 3, 'commercial': 4,
-        'production': 4, 'api': 3, 'service': 3,
-        'platform': 4, 'saas': 5, 'cloud': 3
-    }
+    # 基于描述的商业指标 (小写文本来自共享特征缓存)
+    features = features or get_feature_cache().get(repo_data)
     
-    for keyword, weight in commercial_keywords.items():
-        if keyword in description:
+    for keyword, weight in COMMERCIAL_KEYWORD_WEIGHTS.items():
+        if features.has(keyword, "description"):
             score += weight
     
     # 行业支持评估
-    industry_indicators = {
-        'google': 8, 'microsoft': 8, 'openai': 10, 'meta': 8,
-        'amazon': 6, 'nvidia': 8, 'anthropic': 9, 'huggingface': 7
-    }
-    
-    full_text = f"{repo_data.get('full_name', '')} {description}".lower()
-    
-    for company, weight in industry_indicators.items():
-        if company in full_text:
+    for company, weight in INDUSTRY_BACKING_WEIGHTS.items():
+        if features.has(company, "full_name_description"):
             score += weight
             break
     
     return min(20, score)
 
+def get_maturity_level(enhanced_score):
+    """综合评分 → 成熟度等级"""
+    if enhanced_score >= 80:
+        return 'production'
+    elif enhanced_score >= 60:
+        return 'mature'
+    elif enhanced_score >= 40:
+        return 'developing'
+    return 'experimental'
+
+def get_innovation_level(innovation_score):
+    """前沿性+研究质量评分 → 创新水平"""
+    if innovation_score >= 15:
+        return 'cutting-edge'
+    elif innovation_score >= 10:
+        return 'high'
+    elif innovation_score >= 5:
+        return 'medium'
+    return 'low'
+
+def get_commercial_level(commercial_score):
+    """商业潜力评分 → 商业潜力等级"""
+    if commercial_score >= 15:
+        return 'very-high'
+    elif commercial_score >= 10:
+        return 'high'
+    elif commercial_score >= 5:
+        return 'medium'
+    return 'low'
+
 def create_enhanced_repo_record(enhanced_data):
     """创建增强版仓库记录"""
     repo_data = enhanced_data['basic_info']
@@ -471,11 +495,14 @@ def create_enhanced_repo_record(enhanced_data):
     languages = enhanced_data['languages']
     content_analysis = enhanced_data['content_analysis']
     
+    # 各项分析与评分共用同一份特征
+    features = get_feature_cache().get(repo_data)
+    
     # AI特定分析
-    ai_analysis = analyze_ai_specific_indicators(enhanced_data)
+    ai_analysis = analyze_ai_specific_indicators(enhanced_data, features)
     
     # 商业价值分析
-    commercial_score = calculate_commercial_potential(enhanced_data)
+    commercial_score = calculate_commercial_potential(enhanced_data, features)
     
     # 计算综合评分
     enhanced_score = calculate_enhanced_score(repo_data, {
@@ -483,17 +510,10 @@ def create_enhanced_repo_record(enhanced_data):
         'has_readme': content_analysis['has_readme'],
         'has_tests': content_analysis['has_tests'],
         'has_ci': content_analysis['has_ci_cd']
-    })
+    }, features)
     
     # 确定成熟度等级
-    if enhanced_score >= 80:
-        maturity_level = 'production'
-    elif enhanced_score >= 60:
-        maturity_level = 'mature'
-    elif enhanced_score >= 40:
-        maturity_level = 'developing'
-    else:
-        maturity_level = 'experimental'
+    maturity_level = get_maturity_level(enhanced_score)
     
     # 确定社区健康状态
     community_score = (contributors['count'] * 2 + 
@@ -510,26 +530,10 @@ def create_enhanced_repo_record(enhanced_data):
         community_health = 'poor'
     
     # 确定创新水平
-    innovation_score = ai_analysis['cutting_edge_score'] + ai_analysis['research_quality_score']
-    
-    if innovation_score >= 15:
-        innovation_level = 'cutting-edge'
-    elif innovation_score >= 10:
-        innovation_level = 'high'
-    elif innovation_score >= 5:
-        innovation_level = 'medium'
-    else:
-        innovation_level = 'low'
+    innovation_level = get_innovation_level(ai_analysis['cutting_edge_score'] + ai_analysis['research_quality_score'])
     
     # 确定商业潜力等级
-    if commercial_score >= 15:
-        commercial_potential = 'very-high'
-    elif commercial_score >= 10:
-        commercial_potential = 'high'
-    elif commercial_score >= 5:
-        commercial_potential = 'medium'
-    else:
-        commercial_potential = 'low'
+    commercial_potential = get_commercial_level(commercial_score)
     
     # 构建完整记录
     record = {
@@ -550,6 +554,7 @@ def create_enhanced_repo_record(enhanced_data):
         
         # 增强评分
         'enhanced_score': enhanced_score,
+        'score_model_version': get_model("enhanced").id,
         'ai_maturity_level': maturity_level,
         'community_health': community_health,
         'innovation_level': innovation_level,
@@ -616,9 +621,9 @@ def save_enhanced_record_to_database(record):
             ai_framework, model_type, cutting_edge_score, research_quality_score, practical_deployment_score,
             primary_language, languages_count, repo_size_kb, has_tests, has_ci_cd, has_documentation,
             license_type, enterprise_adoption_score, dependency_count, github_topics, technology_stack,
-            fork_to_star_ratio, code_quality_score, maintenance_score, sync_time
+            fork_to_star_ratio, code_quality_score, maintenance_score, sync_time, score_model_version
         ) VALUES (
-            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
         )
         ON CONFLICT(id) DO UPDATE SET
             stars=excluded.stars, forks=excluded.forks, watchers_count=excluded.watchers_count,
@@ -629,7 +634,8 @@ def save_enhanced_record_to_database(record):
             last_commit_date=excluded.last_commit_date, commit_frequency_score=excluded.commit_frequency_score,
             cutting_edge_score=excluded.cutting_edge_score, research_quality_score=excluded.research_quality_score,
             practical_deployment_score=excluded.practical_deployment_score, code_quality_score=excluded.code_quality_score,
-            maintenance_score=excluded.maintenance_score, sync_time=excluded.sync_time
+            maintenance_score=excluded.maintenance_score, sync_time=excluded.sync_time,
+            score_model_version=excluded.score_model_version
         """
         
         params = [
@@ -646,7 +652,7 @@ def save_enhanced_record_to_database(record):
             record['has_tests'], record['has_ci_cd'], record['has_documentation'], record['license_type'],
             record['enterprise_adoption_score'], record['dependency_count'], record['github_topics'],
             record['technology_stack'], record['fork_to_star_ratio'], record['code_quality_score'],
-            record['maintenance_score'], record['sync_time']
+            record['maintenance_score'], record['sync_time'], record['score_model_version']
         ]
         
         response = cloudflare_client.d1.database.query(
@@ -6,12 +6,11 @@
 """
 
 import os
-import requests
 import json
 import time
 from datetime import datetime, timedelta
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, lazy_import, LazyCloudflareClient
+from config_v2 import APIConfig
 from enhanced_search_config import (
     ENHANCED_SEARCH_CONFIG, TECH_KEYWORD_GROUPS, TRENDING_KEYWORDS,
     LANGUAGE_COMBINATIONS, SORT_STRATEGIES, ENHANCED_FILTER_CONFIG,
@@ -22,8 +21,11 @@ from enhanced_search_config import (
 # 从原配置导入必要的函数
 from search_config import AI_RELEVANCE_THRESHOLD
 
+# 延迟导入 (首次发起请求时才加载)
+requests = lazy_import("requests")
+
 # 加载环境变量
-load_dotenv()
+load_env()
 
 # --- 配置部分 ---
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
@@ -35,10 +37,10 @@ if not all([GITHUB_TOKEN, CLOUDFLARE_API_TOKEN, CLOUDFLARE_ACCOUNT_ID, D1_DATABA
     raise ValueError("环境变量未设置。请确保所有必要的环境变量都已正确配置。")
 
 # --- 初始化客户端 ---
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
 
 # GitHub API设置
-github_url = "https://api.github.com/search/repositories"
+github_url = f"{APIConfig.GITHUB_API_BASE}/search/repositories"
 github_headers = {
     "Authorization": f"token {GITHUB_TOKEN}",
     "Accept": "application/vnd.github.v3+json"
@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+本地模拟 GitHub API 服务
+========================================
+
+用于离线、可复现地压测 MAX_CONCURRENT / BATCH_SIZE / enrich_repositories_batch 信号量等并发设置。
+模拟 /search/repositories、/repos/{owner}/{repo} 及其子资源, 支持:
+- 可配置的延迟分布 (fixed / uniform / lognormal, 搜索与核心接口分别配置)
+- X-RateLimit-* 限频响应头与一级限频 (core 每小时 / search 每分钟)
+- 二级限频注入 (按概率或并发数超限返回 403 + Retry-After)
+- 5xx 错误注入
+- 分页 (page/per_page 与 Link 响应头)
+
+用法:
+    python fake_github_server.py --port 8081 --size 5000 --search-latency lognormal:300:0.4
+    GITHUB_API_BASE=http://127.0.0.1:8081 python optimized_fast_collector.py
+
+    GET /_stats 返回请求数、状态码分布、并发峰值和延迟分位数, POST /_reset 重置统计与限频
+"""
+
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import itertools
+from typing import Dict, List, Any, Optional, Tuple
+
+from aiohttp import web
+
+from benchmark_collector import generate_corpus, load_corpus, query_keyword
+
+FAKE_GITHUB_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8081,
+    "corpus_size": 1000,
+    "search_latency": "lognormal:250:0.5",     # 毫秒
+    "core_latency": "lognormal:80:0.5",
+    "core_limit": 5000,                         # 每小时
+    "search_limit": 30,                         # 每分钟
+    "secondary_limit_rate": 0.0,                # 随机二级限频概率
+    "max_concurrent": 100,                      # 超过该并发数触发二级限频
+    "retry_after": 60,                          # 二级限频 Retry-After 秒数
+    "error_rate": 0.0,                          # 随机5xx概率
+    "search_max_results": 1000,                 # GitHub搜索最多返回1000条
+}
+
+_RESOURCE_WINDOWS = {"core": 3600, "search": 60}
+_SUB_RESOURCES = ("contributors", "commits", "pulls", "issues", "releases",
+                  "languages", "readme", "contents", "tags", "subscribers", "stargazers")
+
+
+def parse_latency(spec: str):
+    """
+    解析延迟分布, 返回生成秒数的函数
+    fixed:ms | uniform:min_ms:max_ms | lognormal:median_ms:sigma | none
+    """
+    parts = spec.split(":")
+    kind = parts[0]
+    if kind in ("none", "0"):
+        return lambda rng: 0.0
+    if kind == "fixed":
+        value = float(parts[1]) / 1000
+        return lambda rng: value
+    if kind == "uniform":
+        low, high = float(parts[1]) / 1000, float(parts[2]) / 1000
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal":
+        mu, sigma = math.log(float(parts[1]) / 1000), float(parts[2])
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    raise ValueError(f"未知延迟分布: {spec}")
+
+
+class RateLimitBucket:
+    """固定窗口限频桶 (与GitHub一致: 窗口结束时整体重置)"""
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.reset_at = int(time.time()) + window
+        self.used = 0
+
+    def consume(self) -> bool:
+        now = time.time()
+        if now >= self.reset_at:
+            self.reset_at = int(now) + self.window
+            self.used = 0
+        if self.used >= self.limit:
+            return False
+        self.used += 1
+        return True
+
+    def headers(self, resource: str) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.limit - self.used)),
+            "X-RateLimit-Reset": str(self.reset_at),
+            "X-RateLimit-Used": str(self.used),
+            "X-RateLimit-Resource": resource,
+        }
+
+
+class FakeGitHubServer:
+    """模拟 GitHub API"""
+
+    def __init__(self, corpus: Dict[str, Any], seed: int = 0, **options):
+        self.options = dict(FAKE_GITHUB_CONFIG, **{k: v for k, v in options.items() if v is not None})
+        self.search = corpus.get("search", {})
+        self.repos = corpus.get("repos", {})
+        self.search_keys = {keyword.lower(): keyword for keyword in self.search}
+        self.search_index = self._build_search_index()
+        self.rng = random.Random(seed)
+        self.latency = {
+            "search": parse_latency(self.options["search_latency"]),
+            "core": parse_latency(self.options["core_latency"]),
+        }
+        self.logger = logging.getLogger('ai_collector_v2.fake_github')
+        self.reset()
+
+    def _build_search_index(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """语料中全部仓库 (按ID去重) 的小写 名称/描述/topics 文本, 供搜索匹配"""
+        index, seen = [], set()
+        for item in itertools.chain(itertools.chain.from_iterable(self.search.values()), self.repos.values()):
+            if item.get("id") in seen:
+                continue
+            seen.add(item.get("id"))
+            text = " ".join([item.get("name") or "", item.get("description") or ""] + list(item.get("topics") or []))
+            index.append((text.lower(), item))
+        return index
+
+    def reset(self):
+        """重置统计与限频桶"""
+        self.buckets = {
+            "core": RateLimitBucket(self.options["core_limit"], _RESOURCE_WINDOWS["core"]),
+            "search": RateLimitBucket(self.options["search_limit"], _RESOURCE_WINDOWS["search"]),
+        }
+        self.in_flight = 0
+        self.stats = {"requests": 0, "in_flight_peak": 0, "status": {}, "routes": {}, "latencies": []}
+
+    # ------------------------------------------------------------------
+    # 应用
+    # ------------------------------------------------------------------
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self.github_middleware])
+        app.router.add_get('/search/repositories', self.handle_search)
+        app.router.add_get('/repos/{owner}/{repo}', self.handle_repo)
+        app.router.add_get('/repos/{owner}/{repo}/{resource}', self.handle_sub_resource)
+        app.router.add_get('/rate_limit', self.handle_rate_limit)
+        app.router.add_get('/user', self.handle_user)
+        app.router.add_get('/_stats', self.handle_stats)
+        app.router.add_post('/_reset', self.handle_reset)
+        return app
+
+    @web.middleware
+    async def github_middleware(self, request: web.Request, handler):
+        """延迟、并发、限频与错误注入"""
+        if request.path.startswith('/_'):
+            return await handler(request)
+
+        resource = "search" if request.path.startswith('/search/') else "core"
+        self.stats["requests"] += 1
+        self.in_flight += 1
+        self.stats["in_flight_peak"] = max(self.stats["in_flight_peak"], self.in_flight)
+        started = time.perf_counter()
+        try:
+            await asyncio.sleep(self.latency[resource](self.rng))
+            response = self._inject_failure(resource)
+            if response is None:
+                bucket = self.buckets[resource]
+                if not bucket.consume():
+                    response = self._error(403, "API rate limit exceeded for user.",
+                                           "https://docs.github.com/rest/overview/resources-in-the-rest-api#rate-limiting")
+                else:
+                    response = await handler(request)
+            response.headers.update(self.buckets[resource].headers(resource))
+        finally:
+            self.in_flight -= 1
+
+        elapsed = time.perf_counter() - started
+        self.stats["latencies"].append(elapsed)
+        status = str(response.status)
+        self.stats["status"][status] = self.stats["status"].get(status, 0) + 1
+        route = "search" if resource == "search" else request.match_info.get("resource", request.path.strip('/').split('/')[0])
+        self.stats["routes"][route] = self.stats["routes"].get(route, 0) + 1
+        return response
+
+    def _inject_failure(self, resource: str) -> Optional[web.Response]:
+        """二级限频与5xx注入"""
+        opts = self.options
+        if self.in_flight > opts["max_concurrent"] or self.rng.random() < opts["secondary_limit_rate"]:
+            response = self._error(403, "You have exceeded a secondary rate limit. Please wait a few minutes before you try again.",
+                                   "https://docs.github.com/rest/overview/rate-limits-for-the-rest-api#about-secondary-rate-limits")
+            response.headers["Retry-After"] = str(opts["retry_after"])
+            return response
+        if self.rng.random() < opts["error_rate"]:
+            return self._error(self.rng.choice([500, 502, 503]), "Server Error")
+        return None
+
+    @staticmethod
+    def _error(status: int, message: str, doc_url: str = "") -> web.Response:
+        payload = {"message": message}
+        if doc_url:
+            payload["documentation_url"] = doc_url
+        return web.json_response(payload, status=status)
+
+    # ------------------------------------------------------------------
+    # 分页
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _page_params(request: web.Request, default: int = 30) -> Tuple[int, int]:
+        try:
+            per_page = max(1, min(100, int(request.query.get("per_page", default))))
+            page = max(1, int(request.query.get("page", 1)))
+        except ValueError:
+            per_page, page = default, 1
+        return page, per_page
+
+    @staticmethod
+    def _link_header(request: web.Request, page: int, per_page: int, total: int) -> Optional[str]:
+        """生成GitHub风格的 Link 响应头"""
+        last = max(1, math.ceil(total / per_page))
+        if last <= 1:
+            return None
+
+        def url(target: int) -> str:
+            query = dict(request.query, page=str(target), per_page=str(per_page))
+            return str(request.url.with_query(query))
+
+        links = []
+        if page < last:
+            links.append(f'<{url(page + 1)}>; rel="next"')
+            links.append(f'<{url(last)}>; rel="last"')
+        if page > 1:
+            links.append(f'<{url(1)}>; rel="first"')
+            links.append(f'<{url(page - 1)}>; rel="prev"')
+        return ", ".join(links)
+
+    def _paginated(self, request: web.Request, items: List[Any], total: Optional[int] = None,
+                   wrap=None) -> web.Response:
+        page, per_page = self._page_params(request)
+        total = len(items) if total is None else total
+        start = (page - 1) * per_page
+        body = items[start:start + per_page]
+        response = web.json_response(wrap(body, total) if wrap else body)
+        link = self._link_header(request, page, per_page, total)
+        if link:
+            response.headers["Link"] = link
+        return response
+
+    # ------------------------------------------------------------------
+    # 路由
+    # ------------------------------------------------------------------
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        query = request.query.get("q", "")
+        if not query:
+            return self._error(422, "Validation Failed")
+        # 与GitHub一致大小写不敏感: 录制的结果在前, 再补充名称/描述/topics 包含全部关键词的仓库
+        keyword = query_keyword(query).lower()
+        terms = keyword.split()
+        items = list(self.search.get(self.search_keys.get(keyword), []))
+        seen = {item.get("id") for item in items}
+        items += [item for text, item in self.search_index
+                  if item.get("id") not in seen and all(term in text for term in terms)]
+        if request.query.get("sort") == "stars":
+            reverse = request.query.get("order", "desc") == "desc"
+            items = sorted(items, key=lambda item: item.get("stargazers_count", 0), reverse=reverse)
+        visible = items[:self.options["search_max_results"]]
+        return self._paginated(
+            request, visible, wrap=lambda body, _: {
+                "total_count": len(items), "incomplete_results": False, "items": body
+            }
+        )
+
+    def _get_repo(self, request: web.Request) -> Optional[Dict[str, Any]]:
+        return self.repos.get(f"{request.match_info['owner']}/{request.match_info['repo']}")
+
+    async def handle_repo(self, request: web.Request) -> web.Response:
+        repo = self._get_repo(request)
+        if not repo:
+            return self._error(404, "Not Found")
+        return web.json_response(repo)
+
+    async def handle_sub_resource(self, request: web.Request) -> web.Response:
+        repo = self._get_repo(request)
+        resource = request.match_info["resource"]
+        if not repo or resource not in _SUB_RESOURCES:
+            return self._error(404, "Not Found")
+
+        # 按仓库ID确定性生成子资源, 同一仓库多次请求结果一致
+        rng = random.Random(repo["id"])
+        stars = repo.get("stargazers_count", 0)
+
+        if resource == "languages":
+            languages = [repo.get("language") or "Python", "Shell", "Dockerfile", "Jupyter Notebook"]
+            return web.json_response({lang: rng.randint(1_000, 500_000) for lang in languages[:rng.randint(1, 4)]})
+        if resource == "readme":
+            size = rng.randint(200, 20_000)
+            return web.json_response({"name": "README.md", "path": "README.md", "size": size, "encoding": "base64"})
+
+        count = {
+            "contributors": max(1, int(math.sqrt(stars) / 2)),
+            "commits": rng.randint(20, 5_000),
+            "pulls": rng.randint(0, 300),
+            "issues": rng.randint(0, 500),
+            "releases": rng.randint(0, 40),
+            "contents": rng.randint(5, 40),
+            "tags": rng.randint(0, 60),
+            "subscribers": repo.get("subscribers_count", 0),
+            "stargazers": stars,
+        }[resource]
+
+        page, per_page = self._page_params(request)
+        start = (page - 1) * per_page
+        body = [self._sub_item(resource, repo, index, rng) for index in range(start, min(count, start + per_page))]
+        response = web.json_response(body)
+        link = self._link_header(request, page, per_page, count)
+        if link:
+            response.headers["Link"] = link
+        return response
+
+    @staticmethod
+    def _sub_item(resource: str, repo: Dict[str, Any], index: int, rng: random.Random) -> Dict[str, Any]:
+        """生成子资源列表中的单个元素 (只包含采集脚本使用的字段)"""
+        if resource == "commits":
+            date = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() - index * 3600 * 7))
+            return {"sha": f"{repo['id']:x}{index:08x}", "commit": {"author": {"date": date}}}
+        if resource in ("pulls", "issues"):
+            item = {"number": index + 1, "state": "open" if rng.random() < 0.3 else "closed"}
+            if resource == "issues" and rng.random() < 0.4:
+                item["pull_request"] = {}
+            return item
+        if resource == "releases":
+            return {"id": index + 1, "tag_name": f"v{index}.0.0"}
+        if resource == "contents":
+            return {"name": f"file_{index}.py", "type": "file"}
+        if resource == "tags":
+            return {"name": f"v{index}.0.0"}
+        return {"login": f"user{index}", "contributions": max(1, 1000 // (index + 1))}
+
+    async def handle_rate_limit(self, request: web.Request) -> web.Response:
+        # /rate_limit 不消耗配额
+        resources = {}
+        for name, bucket in self.buckets.items():
+            resources[name] = {"limit": bucket.limit, "remaining": max(0, bucket.limit - bucket.used),
+                               "reset": bucket.reset_at, "used": bucket.used}
+        return web.json_response({"resources": resources, "rate": resources["core"]})
+
+    async def handle_user(self, request: web.Request) -> web.Response:
+        return web.json_response({"login": "fake-user", "id": 1})
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.get_stats())
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({"reset": True})
+
+    def get_stats(self) -> Dict[str, Any]:
+        """请求统计与延迟分位数"""
+        latencies = sorted(self.stats["latencies"])
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "requests": self.stats["requests"],
+            "in_flight": self.in_flight,
+            "in_flight_peak": self.stats["in_flight_peak"],
+            "status": self.stats["status"],
+            "routes": self.stats["routes"],
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+        }
+
+
+async def start_fake_github_server(corpus: Optional[Dict[str, Any]] = None, host: str = "127.0.0.1",
+                                   port: int = 0, **options) -> Tuple[web.AppRunner, FakeGitHubServer, str]:
+    """
+    在当前事件循环中启动模拟服务 (port=0 自动分配端口)
+    返回: (runner, server, base_url), 结束时调用 await runner.cleanup()
+    """
+    corpus = corpus or generate_corpus(FAKE_GITHUB_CONFIG["corpus_size"])
+    server = FakeGitHubServer(corpus, **options)
+    runner = web.AppRunner(server.create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_host, bound_port = runner.addresses[0][:2]
+    return runner, server, f"http://{bound_host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟 GitHub API 服务")
+    parser.add_argument("--host", default=FAKE_GITHUB_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=FAKE_GITHUB_CONFIG["port"])
+    parser.add_argument("--fixture", help="语料文件 (默认生成合成语料)")
+    parser.add_argument("--size", type=int, default=FAKE_GITHUB_CONFIG["corpus_size"], help="合成语料仓库数")
+    parser.add_argument("--search-latency", help="搜索接口延迟分布, 如 lognormal:250:0.5")
+    parser.add_argument("--core-latency", help="核心接口延迟分布, 如 uniform:20:120")
+    parser.add_argument("--core-limit", type=int, help="core 每小时配额")
+    parser.add_argument("--search-limit", type=int, help="search 每分钟配额")
+    parser.add_argument("--secondary-limit-rate", type=float, help="随机二级限频概率")
+    parser.add_argument("--max-concurrent", type=int, help="超过该并发数触发二级限频")
+    parser.add_argument("--error-rate", type=float, help="随机5xx概率")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    corpus = load_corpus(args.fixture) if args.fixture else generate_corpus(args.size)
+    server = FakeGitHubServer(
+        corpus, seed=args.seed,
+        search_latency=args.search_latency, core_latency=args.core_latency,
+        core_limit=args.core_limit, search_limit=args.search_limit,
+        secondary_limit_rate=args.secondary_limit_rate, max_concurrent=args.max_concurrent,
+        error_rate=args.error_rate,
+    )
+    print(f"🧪 模拟 GitHub API: http://{args.host}:{args.port} ({len(server.repos)} 个仓库)")
+    print(f"   export GITHUB_API_BASE=http://{args.host}:{args.port}")
+    print(f"   配置: {json.dumps(server.options, ensure_ascii=False)}")
+    web.run_app(server.create_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -167,101 +167,10 @@ def build_enhanced_search_queries():
 # ================================
 
 def calculate_comprehensive_score(repo_data):
-    """基于多维指标计算项目综合评分"""
-    
-    score = 0
-    max_score = 50  # 总分50分
-    
-    # 1. 星标评分 (最高10分)
-    stars = repo_data.get('stargazers_count', 0)
-    if stars >= 1000:
-        score += 10
-    elif stars >= 500:
-        score += 8
-    elif stars >= 100:
-        score += 6
-    elif stars >= 20:
-        score += 4
-    
-    # 2. 分叉评分 (最高8分)
-    forks = repo_data.get('forks_count', 0)
-    if forks >= 200:
-        score += 8
-    elif forks >= 50:
-        score += 6
-    elif forks >= 10:
-        score += 4
-    elif forks >= 2:
-        score += 2
-    
-    # 3. 活跃度评分 (最高10分)
-    pushed_at = repo_data.get('pushed_at', '')
-    if pushed_at:
-        try:
-            pushed_date = datetime.fromisoformat(pushed_at.replace('Z', '+00:00'))
-            days_since_push = (datetime.now(pushed_date.tzinfo) - pushed_date).days
-            
-            if days_since_push <= 7:
-                score += 10  # 极活跃
-            elif days_since_push <= 30:
-                score += 8   # 活跃
-            elif days_since_push <= 90:
-                score += 6   # 中等
-            elif days_since_push <= 365:
-                score += 2   # 不活跃
-        except:
-            pass
-    
-    # 4. 新鲜度评分 (最高8分)
-    created_at = repo_data.get('created_at', '')
-    if created_at:
-        try:
-            created_date = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            days_since_creation = (datetime.now(created_date.tzinfo) - created_date).days
-            
-            if days_since_creation <= 30:
-                score += 8   # 全新
-            elif days_since_creation <= 90:
-                score += 6   # 近期
-            elif days_since_creation <= 365:
-                score += 4   # 成熟
-            else:
-                score += 2   # 老牌
-        except:
-            pass
-    
-    # 5. 质量评分 (最高9分)
-    # 许可证评分 (最高5分)
-    license_info = repo_data.get('license', {})
-    if license_info and license_info.get('key'):
-        license_key = license_info.get('key', '')
-        preferred_licenses = ['mit', 'apache-2.0', 'gpl-3.0', 'bsd-3-clause']
-        if license_key.lower() in preferred_licenses:
-            score += 5
-        else:
-            score += 3
-    
-    # 描述评分 (最高4分)
-    description = repo_data.get('description', '') or ''
-    desc_length = len(description)
-    if desc_length >= 100:
-        score += 4
-    elif desc_length >= 50:
-        score += 3
-    elif desc_length >= 20:
-        score += 2
-    
-    # 6. 社区评分 (最高5分) - 基于星标和分叉的比例
-    if stars > 0 and forks > 0:
-        fork_ratio = forks / stars
-        if fork_ratio >= 0.1:  # 10%以上的分叉率说明项目实用性强
-            score += 5
-        elif fork_ratio >= 0.05:
-            score += 3
-        elif fork_ratio >= 0.02:
-            score += 2
-    
-    return min(score, max_score)
+    """基于多维指标计算项目综合评分 (0-50分, 评分模型 comprehensive 当前生效版本)"""
+    # 评分模型声明引用本模块的配置表, 延迟导入避免循环依赖
+    from scoring_models import get_model
+    return get_model("comprehensive").score(repo_data)
 
 # ================================
 # 🎯 AI项目特定指标
@@ -41,6 +41,7 @@ class RepositoryData:
     # 评分信息
     quality_score: float = 0.0
     trending_score: float = 0.0
+    score_model_version: str = ""       # 计算 quality_score 的评分模型 (名称@版本)
     
     # 采集信息
     collection_round: int = 1
@@ -76,6 +77,7 @@ class RepositoryData:
             'ai_tags': ','.join(self.ai_tags) if self.ai_tags else '',
             'quality_score': self.quality_score,
             'trending_score': self.trending_score,
+            'score_model_version': self.score_model_version,
             'collection_round': self.collection_round,
             'last_fork_count': self.last_fork_count,
             'fork_growth': self.fork_growth,
@@ -113,6 +115,7 @@ class RepositoryData:
             ai_tags=ai_tags,
             quality_score=data.get('quality_score', 0.0),
             trending_score=data.get('trending_score', 0.0),
+            score_model_version=data.get('score_model_version') or '',
             collection_round=data.get('collection_round', 1),
             last_fork_count=data.get('last_fork_count', 0),
             fork_growth=data.get('fork_growth', 0),
@@ -125,6 +128,26 @@ class RepositoryData:
         content = f"{self.id}_{self.full_name}_{self.stargazers_count}_{self.forks_count}_{self.updated_at}"
         return hashlib.md5(content.encode()).hexdigest()
     
+    def calculate_fingerprint(self) -> str:
+        """
+        计算持久化字段指纹 (blake2b, 非加密用途)
+        覆盖UPSERT写入的全部内容字段, 不含 collection_round/collection_hash/collection_time;
+        评分取整, 避免浮点微小波动导致无意义写入; 含评分模型版本, 版本升级后即使分数相同也会写入新版本
+        """
+        import hashlib
+        content = "\x1f".join(str(value) for value in (
+            self.id, self.full_name, self.name, self.owner,
+            self.description or '', self.url,
+            self.stargazers_count, self.forks_count, self.watchers_count,
+            self.created_at, self.updated_at, self.pushed_at, self.language or '',
+            ','.join(self.topics) if self.topics else '',
+            self.ai_category or '',
+            ','.join(self.ai_tags) if self.ai_tags else '',
+            int(round(self.quality_score or 0)), int(round(self.trending_score or 0)),
+            self.last_fork_count, self.fork_growth, self.score_model_version or ''
+        ))
+        return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+    
     def is_ai_related(self) -> bool:
         """判断是否为AI相关项目"""
         ai_keywords = [
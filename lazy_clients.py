@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+延迟初始化的外部客户端、重量级依赖与环境变量加载
+功能: 导入脚本时不再构建 Cloudflare 客户端、不再导入 Cloudflare SDK/requests, 首次使用时才初始化
+更新时间: 2025-09-16
+"""
+
+import os
+import sys
+import threading
+import importlib.util
+from types import ModuleType
+from typing import Any, Dict, Optional
+
+_env_loaded = False
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def load_env() -> bool:
+    """加载 .env (整个进程只执行一次), 返回是否找到并加载了文件"""
+    global _env_loaded
+    if _env_loaded:
+        return False
+    _env_loaded = True
+    from dotenv import load_dotenv
+    return load_dotenv()
+
+
+def lazy_import(name: str) -> ModuleType:
+    """延迟导入模块: 首次访问属性时才执行模块代码 (已导入则直接返回)"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def get_cloudflare_client(api_token: Optional[str] = None):
+    """按API令牌缓存的 Cloudflare 客户端 (首次调用时才导入SDK)"""
+    token = api_token if api_token is not None else os.environ.get("CLOUDFLARE_API_TOKEN")
+    key = token or ""
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                from cloudflare import Cloudflare
+                client = _clients[key] = Cloudflare(api_token=token)
+    return client
+
+
+class LazyCloudflareClient:
+    """
+    Cloudflare 客户端代理: 可作为模块级 cloudflare_client 使用,
+    首次访问属性 (如 cloudflare_client.d1) 时才构建真实客户端
+    """
+
+    def __init__(self, api_token: Optional[str] = None):
+        self._api_token = api_token
+        self._client = None
+
+    def _resolve(self):
+        if self._client is None:
+            self._client = get_cloudflare_client(self._api_token)
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._resolve(), name)
+
+    def __repr__(self) -> str:
+        state = "已初始化" if self._client is not None else "未初始化"
+        return f"<LazyCloudflareClient {state}>"
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+排行榜索引 - 采集流水线中用有界最小堆增量维护 Top-K 榜单
+功能: 按质量分/趋势分/星标速度/AI分类维护 Top-K, 每次运行持久化快照, 邮件摘要直接从内存读取 (O(K), 无需数据库排序)
+更新时间: 2025-09-16
+"""
+
+import os
+import json
+import heapq
+import itertools
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+from config_v2 import Config
+
+LEADERBOARD_CONFIG = {
+    "keep_runs": 30,            # 保留的历史运行快照数
+    "digest_size": 10,          # 邮件摘要中每个榜单展示的仓库数
+    "category_prefix": "category:",
+}
+
+# 全局榜单: 名称 -> (标题, 评分字段)
+LEADERBOARDS = {
+    "quality": ("🏆 质量分榜", "quality_score"),
+    "trending": ("🔥 趋势榜", "trending_score"),
+    "stars_velocity": ("⭐ 星标速度榜 (7天)", "stars_per_day"),
+}
+
+LATEST_SNAPSHOT = "latest.json"
+
+logger = logging.getLogger('ai_collector_v2.leaderboards')
+
+
+class TopK:
+    """
+    有界 Top-K: 最小堆保存当前入榜的 K 个条目, 堆顶即入榜门槛
+    同一 key 重复提交时替换旧条目 (旧堆元素惰性失效), 每次提交 O(log K)
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._heap: List[list] = []         # [score, seq, key, payload, valid]
+        self._entries: Dict[Any, list] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def threshold(self) -> Optional[float]:
+        """当前入榜门槛 (未满时为 None)"""
+        if len(self._entries) < self.k:
+            return None
+        self._drop_stale()
+        return self._heap[0][0]
+
+    def push(self, key: Any, score: float, payload: Any = None) -> bool:
+        """提交一个条目, 返回是否在榜"""
+        current = self._entries.get(key)
+        if current is not None:
+            if current[0] == score:
+                current[3] = payload
+                return True
+            current[4] = False
+            del self._entries[key]
+        elif self.k <= 0 or (len(self._entries) >= self.k and score <= self.threshold()):
+            return False
+
+        entry = [score, next(self._seq), key, payload, True]
+        heapq.heappush(self._heap, entry)
+        self._entries[key] = entry
+        while len(self._entries) > self.k:
+            self._drop_stale()
+            evicted = heapq.heappop(self._heap)
+            del self._entries[evicted[2]]
+        if len(self._heap) > 2 * self.k + 16:
+            self._compact()
+        return key in self._entries
+
+    def items(self, n: Optional[int] = None) -> List[Tuple[Any, float, Any]]:
+        """按分数降序返回 [(key, score, payload)], 先入榜者在同分时靠前"""
+        entries = sorted(self._entries.values(), key=lambda e: (-e[0], e[1]))
+        return [(e[2], e[0], e[3]) for e in entries[:n]]
+
+    def _drop_stale(self):
+        while self._heap and not self._heap[0][4]:
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if entry[4]]
+        heapq.heapify(self._heap)
+
+
+class LeaderboardTracker:
+    """排行榜跟踪器 - 仓库流经处理阶段时增量入榜, 运行结束时持久化快照"""
+
+    def __init__(self, size: Optional[int] = None, directory: Optional[str] = None):
+        self.config = Config()
+        self.size = size if size is not None else self.config.LEADERBOARD_SIZE
+        self.directory = directory if directory is not None else self.config.LEADERBOARD_DIR
+        self.boards: Dict[str, TopK] = {name: TopK(self.size) for name in LEADERBOARDS}
+        self.run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.observed = 0
+
+    # ------------------------------------------------------------------
+    # 批量 API
+    # ------------------------------------------------------------------
+
+    def update_batch(self, repos: Iterable[Any], trending_engine: Any = None) -> int:
+        """
+        用本批仓库更新各榜单
+        repos: RepositoryData 或 GitHub API 字典; trending_engine 提供 7天星标速度
+        返回: 本批处理的仓库数
+        """
+        count = 0
+        for repo in repos:
+            entry = self._entry(repo, trending_engine)
+            if not entry["id"]:
+                continue
+            for name, (_, field) in LEADERBOARDS.items():
+                self.boards[name].push(entry["id"], entry[field], entry)
+            if entry["ai_category"]:
+                self._category_board(entry["ai_category"]).push(entry["id"], entry["quality_score"], entry)
+            count += 1
+        self.observed += count
+        return count
+
+    def top(self, board: str, n: Optional[int] = None) -> List[Dict[str, Any]]:
+        """读取榜单 (已按分数降序)"""
+        topk = self.boards.get(board)
+        return [payload for _, _, payload in topk.items(n)] if topk else []
+
+    def categories(self) -> List[str]:
+        prefix = LEADERBOARD_CONFIG["category_prefix"]
+        return sorted(name[len(prefix):] for name in self.boards if name.startswith(prefix))
+
+    def snapshot(self, n: Optional[int] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """所有榜单 → 条目列表"""
+        return {name: self.top(name, n) for name in self.boards}
+
+    def digest(self, n: Optional[int] = None) -> Dict[str, Any]:
+        """邮件摘要数据: 全局榜单 + 各分类榜首"""
+        n = n or LEADERBOARD_CONFIG["digest_size"]
+        return {
+            "boards": {LEADERBOARDS[name][0]: self.top(name, n) for name in LEADERBOARDS},
+            "categories": {category: self.top(LEADERBOARD_CONFIG["category_prefix"] + category, 1)[0]
+                           for category in self.categories()},
+        }
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def save(self) -> Optional[str]:
+        """原子写入本次运行快照与 latest.json, 并清理过期快照; 返回快照路径"""
+        if not self.directory:
+            return None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            payload = json.dumps({
+                "run_id": self.run_id,
+                "saved_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                "size": self.size,
+                "observed": self.observed,
+                "boards": self.snapshot(),
+            }, ensure_ascii=False, separators=(',', ':'))
+            path = os.path.join(self.directory, f"leaderboards_{self.run_id}.json")
+            for target in (path, os.path.join(self.directory, LATEST_SNAPSHOT)):
+                tmp_file = f"{target}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(payload)
+                os.replace(tmp_file, target)
+            self._prune()
+            logger.info(f"🏅 排行榜快照已保存: {path} | {len(self.boards)} 个榜单")
+            return path
+        except Exception as e:
+            logger.error(f"保存排行榜快照失败: {self.directory} | {e}")
+            return None
+
+    def _prune(self):
+        snapshots = sorted(name for name in os.listdir(self.directory)
+                           if name.startswith("leaderboards_") and name.endswith(".json"))
+        for name in snapshots[:-LEADERBOARD_CONFIG["keep_runs"]]:
+            os.remove(os.path.join(self.directory, name))
+
+    # ------------------------------------------------------------------
+    # 内部方法
+    # ------------------------------------------------------------------
+
+    def _category_board(self, category: str) -> TopK:
+        name = LEADERBOARD_CONFIG["category_prefix"] + category
+        board = self.boards.get(name)
+        if board is None:
+            board = self.boards[name] = TopK(self.size)
+        return board
+
+    @staticmethod
+    def _entry(repo: Any, trending_engine: Any) -> Dict[str, Any]:
+        get = repo.get if isinstance(repo, dict) else lambda key, default=None: getattr(repo, key, default)
+        repo_id = get('id')
+        velocity = trending_engine.get_velocity(repo_id) if trending_engine is not None and repo_id else None
+        owner = get('owner')
+        return {
+            "id": repo_id,
+            "full_name": get('full_name', ''),
+            "url": get('url') or get('html_url', ''),
+            "stars": get('stargazers_count', 0) or 0,
+            "quality_score": float(get('quality_score', 0) or 0),
+            "trending_score": float(get('trending_score', 0) or 0),
+            "stars_per_day": round(velocity["7d"]["stars_per_day"], 2) if velocity else 0.0,
+            "ai_category": get('ai_category', '') or '',
+            "owner": owner.get('login', '') if isinstance(owner, dict) else owner or '',
+        }
+
+
+def load_latest_snapshot(directory: Optional[str] = None) -> Dict[str, Any]:
+    """读取最近一次运行的榜单快照 (不存在时返回空字典)"""
+    path = os.path.join(directory if directory is not None else Config().LEADERBOARD_DIR, LATEST_SNAPSHOT)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"读取排行榜快照失败: {path} | {e}")
+        return {}
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+本地 D1 兼容服务 (SQLite)
+========================================
+
+实现 Cloudflare D1 query/raw 接口的请求与响应结构 (result[0].results、批量语句),
+支持延迟与错误注入, 用于在没有 Cloudflare 账号时端到端压测存储批量化和并发改动。
+
+用法:
+    python local_d1_server.py --port 8787 --db local_d1.sqlite --latency lognormal:40:0.5
+    CLOUDFLARE_BASE_URL=http://127.0.0.1:8787/client/v4 python optimized_fast_collector.py
+
+    GET /_stats 返回请求数、语句数、状态码分布和延迟分位数, POST /_reset 重置统计
+
+进程内使用 (不经过HTTP) 可直接用 LocalD1Client 替换 Cloudflare 客户端。
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import asyncio
+import logging
+import argparse
+import threading
+from types import SimpleNamespace
+from typing import Dict, List, Any, Optional, Tuple
+
+from aiohttp import web
+
+from config_v2 import DatabaseConfig
+
+LOCAL_D1_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8787,
+    "database": ":memory:",
+    "latency": "none",              # 每个请求的延迟分布 (毫秒), 同 fake_github_server
+    "error_rate": 0.0,              # 随机错误概率
+    "error_status": 500,
+    # 启动时依次执行的建表/升级脚本 (已存在的列等错误会被忽略)
+    "schema_files": [
+        "create_table.sql", "upgrade_table.sql", "add_key_fields.sql",
+        "database_upgrade_v2.sql", "enhanced_database_upgrade.sql",
+        "add_score_model_version.sql",
+    ],
+}
+
+D1_ERROR_CODE = 7500
+
+
+def split_statements(sql: str) -> List[str]:
+    """按分号拆分SQL语句 (借助 sqlite3.complete_statement 正确处理字符串与触发器)"""
+    statements = []
+    buffer = ""
+    for part in sql.split(";"):
+        buffer += part + ";"
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip().rstrip(";").strip()
+            if statement and not all(line.strip().startswith("--") for line in statement.splitlines() if line.strip()):
+                statements.append(statement)
+            buffer = ""
+    tail = buffer.rstrip(";").strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+class D1Error(Exception):
+    """D1 查询错误 (对应响应中的 errors 列表)"""
+
+
+class LocalD1Database:
+    """SQLite 执行器, 输出与 D1 query/raw 接口一致的结果结构"""
+
+    def __init__(self, path: str = ":memory:", schema_files: Optional[List[str]] = None):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()  # 连接在线程间共享, 事务串行执行
+        self.conn.execute(DatabaseConfig.CREATE_TABLE_SQL)
+        self.logger = logging.getLogger('ai_collector_v2.local_d1')
+        for schema_file in schema_files or []:
+            self.apply_schema_file(schema_file)
+        self.conn.commit()
+
+    def apply_schema_file(self, path: str) -> int:
+        """执行建表/升级脚本, 忽略单条语句错误, 返回成功执行的语句数"""
+        if not os.path.exists(path):
+            return 0
+        with open(path, 'r', encoding='utf-8') as f:
+            statements = split_statements(f.read())
+        applied = 0
+        for statement in statements:
+            try:
+                self.conn.execute(statement)
+                applied += 1
+            except sqlite3.Error as e:
+                self.logger.debug(f"跳过建表语句: {statement[:60]} | {e}")
+        return applied
+
+    def seed(self, rows: List[Dict[str, Any]], table: str = DatabaseConfig.TABLE_NAME):
+        """预置记录"""
+        for row in rows:
+            columns = ", ".join(row)
+            placeholders = ", ".join("?" * len(row))
+            self.conn.execute(f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})", list(row.values()))
+        self.conn.commit()
+
+    def _run(self, sql: str, params: List[Any], raw: bool) -> Dict[str, Any]:
+        started = time.perf_counter()
+        changes_before = self.conn.total_changes
+        try:
+            cursor = self.conn.execute(sql, params)
+            rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            raise D1Error(f"{e}: SQLITE_ERROR")
+
+        columns = [d[0] for d in cursor.description] if cursor.description else []
+        changes = self.conn.total_changes - changes_before
+        meta = {
+            "served_by": "local-d1",
+            "duration": round((time.perf_counter() - started) * 1000, 3),
+            "changes": changes,
+            "last_row_id": cursor.lastrowid or 0,
+            "changed_db": changes > 0,
+            "rows_read": len(rows),
+            "rows_written": changes,
+        }
+        if raw:
+            results = {"columns": columns, "rows": [list(row) for row in rows]}
+        else:
+            results = [dict(zip(columns, row)) for row in rows]
+        return {"results": results, "success": True, "meta": meta}
+
+    def execute(self, sql: str, params: Optional[List[Any]] = None, raw: bool = False) -> List[Dict[str, Any]]:
+        """
+        执行 query 请求: 单条语句可绑定参数; 多条语句按顺序执行, 每条语句返回一个结果
+        任一语句失败时整体回滚
+        """
+        params = list(params or [])
+        statements = split_statements(sql)
+        if not statements:
+            raise D1Error("No SQL statements detected.")
+        if params and len(statements) > 1:
+            raise D1Error("Parameters can only be bound to a single statement; use batch instead.")
+        return self._transaction([(statement, params) for statement in statements], raw)
+
+    def execute_batch(self, batch: List[Dict[str, Any]], raw: bool = False) -> List[Dict[str, Any]]:
+        """执行批量请求 [{"sql", "params"}], 在同一事务中执行"""
+        return self._transaction([(item["sql"], list(item.get("params") or [])) for item in batch], raw)
+
+    def _transaction(self, statements: List[Tuple[str, List[Any]]], raw: bool) -> List[Dict[str, Any]]:
+        with self.lock:
+            try:
+                results = [self._run(sql, params, raw) for sql, params in statements]
+                self.conn.commit()
+                return results
+            except D1Error:
+                self.conn.rollback()
+                raise
+
+
+class LocalD1Client:
+    """
+    进程内 D1 客户端替身
+    接口与 Cloudflare SDK 的 client.d1.database.query 一致, 返回 response.result[0].results
+    """
+
+    def __init__(self, path: str = ":memory:", stats=None, database: Optional[LocalD1Database] = None):
+        self.db = database or LocalD1Database(path)
+        self.stats = stats
+        self.d1 = SimpleNamespace(database=self)
+
+    def seed(self, rows: List[Dict[str, Any]], table: str = DatabaseConfig.TABLE_NAME):
+        self.db.seed(rows, table)
+
+    def query(self, database_id: str = None, account_id: str = None, sql: str = "",
+              params: Optional[List[Any]] = None, **kwargs) -> SimpleNamespace:
+        if self.stats is not None:
+            self.stats.requests += 1
+            self.stats.bytes_out += len(json.dumps({"sql": sql, "params": params or []}, default=str))
+        try:
+            results = self.db.execute(sql, params)
+        except D1Error as e:
+            errors = [{"code": D1_ERROR_CODE, "message": str(e)}]
+            if self.stats is not None:
+                self.stats.bytes_in += len(json.dumps(errors))
+            return SimpleNamespace(success=False, errors=errors, result=[])
+
+        if self.stats is not None:
+            self.stats.bytes_in += len(json.dumps(results, default=str))
+        return SimpleNamespace(
+            success=True, errors=[],
+            result=[SimpleNamespace(results=r["results"], success=True, meta=r["meta"]) for r in results]
+        )
+
+
+class LocalD1Server:
+    """D1 兼容 HTTP 服务"""
+
+    def __init__(self, database: LocalD1Database, seed: int = 0, **options):
+        from fake_github_server import parse_latency
+
+        self.options = dict(LOCAL_D1_CONFIG, **{k: v for k, v in options.items() if v is not None})
+        self.db = database
+        self.rng = random.Random(seed)
+        self.latency = parse_latency(self.options["latency"])
+        # D1 单库串行执行写入, 用锁模拟
+        self.lock = asyncio.Lock()
+        self.reset()
+
+    def reset(self):
+        self.stats = {"requests": 0, "statements": 0, "status": {}, "rows_read": 0,
+                      "rows_written": 0, "latencies": []}
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        for prefix in ("/client/v4", ""):
+            base = prefix + "/accounts/{account_id}/d1/database/{database_id}"
+            app.router.add_post(base + "/query", self.handle_query)
+            app.router.add_post(base + "/raw", self.handle_raw)
+        app.router.add_get('/_stats', self.handle_stats)
+        app.router.add_post('/_reset', self.handle_reset)
+        return app
+
+    @staticmethod
+    def _envelope(result: Any, status: int = 200, errors: Optional[List[Dict[str, Any]]] = None) -> web.Response:
+        return web.json_response(
+            {"result": result, "success": not errors, "errors": errors or [], "messages": []},
+            status=status
+        )
+
+    async def handle_query(self, request: web.Request) -> web.Response:
+        return await self._handle(request, raw=False)
+
+    async def handle_raw(self, request: web.Request) -> web.Response:
+        return await self._handle(request, raw=True)
+
+    async def _handle(self, request: web.Request, raw: bool) -> web.Response:
+        started = time.perf_counter()
+        self.stats["requests"] += 1
+        response = await self._execute(request, raw)
+        self.stats["latencies"].append(time.perf_counter() - started)
+        status = str(response.status)
+        self.stats["status"][status] = self.stats["status"].get(status, 0) + 1
+        return response
+
+    async def _execute(self, request: web.Request, raw: bool) -> web.Response:
+        await asyncio.sleep(self.latency(self.rng))
+        if self.rng.random() < self.options["error_rate"]:
+            return self._envelope(None, self.options["error_status"],
+                                  [{"code": D1_ERROR_CODE, "message": "D1_ERROR: injected error"}])
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return self._envelope(None, 400, [{"code": D1_ERROR_CODE, "message": "Invalid JSON body"}])
+
+        try:
+            async with self.lock:
+                if isinstance(body, dict) and "batch" in body:
+                    results = self.db.execute_batch(body["batch"], raw)
+                elif isinstance(body, list):
+                    results = self.db.execute_batch(body, raw)
+                else:
+                    results = self.db.execute(body.get("sql", ""), body.get("params"), raw)
+        except D1Error as e:
+            return self._envelope(None, 400, [{"code": D1_ERROR_CODE, "message": str(e)}])
+
+        self.stats["statements"] += len(results)
+        for result in results:
+            self.stats["rows_read"] += result["meta"]["rows_read"]
+            self.stats["rows_written"] += result["meta"]["rows_written"]
+        return self._envelope(results)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.get_stats())
+
+    async def handle_reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({"reset": True})
+
+    def get_stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.stats["latencies"])
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1)
+
+        return {
+            "requests": self.stats["requests"],
+            "statements": self.stats["statements"],
+            "rows_read": self.stats["rows_read"],
+            "rows_written": self.stats["rows_written"],
+            "status": self.stats["status"],
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+        }
+
+
+async def start_local_d1_server(database: Optional[LocalD1Database] = None, host: str = "127.0.0.1",
+                                port: int = 0, **options) -> Tuple[web.AppRunner, LocalD1Server, str]:
+    """
+    在当前事件循环中启动本地D1服务 (port=0 自动分配端口)
+    返回: (runner, server, base_url), base_url 可直接作为 Cloudflare(base_url=...) 使用
+    """
+    server = LocalD1Server(database or LocalD1Database(), **options)
+    runner = web.AppRunner(server.create_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_host, bound_port = runner.addresses[0][:2]
+    return runner, server, f"http://{bound_host}:{bound_port}/client/v4"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地 D1 兼容服务 (SQLite)")
+    parser.add_argument("--host", default=LOCAL_D1_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=LOCAL_D1_CONFIG["port"])
+    parser.add_argument("--db", default=LOCAL_D1_CONFIG["database"], help="SQLite 文件路径 (默认内存库)")
+    parser.add_argument("--latency", help="请求延迟分布, 如 lognormal:40:0.5")
+    parser.add_argument("--error-rate", type=float, help="随机错误概率")
+    parser.add_argument("--error-status", type=int, help="注入错误的HTTP状态码")
+    parser.add_argument("--no-schema", action="store_true", help="不执行仓库内的 repos 建表/升级脚本")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    database = LocalD1Database(args.db, [] if args.no_schema else LOCAL_D1_CONFIG["schema_files"])
+    server = LocalD1Server(database, seed=args.seed, latency=args.latency,
+                           error_rate=args.error_rate, error_status=args.error_status)
+    print(f"🗄️ 本地 D1 服务: http://{args.host}:{args.port}/client/v4 ({args.db})")
+    print(f"   export CLOUDFLARE_BASE_URL=http://{args.host}:{args.port}/client/v4")
+    web.run_app(server.create_app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+仪表板物化聚合表 - 写入时增量维护的分组计数/求和与Top-N榜单
+功能: 在 repos 上安装触发器, 任一脚本 upsert/删除仓库时同步更新汇总表; 提供安装/重建/校验命令
+更新时间: 2025-09-16
+
+表结构:
+    repo_aggregate_members  每个仓库对汇总的贡献 (维度取值 + 指标原值), 用于撤销旧贡献
+    repo_dimension_stats    (维度, 取值) → 仓库数、各指标的和与非空计数 (平均值 = 和 / 非空计数)
+    repo_leaderboards       Top-N 榜单 (综合评分榜、前沿技术榜)
+    repo_aggregate_meta     重建时间等元数据, 存在 built_at 表示汇总表可用
+
+用法:
+    python materialized_aggregates.py install    # 建表 + 全量重建 + 安装触发器
+    python materialized_aggregates.py rebuild    # 从 repos 全量重建 (建议在同步任务空闲时执行)
+    python materialized_aggregates.py check      # 对比汇总表与全表扫描结果
+    python materialized_aggregates.py drop       # 移除触发器与汇总表
+"""
+
+import sys
+import math
+import logging
+import argparse
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+SOURCE_TABLE = "repos"
+MEMBERS_TABLE = "repo_aggregate_members"
+STATS_TABLE = "repo_dimension_stats"
+BOARDS_TABLE = "repo_leaderboards"
+META_TABLE = "repo_aggregate_meta"
+TRIGGER_PREFIX = "trg_repo_agg_"
+
+# 全表汇总使用的虚拟维度
+ALL_DIMENSION = "_all"
+
+# 分组维度 (NULL 取值记为 '')
+AGGREGATE_DIMENSIONS = [
+    "ai_maturity_level", "innovation_level", "commercial_potential",
+    "primary_language", "ai_framework", "community_health",
+]
+
+# 汇总指标: 每个指标维护 <指标>_sum 与 <指标>_n (非空计数), 与 AVG/SUM 的 NULL 语义一致
+AGGREGATE_METRICS = [
+    "enhanced_score", "stars", "contributors_count", "cutting_edge_score",
+    "research_quality_score", "enterprise_adoption_score", "commit_frequency_score",
+]
+
+# 榜单保存的列
+LEADERBOARD_COLUMNS = [
+    "id", "name", "owner", "enhanced_score", "stars", "forks",
+    "ai_maturity_level", "community_health", "innovation_level", "commercial_potential",
+    "cutting_edge_score", "last_commit_date",
+]
+
+# Top-N 榜单: rank_column 为第一排序键, 新仓库该值不低于榜单最小值时才刷新榜单
+LEADERBOARDS = {
+    "top_projects": {
+        "order_by": "enhanced_score DESC",
+        "rank_column": "enhanced_score",
+        "filter": None,
+        "limit": 20,
+    },
+    "trending_projects": {
+        "order_by": "cutting_edge_score DESC, enhanced_score DESC",
+        "rank_column": "cutting_edge_score",
+        "filter": "{row}cutting_edge_score > 10",
+        "limit": 15,
+    },
+}
+
+logger = logging.getLogger('ai_collector_v2.aggregates')
+
+
+# ================================
+# 🧱 SQL 生成
+# ================================
+
+def _watched_columns() -> List[str]:
+    """影响汇总或榜单展示的列, 仅这些列被更新时触发维护"""
+    columns = AGGREGATE_DIMENSIONS + AGGREGATE_METRICS + LEADERBOARD_COLUMNS
+    return [c for c in dict.fromkeys(columns) if c != "id"]
+
+
+def create_table_statements() -> List[str]:
+    """汇总表建表语句"""
+    dimension_columns = ", ".join(f"{d} TEXT NOT NULL" for d in AGGREGATE_DIMENSIONS)
+    metric_columns = ", ".join(f"{m} REAL" for m in AGGREGATE_METRICS)
+    stat_columns = ", ".join(f"{m}_sum REAL NOT NULL DEFAULT 0, {m}_n INTEGER NOT NULL DEFAULT 0"
+                             for m in AGGREGATE_METRICS)
+    board_columns = ", ".join(LEADERBOARD_COLUMNS)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {MEMBERS_TABLE} (id TEXT PRIMARY KEY, {dimension_columns}, {metric_columns})",
+        f"CREATE TABLE IF NOT EXISTS {STATS_TABLE} (dimension TEXT NOT NULL, value TEXT NOT NULL, "
+        f"repo_count INTEGER NOT NULL DEFAULT 0, {stat_columns}, PRIMARY KEY (dimension, value))",
+        f"CREATE TABLE IF NOT EXISTS {BOARDS_TABLE} (board TEXT NOT NULL, {board_columns}, PRIMARY KEY (board, id))",
+        f"CREATE TABLE IF NOT EXISTS {META_TABLE} (key TEXT PRIMARY KEY, value TEXT)",
+    ]
+
+
+def _member_values(row: str) -> str:
+    """仓库行 → 贡献行的取值表达式 (row 为 'NEW.' 或 '')"""
+    return ", ".join(
+        [f"{row}id"]
+        + [f"IFNULL({row}{d}, '')" for d in AGGREGATE_DIMENSIONS]
+        + [f"{row}{m}" for m in AGGREGATE_METRICS]
+    )
+
+
+def _member_columns() -> str:
+    return ", ".join(["id"] + AGGREGATE_DIMENSIONS + AGGREGATE_METRICS)
+
+
+def _stat_columns() -> str:
+    return ", ".join(["dimension", "value", "repo_count"]
+                     + [f"{m}_{suffix}" for m in AGGREGATE_METRICS for suffix in ("sum", "n")])
+
+
+def _dimension_value(dimension: str, row: str) -> str:
+    return f"'{ALL_DIMENSION}'" if dimension == ALL_DIMENSION else f"{row}{dimension}"
+
+
+def _add_contribution(dimension: str) -> str:
+    """贡献行 NEW 计入汇总 (upsert)"""
+    values = ", ".join(
+        [f"'{dimension}'", _dimension_value(dimension, "NEW."), "1"]
+        + [f"IFNULL(NEW.{m}, 0), NEW.{m} IS NOT NULL" for m in AGGREGATE_METRICS]
+    )
+    updates = ", ".join(
+        ["repo_count = repo_count + 1"]
+        + [f"{m}_{s} = {m}_{s} + excluded.{m}_{s}" for m in AGGREGATE_METRICS for s in ("sum", "n")]
+    )
+    return (f"INSERT INTO {STATS_TABLE} ({_stat_columns()}) VALUES ({values}) "
+            f"ON CONFLICT (dimension, value) DO UPDATE SET {updates}")
+
+
+def _remove_contribution(dimension: str) -> str:
+    """贡献行 OLD 从汇总中撤销"""
+    updates = ", ".join(
+        ["repo_count = repo_count - 1"]
+        + [f"{m}_sum = {m}_sum - IFNULL(OLD.{m}, 0), {m}_n = {m}_n - (OLD.{m} IS NOT NULL)" for m in AGGREGATE_METRICS]
+    )
+    return (f"UPDATE {STATS_TABLE} SET {updates} "
+            f"WHERE dimension = '{dimension}' AND value = {_dimension_value(dimension, 'OLD.')}")
+
+
+def _rebuild_dimension(dimension: str) -> str:
+    """从贡献表按维度分组重建汇总"""
+    value = f"'{ALL_DIMENSION}'" if dimension == ALL_DIMENSION else dimension
+    metrics = ", ".join(f"IFNULL(SUM({m}), 0), COUNT({m})" for m in AGGREGATE_METRICS)
+    return (f"INSERT INTO {STATS_TABLE} ({_stat_columns()}) "
+            f"SELECT '{dimension}', {value}, COUNT(*), {metrics} FROM {MEMBERS_TABLE} GROUP BY 2")
+
+
+def board_refresh_statements(board: str) -> List[str]:
+    """按索引顺序读取前N行, 替换榜单内容"""
+    spec = LEADERBOARDS[board]
+    columns = ", ".join(LEADERBOARD_COLUMNS)
+    where = f" WHERE {spec['filter'].format(row='')}" if spec["filter"] else ""
+    return [
+        f"DELETE FROM {BOARDS_TABLE} WHERE board = '{board}'",
+        f"INSERT INTO {BOARDS_TABLE} (board, {columns}) SELECT '{board}', {columns} FROM {SOURCE_TABLE}"
+        f"{where} ORDER BY {spec['order_by']} LIMIT {spec['limit']}",
+    ]
+
+
+def _trigger(name: str, event: str, statements: List[str], when: Optional[str] = None) -> str:
+    body = "".join(f"\n    {statement};" for statement in statements)
+    condition = f"\nWHEN {when}" if when else ""
+    return f"CREATE TRIGGER IF NOT EXISTS {TRIGGER_PREFIX}{name} {event}{condition}\nBEGIN{body}\nEND"
+
+
+def trigger_names() -> List[str]:
+    names = ["repos_insert", "repos_update", "repos_delete", "members_insert", "members_delete"]
+    for board in LEADERBOARDS:
+        names += [f"board_{board}_insert", f"board_{board}_delete"]
+    return [f"{TRIGGER_PREFIX}{name}" for name in names]
+
+
+def create_trigger_statements() -> List[str]:
+    """
+    触发器链: repos 写入 → 贡献表 (先删旧贡献再插入新贡献) → 汇总表/榜单
+    INSERT OR REPLACE 删除旧行时不触发删除触发器, 因此插入触发器先删除同ID的旧贡献
+    """
+    dimensions = [ALL_DIMENSION] + AGGREGATE_DIMENSIONS
+    insert_member = f"INSERT INTO {MEMBERS_TABLE} ({_member_columns()}) VALUES ({_member_values('NEW.')})"
+    watched = ", ".join(_watched_columns())
+
+    statements = [
+        _trigger("repos_insert", f"AFTER INSERT ON {SOURCE_TABLE}", [
+            f"DELETE FROM {MEMBERS_TABLE} WHERE id = NEW.id", insert_member,
+        ]),
+        _trigger("repos_update", f"AFTER UPDATE OF {watched} ON {SOURCE_TABLE}", [
+            f"DELETE FROM {MEMBERS_TABLE} WHERE id IN (OLD.id, NEW.id)", insert_member,
+        ]),
+        _trigger("repos_delete", f"AFTER DELETE ON {SOURCE_TABLE}", [
+            f"DELETE FROM {MEMBERS_TABLE} WHERE id = OLD.id",
+        ]),
+        _trigger("members_insert", f"AFTER INSERT ON {MEMBERS_TABLE}",
+                 [_add_contribution(d) for d in dimensions]),
+        _trigger("members_delete", f"AFTER DELETE ON {MEMBERS_TABLE}",
+                 [_remove_contribution(d) for d in dimensions] + [f"DELETE FROM {STATS_TABLE} WHERE repo_count <= 0"]),
+    ]
+
+    for board, spec in LEADERBOARDS.items():
+        in_board = f"SELECT id FROM {BOARDS_TABLE} WHERE board = '{board}'"
+        qualifies = (f"((SELECT COUNT(*) FROM {BOARDS_TABLE} WHERE board = '{board}') < {spec['limit']} "
+                     f"OR NEW.{spec['rank_column']} >= (SELECT MIN({spec['rank_column']}) FROM {BOARDS_TABLE} "
+                     f"WHERE board = '{board}'))")
+        if spec["filter"]:
+            qualifies = f"({spec['filter'].format(row='NEW.')}) AND {qualifies}"
+        statements.append(_trigger(
+            f"board_{board}_insert", f"AFTER INSERT ON {MEMBERS_TABLE}", board_refresh_statements(board),
+            when=f"NEW.id IN ({in_board}) OR ({qualifies})",
+        ))
+        # 更新路径上仓库行仍存在, 由随后的插入触发器刷新
+        statements.append(_trigger(
+            f"board_{board}_delete", f"AFTER DELETE ON {MEMBERS_TABLE}", board_refresh_statements(board),
+            when=f"OLD.id IN ({in_board}) AND NOT EXISTS (SELECT 1 FROM {SOURCE_TABLE} WHERE id = OLD.id)",
+        ))
+    return statements
+
+
+def drop_trigger_statements() -> List[str]:
+    return [f"DROP TRIGGER IF EXISTS {name}" for name in trigger_names()]
+
+
+def rebuild_statements() -> List[str]:
+    """全量重建: 暂停触发器 → 清空 → 批量计算 → 恢复触发器"""
+    statements = drop_trigger_statements()
+    statements += [f"DELETE FROM {table}" for table in (MEMBERS_TABLE, STATS_TABLE, BOARDS_TABLE)]
+    statements.append(f"INSERT INTO {MEMBERS_TABLE} ({_member_columns()}) "
+                      f"SELECT {_member_values('')} FROM {SOURCE_TABLE}")
+    statements += [_rebuild_dimension(d) for d in [ALL_DIMENSION] + AGGREGATE_DIMENSIONS]
+    for board in LEADERBOARDS:
+        statements += board_refresh_statements(board)
+    statements += create_trigger_statements()
+    statements.append(f"INSERT INTO {META_TABLE} (key, value) VALUES ('built_at', '{datetime.now().isoformat()}') "
+                      f"ON CONFLICT (key) DO UPDATE SET value = excluded.value")
+    return statements
+
+
+def average(metric: str) -> str:
+    """汇总表上的平均值表达式 (与 AVG 一致, 无非空值时为 NULL)"""
+    return f"{metric}_sum * 1.0 / NULLIF({metric}_n, 0)"
+
+
+# ================================
+# 🗄️ 维护命令
+# ================================
+
+class MaterializedAggregates:
+    """在 D1 上安装、重建和校验物化聚合表"""
+
+    def __init__(self, cloudflare_client, account_id: str, database_id: str):
+        self.cloudflare_client = cloudflare_client
+        self.account_id = account_id
+        self.database_id = database_id
+
+    def _query(self, sql: str) -> List[Dict[str, Any]]:
+        response = self.cloudflare_client.d1.database.query(
+            database_id=self.database_id,
+            account_id=self.account_id,
+            sql=sql
+        )
+        if not response.success:
+            raise RuntimeError(f"D1查询失败: {getattr(response, 'errors', response)}")
+        return response.result[0].results if response.result else []
+
+    def _execute_script(self, statements: List[str]):
+        """多条语句在一次请求中执行 (同一事务, 任一失败整体回滚)"""
+        self._query(";\n".join(statements))
+
+    def install(self) -> int:
+        """建表并全量重建 (重建过程中安装触发器), 返回汇总的仓库数"""
+        self._execute_script(create_table_statements())
+        return self.rebuild()
+
+    def rebuild(self) -> int:
+        """从 repos 全量重建汇总表与榜单, 返回汇总的仓库数"""
+        self._execute_script(rebuild_statements())
+        rows = self._query(f"SELECT repo_count FROM {STATS_TABLE} WHERE dimension = '{ALL_DIMENSION}'")
+        total = rows[0]["repo_count"] if rows else 0
+        logger.info(f"🧮 物化聚合表已重建: {total} 个仓库")
+        return total
+
+    def drop(self):
+        """移除触发器与汇总表"""
+        tables = (MEMBERS_TABLE, STATS_TABLE, BOARDS_TABLE, META_TABLE)
+        self._execute_script(drop_trigger_statements() + [f"DROP TABLE IF EXISTS {t}" for t in tables])
+        logger.info("🗑️ 物化聚合表与触发器已移除")
+
+    def is_ready(self) -> bool:
+        """汇总表已建立并完成过重建"""
+        try:
+            return bool(self._query(f"SELECT value FROM {META_TABLE} WHERE key = 'built_at'"))
+        except Exception:
+            return False
+
+    def check(self) -> List[str]:
+        """对比仪表板的汇总表查询与全表扫描查询, 返回不一致的查询说明"""
+        from metrics_dashboard import DASHBOARD_QUERIES, MATERIALIZED_QUERIES
+
+        mismatches = []
+        for name, sql in MATERIALIZED_QUERIES.items():
+            expected = _normalize_rows(self._query(DASHBOARD_QUERIES[name]))
+            actual = _normalize_rows(self._query(sql))
+            if expected != actual:
+                mismatches.append(f"{name}: 扫描 {len(expected)} 行 / 汇总表 {len(actual)} 行不一致")
+        return mismatches
+
+
+def _normalize_rows(rows: List[Dict[str, Any]]) -> List[tuple]:
+    """比较用: 浮点数保留6位有效数字, 忽略行顺序"""
+    def norm(value):
+        if isinstance(value, float):
+            return float(f"{value:.6g}") if math.isfinite(value) else value
+        return value
+    return sorted((tuple((k, norm(v)) for k, v in sorted(row.items())) for row in rows), key=repr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="仪表板物化聚合表维护")
+    parser.add_argument("command", choices=["install", "rebuild", "check", "drop"])
+    args = parser.parse_args()
+
+    from lazy_clients import load_env, get_cloudflare_client
+    load_env()  # Config 在导入时读取环境变量
+    from config_v2 import Config
+    from structured_logging import setup_logging
+
+    setup_logging()
+    config = Config()
+    aggregates = MaterializedAggregates(get_cloudflare_client(config.CLOUDFLARE_API_TOKEN),
+                                        config.CLOUDFLARE_ACCOUNT_ID, config.D1_DATABASE_ID)
+
+    if args.command == "install":
+        print(f"✅ 已安装物化聚合表, 汇总 {aggregates.install()} 个仓库")
+    elif args.command == "rebuild":
+        print(f"✅ 已重建物化聚合表, 汇总 {aggregates.rebuild()} 个仓库")
+    elif args.command == "drop":
+        aggregates.drop()
+        print("✅ 已移除物化聚合表")
+    else:
+        mismatches = aggregates.check()
+        if mismatches:
+            print("❌ 汇总表与全表扫描不一致:")
+            for line in mismatches:
+                print(f"   {line}")
+            sys.exit(1)
+        print("✅ 汇总表与全表扫描结果一致")
+
+
+if __name__ == "__main__":
+    main()
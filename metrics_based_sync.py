@@ -5,20 +5,23 @@
 """
 
 import os
-import requests
 import json
 import time
 from datetime import datetime, timedelta
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, lazy_import, LazyCloudflareClient
+from config_v2 import APIConfig
+from semantic_categorizer import classify_text
+from scoring_models import get_model
 from github_metrics_config import (
     CORE_METRICS_CONFIG, ACTIVITY_METRICS_CONFIG, QUALITY_METRICS_CONFIG,
-    AI_SPECIFIC_METRICS, SEARCH_OPTIMIZATION_CONFIG,
-    build_enhanced_search_queries, calculate_comprehensive_score
+    SEARCH_OPTIMIZATION_CONFIG, build_enhanced_search_queries
 )
 
+# 延迟导入 (首次发起请求时才加载)
+requests = lazy_import("requests")
+
 # 加载环境变量
-load_dotenv()
+load_env()
 
 # === 配置 ===
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
@@ -30,7 +33,7 @@ if not all([GITHUB_TOKEN, CLOUDFLARE_API_TOKEN, CLOUDFLARE_ACCOUNT_ID, D1_DATABA
     raise ValueError("环境变量未设置。请确保所有必要的环境变量都已正确配置。")
 
 # 初始化客户端
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
 
 github_headers = {
     "Authorization": f"token {GITHUB_TOKEN}",
@@ -84,7 +87,7 @@ def execute_metrics_based_search(strategy, keywords, time_ranges):
         print(f"   查询: {query[:80]}...")
         
         response = requests.get(
-            "https://api.github.com/search/repositories",
+            f"{APIConfig.GITHUB_API_BASE}/search/repositories",
             headers=github_headers,
             params=params
         )
@@ -105,14 +108,11 @@ def execute_metrics_based_search(strategy, keywords, time_ranges):
 def enhance_repo_with_metrics(repo):
     """用指标数据增强仓库信息"""
     
-    # 计算综合评分
-    comprehensive_score = calculate_comprehensive_score(repo)
-    
-    # AI特定评分
-    ai_score = calculate_ai_specific_score(repo)
-    
-    # 最终评分
-    final_score = min(50, comprehensive_score + ai_score)
+    # 综合评分 + AI特定评分 = 最终评分 (评分模型 metrics 一次求值)
+    result = get_model("metrics").evaluate(repo)
+    comprehensive_score = result.sections["comprehensive"]
+    ai_score = result.sections["ai_specific"]
+    final_score = result.total
     
     # 项目分类
     category = classify_by_metrics(repo)
@@ -135,41 +135,22 @@ def enhance_repo_with_metrics(repo):
         "quality_level": quality_level,
         "activity_status": activity_status,
         "community_impact": community_impact,
+        "score_model_version": result.model_id,
         "metrics_timestamp": datetime.now().isoformat()
     })
     
     return enhanced_repo
 
 def calculate_ai_specific_score(repo):
-    """计算AI领域特定评分"""
-    name = repo.get("name", "").lower()
-    description = repo.get("description", "").lower() if repo.get("description") else ""
-    full_text = f"{name} {description}"
-    
-    ai_score = 0
-    
-    # AI指标评分
-    for indicator, config in AI_SPECIFIC_METRICS["ai_indicators"].items():
-        matches = sum(1 for keyword in config["keywords"] if keyword in full_text)
-        if matches > 0:
-            ai_score += config["weight"]
-    
-    # 技术栈加分
-    for tech, bonus in AI_SPECIFIC_METRICS["tech_stack_bonus"].items():
-        if tech in full_text:
-            ai_score += bonus
-    
-    return min(15, ai_score)  # AI特定评分最高15分
+    """计算AI领域特定评分 (最高15分, 评分模型 metrics 的 ai_specific 分项)"""
+    return get_model("metrics").section_score("ai_specific", repo)
 
 def classify_by_metrics(repo):
     """基于指标数据进行项目分类"""
-    name = repo.get("name", "").lower()
     description = repo.get("description", "").lower() if repo.get("description") else ""
     stars = repo.get("stargazers_count", 0)
     forks = repo.get("forks_count", 0)
     
-    full_text = f"{name} {description}"
-    
     # 基于星标和分叉数判断项目类型
     if stars >= 1000:
         project_tier = "明星项目"
@@ -180,24 +161,8 @@ def classify_by_metrics(repo):
     else:
         project_tier = "新兴项目"
     
-    # 基于内容判断技术分类
-    if any(keyword in full_text for keyword in ["llm", "gpt", "language model", "transformer"]):
-        if any(keyword in full_text for keyword in ["api", "server", "serving"]):
-            tech_category = "LLM服务"
-        elif any(keyword in full_text for keyword in ["chat", "assistant", "bot"]):
-            tech_category = "LLM应用"
-        else:
-            tech_category = "LLM研究"
-    elif any(keyword in full_text for keyword in ["diffusion", "stable-diffusion", "image generation"]):
-        tech_category = "生成式AI"
-    elif any(keyword in full_text for keyword in ["computer vision", "object detection", "yolo"]):
-        tech_category = "计算机视觉"
-    elif any(keyword in full_text for keyword in ["rag", "retrieval", "vector", "embedding"]):
-        tech_category = "RAG技术"
-    elif any(keyword in full_text for keyword in ["data science", "analytics", "visualization"]):
-        tech_category = "数据科学"
-    else:
-        tech_category = "通用AI"
+    # 基于内容判断技术分类 (语义分类引擎)
+    tech_category = classify_text(repo.get("name", ""), description, repo.get("topics"))
     
     return f"{tech_category} - {project_tier}"
 
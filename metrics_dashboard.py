@@ -2,153 +2,248 @@
 """
 增强指标仪表板生成器
 生成HTML格式的AI项目指标分析报告
+功能: 并发查询 + 按表水位线(max sync_time)缓存聚合结果, 仅重新渲染输入有变化的区块, 原子写出
+更新时间: 2025-09-16
 """
 
 import os
 import json
+import time
+import hashlib
+import argparse
 from datetime import datetime
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
+from lazy_clients import load_env, LazyCloudflareClient
+from materialized_aggregates import (
+    MaterializedAggregates, average, ALL_DIMENSION, STATS_TABLE, BOARDS_TABLE
+)
+from static_dashboard import export_static_dashboard, read_static_asset, STATIC_DASHBOARD_CONFIG
 
 # 加载环境变量
-load_dotenv()
+load_env()
 
 # Cloudflare配置
 CLOUDFLARE_API_TOKEN = os.environ.get('CLOUDFLARE_API_TOKEN')
 CLOUDFLARE_ACCOUNT_ID = os.environ.get('CLOUDFLARE_ACCOUNT_ID')
 D1_DATABASE_ID = os.environ.get('D1_DATABASE_ID')
 
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
 
-def fetch_dashboard_data():
-    """获取仪表板数据"""
-    try:
-        queries = {
-            'overview': """
-                SELECT 
-                    COUNT(*) as total_projects,
-                    AVG(enhanced_score) as avg_score,
-                    MAX(enhanced_score) as max_score,
-                    MIN(enhanced_score) as min_score,
-                    AVG(stars) as avg_stars,
-                    SUM(contributors_count) as total_contributors
-                FROM repos
-            """,
-            
-            'top_projects': """
-                SELECT 
-                    name, owner, enhanced_score, stars, forks, 
-                    ai_maturity_level, community_health, innovation_level, commercial_potential
-                FROM repos 
-                ORDER BY enhanced_score DESC 
-                LIMIT 20
-            """,
-            
-            'ai_maturity_distribution': """
-                SELECT 
-                    ai_maturity_level, 
-                    COUNT(*) as count,
-                    AVG(enhanced_score) as avg_score
-                FROM repos 
-                GROUP BY ai_maturity_level
-            """,
-            
-            'innovation_analysis': """
-                SELECT 
-                    innovation_level,
-                    COUNT(*) as count,
-                    AVG(cutting_edge_score) as avg_cutting_edge,
-                    AVG(research_quality_score) as avg_research_quality
-                FROM repos 
-                GROUP BY innovation_level
-            """,
-            
-            'commercial_potential': """
-                SELECT 
-                    commercial_potential,
-                    COUNT(*) as count,
-                    AVG(enterprise_adoption_score) as avg_enterprise_score
-                FROM repos 
-                GROUP BY commercial_potential
-            """,
-            
-            'technology_stack': """
-                SELECT 
-                    primary_language,
-                    COUNT(*) as count,
-                    AVG(enhanced_score) as avg_score
-                FROM repos 
-                WHERE primary_language != 'Unknown'
-                GROUP BY primary_language 
-                ORDER BY count DESC 
-                LIMIT 10
-            """,
-            
-            'ai_frameworks': """
-                SELECT 
-                    ai_framework,
-                    COUNT(*) as count,
-                    AVG(enhanced_score) as avg_score
-                FROM repos 
-                WHERE ai_framework != 'unknown'
-                GROUP BY ai_framework 
-                ORDER BY count DESC
-            """,
-            
-            'community_health': """
-                SELECT 
-                    community_health,
-                    COUNT(*) as count,
-                    AVG(contributors_count) as avg_contributors,
-                    AVG(commit_frequency_score) as avg_commit_frequency
-                FROM repos 
-                GROUP BY community_health
-            """,
-            
-            'trending_projects': """
-                SELECT 
-                    name, owner, enhanced_score, stars, 
-                    cutting_edge_score, innovation_level,
-                    last_commit_date
-                FROM repos 
-                WHERE cutting_edge_score > 10
-                ORDER BY cutting_edge_score DESC, enhanced_score DESC
-                LIMIT 15
-            """
-        }
-        
-        dashboard_data = {}
-        
-        for query_name, sql in queries.items():
-            try:
-                response = cloudflare_client.d1.database.query(
-                    database_id=D1_DATABASE_ID,
-                    account_id=CLOUDFLARE_ACCOUNT_ID,
-                    sql=sql
-                )
-                
-                if response.success and response.result:
-                    dashboard_data[query_name] = response.result[0].results
-                else:
-                    dashboard_data[query_name] = []
-                    
-            except Exception as e:
-                print(f"❌ 查询 {query_name} 失败: {e}")
-                dashboard_data[query_name] = []
-        
-        return dashboard_data
-        
-    except Exception as e:
-        print(f"❌ 获取仪表板数据失败: {e}")
-        return {}
+DASHBOARD_CONFIG = {
+    "output_file": os.environ.get("DASHBOARD_OUTPUT", "enhanced_metrics_dashboard.html"),
+    "cache_file": os.environ.get("DASHBOARD_CACHE_FILE", "dashboard_cache.json"),
+    "max_workers": 9,               # 并发查询线程数 (每个聚合查询一个)
+    "use_materialized": os.environ.get("DASHBOARD_USE_MATERIALIZED", "1") == "1",  # 优先读取物化聚合表
+}
 
-def generate_html_dashboard(data):
-    """生成HTML仪表板"""
+# 表水位线: 最近同步时间 + 行数 (行数用于感知删除)
+WATERMARK_SQL = "SELECT MAX(sync_time) AS watermark, COUNT(*) AS row_count FROM repos"
+
+DASHBOARD_QUERIES = {
+    'overview': """
+        SELECT 
+            COUNT(*) as total_projects,
+            AVG(enhanced_score) as avg_score,
+            MAX(enhanced_score) as max_score,
+            MIN(enhanced_score) as min_score,
+            AVG(stars) as avg_stars,
+            SUM(contributors_count) as total_contributors
+        FROM repos
+    """,
     
-    # 获取概览数据
-    overview = data.get('overview', [{}])[0] if data.get('overview') else {}
+    'top_projects': """
+        SELECT 
+            name, owner, enhanced_score, stars, forks, 
+            ai_maturity_level, community_health, innovation_level, commercial_potential
+        FROM repos 
+        ORDER BY enhanced_score DESC 
+        LIMIT 20
+    """,
+    
+    'ai_maturity_distribution': """
+        SELECT 
+            ai_maturity_level, 
+            COUNT(*) as count,
+            AVG(enhanced_score) as avg_score
+        FROM repos 
+        GROUP BY ai_maturity_level
+    """,
     
-    html_content = f"""
+    'innovation_analysis': """
+        SELECT 
+            innovation_level,
+            COUNT(*) as count,
+            AVG(cutting_edge_score) as avg_cutting_edge,
+            AVG(research_quality_score) as avg_research_quality
+        FROM repos 
+        GROUP BY innovation_level
+    """,
+    
+    'commercial_potential': """
+        SELECT 
+            commercial_potential,
+            COUNT(*) as count,
+            AVG(enterprise_adoption_score) as avg_enterprise_score
+        FROM repos 
+        GROUP BY commercial_potential
+    """,
+    
+    'technology_stack': """
+        SELECT 
+            primary_language,
+            COUNT(*) as count,
+            AVG(enhanced_score) as avg_score
+        FROM repos 
+        WHERE primary_language != 'Unknown'
+        GROUP BY primary_language 
+        ORDER BY count DESC 
+        LIMIT 10
+    """,
+    
+    'ai_frameworks': """
+        SELECT 
+            ai_framework,
+            COUNT(*) as count,
+            AVG(enhanced_score) as avg_score
+        FROM repos 
+        WHERE ai_framework != 'unknown'
+        GROUP BY ai_framework 
+        ORDER BY count DESC
+    """,
+    
+    'community_health': """
+        SELECT 
+            community_health,
+            COUNT(*) as count,
+            AVG(contributors_count) as avg_contributors,
+            AVG(commit_frequency_score) as avg_commit_frequency
+        FROM repos 
+        GROUP BY community_health
+    """,
+    
+    'trending_projects': """
+        SELECT 
+            name, owner, enhanced_score, stars, 
+            cutting_edge_score, innovation_level,
+            last_commit_date
+        FROM repos 
+        WHERE cutting_edge_score > 10
+        ORDER BY cutting_edge_score DESC, enhanced_score DESC
+        LIMIT 15
+    """
+}
+
+def _dimension_query(dimension: str, columns: str, where: str = "", order: str = "") -> str:
+    return f"""
+        SELECT NULLIF(value, '') AS {dimension}, repo_count AS count, {columns}
+        FROM {STATS_TABLE}
+        WHERE dimension = '{dimension}'{where}
+        {order}
+    """
+
+
+def _board_query(board: str, columns: str, order: str) -> str:
+    return f"""
+        SELECT {columns}
+        FROM {BOARDS_TABLE}
+        WHERE board = '{board}'
+        ORDER BY {order}
+    """
+
+
+# 同名查询的物化聚合表版本 (materialized_aggregates 维护), 结果列与 DASHBOARD_QUERIES 一致
+MATERIALIZED_QUERIES = {
+    'overview': f"""
+        SELECT
+            repo_count as total_projects,
+            {average('enhanced_score')} as avg_score,
+            (SELECT MAX(enhanced_score) FROM repos) as max_score,
+            (SELECT MIN(enhanced_score) FROM repos) as min_score,
+            {average('stars')} as avg_stars,
+            contributors_count_sum as total_contributors
+        FROM {STATS_TABLE}
+        WHERE dimension = '{ALL_DIMENSION}'
+    """,
+
+    'top_projects': _board_query(
+        'top_projects',
+        "name, owner, enhanced_score, stars, forks, "
+        "ai_maturity_level, community_health, innovation_level, commercial_potential",
+        "enhanced_score DESC"),
+
+    'ai_maturity_distribution': _dimension_query(
+        'ai_maturity_level', f"{average('enhanced_score')} as avg_score"),
+
+    'innovation_analysis': _dimension_query(
+        'innovation_level',
+        f"{average('cutting_edge_score')} as avg_cutting_edge, "
+        f"{average('research_quality_score')} as avg_research_quality"),
+
+    'commercial_potential': _dimension_query(
+        'commercial_potential', f"{average('enterprise_adoption_score')} as avg_enterprise_score"),
+
+    'technology_stack': _dimension_query(
+        'primary_language', f"{average('enhanced_score')} as avg_score",
+        where=" AND value NOT IN ('Unknown', '')", order="ORDER BY count DESC LIMIT 10"),
+
+    'ai_frameworks': _dimension_query(
+        'ai_framework', f"{average('enhanced_score')} as avg_score",
+        where=" AND value NOT IN ('unknown', '')", order="ORDER BY count DESC"),
+
+    'community_health': _dimension_query(
+        'community_health',
+        f"{average('contributors_count')} as avg_contributors, "
+        f"{average('commit_frequency_score')} as avg_commit_frequency"),
+
+    'trending_projects': _board_query(
+        'trending_projects',
+        "name, owner, enhanced_score, stars, cutting_edge_score, innovation_level, last_commit_date",
+        "cutting_edge_score DESC, enhanced_score DESC"),
+}
+
+# 图表区块: 每个图表只依赖一个聚合查询
+CHART_SPECS = [
+    {
+        "canvas": "maturityChart", "title": "AI成熟度分布", "query": "ai_maturity_distribution",
+        "label_field": "ai_maturity_level", "type": "doughnut",
+        "dataset": {"backgroundColor": ['#28a745', '#17a2b8', '#ffc107', '#6c757d']},
+        "options": {"responsive": True, "plugins": {"legend": {"position": "bottom"}}},
+    },
+    {
+        "canvas": "innovationChart", "title": "创新水平分析", "query": "innovation_analysis",
+        "label_field": "innovation_level", "type": "bar",
+        "dataset": {"label": "项目数量", "backgroundColor": "#667eea"},
+        "options": {"responsive": True, "scales": {"y": {"beginAtZero": True}}},
+    },
+    {
+        "canvas": "commercialChart", "title": "商业潜力分布", "query": "commercial_potential",
+        "label_field": "commercial_potential", "type": "pie",
+        "dataset": {"backgroundColor": ['#28a745', '#fd7e14', '#ffc107', '#6c757d']},
+        "options": {"responsive": True, "plugins": {"legend": {"position": "bottom"}}},
+    },
+    {
+        "canvas": "techStackChart", "title": "技术栈分布", "query": "technology_stack",
+        "label_field": "primary_language", "type": "horizontalBar",
+        "dataset": {"label": "项目数量", "backgroundColor": "#764ba2"},
+        "options": {"responsive": True, "scales": {"x": {"beginAtZero": True}}},
+    },
+    {
+        "canvas": "frameworkChart", "title": "AI框架使用情况", "query": "ai_frameworks",
+        "label_field": "ai_framework", "type": "doughnut",
+        "dataset": {"backgroundColor": ['#e83e8c', '#fd7e14', '#20c997', '#6f42c1', '#dc3545']},
+        "options": {"responsive": True, "plugins": {"legend": {"position": "bottom"}}},
+    },
+    {
+        "canvas": "communityChart", "title": "社区健康状态", "query": "community_health",
+        "label_field": "community_health", "type": "radar",
+        "dataset": {"label": "项目数量", "borderColor": "#667eea", "backgroundColor": "rgba(102, 126, 234, 0.2)"},
+        "options": {"responsive": True, "scales": {"r": {"beginAtZero": True}}},
+    },
+]
+
+# 样式与静态仪表板共用 dashboard_static/dashboard.css ({css} 在拼接时读取, 导入模块不访问文件)
+HTML_HEAD = """
 <!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -157,225 +252,192 @@ def generate_html_dashboard(data):
     <title>GitHub AI项目增强指标仪表板</title>
     <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
     <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }}
-        
-        .dashboard {{
-            max-width: 1400px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 20px;
-            box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            padding: 40px;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5em;
-            margin-bottom: 10px;
-        }}
-        
-        .header p {{
-            font-size: 1.2em;
-            opacity: 0.9;
-        }}
-        
-        .overview {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            padding: 40px;
-            background: #f8f9fa;
-        }}
-        
-        .metric-card {{
-            background: white;
-            padding: 30px;
-            border-radius: 15px;
-            text-align: center;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-            transition: transform 0.3s ease;
-        }}
-        
-        .metric-card:hover {{
-            transform: translateY(-5px);
-        }}
-        
-        .metric-value {{
-            font-size: 2.5em;
-            font-weight: bold;
-            color: #667eea;
-            margin-bottom: 10px;
-        }}
-        
-        .metric-label {{
-            color: #666;
-            font-size: 1.1em;
-        }}
-        
-        .content {{
-            padding: 40px;
-        }}
-        
-        .section {{
-            margin-bottom: 50px;
-        }}
-        
-        .section h2 {{
-            color: #333;
-            margin-bottom: 25px;
-            font-size: 1.8em;
-            border-bottom: 3px solid #667eea;
-            padding-bottom: 10px;
-        }}
-        
-        .charts-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
-            gap: 30px;
-            margin-bottom: 40px;
-        }}
-        
-        .chart-container {{
-            background: white;
-            padding: 25px;
-            border-radius: 15px;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-        }}
-        
-        .table-container {{
-            background: white;
-            border-radius: 15px;
-            overflow: hidden;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-            margin-bottom: 30px;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-        }}
-        
-        th {{
-            background: #667eea;
-            color: white;
-            padding: 15px;
-            text-align: left;
-            font-weight: 600;
-        }}
-        
-        td {{
-            padding: 12px 15px;
-            border-bottom: 1px solid #eee;
-        }}
-        
-        tr:hover {{
-            background: #f8f9fa;
-        }}
-        
-        .badge {{
-            padding: 5px 12px;
-            border-radius: 20px;
-            font-size: 0.85em;
-            font-weight: 600;
-            color: white;
-        }}
-        
-        .badge-production {{ background: #28a745; }}
-        .badge-mature {{ background: #17a2b8; }}
-        .badge-developing {{ background: #ffc107; color: #333; }}
-        .badge-experimental {{ background: #6c757d; }}
-        
-        .badge-excellent {{ background: #28a745; }}
-        .badge-good {{ background: #17a2b8; }}
-        .badge-fair {{ background: #ffc107; color: #333; }}
-        .badge-poor {{ background: #dc3545; }}
-        
-        .badge-cutting-edge {{ background: #e83e8c; }}
-        .badge-high {{ background: #fd7e14; }}
-        .badge-medium {{ background: #6f42c1; }}
-        .badge-low {{ background: #6c757d; }}
-        
-        .badge-very-high {{ background: #28a745; }}
-        .badge-medium {{ background: #ffc107; color: #333; }}
-        
-        .score {{
-            font-weight: bold;
-            font-size: 1.1em;
-        }}
-        
-        .score-excellent {{ color: #28a745; }}
-        .score-good {{ color: #17a2b8; }}
-        .score-fair {{ color: #ffc107; }}
-        .score-poor {{ color: #dc3545; }}
-        
-        .footer {{
-            background: #333;
-            color: white;
-            text-align: center;
-            padding: 20px;
-            margin-top: 40px;
-        }}
-        
-        @media (max-width: 768px) {{
-            .charts-grid {{
-                grid-template-columns: 1fr;
-            }}
-            
-            .overview {{
-                grid-template-columns: repeat(2, 1fr);
-            }}
-        }}
+{css}
     </style>
 </head>
-<body>
-    <div class="dashboard">
-        <div class="header">
-            <h1>🚀 GitHub AI项目增强指标仪表板</h1>
-            <p>基于100分制综合评分的AI项目价值分析</p>
-            <p>更新时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
-        </div>
-        
+"""
+
+
+# ================================
+# 📊 数据获取
+# ================================
+
+def run_d1_query(sql: str) -> List[Dict[str, Any]]:
+    """执行单个D1查询, 失败时抛出异常"""
+    response = cloudflare_client.d1.database.query(
+        database_id=D1_DATABASE_ID,
+        account_id=CLOUDFLARE_ACCOUNT_ID,
+        sql=sql
+    )
+    if response.success and response.result:
+        return response.result[0].results
+    return []
+
+
+def fetch_table_watermark() -> Optional[str]:
+    """获取 repos 表水位线, 失败时返回 None (视为数据已变化)"""
+    try:
+        rows = run_d1_query(WATERMARK_SQL)
+    except Exception as e:
+        print(f"⚠️ 获取表水位线失败: {e}")
+        return None
+    if not rows:
+        return None
+    return f"{rows[0].get('watermark')}|{rows[0].get('row_count')}"
+
+
+def materialized_ready() -> bool:
+    """物化聚合表是否已安装并完成重建"""
+    if not DASHBOARD_CONFIG["use_materialized"]:
+        return False
+    return MaterializedAggregates(cloudflare_client, CLOUDFLARE_ACCOUNT_ID, D1_DATABASE_ID).is_ready()
+
+
+def _fetch_query(query_name: str, materialized: bool = False) -> Tuple[str, List[Dict[str, Any]], bool]:
+    if materialized and query_name in MATERIALIZED_QUERIES:
+        try:
+            return query_name, run_d1_query(MATERIALIZED_QUERIES[query_name]), True
+        except Exception as e:
+            print(f"⚠️ 物化聚合查询 {query_name} 失败, 改为全表查询: {e}")
+    try:
+        return query_name, run_d1_query(DASHBOARD_QUERIES[query_name]), True
+    except Exception as e:
+        print(f"❌ 查询 {query_name} 失败: {e}")
+        return query_name, [], False
+
+
+def fetch_dashboard_data(query_names: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """并发获取仪表板数据 (单个查询失败时该区块为空)"""
+    data, _ = _fetch_dashboard_data(query_names, materialized_ready())
+    return data
+
+
+def _fetch_dashboard_data(query_names: Optional[List[str]] = None,
+                          materialized: bool = False) -> Tuple[Dict[str, List[Dict[str, Any]]], List[str]]:
+    names = list(query_names or DASHBOARD_QUERIES)
+    with ThreadPoolExecutor(max_workers=min(DASHBOARD_CONFIG["max_workers"], len(names) or 1)) as executor:
+        results = list(executor.map(lambda name: _fetch_query(name, materialized), names))
+    data = {name: rows for name, rows, _ in results}
+    failed = [name for name, _, ok in results if not ok]
+    return data, failed
+
+
+# ================================
+# 💾 水位线缓存
+# ================================
+
+def load_dashboard_cache(cache_file: Optional[str] = None) -> Dict[str, Any]:
+    """加载聚合结果与区块缓存, 文件不存在或损坏时返回空缓存"""
+    cache_file = cache_file or DASHBOARD_CONFIG["cache_file"]
+    if not cache_file or not os.path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"⚠️ 加载仪表板缓存失败: {cache_file} | {e}")
+        return {}
+
+
+def atomic_write(path: str, content: str):
+    """先写临时文件再替换, 避免读者看到半个文件"""
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_file, path)
+
+
+def save_dashboard_cache(cache: Dict[str, Any], cache_file: Optional[str] = None) -> bool:
+    """原子写入仪表板缓存"""
+    cache_file = cache_file or DASHBOARD_CONFIG["cache_file"]
+    if not cache_file:
+        return False
+    try:
+        atomic_write(cache_file, json.dumps(cache, ensure_ascii=False, default=str))
+        return True
+    except Exception as e:
+        print(f"⚠️ 保存仪表板缓存失败: {cache_file} | {e}")
+        return False
+
+
+def fetch_dashboard_data_cached(cache: Dict[str, Any], force: bool = False) -> Tuple[Dict[str, List[Dict[str, Any]]], bool]:
+    """
+    水位线未变化时直接复用缓存的聚合结果 (只执行一次轻量查询),
+    否则并发重新查询; 返回 (数据, 是否重新查询)
+    """
+    watermark = fetch_table_watermark()
+    if not force and watermark and cache.get("watermark") == watermark and cache.get("data"):
+        print(f"⚡ 数据未变化 (水位线 {watermark}), 复用缓存的聚合结果")
+        return cache["data"], False
+
+    materialized = materialized_ready()
+    if materialized:
+        print("🧮 读取物化聚合表")
+    data, failed = _fetch_dashboard_data(materialized=materialized)
+    # 有查询失败时不记录水位线, 下次运行重新查询
+    cache["watermark"] = watermark if not failed else None
+    cache["data"] = data
+    return data, True
+
+
+# ================================
+# 🎨 区块渲染
+# ================================
+
+def _score_class(score: float) -> str:
+    return "score-excellent" if score >= 80 else \
+           "score-good" if score >= 60 else \
+           "score-fair" if score >= 40 else "score-poor"
+
+
+def _render_overview(data: Dict[str, Any]) -> str:
+    overview = data.get('overview', [{}])[0] if data.get('overview') else {}
+    return f"""
         <div class="overview">
             <div class="metric-card">
-                <div class="metric-value">{overview.get('total_projects', 0)}</div>
+                <div class="metric-value">{overview.get('total_projects') or 0}</div>
                 <div class="metric-label">总项目数</div>
             </div>
             <div class="metric-card">
-                <div class="metric-value">{overview.get('avg_score', 0):.1f}</div>
+                <div class="metric-value">{overview.get('avg_score') or 0:.1f}</div>
                 <div class="metric-label">平均评分</div>
             </div>
             <div class="metric-card">
-                <div class="metric-value">{overview.get('max_score', 0):.0f}</div>
+                <div class="metric-value">{overview.get('max_score') or 0:.0f}</div>
                 <div class="metric-label">最高评分</div>
             </div>
             <div class="metric-card">
-                <div class="metric-value">{overview.get('avg_stars', 0):.0f}</div>
+                <div class="metric-value">{overview.get('avg_stars') or 0:.0f}</div>
                 <div class="metric-label">平均星标</div>
             </div>
             <div class="metric-card">
-                <div class="metric-value">{overview.get('total_contributors', 0):.0f}</div>
+                <div class="metric-value">{overview.get('total_contributors') or 0:.0f}</div>
                 <div class="metric-label">总贡献者</div>
             </div>
         </div>
-        
-        <div class="content">
+    """
+
+
+def _render_top_projects(data: Dict[str, Any]) -> str:
+    rows = []
+    for i, project in enumerate(data.get('top_projects', [])[:20], 1):
+        rows.append(f"""
+                            <tr>
+                                <td><strong>#{i}</strong></td>
+                                <td>
+                                    <strong>{project.get('owner', '')}/{project.get('name', '')}</strong>
+                                </td>
+                                <td class="{_score_class(project.get('enhanced_score', 0))}">{project.get('enhanced_score', 0):.1f}</td>
+                                <td>{project.get('stars', 0):,}</td>
+                                <td>{project.get('forks', 0):,}</td>
+                                <td><span class="badge badge-{project.get('ai_maturity_level', 'unknown')}">{project.get('ai_maturity_level', 'Unknown')}</span></td>
+                                <td><span class="badge badge-{project.get('community_health', 'unknown')}">{project.get('community_health', 'Unknown')}</span></td>
+                                <td><span class="badge badge-{project.get('innovation_level', 'unknown')}">{project.get('innovation_level', 'Unknown')}</span></td>
+                                <td><span class="badge badge-{project.get('commercial_potential', 'unknown')}">{project.get('commercial_potential', 'Unknown')}</span></td>
+                            </tr>
+        """)
+
+    return f"""
             <!-- 顶级项目排行榜 -->
             <div class="section">
                 <h2>🏆 顶级AI项目排行榜 (Top 20)</h2>
@@ -394,94 +456,33 @@ def generate_html_dashboard(data):
                                 <th>商业潜力</th>
                             </tr>
                         </thead>
-                        <tbody>
-    """
-    
-    # 添加顶级项目表格
-    top_projects = data.get('top_projects', [])
-    for i, project in enumerate(top_projects[:20], 1):
-        score_class = "score-excellent" if project.get('enhanced_score', 0) >= 80 else \
-                     "score-good" if project.get('enhanced_score', 0) >= 60 else \
-                     "score-fair" if project.get('enhanced_score', 0) >= 40 else "score-poor"
-        
-        html_content += f"""
-                            <tr>
-                                <td><strong>#{i}</strong></td>
-                                <td>
-                                    <strong>{project.get('owner', '')}/{project.get('name', '')}</strong>
-                                </td>
-                                <td class="{score_class}">{project.get('enhanced_score', 0):.1f}</td>
-                                <td>{project.get('stars', 0):,}</td>
-                                <td>{project.get('forks', 0):,}</td>
-                                <td><span class="badge badge-{project.get('ai_maturity_level', 'unknown')}">{project.get('ai_maturity_level', 'Unknown')}</span></td>
-                                <td><span class="badge badge-{project.get('community_health', 'unknown')}">{project.get('community_health', 'Unknown')}</span></td>
-                                <td><span class="badge badge-{project.get('innovation_level', 'unknown')}">{project.get('innovation_level', 'Unknown')}</span></td>
-                                <td><span class="badge badge-{project.get('commercial_potential', 'unknown')}">{project.get('commercial_potential', 'Unknown')}</span></td>
-                            </tr>
-        """
-    
-    html_content += """
+                        <tbody>{''.join(rows)}
                         </tbody>
                     </table>
                 </div>
             </div>
-            
+    """
+
+
+def _render_chart_grid(data: Dict[str, Any]) -> str:
+    containers = "".join(f"""
+                    <div class="chart-container">
+                        <h3>{spec['title']}</h3>
+                        <canvas id="{spec['canvas']}"></canvas>
+                    </div>""" for spec in CHART_SPECS)
+    return f"""
             <!-- 图表分析 -->
             <div class="section">
                 <h2>📊 多维度分析图表</h2>
-                <div class="charts-grid">
-                    <div class="chart-container">
-                        <h3>AI成熟度分布</h3>
-                        <canvas id="maturityChart"></canvas>
-                    </div>
-                    <div class="chart-container">
-                        <h3>创新水平分析</h3>
-                        <canvas id="innovationChart"></canvas>
-                    </div>
-                    <div class="chart-container">
-                        <h3>商业潜力分布</h3>
-                        <canvas id="commercialChart"></canvas>
-                    </div>
-                    <div class="chart-container">
-                        <h3>技术栈分布</h3>
-                        <canvas id="techStackChart"></canvas>
-                    </div>
-                    <div class="chart-container">
-                        <h3>AI框架使用情况</h3>
-                        <canvas id="frameworkChart"></canvas>
-                    </div>
-                    <div class="chart-container">
-                        <h3>社区健康状态</h3>
-                        <canvas id="communityChart"></canvas>
-                    </div>
+                <div class="charts-grid">{containers}
                 </div>
             </div>
-            
-            <!-- 前沿技术项目 -->
-            <div class="section">
-                <h2>🔬 前沿技术项目</h2>
-                <div class="table-container">
-                    <table>
-                        <thead>
-                            <tr>
-                                <th>项目</th>
-                                <th>综合评分</th>
-                                <th>星标</th>
-                                <th>前沿性评分</th>
-                                <th>创新水平</th>
-                                <th>最后提交</th>
-                            </tr>
-                        </thead>
-                        <tbody>
     """
-    
-    # 添加前沿技术项目
-    trending_projects = data.get('trending_projects', [])
-    for project in trending_projects:
-        score_class = "score-excellent" if project.get('enhanced_score', 0) >= 80 else \
-                     "score-good" if project.get('enhanced_score', 0) >= 60 else \
-                     "score-fair" if project.get('enhanced_score', 0) >= 40 else "score-poor"
-        
+
+
+def _render_trending_projects(data: Dict[str, Any]) -> str:
+    rows = []
+    for project in data.get('trending_projects', []):
         last_commit = project.get('last_commit_date', '')
         if last_commit:
             try:
@@ -489,198 +490,182 @@ def generate_html_dashboard(data):
                 last_commit = commit_date.strftime('%Y-%m-%d')
             except:
                 last_commit = 'Unknown'
-        
-        html_content += f"""
+
+        rows.append(f"""
                             <tr>
                                 <td><strong>{project.get('owner', '')}/{project.get('name', '')}</strong></td>
-                                <td class="{score_class}">{project.get('enhanced_score', 0):.1f}</td>
+                                <td class="{_score_class(project.get('enhanced_score', 0))}">{project.get('enhanced_score', 0):.1f}</td>
                                 <td>{project.get('stars', 0):,}</td>
                                 <td><strong>{project.get('cutting_edge_score', 0)}</strong></td>
                                 <td><span class="badge badge-{project.get('innovation_level', 'unknown')}">{project.get('innovation_level', 'Unknown')}</span></td>
                                 <td>{last_commit}</td>
                             </tr>
-        """
-    
-    # 准备图表数据
-    maturity_data = data.get('ai_maturity_distribution', [])
-    innovation_data = data.get('innovation_analysis', [])
-    commercial_data = data.get('commercial_potential', [])
-    tech_stack_data = data.get('technology_stack', [])
-    framework_data = data.get('ai_frameworks', [])
-    community_data = data.get('community_health', [])
-    
-    html_content += f"""
+        """)
+
+    return f"""
+            <!-- 前沿技术项目 -->
+            <div class="section">
+                <h2>🔬 前沿技术项目</h2>
+                <div class="table-container">
+                    <table>
+                        <thead>
+                            <tr>
+                                <th>项目</th>
+                                <th>综合评分</th>
+                                <th>星标</th>
+                                <th>前沿性评分</th>
+                                <th>创新水平</th>
+                                <th>最后提交</th>
+                            </tr>
+                        </thead>
+                        <tbody>{''.join(rows)}
                         </tbody>
                     </table>
                 </div>
             </div>
+    """
+
+
+def _render_chart_script(spec: Dict[str, Any], data: Dict[str, Any]) -> str:
+    items = data.get(spec["query"], [])
+    dataset = dict(spec["dataset"], data=[item.get('count', 0) for item in items])
+    chart = {
+        "type": spec["type"],
+        "data": {"labels": [item.get(spec["label_field"], 'Unknown') for item in items], "datasets": [dataset]},
+        "options": spec["options"],
+    }
+    return f"""
+        // {spec['title']}
+        new Chart(document.getElementById('{spec['canvas']}').getContext('2d'), {json.dumps(chart, ensure_ascii=False)});
+"""
+
+
+def _chart_renderer(spec: Dict[str, Any]):
+    return lambda data: _render_chart_script(spec, data)
+
+
+# 区块 → (依赖的查询, 渲染函数); 依赖查询的结果不变时复用缓存的HTML
+SECTIONS = {
+    "overview": (("overview",), _render_overview),
+    "top_projects": (("top_projects",), _render_top_projects),
+    "chart_grid": ((), _render_chart_grid),
+    "trending_projects": (("trending_projects",), _render_trending_projects),
+}
+SECTIONS.update({
+    f"chart:{spec['canvas']}": ((spec["query"],), _chart_renderer(spec)) for spec in CHART_SPECS
+})
+
+
+def _section_digest(data: Dict[str, Any], inputs: Tuple[str, ...]) -> str:
+    payload = json.dumps([data.get(name) for name in inputs], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def render_sections(data: Dict[str, Any], cache: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, str], List[str]]:
+    """渲染各区块, 输入摘要与缓存一致的区块直接复用; 返回 (区块HTML, 重新渲染的区块名)"""
+    cached = (cache or {}).get("sections", {})
+    sections, rendered = {}, []
+    for name, (inputs, render) in SECTIONS.items():
+        digest = _section_digest(data, inputs)
+        entry = cached.get(name)
+        if entry and entry.get("digest") == digest:
+            sections[name] = entry["html"]
+            continue
+        sections[name] = render(data)
+        rendered.append(name)
+        cached[name] = {"digest": digest, "html": sections[name]}
+    if cache is not None:
+        cache["sections"] = cached
+    return sections, rendered
+
+
+def assemble_html(sections: Dict[str, str]) -> str:
+    """拼接区块 (页头/页脚时间戳每次生成)"""
+    now = datetime.now()
+    chart_scripts = "".join(sections[f"chart:{spec['canvas']}"] for spec in CHART_SPECS)
+    return "".join([
+        HTML_HEAD.replace("{css}", read_static_asset("dashboard.css")),
+        f"""<body>
+    <div class="dashboard">
+        <div class="header">
+            <h1>🚀 GitHub AI项目增强指标仪表板</h1>
+            <p>基于100分制综合评分的AI项目价值分析</p>
+            <p>更新时间: {now.strftime('%Y-%m-%d %H:%M:%S')}</p>
+        </div>
+        """,
+        sections["overview"],
+        """
+        <div class="content">""",
+        sections["top_projects"],
+        sections["chart_grid"],
+        sections["trending_projects"],
+        f"""
         </div>
-        
+
         <div class="footer">
-            <p>© 2024 GitHub AI项目增强指标监控系统 | 基于Cloudflare D1数据库 | 数据更新时间: {datetime.now().strftime('%Y-%m-%d %H:%M')}</p>
+            <p>© 2024 GitHub AI项目增强指标监控系统 | 基于Cloudflare D1数据库 | 数据更新时间: {now.strftime('%Y-%m-%d %H:%M')}</p>
         </div>
     </div>
-    
-    <script>
-        // AI成熟度分布图
-        const maturityCtx = document.getElementById('maturityChart').getContext('2d');
-        new Chart(maturityCtx, {{
-            type: 'doughnut',
-            data: {{
-                labels: {json.dumps([item.get('ai_maturity_level', 'Unknown') for item in maturity_data])},
-                datasets: [{{
-                    data: {json.dumps([item.get('count', 0) for item in maturity_data])},
-                    backgroundColor: ['#28a745', '#17a2b8', '#ffc107', '#6c757d']
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                plugins: {{
-                    legend: {{
-                        position: 'bottom'
-                    }}
-                }}
-            }}
-        }});
-        
-        // 创新水平分析图
-        const innovationCtx = document.getElementById('innovationChart').getContext('2d');
-        new Chart(innovationCtx, {{
-            type: 'bar',
-            data: {{
-                labels: {json.dumps([item.get('innovation_level', 'Unknown') for item in innovation_data])},
-                datasets: [{{
-                    label: '项目数量',
-                    data: {json.dumps([item.get('count', 0) for item in innovation_data])},
-                    backgroundColor: '#667eea'
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                scales: {{
-                    y: {{
-                        beginAtZero: true
-                    }}
-                }}
-            }}
-        }});
-        
-        // 商业潜力分布图
-        const commercialCtx = document.getElementById('commercialChart').getContext('2d');
-        new Chart(commercialCtx, {{
-            type: 'pie',
-            data: {{
-                labels: {json.dumps([item.get('commercial_potential', 'Unknown') for item in commercial_data])},
-                datasets: [{{
-                    data: {json.dumps([item.get('count', 0) for item in commercial_data])},
-                    backgroundColor: ['#28a745', '#fd7e14', '#ffc107', '#6c757d']
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                plugins: {{
-                    legend: {{
-                        position: 'bottom'
-                    }}
-                }}
-            }}
-        }});
-        
-        // 技术栈分布图
-        const techStackCtx = document.getElementById('techStackChart').getContext('2d');
-        new Chart(techStackCtx, {{
-            type: 'horizontalBar',
-            data: {{
-                labels: {json.dumps([item.get('primary_language', 'Unknown') for item in tech_stack_data])},
-                datasets: [{{
-                    label: '项目数量',
-                    data: {json.dumps([item.get('count', 0) for item in tech_stack_data])},
-                    backgroundColor: '#764ba2'
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                scales: {{
-                    x: {{
-                        beginAtZero: true
-                    }}
-                }}
-            }}
-        }});
-        
-        // AI框架使用情况图
-        const frameworkCtx = document.getElementById('frameworkChart').getContext('2d');
-        new Chart(frameworkCtx, {{
-            type: 'doughnut',
-            data: {{
-                labels: {json.dumps([item.get('ai_framework', 'Unknown') for item in framework_data])},
-                datasets: [{{
-                    data: {json.dumps([item.get('count', 0) for item in framework_data])},
-                    backgroundColor: ['#e83e8c', '#fd7e14', '#20c997', '#6f42c1', '#dc3545']
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                plugins: {{
-                    legend: {{
-                        position: 'bottom'
-                    }}
-                }}
-            }}
-        }});
-        
-        // 社区健康状态图
-        const communityCtx = document.getElementById('communityChart').getContext('2d');
-        new Chart(communityCtx, {{
-            type: 'radar',
-            data: {{
-                labels: {json.dumps([item.get('community_health', 'Unknown') for item in community_data])},
-                datasets: [{{
-                    label: '项目数量',
-                    data: {json.dumps([item.get('count', 0) for item in community_data])},
-                    borderColor: '#667eea',
-                    backgroundColor: 'rgba(102, 126, 234, 0.2)'
-                }}]
-            }},
-            options: {{
-                responsive: true,
-                scales: {{
-                    r: {{
-                        beginAtZero: true
-                    }}
-                }}
-            }}
-        }});
-    </script>
+
+    <script>{chart_scripts}    </script>
 </body>
 </html>
-    """
-    
-    return html_content
+    """,
+    ])
+
 
-def main_generate_dashboard():
-    """生成增强指标仪表板"""
+def generate_html_dashboard(data, cache: Optional[Dict[str, Any]] = None):
+    """生成HTML仪表板 (传入缓存时仅重新渲染输入有变化的区块)"""
+    sections, _ = render_sections(data, cache)
+    return assemble_html(sections)
+
+
+def main_generate_dashboard(force: bool = False, output_file: Optional[str] = None,
+                            cache_file: Optional[str] = None, static_dir: Optional[str] = None) -> Optional[List[str]]:
+    """
+    生成增强指标仪表板, 返回本次重新渲染(静态模式为重新写出)的区块名
+    static_dir 不为空时导出静态仪表板 (区块JSON + HTML外壳) 而非单文件HTML
+    """
     print("🎯 开始生成增强指标仪表板...")
-    
+    start_time = time.time()
+    cache = {} if force else load_dashboard_cache(cache_file)
+
     # 获取数据
     print("📊 正在获取数据库数据...")
-    data = fetch_dashboard_data()
-    
+    data, refreshed = fetch_dashboard_data_cached(cache, force=force)
+
     if not data:
         print("❌ 无法获取数据")
-        return
-    
+        return None
+
+    if static_dir:
+        print("📦 正在导出静态仪表板...")
+        result = export_static_dashboard(data, static_dir, cache.get("watermark"), CHART_SPECS)
+        save_dashboard_cache(cache, cache_file)
+        print(f"🧩 重新写出区块: {len(result['written'])}/{len(data)} | 区块数据共 {result['bytes'] / 1024:.1f}KB")
+        print(f"✅ 静态仪表板已导出: {static_dir} (耗时 {time.time() - start_time:.2f}s, {'重新查询' if refreshed else '命中缓存'})")
+        return result["written"]
+
     # 生成HTML
     print("🎨 正在生成HTML仪表板...")
-    html_content = generate_html_dashboard(data)
-    
-    # 保存文件
-    output_file = "enhanced_metrics_dashboard.html"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
-    
-    print(f"✅ 仪表板已生成: {output_file}")
+    sections, rendered = render_sections(data, cache)
+    html_content = assemble_html(sections)
+    print(f"🧩 重新渲染区块: {len(rendered)}/{len(SECTIONS)}" + (f" ({', '.join(rendered)})" if rendered else ""))
+
+    # 原子写入
+    output_file = output_file or DASHBOARD_CONFIG["output_file"]
+    atomic_write(output_file, html_content)
+    save_dashboard_cache(cache, cache_file)
+
+    print(f"✅ 仪表板已生成: {output_file} (耗时 {time.time() - start_time:.2f}s, {'重新查询' if refreshed else '命中缓存'})")
     print(f"🌐 请在浏览器中打开 {os.path.abspath(output_file)} 查看")
+    return rendered
 
 if __name__ == "__main__":
-    main_generate_dashboard()
+    parser = argparse.ArgumentParser(description="增强指标仪表板生成器")
+    parser.add_argument("--force", action="store_true", help="忽略缓存, 重新查询并渲染全部区块")
+    parser.add_argument("--output", help="HTML输出路径 (默认 enhanced_metrics_dashboard.html)")
+    parser.add_argument("--static", nargs="?", const=STATIC_DASHBOARD_CONFIG["output_dir"], metavar="DIR",
+                        help="导出静态仪表板到目录 (默认 dashboard_site): 区块JSON + HTML外壳")
+    args = parser.parse_args()
+    main_generate_dashboard(force=args.force, output_file=args.output, static_dir=args.static)
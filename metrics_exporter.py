@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+采集指标导出器 - OpenMetrics/Prometheus 文本格式
+功能: 运行期间通过本地HTTP端点暴露指标, 运行结束时写入textfile快照或推送到Pushgateway
+      (textfile collector 与 Pushgateway 只接受 Prometheus 文本格式 0.0.4, 快照与推送使用该格式)
+更新时间: 2025-09-16
+"""
+
+import os
+import logging
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from monitoring_system import MonitoringSystem, LatencyHistogram
+
+# 导出配置
+METRICS_EXPORT_CONFIG = {
+    "prefix": "ai_collector",
+    "job": "github_ai_collector",
+    # 延迟直方图的固定桶上界 (秒), 保证不同运行间可比
+    "latency_buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0],
+    "content_type": "application/openmetrics-text; version=1.0.0; charset=utf-8",
+    "text_content_type": "text/plain; version=0.0.4; charset=utf-8",
+    "push_timeout": 10,
+}
+
+logger = logging.getLogger('ai_collector_v2.metrics_exporter')
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _MetricWriter:
+    """按指标族累积文本行 (openmetrics=False 时输出 Prometheus 文本格式 0.0.4)"""
+
+    def __init__(self, prefix: str, openmetrics: bool = True):
+        self.prefix = prefix
+        self.openmetrics = openmetrics
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str, unit: Optional[str] = None) -> str:
+        full_name = f"{self.prefix}_{name}"
+        # 0.0.4 没有 UNIT 元数据, 计数器的 TYPE 行直接使用带 _total 的样本名
+        type_name = f"{full_name}_total" if kind == "counter" and not self.openmetrics else full_name
+        self.lines.append(f"# TYPE {type_name} {kind}")
+        if unit and self.openmetrics:
+            self.lines.append(f"# UNIT {full_name} {unit}")
+        self.lines.append(f"# HELP {type_name} {help_text}")
+        return full_name
+
+    def sample(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        self.lines.append(f"{name}{_labels(labels or {})} {_number(value)}")
+
+    def counter(self, name: str, help_text: str, values: List[Tuple[Dict[str, str], float]]):
+        full_name = self.family(name, "counter", help_text)
+        for labels, value in values:
+            self.sample(f"{full_name}_total", value, labels)
+
+    def gauge(self, name: str, help_text: str, values: List[Tuple[Dict[str, str], float]], unit: Optional[str] = None):
+        full_name = self.family(name, "gauge", help_text, unit)
+        for labels, value in values:
+            self.sample(full_name, value, labels)
+
+    def histogram(self, name: str, help_text: str, values: List[Tuple[Dict[str, str], LatencyHistogram]],
+                  bounds: List[float]):
+        full_name = self.family(name, "histogram", help_text, "seconds")
+        for labels, histogram in values:
+            cumulative = histogram.buckets()
+            position, seen = 0, 0
+            for bound in bounds:
+                # 直方图内部桶上界不超过固定上界的样本计入该桶
+                while position < len(cumulative) and cumulative[position][0] <= bound:
+                    seen = cumulative[position][1]
+                    position += 1
+                self.sample(f"{full_name}_bucket", seen, dict(labels, le=_number(float(bound))))
+            self.sample(f"{full_name}_bucket", histogram.count, dict(labels, le="+Inf"))
+            self.sample(f"{full_name}_count", histogram.count, labels)
+            self.sample(f"{full_name}_sum", round(histogram.total, 6), labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines + (["# EOF"] if self.openmetrics else [])) + "\n"
+
+
+def render_openmetrics(monitoring: MonitoringSystem, prefix: str = METRICS_EXPORT_CONFIG["prefix"]) -> str:
+    """将监控系统的计数器、仪表和直方图渲染为 OpenMetrics 文本"""
+    return _render(monitoring, _MetricWriter(prefix))
+
+
+def render_text_format(monitoring: MonitoringSystem, prefix: str = METRICS_EXPORT_CONFIG["prefix"]) -> str:
+    """渲染为 Prometheus 文本格式 0.0.4 (textfile collector / Pushgateway)"""
+    return _render(monitoring, _MetricWriter(prefix, openmetrics=False))
+
+
+def _render(monitoring: MonitoringSystem, writer: _MetricWriter) -> str:
+    metrics = monitoring.metrics
+
+    writer.counter("repositories", "按流水线阶段统计的仓库数", [
+        ({"stage": "searched"}, metrics.total_searched),
+        ({"stage": "collected"}, metrics.total_collected),
+        ({"stage": "stored"}, metrics.total_stored),
+        ({"stage": "skipped"}, metrics.total_skipped),
+    ])
+    writer.counter("stored_repositories", "按存储结果统计的仓库数", [
+        ({"result": "new"}, metrics.new_repositories),
+        ({"result": "updated"}, metrics.updated_repositories),
+        ({"result": "duplicate"}, metrics.duplicate_repositories),
+    ])
+    writer.counter("errors", "按类型统计的错误数", [
+        ({"type": "api"}, metrics.api_errors),
+        ({"type": "storage"}, metrics.storage_errors),
+        ({"type": "processing"}, metrics.processing_errors),
+    ])
+    writer.counter("github_api_calls", "GitHub API调用次数", [({}, metrics.api_calls_made)])
+    writer.counter("search_rounds", "完成的搜索轮次", [({}, metrics.search_rounds_completed)])
+
+    endpoints = [(name, item) for name, item in metrics.endpoints.items() if item.requests or item.in_flight]
+    writer.counter("requests", "按接口类别统计的请求数", [({"endpoint": n}, e.requests) for n, e in endpoints])
+    writer.counter("request_errors", "按接口类别统计的失败请求数", [({"endpoint": n}, e.errors) for n, e in endpoints])
+    writer.counter("request_retries", "按接口类别统计的重试次数", [({"endpoint": n}, e.retries) for n, e in endpoints])
+    writer.counter("rate_limited", "按接口类别统计的限频响应数", [({"endpoint": n}, e.rate_limited) for n, e in endpoints])
+    writer.counter("received_bytes", "按接口类别统计的接收字节数", [({"endpoint": n}, e.bytes_in) for n, e in endpoints])
+    writer.counter("sent_bytes", "按接口类别统计的发送字节数", [({"endpoint": n}, e.bytes_out) for n, e in endpoints])
+    writer.gauge("in_flight_requests", "当前进行中的请求数", [({"endpoint": n}, e.in_flight) for n, e in endpoints])
+    writer.gauge("in_flight_requests_peak", "本次运行进行中请求数峰值",
+                 [({"endpoint": n}, e.in_flight_peak) for n, e in endpoints])
+    writer.histogram("request_duration_seconds", "按接口类别统计的请求延迟",
+                     [({"endpoint": n}, e.latency) for n, e in endpoints], METRICS_EXPORT_CONFIG["latency_buckets"])
+
+    writer.gauge("rate_limit_remaining", "GitHub API剩余配额", [({}, metrics.api_rate_limit_remaining)])
+    writer.gauge("stage_duration_seconds", "流水线各阶段耗时",
+                 [({"stage": name}, round(seconds, 6)) for name, seconds in metrics.stage_durations.items()], "seconds")
+    if metrics.start_time:
+        writer.gauge("run_start_time_seconds", "本次运行开始时间", [({}, metrics.start_time.timestamp())], "seconds")
+    writer.gauge("run_duration_seconds", "本次运行总耗时", [({}, round(metrics.total_duration, 6))], "seconds")
+    writer.gauge("success_rate", "存储成功率 (百分比)", [({}, round(metrics.get_success_rate(), 4))])
+    writer.gauge("throughput", "吞吐量 (项目/分钟)", [({}, round(metrics.get_throughput(), 4))])
+    return writer.render()
+
+
+def write_textfile(monitoring: MonitoringSystem, path: str) -> bool:
+    """原子写入 textfile 快照 (供 node_exporter textfile collector 或CI产物收集)"""
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(render_text_format(monitoring))
+        os.replace(tmp_path, path)
+        logger.info(f"📈 指标快照已写入: {path}")
+        return True
+    except OSError as e:
+        logger.error(f"❌ 写入指标快照失败: {e}")
+        return False
+
+
+def push_to_gateway(monitoring: MonitoringSystem, gateway_url: str,
+                    job: str = METRICS_EXPORT_CONFIG["job"], grouping: Optional[Dict[str, str]] = None) -> bool:
+    """以PUT方式推送到Pushgateway (替换该分组下的全部指标)"""
+    path = f"/metrics/job/{quote(job, safe='')}"
+    for key, value in (grouping or {}).items():
+        path += f"/{quote(key, safe='')}/{quote(str(value), safe='')}"
+    request = urllib.request.Request(
+        gateway_url.rstrip("/") + path,
+        data=render_text_format(monitoring).encode("utf-8"),
+        method="PUT",
+        headers={"Content-Type": METRICS_EXPORT_CONFIG["text_content_type"]},
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=METRICS_EXPORT_CONFIG["push_timeout"]) as response:
+            logger.info(f"📤 指标已推送到Pushgateway: {gateway_url} ({response.status})")
+            return True
+    except Exception as e:
+        logger.error(f"❌ 推送指标失败: {e}")
+        return False
+
+
+class MetricsHTTPServer:
+    """后台线程中的 /metrics 端点, 供Prometheus在长时间运行期间抓取"""
+
+    def __init__(self, monitoring: MonitoringSystem, port: int, host: str = "127.0.0.1"):
+        self.monitoring = monitoring
+        self.host = host
+        self.port = port
+        self.httpd: Optional[ThreadingHTTPServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> int:
+        """启动服务, 返回实际监听端口 (port=0 时随机分配)"""
+        monitoring = self.monitoring
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                # 按 Accept 协商: Prometheus 声明支持 OpenMetrics, 其余客户端返回 0.0.4
+                if "application/openmetrics-text" in self.headers.get("Accept", ""):
+                    body, content_type = render_openmetrics(monitoring), METRICS_EXPORT_CONFIG["content_type"]
+                else:
+                    body, content_type = render_text_format(monitoring), METRICS_EXPORT_CONFIG["text_content_type"]
+                body = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="metrics-exporter", daemon=True)
+        self.thread.start()
+        logger.info(f"📡 指标端点已启动: http://{self.host}:{self.port}/metrics")
+        return self.port
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def export_run_metrics(monitoring: MonitoringSystem, textfile: Optional[str] = None,
+                       pushgateway_url: Optional[str] = None, job: str = METRICS_EXPORT_CONFIG["job"]):
+    """运行结束时按配置写入快照和/或推送"""
+    if textfile:
+        write_textfile(monitoring, textfile)
+    if pushgateway_url:
+        push_to_gateway(monitoring, pushgateway_url, job)
@@ -1,15 +1,163 @@
 # -*- coding: utf-8 -*-
 """
 监控系统 - 采集指标和性能监控
-更新时间: 2025-09-12
+功能: 计数指标、按接口类别的延迟直方图(p50/p95/p99)、并发中仪表、重试与流量统计; 可重试状态与退避等待
+更新时间: 2025-09-16
 """
 
+import math
 import time
 import logging
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Iterator, Tuple
 from dataclasses import dataclass, field
 
+# 接口类别
+ENDPOINT_CLASSES = ("github_search", "github_repo", "d1_query", "d1_write")
+
+# 可重试的响应状态 (二级限频 / 限流 / 服务端错误)
+RETRYABLE_STATUSES = frozenset({403, 429, 500, 502, 503, 504})
+
+
+def retry_delay(attempt: int, headers: Any, backoff: float, max_delay: float) -> Optional[float]:
+    """
+    第 attempt 次重试前的等待秒数: 优先 Retry-After, 配额耗尽时等到 X-RateLimit-Reset, 否则指数退避
+    需等待超过 max_delay 时返回 None (不再重试)
+    """
+    headers = headers or {}
+    wait = None
+    try:
+        if headers.get("Retry-After") is not None:
+            wait = float(headers["Retry-After"])
+        elif headers.get("X-RateLimit-Remaining") == "0" and headers.get("X-RateLimit-Reset"):
+            wait = int(headers["X-RateLimit-Reset"]) - time.time()
+    except (TypeError, ValueError):
+        wait = None
+    if wait is None:
+        wait = backoff * 2 ** (attempt - 1)
+    return max(0.0, wait) if wait <= max_delay else None
+
+
+class LatencyHistogram:
+    """
+    HDR风格延迟直方图 (对数-线性分桶, 微秒精度)
+    每个2的幂区间分为32个子桶, 相对误差不超过约3%, 内存与样本数无关
+    """
+
+    SUB_BUCKET_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        linear = cls.SUB_BUCKETS * 2
+        if micros < linear:
+            return micros
+        shift = micros.bit_length() - (cls.SUB_BUCKET_BITS + 1)
+        return linear + (shift - 1) * cls.SUB_BUCKETS + (micros >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def _upper_bound(cls, index: int) -> int:
+        """桶内最大值 (微秒)"""
+        linear = cls.SUB_BUCKETS * 2
+        if index < linear:
+            return index
+        shift = (index - linear) // cls.SUB_BUCKETS + 1
+        mantissa = (index - linear) % cls.SUB_BUCKETS + cls.SUB_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        """记录一次耗时 (秒)"""
+        seconds = max(0.0, seconds)
+        index = self._index(int(seconds * 1_000_000))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: 'LatencyHistogram'):
+        """合并另一个直方图"""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p: float) -> float:
+        """分位数 (秒), p 取值 0-100"""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper_bound(index) / 1_000_000, self.max)
+        return self.max
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """非空桶的 (上界秒数, 累计数量), 供指标导出使用"""
+        cumulative = 0
+        result = []
+        for index in sorted(self.counts):
+            cumulative += self.counts[index]
+            result.append((self._upper_bound(index) / 1_000_000, cumulative))
+        return result
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """毫秒为单位的摘要"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean * 1000, 2),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+@dataclass
+class EndpointMetrics:
+    """单个接口类别的请求指标"""
+
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    in_flight: int = 0
+    in_flight_peak: int = 0
+
+
+class RequestTrace:
+    """单次请求的跟踪上下文 (由 MonitoringSystem.track 产生)"""
+
+    __slots__ = ("endpoint", "bytes_in", "bytes_out", "status", "error")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.status: Optional[int] = None
+        self.error = False
+
 @dataclass
 class CollectionMetrics:
     """采集指标数据类"""
@@ -46,6 +194,12 @@ class CollectionMetrics:
     keywords_used: List[str] = field(default_factory=list)
     search_rounds_completed: int = 0
     
+    # 请求与阶段耗时
+    endpoints: Dict[str, EndpointMetrics] = field(
+        default_factory=lambda: {name: EndpointMetrics() for name in ENDPOINT_CLASSES}
+    )
+    stage_durations: Dict[str, float] = field(default_factory=dict)
+    
     def calculate_duration(self):
         """计算总耗时"""
         if self.end_time:
@@ -87,7 +241,7 @@ class MonitoringSystem:
         """记录搜索操作"""
         self.metrics.total_searched += results_count
         self.metrics.keywords_used.append(keyword)
-        self.metrics.api_calls_made += 1
+        # API调用次数由 track() 按实际请求计数
     
     def record_collection(self, count: int):
         """记录采集操作"""
@@ -115,6 +269,111 @@ class MonitoringSystem:
         if ai_scores:
             self.metrics.avg_ai_relevance_score = sum(ai_scores) / len(ai_scores)
     
+    def endpoint(self, name: str) -> EndpointMetrics:
+        """获取接口类别指标 (未知类别自动创建)"""
+        metrics = self.metrics.endpoints.get(name)
+        if metrics is None:
+            metrics = self.metrics.endpoints[name] = EndpointMetrics()
+        return metrics
+    
+    @contextmanager
+    def track(self, endpoint: str) -> Iterator[RequestTrace]:
+        """
+        跟踪一次请求: 记录延迟、并发中数量和流量
+        用法: with monitoring.track("github_search") as trace: ...; trace.bytes_in = n; trace.status = 200
+        """
+        metrics = self.endpoint(endpoint)
+        trace = RequestTrace(endpoint)
+        metrics.in_flight += 1
+        if metrics.in_flight > metrics.in_flight_peak:
+            metrics.in_flight_peak = metrics.in_flight
+        started = time.perf_counter()
+        try:
+            yield trace
+        except Exception:
+            trace.error = True
+            raise
+        finally:
+            metrics.in_flight -= 1
+            self._finish(metrics, trace, time.perf_counter() - started)
+    
+    def _finish(self, metrics: EndpointMetrics, trace: RequestTrace, elapsed: float):
+        metrics.latency.record(elapsed)
+        metrics.requests += 1
+        metrics.bytes_in += trace.bytes_in
+        metrics.bytes_out += trace.bytes_out
+        if trace.status == 403 or trace.status == 429:
+            metrics.rate_limited += 1
+        if trace.error or (trace.status is not None and trace.status >= 400):
+            metrics.errors += 1
+        if trace.endpoint.startswith("github_"):
+            self.metrics.api_calls_made += 1
+    
+    def record_request(self, endpoint: str, seconds: float, bytes_in: int = 0,
+                       bytes_out: int = 0, status: Optional[int] = None, error: bool = False):
+        """直接记录一次已完成的请求"""
+        trace = RequestTrace(endpoint)
+        trace.bytes_in, trace.bytes_out, trace.status, trace.error = bytes_in, bytes_out, status, error
+        self._finish(self.endpoint(endpoint), trace, seconds)
+    
+    def record_retry(self, endpoint: str):
+        """记录一次重试"""
+        self.endpoint(endpoint).retries += 1
+    
+    def record_rate_limit_headers(self, headers: Any):
+        """从 X-RateLimit-Remaining 响应头更新剩余配额"""
+        remaining = headers.get("X-RateLimit-Remaining") if headers else None
+        if remaining is not None:
+            try:
+                self.record_rate_limit(int(remaining))
+            except (TypeError, ValueError):
+                pass
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """记录流水线阶段耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metrics.stage_durations[name] = self.metrics.stage_durations.get(name, 0.0) + time.perf_counter() - started
+    
+    def get_latency_report(self) -> Dict[str, Dict[str, Any]]:
+        """各接口类别的延迟分位数、并发峰值、重试和流量"""
+        report = {}
+        for name, metrics in self.metrics.endpoints.items():
+            if not metrics.requests:
+                continue
+            report[name] = dict(
+                metrics.latency.summary(),
+                errors=metrics.errors,
+                retries=metrics.retries,
+                rate_limited=metrics.rate_limited,
+                in_flight_peak=metrics.in_flight_peak,
+                bytes_in=metrics.bytes_in,
+                bytes_out=metrics.bytes_out,
+            )
+        return report
+    
+    def _format_latency_section(self) -> str:
+        lines = []
+        if self.metrics.stage_durations:
+            lines.append("⏱️ 阶段耗时:")
+            for name, seconds in self.metrics.stage_durations.items():
+                lines.append(f"  • {name}: {seconds:.2f}s")
+        report = self.get_latency_report()
+        if report:
+            lines.append("📶 请求延迟 (ms):")
+            lines.append(f"  {'接口':<14}{'请求':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'最大':>9}{'并发峰值':>9}"
+                         f"{'重试':>6}{'错误':>6}{'入(KB)':>10}{'出(KB)':>10}")
+            for name, item in report.items():
+                lines.append(
+                    f"  {name:<14}{item['count']:>7}{item['p50_ms']:>9.1f}{item['p95_ms']:>9.1f}"
+                    f"{item['p99_ms']:>9.1f}{item['max_ms']:>9.1f}{item['in_flight_peak']:>9}"
+                    f"{item['retries']:>6}{item['errors']:>6}{item['bytes_in'] / 1024:>10.1f}{item['bytes_out'] / 1024:>10.1f}"
+                )
+        return "\n".join(lines)
+    
     def record_api_error(self):
         """记录API错误"""
         self.metrics.api_errors += 1
@@ -172,6 +431,8 @@ class MonitoringSystem:
   • API错误: {self.metrics.api_errors}
   • 存储错误: {self.metrics.storage_errors}
   • 处理错误: {self.metrics.processing_errors}
+
+{self._format_latency_section()}
 {'='*50}
         """
         return report
@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+近重复仓库检测 - MinHash + LSH 分桶
+功能: 对名称+描述+topics 的字符 shingle 计算 MinHash 签名 (单次置换 + 旋转稠密化), LSH 分桶找候选, 入库前识别镜像/改名fork/模板克隆并归并到规范代表仓库
+更新时间: 2025-09-16
+
+每个仓库只与同桶候选比较, 分桶每簇只收录有限成员且单桶有容量上限, 每次检测的成本与索引规模无关; 簇内星标最多 (其次创建最早) 的仓库为规范代表;
+代表以外的成员视为克隆, 在补全阶段之前丢弃, 不再消耗补全API调用与存储
+"""
+
+import os
+import re
+import zlib
+import array
+import random
+import struct
+import logging
+import operator
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+from config_v2 import Config
+from trending_engine import parse_observation_time
+
+NEAR_DUPLICATE_CONFIG = {
+    "num_perm": 64,             # MinHash 签名长度 (单次置换的分槽数)
+    "bands": 16,                # LSH 分桶数 (每桶 num_perm / bands 行; J≈0.5 起成为候选)
+    "shingle_size": 5,          # 字符 shingle 长度
+    "min_shingles": 20,         # 文本过短 (如只有名称) 时不参与检测, 避免误判
+    "bucket_sample": 16,        # 每个簇进入 LSH 分桶的成员上限 (代表 + 最早收录的成员), 检测成本与簇大小无关
+    "min_band_hits": 2,         # 至少在几个分桶中相遇才精确比较 (J=0.8 时漏检率约0.07%, 大幅减少模板化文本的无效比较)
+    "max_bucket_size": 32,      # 单个分桶的条目上限 (模板化文本使大量不相似仓库同桶时, 限制每次检测的比较次数)
+    "max_entries": 200000,      # 持久化索引的仓库数上限, 超出时先淘汰星标最少的单成员簇
+    "seed": 20250916,
+}
+
+# 文件头: 魔数 + 签名长度 + 分桶数 + 记录数
+_HEADER = struct.Struct("<4sIII")
+_RECORD = struct.Struct("<qqIi")    # 仓库ID, 规范代表ID, 星标数, 创建时间 (epoch秒)
+_MAGIC = b"GAMI"                    # 签名算法变化时更换, 旧索引文件不再加载
+_UNKNOWN_CREATED = 0x7FFFFFFF       # 创建时间未知时视为最晚
+_EMPTY_SLOT = 1 << 32               # 空槽标记 (大于任何32位取值)
+_ROTATION_OFFSET = 0x9E3779B1       # 稠密化借用相邻槽时按距离加的偏移, 区分借用值与原值
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+logger = logging.getLogger('ai_collector_v2.near_duplicates')
+
+
+@dataclass
+class NearDuplicate:
+    """近重复判定结果"""
+
+    repo_id: int
+    canonical_id: int           # 所在簇的规范代表
+    matched_id: int             # 相似度最高的已知仓库
+    similarity: float           # 估计 Jaccard 相似度
+
+
+def _getter(repo: Any):
+    """字典与 RepositoryData 统一取值"""
+    return repo.get if isinstance(repo, dict) else lambda key, default=None: getattr(repo, key, default)
+
+
+def repo_text(repo: Any) -> str:
+    """名称 + 描述 + topics 归一化文本 (小写, 非字词字符折叠为空格)"""
+    get = _getter(repo)
+    topics = get('topics') or []
+    if isinstance(topics, str):
+        topics = topics.split(",")
+    text = " ".join([get('name') or "", get('description') or "", " ".join(sorted(topics))])
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def shingles(text: str, size: Optional[int] = None) -> List[int]:
+    """字符 shingle → 32位哈希集合"""
+    size = size or NEAR_DUPLICATE_CONFIG["shingle_size"]
+    return list({zlib.crc32(text[i:i + size].encode("utf-8")) for i in range(max(len(text) - size + 1, 0))})
+
+
+class NearDuplicateIndex:
+    """MinHash-LSH 索引 (签名持久化, 分桶在加载时重建)"""
+
+    def __init__(self, threshold: Optional[float] = None, num_perm: Optional[int] = None,
+                 bands: Optional[int] = None):
+        self.config = Config()
+        self.threshold = threshold if threshold is not None else self.config.NEAR_DUPLICATE_THRESHOLD
+        self.num_perm = num_perm or NEAR_DUPLICATE_CONFIG["num_perm"]
+        self.bands = bands or NEAR_DUPLICATE_CONFIG["bands"]
+        if self.num_perm % self.bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.rows = self.num_perm // self.bands
+
+        # 单次置换: 每个 shingle 只哈希一次, 高位决定槽位, 低位参与槽内取最小
+        self.mix = random.Random(NEAR_DUPLICATE_CONFIG["seed"]).getrandbits(64) | 1
+
+        self._reset()
+        self.stats = {"checked": 0, "duplicates": 0, "too_short": 0, "refreshed": 0}
+
+    def _reset(self):
+        self.signatures: Dict[int, array.array] = {}
+        self.root: Dict[int, int] = {}                      # 仓库ID → 规范代表ID
+        self.members: Dict[int, List[int]] = {}             # 规范代表ID → 簇成员 (含代表自身)
+        self.samples: Dict[int, List[int]] = {}             # 规范代表ID → 进入分桶的成员 (代表在首位)
+        self.rank_keys: Dict[int, Tuple[int, int, int]] = {}  # 代表选择依据 (星标多, 创建早, ID小)
+        # LSH 分桶每簇只收录有限的成员样本: 克隆再多也不增加每次检测的比较次数
+        self.buckets: List[Dict[int, List[int]]] = [{} for _ in range(self.bands)]
+
+    # ------------------------------------------------------------------
+    # 签名与候选
+    # ------------------------------------------------------------------
+
+    def signature(self, text: str) -> Optional[array.array]:
+        """
+        MinHash 签名 (单次置换 + 旋转稠密化, 每个 shingle 只哈希一次); 文本过短时返回 None
+        空槽借用顺时针最近非空槽的值, 两个签名对应槽相等的比例仍是 Jaccard 相似度的估计
+        """
+        hashes = shingles(text)
+        if len(hashes) < NEAR_DUPLICATE_CONFIG["min_shingles"]:
+            return None
+        k, mix = self.num_perm, self.mix
+        slots = [_EMPTY_SLOT] * k
+        for h in hashes:
+            h = (h * mix) & 0xFFFFFFFFFFFFFFFF
+            slot = ((h >> 32) * k) >> 32
+            value = h & 0xFFFFFFFF
+            if value < slots[slot]:
+                slots[slot] = value
+
+        signature = list(slots)
+        for i in range(k):
+            if slots[i] == _EMPTY_SLOT:
+                distance = 1
+                while slots[(i + distance) % k] == _EMPTY_SLOT:
+                    distance += 1
+                signature[i] = (slots[(i + distance) % k] + distance * _ROTATION_OFFSET) & 0xFFFFFFFF
+        return array.array("I", signature)
+
+    def _band_keys(self, signature: array.array) -> List[int]:
+        rows = self.rows
+        return [hash(tuple(signature[i * rows:(i + 1) * rows])) for i in range(self.bands)]
+
+    def _similarity(self, a: array.array, b: array.array) -> float:
+        return sum(map(operator.eq, a, b)) / self.num_perm
+
+    def candidates(self, signature: array.array) -> Dict[int, float]:
+        """同桶候选 (各簇成员样本) → 估计相似度 (只返回达到阈值的; 每个簇命中一个成员即不再比较其余成员)"""
+        hits: Dict[int, int] = {}
+        for band, key in zip(self.buckets, self._band_keys(signature)):
+            for other in band.get(key, ()):
+                hits[other] = hits.get(other, 0) + 1
+
+        min_hits = NEAR_DUPLICATE_CONFIG["min_band_hits"]
+        matched_roots, matches = set(), {}
+        root = self.root
+        for other, count in hits.items():
+            if count < min_hits or root[other] in matched_roots:
+                continue
+            similarity = self._similarity(signature, self.signatures[other])
+            if similarity >= self.threshold:
+                matches[other] = similarity
+                matched_roots.add(root[other])
+        return matches
+
+    # ------------------------------------------------------------------
+    # 簇与规范代表
+    # ------------------------------------------------------------------
+
+    def canonical_of(self, repo_id: int) -> int:
+        """规范代表ID (未收录的仓库返回自身)"""
+        return self.root.get(repo_id, repo_id)
+
+    def clusters(self, min_size: int = 2) -> Dict[int, List[int]]:
+        """规范代表 → 簇成员 (含代表自身)"""
+        return {root: sorted(members) for root, members in self.members.items() if len(members) >= min_size}
+
+    def _bucket_add(self, repo_id: int):
+        # 已满的分桶不再收录 (先收录的是星标更高的仓库), 该仓库仍可经其他分桶被找到
+        limit = NEAR_DUPLICATE_CONFIG["max_bucket_size"]
+        for band, key in zip(self.buckets, self._band_keys(self.signatures[repo_id])):
+            bucket = band.setdefault(key, [])
+            if len(bucket) < limit:
+                bucket.append(repo_id)
+
+    def _bucket_remove(self, repo_id: int):
+        for band, key in zip(self.buckets, self._band_keys(self.signatures[repo_id])):
+            bucket = band.get(key)
+            if bucket is not None and repo_id in bucket:
+                bucket.remove(repo_id)
+                if not bucket:
+                    del band[key]
+
+    def _set_sample(self, root: int, sample: List[int], previous: Iterable[int] = ()):
+        """设置簇的分桶样本 (截断到上限), 增删对应的分桶条目"""
+        sample = sample[:NEAR_DUPLICATE_CONFIG["bucket_sample"]]
+        kept = set(sample)
+        for repo_id in set(previous) - kept:
+            self._bucket_remove(repo_id)
+        previous = set(previous)
+        for repo_id in sample:
+            if repo_id not in previous:
+                self._bucket_add(repo_id)
+        self.samples[root] = sample
+
+    def _insert(self, repo_id: int, signature: array.array, rank_key: Tuple[int, int, int]):
+        """收录为单成员簇的代表"""
+        self.signatures[repo_id] = signature
+        self.rank_keys[repo_id] = rank_key
+        self.root[repo_id] = repo_id
+        self.members[repo_id] = [repo_id]
+        self._set_sample(repo_id, [repo_id])
+
+    def _merge(self, roots: Iterable[int]) -> int:
+        """合并若干簇, 最优代表接任; 较小簇的成员并入最大的成员列表, 返回新代表"""
+        roots = list(roots)
+        best = max(roots, key=lambda root: self.rank_keys[root])
+        largest = max(roots, key=lambda root: len(self.members[root]))
+        previous = [repo_id for root in roots for repo_id in self.samples.pop(root)]
+        self._set_sample(best, [best] + [repo_id for repo_id in previous if repo_id != best], previous)
+        members = self.members.pop(largest)
+        for root in roots:
+            if root != largest:
+                moved = self.members.pop(root)
+                members.extend(moved)
+                for member in moved:
+                    self.root[member] = best
+        if largest != best:
+            for member in members:
+                self.root[member] = best
+        self.members[best] = members
+        return best
+
+    def _remove(self, repo_id: int):
+        """移出索引; 若为簇代表, 剩余成员中最优者接任 (只遍历本簇成员)"""
+        root = self.root.pop(repo_id)
+        members = self.members.pop(root)
+        members.remove(repo_id)
+        previous = self.samples.pop(root)
+        sample = [other for other in previous if other != repo_id]
+        if root == repo_id and members:
+            root = max(members, key=lambda other: self.rank_keys[other])
+            for member in members:
+                self.root[member] = root
+            sample = [root] + [other for other in sample if other != root]
+        if members:
+            self.members[root] = members
+            self._set_sample(root, sample, previous)
+        else:
+            self._set_sample(root, [], previous)
+            del self.samples[root]
+        del self.signatures[repo_id]
+        del self.rank_keys[repo_id]
+
+    @staticmethod
+    def _rank_key(repo_id: int, stars: int, created: int) -> Tuple[int, int, int]:
+        return (stars, -(created or _UNKNOWN_CREATED), -repo_id)
+
+    def check_and_add(self, repo: Any) -> Optional[NearDuplicate]:
+        """
+        检测并收录一个仓库 (RepositoryData 或 GitHub API 字典)
+        返回 NearDuplicate 表示该仓库是已知簇的非代表成员 (应跳过); 返回 None 表示应保留
+        新仓库优于现有代表时 (如原仓库晚于克隆被发现) 成为新代表并返回 None
+        已收录仓库的描述/topics 变化时, 旧签名移出索引并按新内容重新检测
+        """
+        get = _getter(repo)
+        repo_id = get('id')
+        if not repo_id:
+            return None
+        repo_id = int(repo_id)
+        self.stats["checked"] += 1
+
+        signature = self.signature(repo_text(repo))
+        if repo_id in self.root:
+            if signature == self.signatures[repo_id]:
+                canonical = self.root[repo_id]
+                if canonical == repo_id:
+                    return None
+                self.stats["duplicates"] += 1
+                return NearDuplicate(repo_id, canonical, canonical,
+                                     self._similarity(self.signatures[repo_id], self.signatures[canonical]))
+            self.stats["refreshed"] += 1
+            self._remove(repo_id)
+
+        if signature is None:
+            self.stats["too_short"] += 1
+            return None
+
+        created = int(parse_observation_time(get('created_at')) or 0)
+        rank_key = self._rank_key(repo_id, int(get('stargazers_count') or 0), created)
+        matches = self.candidates(signature)
+        self._insert(repo_id, signature, rank_key)
+        if not matches:
+            return None
+
+        # 合并所有命中的簇, 簇内最优者为代表
+        best = self._merge({self.root[other] for other in matches} | {repo_id})
+        if best == repo_id:
+            return None
+
+        matched_id = max(matches, key=matches.get)
+        self.stats["duplicates"] += 1
+        return NearDuplicate(repo_id, best, matched_id, matches[matched_id])
+
+    def filter(self, repos: Iterable[Any]) -> List[Any]:
+        """
+        过滤一批仓库 (搜索结果字典或 RepositoryData), 丢弃近重复克隆 (保持原顺序)
+        按星标降序检测, 使同批次中的原仓库先于克隆收录并成为代表;
+        调用方应先完成质量/相关性过滤, 避免被过滤掉的仓库成为代表而连带丢弃其克隆
+        """
+        repos = list(repos)
+        dropped = set()
+        for position in sorted(range(len(repos)), key=lambda i: -(_getter(repos[i])('stargazers_count') or 0)):
+            repo = repos[position]
+            duplicate = self.check_and_add(repo)
+            if duplicate is not None:
+                dropped.add(position)
+                logger.debug(f"跳过近重复仓库: {_getter(repo)('full_name', duplicate.repo_id)} ≈ {duplicate.matched_id} "
+                             f"(相似度 {duplicate.similarity:.2f}, 代表 {duplicate.canonical_id})")
+        return [repo for position, repo in enumerate(repos) if position not in dropped]
+
+    def log_summary(self):
+        stats = self.stats
+        logger.info(f"🧬 近重复检测: 检查 {stats['checked']}, 跳过克隆 {stats['duplicates']}, "
+                    f"文本过短未检测 {stats['too_short']}, 内容变化重建签名 {stats['refreshed']}, 索引 {len(self.signatures)} 个仓库, "
+                    f"{len(self.clusters())} 个重复簇")
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def _persisted_order(self) -> List[int]:
+        """持久化的仓库 (不超过 max_entries): 多成员簇的代表 → 其余簇成员 → 单成员簇, 各组内按代表选择依据降序"""
+        rank = self.rank_keys.get
+        roots = sorted((root for root, members in self.members.items() if len(members) > 1), key=rank, reverse=True)
+        singles = sorted((root for root, members in self.members.items() if len(members) == 1), key=rank, reverse=True)
+        ordered = roots + [member for root in roots for member in self.members[root] if member != root] + singles
+        return ordered[:NEAR_DUPLICATE_CONFIG["max_entries"]]
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """原子写入索引文件 (签名 + 规范代表; 超出上限时淘汰星标最少的单成员簇)"""
+        path = path if path is not None else self.config.NEAR_DUPLICATE_INDEX_FILE
+        if not path:
+            return False
+        tmp_path = f"{path}.tmp"
+        try:
+            ordered = self._persisted_order()
+            with open(tmp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, self.num_perm, self.bands, len(ordered)))
+                for repo_id in ordered:
+                    stars, created, _ = self.rank_keys[repo_id]
+                    f.write(_RECORD.pack(repo_id, self.root[repo_id], stars, -created))
+                    f.write(self.signatures[repo_id].tobytes())
+            os.replace(tmp_path, path)
+            if len(ordered) < len(self.signatures):
+                logger.info(f"🧹 近重复索引超出上限, 淘汰 {len(self.signatures) - len(ordered)} 个单成员簇")
+            return True
+        except Exception as e:
+            logger.error(f"保存近重复索引失败: {path} | {e}")
+            return False
+
+    def load(self, path: Optional[str] = None) -> int:
+        """从索引文件加载, 返回加载的仓库数 (参数不一致或文件损坏时从空索引开始)"""
+        path = path if path is not None else self.config.NEAR_DUPLICATE_INDEX_FILE
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            canonicals: Dict[int, int] = {}
+            with open(path, 'rb') as f:
+                magic, num_perm, bands, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or num_perm != self.num_perm or bands != self.bands:
+                    raise ValueError("文件格式或签名参数不一致")
+                size = num_perm * 4
+                for _ in range(count):
+                    repo_id, canonical, stars, created = _RECORD.unpack(f.read(_RECORD.size))
+                    signature = array.array("I")
+                    signature.frombytes(f.read(size))
+                    if len(signature) != num_perm:
+                        raise ValueError("记录长度不完整")
+                    self.signatures[repo_id] = signature
+                    self.rank_keys[repo_id] = (stars, -created, -repo_id)
+                    canonicals[repo_id] = canonical
+            # 文件中代表先于成员: 成员列表以代表开头, 分桶样本取每簇最早的成员
+            for repo_id, canonical in canonicals.items():
+                root = canonical if canonical in canonicals else repo_id
+                self.root[repo_id] = root
+                self.members.setdefault(root, []).append(repo_id)
+            for root in sorted(self.members, key=self.rank_keys.get, reverse=True):
+                self._set_sample(root, self.members[root])
+            logger.info(f"📂 已加载近重复索引: {len(self.signatures)} 个仓库")
+        except Exception as e:
+            logger.warning(f"加载近重复索引失败: {path} | {e}")
+            self._reset()
+        return len(self.signatures)
@@ -15,34 +15,53 @@ Date: 2025-09-12
 import asyncio
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Any
-import aiohttp
-from tqdm import tqdm
+from typing import List, Dict, Any, Optional, Tuple
 
 # 导入项目模块
 from config_v2 import Config
 from enhanced_keywords_config import SEARCH_ROUNDS_CONFIG
-from enhanced_data_processor_v2 import EnhancedDataProcessorV2
 from deduplication_manager import DeduplicationManager
 from monitoring_system import CollectionMetrics, MonitoringSystem
-from email_notifier import EmailNotifier
+from structured_logging import setup_logging, get_stage_logger
+from lazy_clients import get_cloudflare_client, lazy_import
+from trending_engine import TrendingEngine
+from leaderboards import LeaderboardTracker
+from search_index import SearchIndex
+from near_duplicates import NearDuplicateIndex
+from semantic_categorizer import get_categorizer
+from query_planner import AdaptiveQueryPlanner
+from stream_deduplicator import StreamingDeduplicator
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# 延迟导入 (首次使用时才加载): 数据处理器、进度条、指标导出、邮件与性能分析
+enhanced_data_processor_v2 = lazy_import("enhanced_data_processor_v2")
+tqdm = lazy_import("tqdm")
+metrics_exporter = lazy_import("metrics_exporter")
+email_notifier = lazy_import("email_notifier")
+profiling = lazy_import("profiling")
 
 class OptimizedHighFrequencyCollector:
     """优化版高频采集器"""
     
     def __init__(self):
         self.config = Config()
-        self.data_processor = EnhancedDataProcessorV2()
+        self.monitoring = MonitoringSystem()
+        self.data_processor = enhanced_data_processor_v2.EnhancedDataProcessorV2(monitoring=self.monitoring)
         self.dedup_manager = DeduplicationManager(
             cloudflare_client=None,  # 将在初始化时设置
-            config=self.config
+            config=self.config,
+            monitoring=self.monitoring
         )
-        self.monitoring = MonitoringSystem()
-        self.email_notifier = EmailNotifier()
+        self.email_notifier = email_notifier.EmailNotifier()
+        self.trending_engine = TrendingEngine()
+        self.leaderboards = LeaderboardTracker()
+        self.search_index = SearchIndex()
+        self.query_planner = AdaptiveQueryPlanner()
+        self.deduplicator = StreamingDeduplicator()
+        self.near_duplicates = NearDuplicateIndex()
+        self.categorizer = get_categorizer()  # 与数据处理器共享 (分类 + 相似仓库向量索引)
         self.session = None
         self.logger = logging.getLogger('optimized_collector')
+        self.store_logger = get_stage_logger('optimized_collector', 'store')  # 逐仓库日志 (按阶段采样)
         
         # 性能配置
         self.BATCH_SIZE = 50  # 批量处理大小
@@ -52,19 +71,31 @@ class OptimizedHighFrequencyCollector:
         """初始化系统"""
         self.logger.info("🚀 初始化优化版采集系统...")
         
-        # 初始化HTTP会话
-        self.session = aiohttp.ClientSession(
-            headers={
-                "Authorization": f"token {self.config.GITHUB_TOKEN}",
-                "Accept": "application/vnd.github.v3+json"
-            },
-            timeout=aiohttp.ClientTimeout(total=30)
-        )
+        # 初始化HTTP会话 (已注入会话时复用, 如基准测试回放)
+        if self.session is None:
+            import aiohttp
+            self.session = aiohttp.ClientSession(
+                headers={
+                    "Authorization": f"token {self.config.GITHUB_TOKEN}",
+                    "Accept": "application/vnd.github.v3+json"
+                },
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
         
         # 初始化去重管理器的Cloudflare客户端
-        from cloudflare import Cloudflare
-        cloudflare_client = Cloudflare(api_token=self.config.CLOUDFLARE_API_TOKEN)
-        self.dedup_manager.cloudflare_client = cloudflare_client
+        if self.dedup_manager.cloudflare_client is None:
+            self.dedup_manager.cloudflare_client = get_cloudflare_client(self.config.CLOUDFLARE_API_TOKEN)
+        
+        # 补齐UPSERT依赖的新增列 (如 score_model_version), 未升级的库不会逐条写入失败
+        await self.dedup_manager.ensure_schema()
+        
+        # 一次性扫描已入库ID, 构建"肯定是新仓库"预判过滤器
+        await self.dedup_manager.load_id_filter()
+        
+        # 加载趋势引擎状态
+        self.trending_engine.load()
+        self.query_planner.load()
+        self.near_duplicates.load()
         
         self.logger.info("✅ 系统初始化完成")
         
@@ -74,29 +105,37 @@ class OptimizedHighFrequencyCollector:
         
         self.logger.info("🔍 开始执行多轮搜索策略")
         
+        # 按历史产出在各轮次之间分配搜索配额
+        keyword_plan = self.query_planner.plan(
+            {config["name"]: config["keywords"] for config in SEARCH_ROUNDS_CONFIG},
+            quota=self.config.SEARCH_QUERY_QUOTA
+        )
+        
         for config in SEARCH_ROUNDS_CONFIG:
             round_name = config["name"]
-            self.logger.info(f"🚀 执行 {round_name}")
+            keywords = keyword_plan.get(round_name, [])
+            if not keywords:
+                continue
+            self.logger.info(f"🚀 执行 {round_name}: {keywords}")
             
-            keywords = config["keywords"][:3]  # 限制关键词数量以提升速度
-            target_count = min(config.get("expected_results", 300), 300)  # 限制单轮数量
+            max_results = self.config.SEARCH_ROUND_MAX_RESULTS
+            target_count = min(config.get("expected_results", max_results), max_results)  # 限制单轮数量
             
             round_repos = await self._search_round(keywords, target_count)
             all_repos.extend(round_repos)
+            self.monitoring.complete_search_round()
             
             self.logger.info(f"✅ {round_name} 完成: {len(round_repos)}个仓库")
             
             # 避免API限制
             await asyncio.sleep(1)
         
-        # 去重
-        unique_repos = {}
-        for repo in all_repos:
-            repo_id = repo.get('id')
-            if repo_id and repo_id not in unique_repos:
-                unique_repos[repo_id] = repo
+        self.query_planner.end_run()
+        self.query_planner.save()
         
-        final_repos = list(unique_repos.values())
+        # 各轮结果已在到达时流式去重
+        final_repos = all_repos
+        self.deduplicator.log_summary()
         self.logger.info(f"🏁 搜索完成: 共 {len(final_repos)} 个去重后的仓库")
         
         # 如果搜索结果太少，使用备用搜索策略
@@ -108,12 +147,41 @@ class OptimizedHighFrequencyCollector:
         
         return final_repos
     
+    async def _fetch_search(self, params: Dict[str, Any]) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """调用搜索API并记录延迟/流量, 403/429/5xx 时退避重试; 返回 (状态码, 响应JSON或None)"""
+        from config_v2 import APIConfig
+        from monitoring_system import RETRYABLE_STATUSES, retry_delay
+        url = f"{APIConfig.GITHUB_API_BASE}/search/repositories"
+        max_retries = self.config.REQUEST_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            with self.monitoring.track("github_search") as trace:
+                trace.bytes_out = len(url) + sum(len(str(k)) + len(str(v)) + 2 for k, v in params.items())
+                async with self.session.get(url, params=params) as response:
+                    trace.status = status = response.status
+                    trace.bytes_in = int(response.headers.get("Content-Length") or 0)
+                    self.monitoring.record_rate_limit_headers(response.headers)
+                    if status == 200:
+                        return status, await response.json()
+                    headers = response.headers
+            
+            if status not in RETRYABLE_STATUSES or attempt == max_retries:
+                break
+            delay = retry_delay(attempt + 1, headers, self.config.REQUEST_RETRY_BACKOFF, self.config.REQUEST_RETRY_MAX_DELAY)
+            if delay is None:
+                break
+            self.monitoring.record_retry("github_search")
+            self.logger.debug(f"搜索API返回 {status}, {delay:.1f}秒后重试 ({attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
+        return status, None
+    
     async def _search_round(self, keywords: List[str], target_count: int) -> List[Dict[str, Any]]:
         """执行单轮搜索 - 优化为发现新仓库"""
         repos = []
         per_keyword = max(1, target_count // len(keywords))
         
         for keyword in keywords:
+            keyword_start = len(repos)
+            search_calls = 0
             try:
                 # 动态时间过滤器 - 分层搜索策略
                 from datetime import datetime, timedelta
@@ -135,66 +203,60 @@ class OptimizedHighFrequencyCollector:
                     "per_page": min(100, per_keyword)
                 }
                 
-                from config_v2 import APIConfig
-                async with self.session.get(
-                    APIConfig.GITHUB_SEARCH_ENDPOINT,
-                    params=params
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        items = data.get("items", [])
-                        repos.extend(items)
+                status, data = await self._fetch_search(params)
+                search_calls += 1
+                if status == 200:
+                    items = data.get("items", [])
+                    repos.extend(self.deduplicator.filter(items, keyword))
+                    
+                    # 分层搜索策略：如果结果不足，逐步放宽条件
+                    if len(items) < per_keyword * 0.3:  # 如果结果少于预期的30%
+                        self.logger.info(f"🔍 {keyword} 最近30天结果不足({len(items)}个)，搜索最近90天")
+                        extended_query = f"{keyword} {extended_updated_filter} stars:>={min_stars}"
+                        extended_params = {
+                            "q": extended_query,
+                            "sort": "updated",
+                            "order": "desc", 
+                            "per_page": min(100, per_keyword - len(items))
+                        }
                         
-                        # 分层搜索策略：如果结果不足，逐步放宽条件
-                        if len(items) < per_keyword * 0.3:  # 如果结果少于预期的30%
-                            self.logger.info(f"🔍 {keyword} 最近30天结果不足({len(items)}个)，搜索最近90天")
-                            extended_query = f"{keyword} {extended_updated_filter} stars:>={min_stars}"
-                            extended_params = {
-                                "q": extended_query,
-                                "sort": "updated",
-                                "order": "desc", 
-                                "per_page": min(100, per_keyword - len(items))
-                            }
+                        extended_status, extended_data = await self._fetch_search(extended_params)
+                        search_calls += 1
+                        if extended_status == 200:
+                            extended_items = extended_data.get("items", [])
+                            repos.extend(self.deduplicator.filter(extended_items, keyword))
+                            self.logger.info(f"✅ {keyword} 90天搜索获得 {len(extended_items)} 个仓库")
                             
-                            async with self.session.get(
-                                APIConfig.GITHUB_SEARCH_ENDPOINT,
-                                params=extended_params
-                            ) as extended_response:
-                                if extended_response.status == 200:
-                                    extended_data = await extended_response.json()
-                                    extended_items = extended_data.get("items", [])
-                                    repos.extend(extended_items)
-                                    self.logger.info(f"✅ {keyword} 90天搜索获得 {len(extended_items)} 个仓库")
-                                    
-                                    # 如果90天结果仍然不足，搜索最近1年
-                                    if len(items) + len(extended_items) < per_keyword * 0.5:
-                                        self.logger.info(f"🔍 {keyword} 90天结果仍不足，搜索最近1年")
-                                        fallback_query = f"{keyword} {fallback_updated_filter} stars:>={min_stars}"
-                                        fallback_params = {
-                                            "q": fallback_query,
-                                            "sort": "updated",
-                                            "order": "desc",
-                                            "per_page": min(100, per_keyword - len(items) - len(extended_items))
-                                        }
-                                        
-                                        async with self.session.get(
-                                            APIConfig.GITHUB_SEARCH_ENDPOINT,
-                                            params=fallback_params
-                                        ) as fallback_response:
-                                            if fallback_response.status == 200:
-                                                fallback_data = await fallback_response.json()
-                                                fallback_items = fallback_data.get("items", [])
-                                                repos.extend(fallback_items)
-                                                self.logger.info(f"✅ {keyword} 1年搜索获得 {len(fallback_items)} 个仓库")
-                                    
-                    elif response.status == 403:
-                        self.logger.warning(f"⚠️ API限频: {keyword}")
-                        await asyncio.sleep(10)
-                    else:
-                        self.logger.error(f"❌ API错误 {keyword}: {response.status}")
-                        
+                            # 如果90天结果仍然不足，搜索最近1年
+                            if len(items) + len(extended_items) < per_keyword * 0.5:
+                                self.logger.info(f"🔍 {keyword} 90天结果仍不足，搜索最近1年")
+                                fallback_query = f"{keyword} {fallback_updated_filter} stars:>={min_stars}"
+                                fallback_params = {
+                                    "q": fallback_query,
+                                    "sort": "updated",
+                                    "order": "desc",
+                                    "per_page": min(100, per_keyword - len(items) - len(extended_items))
+                                }
+                                
+                                fallback_status, fallback_data = await self._fetch_search(fallback_params)
+                                search_calls += 1
+                                if fallback_status == 200:
+                                    fallback_items = fallback_data.get("items", [])
+                                    repos.extend(self.deduplicator.filter(fallback_items, keyword))
+                                    self.logger.info(f"✅ {keyword} 1年搜索获得 {len(fallback_items)} 个仓库")
+                                
+                elif status == 403:
+                    self.logger.warning(f"⚠️ API限频: {keyword}")
+                    await asyncio.sleep(10)
+                else:
+                    self.logger.error(f"❌ API错误 {keyword}: {status}")
+                    
             except Exception as e:
                 self.logger.error(f"❌ 搜索失败 {keyword}: {e}")
+            
+            # 记录该关键词带来的本次运行内新仓库数
+            self.query_planner.record(keyword, search_calls, len(repos) - keyword_start)
+            self.monitoring.record_search(keyword, len(repos) - keyword_start)
                 
         return repos
     
@@ -221,40 +283,56 @@ class OptimizedHighFrequencyCollector:
                     "per_page": 50
                 }
                 
-                from config_v2 import APIConfig
-                async with self.session.get(
-                    APIConfig.GITHUB_SEARCH_ENDPOINT,
-                    params=params
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        items = data.get("items", [])
-                        backup_repos.extend(items)
-                        self.logger.info(f"✅ 备用搜索 {keyword}: {len(items)} 个仓库")
-                    elif response.status == 403:
-                        self.logger.warning(f"⚠️ 备用搜索API限频: {keyword}")
-                        await asyncio.sleep(5)
-                    else:
-                        self.logger.error(f"❌ 备用搜索API错误 {keyword}: {response.status}")
+                status, data = await self._fetch_search(params)
+                if status == 200:
+                    items = data.get("items", [])
+                    backup_repos.extend(self.deduplicator.filter(items, f"backup:{keyword}"))
+                    self.logger.info(f"✅ 备用搜索 {keyword}: {len(items)} 个仓库")
+                elif status == 403:
+                    self.logger.warning(f"⚠️ 备用搜索API限频: {keyword}")
+                    await asyncio.sleep(5)
+                else:
+                    self.logger.error(f"❌ 备用搜索API错误 {keyword}: {status}")
                         
             except Exception as e:
                 self.logger.error(f"❌ 备用搜索失败 {keyword}: {e}")
         
-        # 去重
-        unique_backup = {}
-        for repo in backup_repos:
-            repo_id = repo.get('id')
-            if repo_id and repo_id not in unique_backup:
-                unique_backup[repo_id] = repo
-        
-        return list(unique_backup.values())
+        return backup_repos
     
     async def process_repositories(self, repos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """处理仓库数据 - 使用增强版处理器确保watchers_count正确"""
         self.logger.info(f"🔄 开始处理 {len(repos)} 个仓库数据 (增强版)")
         
-        # 使用增强版数据处理器批量处理，确保watchers_count正确
-        processed_repos = await self.data_processor.process_repositories_batch(repos, max_concurrent=10)
+        # 先做基础处理与质量/相关性过滤 (无API调用), 近重复只在通过过滤的仓库间聚类,
+        # 避免被过滤掉的仓库当选代表而连带丢弃其克隆
+        candidates = self.data_processor.process_repositories(repos)
+        
+        # 补全前丢弃近重复克隆 (镜像/改名fork/模板克隆), 节省补全API调用与存储
+        candidates = self.near_duplicates.filter(candidates)
+        self.near_duplicates.log_summary()
+        
+        # 使用增强版数据处理器批量补全，确保watchers_count正确
+        processed_repos = await self.data_processor.enrich_repositories_batch(candidates, max_concurrent=10)
+        
+        # 趋势状态中没有的仓库 (首次运行/状态文件丢失): 用已存储的星标与采集时间回放基线
+        unseen = [repo for repo in processed_repos if repo.id not in self.trending_engine.states]
+        if unseen:
+            stored = await self.dedup_manager.prefetch_existing_records(unseen)
+            created_at = {repo.id: repo.created_at for repo in unseen}
+            self.trending_engine.bootstrap_from_records(
+                dict(record, created_at=created_at[repo_id]) for repo_id, record in stored.items()
+            )
+        
+        # 基于星标速度增量更新趋势评分 (仅本次观测到的仓库)
+        trending_scores = self.trending_engine.update_batch(processed_repos)
+        for repo in processed_repos:
+            repo.trending_score = trending_scores.get(repo.id, repo.trending_score)
+        
+        # 写入相似仓库向量索引
+        self.categorizer.index_batch(processed_repos)
+        
+        # 增量维护 Top-K 排行榜 (邮件摘要直接读取内存榜单)
+        self.leaderboards.update_batch(processed_repos, self.trending_engine)
         
         self.logger.info(f"✅ 数据处理完成: {len(processed_repos)} 个有效仓库")
         return processed_repos
@@ -264,42 +342,57 @@ class OptimizedHighFrequencyCollector:
         self.logger.info(f"💾 开始存储 {len(repos)} 个仓库到数据库")
         
         stats = {"new": 0, "updated": 0, "skipped": 0, "total_processed": 0}
+        stored_repos = []  # 写入成功的仓库, 存储结束后批量更新全文索引
+        
+        # 整批去重决策 (批量查询已存在记录 + 规则引擎一次性评估)
+        decisions = await self.dedup_manager.decide_batch(repos)
         
         # 批量处理以提升性能
-        with tqdm(repos, desc="存储仓库数据", disable=False, mininterval=2.0) as pbar:
-            for repo in pbar:
+        with tqdm.tqdm(zip(repos, decisions), total=len(repos), desc="存储仓库数据", disable=False, mininterval=2.0) as pbar:
+            for repo, decision in pbar:
                 try:
                     stats["total_processed"] += 1
                     
-                    # 检查去重逻辑
-                    should_store, reason = await self.dedup_manager.should_store_repository(repo)
-                    
-                    if should_store:
+                    if decision.should_store:
                         # 存储到数据库
                         success = await self.store_single_repository(repo)
                         
                         if success:
-                            if "新项目" in reason:
+                            self.dedup_manager.mark_stored(repo.id)
+                            stored_repos.append(repo)
+                            if decision.action == "insert":
                                 stats["new"] += 1
-                                self.logger.info(f"✅ 新增仓库: {repo.full_name}")
-                            elif "重要更新" in reason:
-                                stats["updated"] += 1
-                                self.logger.info(f"🔄 更新仓库: {repo.full_name}")
+                                self.store_logger.info("✅ 新增仓库: %s", repo.full_name,
+                                                       extra={"repo": repo.full_name, "action": "insert"})
                             else:
                                 stats["updated"] += 1
+                                self.store_logger.info("🔄 更新仓库: %s | %s", repo.full_name, decision.reason,
+                                                       extra={"repo": repo.full_name, "action": "update", "rule": decision.rule})
                         else:
                             stats["skipped"] += 1
                     else:
                         stats["skipped"] += 1
-                        self.logger.debug(f"跳过存储: {repo.full_name} | {reason}")
+                        self.store_logger.debug("跳过存储: %s | %s", repo.full_name, decision.reason,
+                                                extra={"repo": repo.full_name, "action": "skip", "rule": decision.rule})
                         
                 except Exception as e:
                     self.logger.error(f"存储失败 {repo.full_name}: {e}")
                     stats["skipped"] += 1
-                    
-                pbar.update(1)
         
+        try:
+            index_stats = self.search_index.add_batch(stored_repos)
+            self.logger.info(f"🔎 全文索引已更新: 重建 {index_stats['indexed']}, 文本未变化 {index_stats['unchanged']}")
+        except Exception as e:
+            self.logger.error(f"❌ 更新全文索引失败: {e}")
+        
+        filter_stats = self.dedup_manager.filter_stats
         self.logger.info(f"✅ 存储完成: 新增{stats['new']}, 更新{stats['updated']}, 跳过{stats['skipped']}")
+        self.logger.info(
+            f"🌸 ID过滤器: 跳过查询 {filter_stats['skipped_lookups']}, "
+            f"可能命中 {filter_stats['probable_hits']}, 误判 {filter_stats['false_positives']}"
+        )
+        self.logger.info(f"🧾 内容指纹未变化, 跳过写入: {self.dedup_manager.write_stats['unchanged_skipped']}")
+        self.dedup_manager.rule_engine.log_summary()
         return stats
     
     async def store_single_repository(self, repo) -> bool:
@@ -319,17 +412,23 @@ class OptimizedHighFrequencyCollector:
                 repo.ai_category or '', 
                 ','.join(repo.ai_tags) if repo.ai_tags else '',  # 序列化ai_tags
                 repo.quality_score, repo.trending_score, 1,  # collection_round
-                repo.last_fork_count, repo.fork_growth, repo.collection_hash or '',
-                current_time  # collection_time
+                repo.last_fork_count, repo.fork_growth,
+                repo.collection_hash or repo.calculate_fingerprint(),
+                current_time,  # collection_time
+                repo.score_model_version or ''
             ]
             
             # 执行插入/更新
-            response = self.dedup_manager.cloudflare_client.d1.database.query(
-                database_id=self.config.D1_DATABASE_ID,
-                account_id=self.config.CLOUDFLARE_ACCOUNT_ID,
-                sql=self.dedup_manager.db_config.UPSERT_SQL,
-                params=params
-            )
+            sql = self.dedup_manager.db_config.UPSERT_SQL
+            with self.monitoring.track("d1_write") as trace:
+                trace.bytes_out = len(sql) + sum(len(str(value)) for value in params)
+                response = self.dedup_manager.cloudflare_client.d1.database.query(
+                    database_id=self.config.D1_DATABASE_ID,
+                    account_id=self.config.CLOUDFLARE_ACCOUNT_ID,
+                    sql=sql,
+                    params=params
+                )
+                trace.error = not response.success
             
             if response.success:
                 return True
@@ -344,18 +443,36 @@ class OptimizedHighFrequencyCollector:
     async def run_optimized_collection(self):
         """运行优化版采集"""
         start_time = datetime.now()
+        metrics_server = None
         
         try:
-            await self.initialize_system()
+            if self.config.METRICS_PORT:
+                metrics_server = metrics_exporter.MetricsHTTPServer(self.monitoring, self.config.METRICS_PORT)
+                metrics_server.start()
+            self.monitoring.start_collection()
+            with self.monitoring.stage("initialize"):
+                await self.initialize_system()
             
             # 1. 搜索仓库
-            repos = await self.search_repositories()
+            with self.monitoring.stage("search"):
+                repos = await self.search_repositories()
             
             # 2. 处理数据
-            processed_repos = await self.process_repositories(repos)
+            with self.monitoring.stage("process"):
+                processed_repos = await self.process_repositories(repos)
+            self.monitoring.record_collection(len(processed_repos))
             
             # 3. 存储数据
-            stats = await self.store_repositories(processed_repos)
+            with self.monitoring.stage("store"):
+                stats = await self.store_repositories(processed_repos)
+            self.monitoring.record_storage(stats["new"], stats["updated"], stats["skipped"])
+            self.trending_engine.save()
+            self.leaderboards.save()
+            self.near_duplicates.save()
+            self.categorizer.save()
+            self.dedup_manager.save_id_filter()
+            self.monitoring.end_collection()
+            self.logger.info(self.monitoring.get_summary_report())
             
             # 4. 生成报告
             end_time = datetime.now()
@@ -388,7 +505,8 @@ class OptimizedHighFrequencyCollector:
                 'updated': stats['updated'],
                 'skipped': stats['skipped'],
                 'duration': f"{duration:.1f}分钟",
-                'speed': f"{len(processed_repos)/duration:.1f}项/分钟"
+                'speed': f"{len(processed_repos)/duration:.1f}项/分钟",
+                'leaderboards': self.leaderboards.digest()
             }
             self.email_notifier.send_success_notification(email_stats)
             
@@ -406,11 +524,20 @@ class OptimizedHighFrequencyCollector:
                     await self.session.close()
                 except Exception as close_error:
                     self.logger.error(f"❌ 关闭HTTP会话失败: {close_error}")
+            # 失败的运行同样导出, 便于按运行统计错误率
+            if self.monitoring.metrics.end_time is None:
+                self.monitoring.end_collection()
+            metrics_exporter.export_run_metrics(self.monitoring, self.config.METRICS_TEXTFILE,
+                               self.config.PUSHGATEWAY_URL, self.config.METRICS_JOB)
+            if metrics_server:
+                metrics_server.stop()
 
 async def main():
     """主函数"""
+    setup_logging()
     collector = OptimizedHighFrequencyCollector()
     await collector.run_optimized_collection()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = profiling.parse_profile_args()
+    profiling.run_profiled(lambda: asyncio.run(main()), args.profile, "optimized_fast_collector", args.profile_output)
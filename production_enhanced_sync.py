@@ -5,15 +5,20 @@
 """
 
 import os
-import requests
 import json
 import time
 from datetime import datetime, timedelta
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, lazy_import, LazyCloudflareClient
+from config_v2 import APIConfig
+from stream_deduplicator import StreamingDeduplicator
+from near_duplicates import NearDuplicateIndex
+from semantic_categorizer import classify_text
+
+# 延迟导入 (首次发起请求时才加载)
+requests = lazy_import("requests")
 
 # 加载环境变量
-load_dotenv()
+load_env()
 
 # === 配置部分 ===
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
@@ -25,10 +30,10 @@ if not all([GITHUB_TOKEN, CLOUDFLARE_API_TOKEN, CLOUDFLARE_ACCOUNT_ID, D1_DATABA
     raise ValueError("环境变量未设置。请确保所有必要的环境变量都已正确配置。")
 
 # 初始化客户端
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
 
 # GitHub API设置
-github_url = "https://api.github.com/search/repositories"
+github_url = f"{APIConfig.GITHUB_API_BASE}/search/repositories"
 github_headers = {
     "Authorization": f"token {GITHUB_TOKEN}",
     "Accept": "application/vnd.github.v3+json"
@@ -259,28 +264,8 @@ def filter_and_process_repos(repos):
     return processed
 
 def categorize_project(name, description):
-    """项目分类"""
-    text = f"{name} {description}".lower()
-    
-    if any(k in text for k in ["llm", "large language", "gpt", "chatgpt", "language model"]):
-        if any(k in text for k in ["api", "server", "serving", "inference"]):
-            return "LLM服务与工具"
-        elif any(k in text for k in ["chat", "assistant", "bot", "conversation"]):
-            return "LLM应用"
-        else:
-            return "LLM研究"
-    elif any(k in text for k in ["rag", "retrieval", "vector", "embedding"]):
-        return "RAG技术"
-    elif any(k in text for k in ["diffusion", "stable-diffusion", "text-to-image", "generation"]):
-        return "生成式AI"
-    elif any(k in text for k in ["computer vision", "object detection", "yolo", "opencv"]):
-        return "计算机视觉"
-    elif any(k in text for k in ["data science", "pandas", "visualization", "analytics"]):
-        return "数据科学"
-    elif any(k in text for k in ["machine learning", "deep learning", "neural network"]):
-        return "机器学习"
-    else:
-        return "其他AI技术"
+    """项目分类 (语义分类引擎)"""
+    return classify_text(name, description)
 
 def extract_tags(name, description):
     """提取技术标签"""
@@ -374,7 +359,7 @@ def main_production_collection():
     print(f"🔄 计划搜索次数: {len(search_queries) * len(time_windows)} 次")
     
     all_repos = []
-    unique_repos = {}
+    deduplicator = StreamingDeduplicator()
     search_count = 0
     
     # 执行搜索
@@ -383,39 +368,50 @@ def main_production_collection():
             
             repos = execute_github_search(keyword, time_window)
             
-            # 去重处理
-            for repo in repos:
-                repo_id = str(repo.get("id"))
-                if repo_id not in unique_repos:
-                    unique_repos[repo_id] = repo
+            # 去重处理 (到达即丢弃重复载荷)
+            all_repos.extend(deduplicator.filter(repos, keyword))
             
             search_count += 1
             
             # 进度显示
             if search_count % 10 == 0:
-                print(f"📈 已完成 {search_count} 次搜索，收集到 {len(unique_repos)} 个唯一项目")
+                print(f"📈 已完成 {search_count} 次搜索，收集到 {len(all_repos)} 个唯一项目")
             
             # API限制控制
             time.sleep(1.0)  # 每次搜索间隔1秒
             
             # 达到足够数据量时可以早停
-            if len(unique_repos) >= 1000:
-                print(f"✅ 已收集足够数据 ({len(unique_repos)}个)，停止搜索")
+            if len(all_repos) >= 1000:
+                print(f"✅ 已收集足够数据 ({len(all_repos)}个)，停止搜索")
                 break
         
-        if len(unique_repos) >= 1000:
+        if len(all_repos) >= 1000:
             break
     
-    all_repos = list(unique_repos.values())
+    dedup_stats = deduplicator.get_stats()
     
     print(f"\n🎉 搜索完成！")
     print(f"📊 总搜索次数: {search_count}")
     print(f"📦 候选项目总数: {len(all_repos)}")
+    print(f"🧹 重复结果: {dedup_stats['duplicates']} 个 ({dedup_stats['duplicate_rate']}%)")
+    for a, b, ratio in deduplicator.redundant_pairs()[:5]:
+        print(f"   🔁 关键词高度重叠: {a} ↔ {b} ({ratio:.0%})")
     
     # 处理和过滤数据
     print(f"\n🔍 开始处理和过滤数据...")
     filtered_repos = filter_and_process_repos(all_repos)
     
+    # 近重复检测 (fork 标记过滤不到的镜像/改名fork/模板克隆)
+    # 只在通过过滤的仓库间聚类, 避免被过滤掉的仓库当选代表而连带丢弃其克隆
+    near_duplicates = NearDuplicateIndex()
+    near_duplicates.load()
+    survivor_ids = {repo["id"] for repo in filtered_repos}
+    unique_ids = {str(repo.get("id")) for repo in near_duplicates.filter(
+        repo for repo in all_repos if str(repo.get("id")) in survivor_ids)}
+    near_duplicates.save()
+    print(f"🧬 近重复克隆: {len(filtered_repos) - len(unique_ids)} 个, 已跳过")
+    filtered_repos = [repo for repo in filtered_repos if repo["id"] in unique_ids]
+    
     print(f"✅ 过滤后有效项目: {len(filtered_repos)}")
     
     if filtered_repos:
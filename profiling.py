@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+采集入口性能分析 - --profile 参数支持
+功能: cProfile 输出 pstats; 采样模式输出 speedscope 火焰图, 并区分 CPU 时间与等待(await/IO)时间
+更新时间: 2025-09-16
+"""
+
+import os
+import sys
+import json
+import time
+import pstats
+import asyncio
+import argparse
+import cProfile
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# 性能分析配置
+PROFILING_CONFIG = {
+    "output_dir": "profiles",
+    "top": 20,
+    "sample_interval": 0.005,  # 采样间隔(秒)
+    "task_stack_limit": 32,
+}
+
+# 阻塞等待原语 (cProfile 中的自身耗时计为等待时间而非CPU时间)
+WAIT_FUNCTIONS = (
+    "'poll' of 'select.epoll'", "'poll' of 'select.poll'", "'poll' of 'select.devpoll'",
+    "'control' of 'select.kqueue'", "built-in method select.select", "built-in method time.sleep",
+    "built-in method _socket.getaddrinfo", "'acquire' of '_thread.lock'", "'acquire' of '_thread.RLock'",
+    "'recv' of '_socket.socket'", "'recv_into' of '_socket.socket'", "'connect' of '_socket.socket'",
+    "'sendall' of '_socket.socket'", "'send' of '_socket.socket'",
+    "'read' of '_ssl._SSLSocket'", "'write' of '_ssl._SSLSocket'", "'do_handshake' of '_ssl._SSLSocket'",
+)
+
+# 等待帧 (路径后缀, 函数名): 采样时栈顶位于此处说明主线程在等待IO
+# 包括事件循环空闲、标准库同步socket读写, 以及 requests/Cloudflare SDK 底层的同步连接读写
+IDLE_FRAMES = (
+    ("selectors.py", "select"), ("selectors.py", "_select"),
+    ("socket.py", "readinto"), ("socket.py", "create_connection"), ("socket.py", "getaddrinfo"),
+    ("ssl.py", "read"), ("ssl.py", "recv_into"), ("ssl.py", "do_handshake"),
+    (os.path.join("httpcore", "_backends", "sync.py"), "read"),
+    (os.path.join("httpcore", "_backends", "sync.py"), "write"),
+    (os.path.join("httpcore", "_backends", "sync.py"), "connect_tcp"),
+)
+
+# 项目源码目录 (等待时间按项目内调用点归因)
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser) -> argparse.ArgumentParser:
+    """为入口脚本添加 --profile / --profile-output 参数"""
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=["cprofile", "sampling"],
+                        help="性能分析模式: cprofile (输出.pstats) 或 sampling (输出speedscope JSON)")
+    parser.add_argument("--profile-output", default=PROFILING_CONFIG["output_dir"], help="分析结果输出目录")
+    return parser
+
+
+def parse_profile_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析性能分析参数, 忽略入口脚本的其他参数"""
+    parser = add_profile_arguments(argparse.ArgumentParser(add_help=False))
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+
+def _is_wait_function(func: Tuple[str, int, str]) -> bool:
+    filename, _, name = func
+    label = f"{filename}:{name}"
+    return any(pattern in label for pattern in WAIT_FUNCTIONS)
+
+
+def _func_label(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+def summarize_pstats(stats: pstats.Stats, top: int = PROFILING_CONFIG["top"]) -> Dict[str, Any]:
+    """按累计耗时汇总, 并将自身耗时拆分为CPU时间与等待时间"""
+    rows = []
+    wait_seconds = 0.0
+    for func, (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        waiting = _is_wait_function(func)
+        if waiting:
+            wait_seconds += tottime
+        rows.append({"function": _func_label(func), "calls": ncalls, "self": tottime,
+                     "cumulative": cumtime, "wait": waiting})
+
+    total = stats.total_tt
+    return {
+        "total_seconds": round(total, 4),
+        "cpu_seconds": round(total - wait_seconds, 4),
+        "wait_seconds": round(wait_seconds, 4),
+        "top_cumulative": sorted(rows, key=lambda r: r["cumulative"], reverse=True)[:top],
+        "top_cpu": sorted((r for r in rows if not r["wait"]), key=lambda r: r["self"], reverse=True)[:top],
+        "top_wait": sorted((r for r in rows if r["wait"]), key=lambda r: r["self"], reverse=True)[:top],
+    }
+
+
+class SamplingProfiler:
+    """
+    异步感知采样分析器: 后台线程定期采集主线程调用栈
+    主线程在事件循环中空闲时, 将该样本按比例归到各挂起任务的 await 调用栈上
+    """
+
+    def __init__(self, interval: float = PROFILING_CONFIG["sample_interval"]):
+        self.interval = interval
+        self.target_thread = threading.main_thread().ident
+        self.frames: List[Dict[str, Any]] = []
+        self.frame_index: Dict[Tuple[str, str, int], int] = {}
+        self.cpu_samples: List[Tuple[List[int], float]] = []
+        self.wait_samples: List[Tuple[List[int], float]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = self.frame_index[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _stack(self, frame) -> List[int]:
+        stack = []
+        while frame is not None:
+            stack.append(self._frame_id(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    @staticmethod
+    def _await_chain(coro) -> List[Any]:
+        """沿 cr_await 链展开挂起协程的完整 await 调用栈 (Task.get_stack 只返回一帧)"""
+        frames = []
+        while coro is not None and len(frames) < PROFILING_CONFIG["task_stack_limit"]:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                break
+            frames.append(frame)
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+        return frames
+
+    def _task_stacks(self, frame) -> List[List[int]]:
+        """从事件循环帧中找到 loop, 收集各挂起任务的协程调用栈"""
+        loop = None
+        while frame is not None:
+            if frame.f_code.co_name == "_run_once":
+                loop = frame.f_locals.get("self")
+                break
+            frame = frame.f_back
+        if not isinstance(loop, asyncio.AbstractEventLoop):
+            return []
+        stacks = []
+        try:
+            for task in list(asyncio.all_tasks(loop)):
+                frames = self._await_chain(task.get_coro())
+                if frames:
+                    stacks.append([self._frame_id(f.f_code) for f in frames])
+        except RuntimeError:
+            return []
+        return stacks
+
+    def _sample(self, weight: float):
+        frame = sys._current_frames().get(self.target_thread)
+        if frame is None:
+            return
+        code = frame.f_code
+        if not any(code.co_name == name and code.co_filename.endswith(suffix) for suffix, name in IDLE_FRAMES):
+            self.cpu_samples.append((self._stack(frame), weight))
+            return
+        # 事件循环空闲: 按比例归到各挂起任务; 同步阻塞IO: 当前调用栈即等待点
+        task_stacks = self._task_stacks(frame) if code.co_filename.endswith("selectors.py") else []
+        if not task_stacks:
+            self.wait_samples.append((self._stack(frame), weight))
+        for stack in task_stacks:
+            self.wait_samples.append((stack, weight / len(task_stacks)))
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            self._sample(now - last)
+            last = now
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _label(self, index: int) -> str:
+        frame = self.frames[index]
+        return f"{os.path.basename(frame['file'])}:{frame['line']}({frame['name']})"
+
+    def _top_self(self, samples: List[Tuple[List[int], float]], top: int) -> List[Dict[str, Any]]:
+        """按栈顶帧(自身耗时)排序"""
+        totals: Counter = Counter()
+        for stack, weight in samples:
+            if stack:
+                totals[stack[-1]] += weight
+        return [{"function": self._label(i), "self": seconds} for i, seconds in totals.most_common(top)]
+
+    def _top_project(self, samples: List[Tuple[List[int], float]], top: int) -> List[Dict[str, Any]]:
+        """按最内层的项目内调用点归因 (如 _fetch_search / store_single_repository)"""
+        totals: Counter = Counter()
+        for stack, weight in samples:
+            owner = next((i for i in reversed(stack) if self.frames[i]["file"].startswith(PROJECT_DIR)
+                          and self.frames[i]["file"] != __file__), None)
+            if owner is not None:
+                totals[owner] += weight
+        return [{"function": self._label(i), "self": seconds} for i, seconds in totals.most_common(top)]
+
+    def summary(self, top: int = PROFILING_CONFIG["top"]) -> Dict[str, Any]:
+        cpu = sum(weight for _, weight in self.cpu_samples)
+        wait = sum(weight for _, weight in self.wait_samples)
+        return {
+            "total_seconds": round(self.elapsed, 4),
+            "cpu_seconds": round(cpu, 4),
+            "wait_seconds": round(wait, 4),
+            "top_cpu": self._top_self(self.cpu_samples, top),
+            "top_cpu_project": self._top_project(self.cpu_samples, top),
+            "top_wait": self._top_project(self.wait_samples, top),
+        }
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """speedscope sampled 格式, CPU 与 await 各一个 profile"""
+        def profile(label: str, samples: List[Tuple[List[int], float]]) -> Dict[str, Any]:
+            return {
+                "type": "sampled", "name": f"{name} ({label})", "unit": "seconds",
+                "startValue": 0, "endValue": round(sum(w for _, w in samples), 6),
+                "samples": [stack for stack, _ in samples],
+                "weights": [round(weight, 6) for _, weight in samples],
+            }
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self.frames},
+            "profiles": [profile("CPU", self.cpu_samples), profile("await", self.wait_samples)],
+            "name": name,
+            "exporter": "github-ai-monitor profiling",
+        }
+
+
+def print_profile_summary(summary: Dict[str, Any], title: str):
+    """打印按累计耗时排序的热点函数, CPU 与等待时间分开展示"""
+    total = summary["total_seconds"] or 1
+    print("\n" + "=" * 78)
+    print(f"🔬 性能分析: {title}")
+    print("=" * 78)
+    print(f"⏱️ 总耗时 {summary['total_seconds']:.2f}s | 🧮 CPU {summary['cpu_seconds']:.2f}s "
+          f"({summary['cpu_seconds'] / total:.0%}) | ⏳ 等待 {summary['wait_seconds']:.2f}s "
+          f"({summary['wait_seconds'] / total:.0%})")
+
+    sections = [("📚 累计耗时最高", "top_cumulative"),
+                ("🧮 CPU热点 (评分/关键词匹配等)", "top_cpu"),
+                ("🧩 CPU按项目函数归因", "top_cpu_project"),
+                ("⏳ 等待来源 (HTTP/D1/休眠)", "top_wait")]
+    for label, key in sections:
+        rows = summary.get(key)
+        if not rows:
+            continue
+        metric = "cumulative" if key == "top_cumulative" else "self"
+        print(f"\n{label}:")
+        for row in rows:
+            calls = f"{row['calls']:>8}次" if "calls" in row else ""
+            print(f"  {row[metric]:>9.3f}s {calls}  {row['function']}")
+
+
+def run_profiled(target: Callable[[], Any], mode: Optional[str], name: str,
+                 output_dir: str = PROFILING_CONFIG["output_dir"]) -> Any:
+    """
+    在性能分析下执行入口函数 (mode 为 None 时直接执行)
+    cprofile: 写入 <name>_<时间>.pstats; sampling: 写入 <name>_<时间>.speedscope.json
+    """
+    if not mode:
+        return target()
+
+    os.makedirs(output_dir, exist_ok=True)
+    prefix = os.path.join(output_dir, f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+
+    if mode == "sampling":
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            return target()
+        finally:
+            profiler.stop()
+            path = f"{prefix}.speedscope.json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(profiler.to_speedscope(name), f)
+            print_profile_summary(profiler.summary(), name)
+            print(f"\n💾 speedscope文件: {path} (https://www.speedscope.app 打开)")
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        return target()
+    finally:
+        profile.disable()
+        path = f"{prefix}.pstats"
+        profile.dump_stats(path)
+        print_profile_summary(summarize_pstats(pstats.Stats(profile)), name)
+        print(f"\n💾 pstats文件: {path} (python -m pstats {path})")
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+自适应搜索查询规划器 - 基于历史产出的关键词配额分配
+功能: 记录每个查询(关键词/模板)每次搜索带来的新仓库数, 以UCB多臂老虎机策略分配搜索配额
+更新时间: 2025-09-16
+"""
+
+import os
+import json
+import math
+import random
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional
+from dataclasses import dataclass, asdict
+
+from config_v2 import Config
+
+QUERY_PLANNER_CONFIG = {
+    "exploration": 0.3,         # UCB探索系数 (按当前最高平均产出缩放)
+    "decay": 0.9,               # 每轮对历史统计的衰减, 适应关键词热度变化
+    "retire_min_calls": 6,      # 至少搜索多少次后才允许淘汰
+    "retire_max_yield": 0.5,    # 平均每次搜索新仓库数低于该值则淘汰
+    "revive_probability": 0.05, # 已淘汰查询每轮被重新探索的概率
+    "min_per_group": 1,         # 每个搜索轮次至少保留的查询数
+}
+
+
+@dataclass
+class QueryStats:
+    """单个查询的产出统计"""
+
+    query: str
+    calls: float = 0.0          # 衰减后的搜索次数
+    new_repos: float = 0.0      # 衰减后的新仓库数
+    total_calls: int = 0
+    total_new_repos: int = 0
+    retired: bool = False
+    last_used: str = ""
+
+    @property
+    def mean_yield(self) -> float:
+        """平均每次搜索带来的新仓库数"""
+        return self.new_repos / self.calls if self.calls else 0.0
+
+
+class AdaptiveQueryPlanner:
+    """自适应查询规划器"""
+
+    def __init__(self, state_file: Optional[str] = None, seed: Optional[int] = None):
+        self.config = Config()
+        self.state_file = state_file if state_file is not None else self.config.QUERY_PLANNER_STATE_FILE
+        self.stats: Dict[str, QueryStats] = {}
+        self.random = random.Random(seed)
+        self.logger = logging.getLogger('ai_collector_v2.planner')
+
+    def _get(self, query: str) -> QueryStats:
+        stats = self.stats.get(query)
+        if stats is None:
+            stats = QueryStats(query=query)
+            self.stats[query] = stats
+        return stats
+
+    # ------------------------------------------------------------------
+    # 配额分配
+    # ------------------------------------------------------------------
+
+    def ucb_score(self, stats: QueryStats, total_calls: float, scale: float) -> float:
+        """UCB1评分: 未探索过的查询优先"""
+        if stats.calls <= 0:
+            return float('inf')
+        bonus = QUERY_PLANNER_CONFIG["exploration"] * scale * math.sqrt(
+            2 * math.log(max(total_calls, 1.0)) / stats.calls
+        )
+        return stats.mean_yield + bonus
+
+    def plan(self, groups: Dict[str, List[str]], quota: int) -> Dict[str, List[str]]:
+        """
+        在各搜索轮次之间分配搜索配额
+        groups: {轮次名称: 候选查询列表}
+        quota: 本次运行可用的搜索查询数
+        返回: {轮次名称: 选中的查询列表}
+        """
+        cfg = QUERY_PLANNER_CONFIG
+        active = {}
+        for group, queries in groups.items():
+            candidates = []
+            for query in dict.fromkeys(queries):
+                stats = self._get(query)
+                if stats.retired and self.random.random() >= cfg["revive_probability"]:
+                    continue
+                candidates.append(stats)
+            active[group] = candidates
+
+        total_calls = sum(s.calls for s in self.stats.values())
+        scale = max([s.mean_yield for s in self.stats.values()] + [1.0])
+        ranked = {
+            group: sorted(candidates, key=lambda s: self.ucb_score(s, total_calls, scale), reverse=True)
+            for group, candidates in active.items()
+        }
+
+        plan = {group: [] for group in groups}
+        chosen = set()
+        remaining = quota
+
+        # 1. 每个轮次保留最少查询, 保证分类覆盖
+        for group, candidates in ranked.items():
+            for stats in candidates[:cfg["min_per_group"]]:
+                if remaining <= 0:
+                    break
+                if stats.query in chosen:
+                    continue
+                plan[group].append(stats.query)
+                chosen.add(stats.query)
+                remaining -= 1
+
+        # 2. 剩余配额全局按UCB评分分配
+        pool = [
+            (self.ucb_score(stats, total_calls, scale), group, stats.query)
+            for group, candidates in ranked.items()
+            for stats in candidates
+            if stats.query not in chosen
+        ]
+        pool.sort(key=lambda item: item[0], reverse=True)
+        for _, group, query in pool:
+            if remaining <= 0:
+                break
+            if query in chosen:
+                continue
+            plan[group].append(query)
+            chosen.add(query)
+            remaining -= 1
+
+        self.logger.info(f"🧭 查询规划: {len(chosen)}/{quota} 个配额已分配")
+        return plan
+
+    # ------------------------------------------------------------------
+    # 产出记录
+    # ------------------------------------------------------------------
+
+    def record(self, query: str, calls: int, new_repos: int):
+        """记录一次查询的搜索次数和带来的新仓库数"""
+        if calls <= 0:
+            return
+        stats = self._get(query)
+        stats.calls += calls
+        stats.new_repos += new_repos
+        stats.total_calls += calls
+        stats.total_new_repos += new_repos
+        stats.last_used = datetime.now(timezone.utc).isoformat()
+
+        cfg = QUERY_PLANNER_CONFIG
+        if stats.retired and stats.mean_yield >= cfg["retire_max_yield"]:
+            stats.retired = False
+            self.logger.info(f"♻️ 重新启用查询: {query} (平均产出 {stats.mean_yield:.2f})")
+
+    def end_run(self):
+        """结束一轮运行: 衰减历史统计并淘汰低产出查询"""
+        cfg = QUERY_PLANNER_CONFIG
+        for stats in self.stats.values():
+            if (not stats.retired and stats.total_calls >= cfg["retire_min_calls"]
+                    and stats.mean_yield < cfg["retire_max_yield"]):
+                stats.retired = True
+                self.logger.info(f"🪦 淘汰低产出查询: {stats.query} (平均产出 {stats.mean_yield:.2f})")
+            stats.calls *= cfg["decay"]
+            stats.new_repos *= cfg["decay"]
+
+    def get_report(self, top_n: int = 10) -> List[Dict[str, Any]]:
+        """按平均产出排序的查询报告"""
+        ranked = sorted(self.stats.values(), key=lambda s: s.mean_yield, reverse=True)
+        return [
+            {
+                "query": s.query,
+                "mean_yield": round(s.mean_yield, 2),
+                "total_calls": s.total_calls,
+                "total_new_repos": s.total_new_repos,
+                "retired": s.retired,
+            }
+            for s in ranked[:top_n]
+        ]
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def load(self) -> int:
+        """加载历史产出统计"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return 0
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.stats = {item["query"]: QueryStats(**item) for item in data.get("queries", [])}
+        except Exception as e:
+            self.logger.warning(f"加载查询规划状态失败: {self.state_file} | {e}")
+            self.stats = {}
+        return len(self.stats)
+
+    def save(self) -> bool:
+        """原子写入历史产出统计"""
+        if not self.state_file:
+            return False
+        tmp_file = f"{self.state_file}.tmp"
+        try:
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({"queries": [asdict(s) for s in self.stats.values()]}, f, ensure_ascii=False)
+            os.replace(tmp_file, self.state_file)
+            return True
+        except Exception as e:
+            self.logger.error(f"保存查询规划状态失败: {self.state_file} | {e}")
+            return False
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+仓库刷新调度器 - 按预期变化量分配每轮API预算
+功能: 以 (距上次刷新天数 × 历史星标速度 × 趋势评分) 为优先级维护大顶堆
+更新时间: 2025-09-16
+"""
+
+import heapq
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Iterable
+from dataclasses import dataclass
+
+from trending_engine import TrendingEngine, parse_observation_time, SECONDS_PER_DAY
+
+REFRESH_SCHEDULER_CONFIG = {
+    "min_velocity": 0.1,            # 无速度历史时的最低星标速度 (stars/day)
+    "min_age_days": 1 / 24,         # 刚刷新过的仓库按1小时计算
+    "never_refreshed_age_days": 365, # 从未刷新的仓库视为一年未刷新
+    "cost_per_refresh": 1,          # 每次刷新消耗的API调用数
+}
+
+
+@dataclass
+class RefreshCandidate:
+    """待刷新仓库"""
+
+    repo_id: int
+    full_name: str
+    last_refreshed: Optional[float] = None   # epoch秒
+    stars: int = 0
+    priority: float = 0.0
+
+
+class RefreshScheduler:
+    """基于优先队列的刷新调度器"""
+
+    def __init__(self, trending_engine: Optional[TrendingEngine] = None):
+        self.trending_engine = trending_engine
+        self.candidates: Dict[int, RefreshCandidate] = {}
+        self.heap: List[tuple] = []
+        self.logger = logging.getLogger('ai_collector_v2.refresh')
+
+        # 本轮统计
+        self.api_calls_spent = 0
+        self.refreshed = 0
+        self.changed = 0
+
+    def add_repos(self, records: Iterable[Dict[str, Any]], time_field: str = 'sync_time') -> int:
+        """
+        登记待调度的仓库
+        records: 需包含 id, full_name (或 owner/name), 可选 stars/stargazers_count 与上次刷新时间
+        """
+        added = 0
+        for record in records:
+            repo_id = record.get('id')
+            if not repo_id:
+                continue
+            full_name = record.get('full_name') or f"{record.get('owner')}/{record.get('name')}"
+            self.candidates[int(repo_id)] = RefreshCandidate(
+                repo_id=int(repo_id),
+                full_name=full_name,
+                last_refreshed=parse_observation_time(record.get(time_field)),
+                stars=int(record.get('stars') or record.get('stargazers_count') or 0)
+            )
+            added += 1
+        return added
+
+    def expected_change(self, candidate: RefreshCandidate, now: float) -> float:
+        """预期变化量 = 刷新间隔 × 星标速度 × 趋势系数"""
+        cfg = REFRESH_SCHEDULER_CONFIG
+
+        if candidate.last_refreshed is None:
+            age_days = cfg["never_refreshed_age_days"]
+        else:
+            age_days = max(cfg["min_age_days"], (now - candidate.last_refreshed) / SECONDS_PER_DAY)
+
+        velocity = cfg["min_velocity"]
+        trending = 0.0
+        if self.trending_engine:
+            state = self.trending_engine.states.get(candidate.repo_id)
+            if state:
+                # 取7天窗口速度作为历史星标速度
+                velocity = max(velocity, state.star_velocity[1])
+                trending = state.score
+
+        return age_days * velocity * (1.0 + trending / 100.0)
+
+    def plan_cycle(self, budget: int, now: Optional[float] = None) -> List[RefreshCandidate]:
+        """
+        为本轮API预算选出最可能发生变化的仓库
+        budget: 本轮可用的API调用数
+        """
+        now = now or datetime.now(timezone.utc).timestamp()
+        cost = REFRESH_SCHEDULER_CONFIG["cost_per_refresh"]
+
+        # 时间推进会改变相对顺序, 每轮开始时重建堆
+        self.heap = []
+        for candidate in self.candidates.values():
+            candidate.priority = self.expected_change(candidate, now)
+            self.heap.append((-candidate.priority, candidate.repo_id))
+        heapq.heapify(self.heap)
+
+        selected = []
+        remaining = budget
+        while self.heap and remaining >= cost:
+            _, repo_id = heapq.heappop(self.heap)
+            selected.append(self.candidates[repo_id])
+            remaining -= cost
+
+        self.logger.info(f"🗓️ 本轮调度: {len(selected)}/{len(self.candidates)} 个仓库, 预算 {budget} 次API调用")
+        return selected
+
+    def record_result(self, repo_id: int, changed: bool, api_calls: int = None,
+                      refreshed_at: Optional[float] = None):
+        """记录一次刷新结果"""
+        if api_calls is None:
+            api_calls = REFRESH_SCHEDULER_CONFIG["cost_per_refresh"]
+        self.api_calls_spent += api_calls
+        self.refreshed += 1
+        if changed:
+            self.changed += 1
+
+        candidate = self.candidates.get(repo_id)
+        if candidate:
+            candidate.last_refreshed = refreshed_at or datetime.now(timezone.utc).timestamp()
+
+    def get_report(self) -> Dict[str, Any]:
+        """本轮刷新效率报告"""
+        spent = self.api_calls_spent
+        return {
+            "tracked_repos": len(self.candidates),
+            "refreshed": self.refreshed,
+            "changed": self.changed,
+            "api_calls": spent,
+            "refresh_per_call": round(self.refreshed / spent, 3) if spent else 0.0,
+            "changes_per_call": round(self.changed / spent, 3) if spent else 0.0,
+            "change_hit_rate": round(self.changed / self.refreshed * 100, 1) if self.refreshed else 0.0,
+        }
+
+    def reset_cycle(self):
+        """重置本轮统计"""
+        self.api_calls_spent = 0
+        self.refreshed = 0
+        self.changed = 0
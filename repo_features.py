@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+仓库特征缓存 - 评分/分类共享的预计算特征
+功能: 每个仓库只做一次小写化/拼接/分词/时间解析; 按内容哈希缓存, 供各评分器与分类器批量复用
+更新时间: 2025-09-16
+"""
+
+import re
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Iterable, FrozenSet
+
+FEATURE_CACHE_CONFIG = {
+    "max_entries": 50000,           # LRU 容量 (按内容哈希)
+}
+
+WORD_PATTERN = re.compile(r"[\w\-.+#]+", re.UNICODE)
+
+# 参与内容哈希的字段 (另加 topics)
+_KEY_FIELDS = (
+    'id', 'full_name', 'name', 'description', 'language', 'stargazers_count',
+    'forks_count', 'watchers_count', 'created_at', 'pushed_at',
+)
+
+logger = logging.getLogger('ai_collector_v2.features')
+
+
+def _field(repo: Any, key: str, default: Any = None) -> Any:
+    if isinstance(repo, dict):
+        return repo.get(key, default)
+    return getattr(repo, key, default)
+
+
+def _parse_time(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class RepoFeatures:
+    """单个仓库的预计算特征 (评分器只读取, 不修改)"""
+
+    key: str                                # 内容哈希
+    id: Any
+    name: str
+    full_name: str
+    description: str
+    topics: List[str]
+    language: str
+    stars: int
+    forks: int
+    watchers: int
+    created_at: str
+    pushed_at: str
+    texts: Dict[str, str]                   # 小写文本: name / description / topics / full / name_description / full_name_description
+    tokens: FrozenSet[str]
+    created_dt: Optional[datetime] = None   # created_at 非空但无法解析时为 None
+    pushed_dt: Optional[datetime] = None
+
+    def has(self, keyword: str, field: str = "full") -> bool:
+        """子串命中 (与原 `keyword in text` 语义一致)"""
+        return keyword in self.texts[field]
+
+    def hits(self, keywords: Iterable[str], field: str = "full") -> List[str]:
+        """命中的关键词列表 (保持传入顺序)"""
+        text = self.texts[field]
+        return [keyword for keyword in keywords if keyword in text]
+
+    def any(self, keywords: Iterable[str], field: str = "full") -> bool:
+        text = self.texts[field]
+        return any(keyword in text for keyword in keywords)
+
+    def days_since(self, kind: str) -> Optional[int]:
+        """距 created / pushed 的天数; 时间无法解析时返回 None (调用方先判断原字段是否为空)"""
+        moment = self.created_dt if kind == "created" else self.pushed_dt
+        if moment is None:
+            return None
+        return (datetime.utcnow().replace(tzinfo=moment.tzinfo) - moment).days
+
+
+def content_key(repo: Any) -> str:
+    """特征相关字段的内容哈希"""
+    if isinstance(repo, dict):
+        parts = [repo.get(key) for key in _KEY_FIELDS]
+        topics = repo.get('topics') or []
+    else:
+        parts = [getattr(repo, key, None) for key in _KEY_FIELDS]
+        topics = getattr(repo, 'topics', None) or []
+    parts.append(topics if isinstance(topics, str) else ",".join(topics))
+    return hashlib.blake2b("\x1f".join(["" if p is None else str(p) for p in parts]).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def compute_features(repo: Any, key: Optional[str] = None) -> RepoFeatures:
+    """RepositoryData / GitHub API 字典 / D1 行字典 → RepoFeatures"""
+    topics = _field(repo, 'topics') or []
+    if isinstance(topics, str):
+        topics = [topic for topic in topics.split(",") if topic]
+    name = _field(repo, 'name') or ""
+    description = _field(repo, 'description') or ""
+    created_at = _field(repo, 'created_at') or ""
+    pushed_at = _field(repo, 'pushed_at') or ""
+
+    name_text, description_text, topics_text = name.lower(), description.lower(), " ".join(topics).lower()
+    texts = {
+        "name": name_text,
+        "description": description_text,
+        "topics": topics_text,
+        "full": f"{name_text} {description_text} {topics_text}",
+        "name_description": f"{name_text} {description_text}",
+        "full_name_description": f"{(_field(repo, 'full_name') or '').lower()} {description_text}",
+    }
+    return RepoFeatures(
+        key=key or content_key(repo),
+        id=_field(repo, 'id'),
+        name=name,
+        full_name=_field(repo, 'full_name') or "",
+        description=description,
+        topics=list(topics),
+        language=_field(repo, 'language') or "",
+        stars=int(_field(repo, 'stargazers_count') or 0),
+        forks=int(_field(repo, 'forks_count') or 0),
+        watchers=int(_field(repo, 'watchers_count') or 0),
+        created_at=created_at,
+        pushed_at=pushed_at,
+        texts=texts,
+        tokens=frozenset(WORD_PATTERN.findall(texts["full"])),
+        created_dt=_parse_time(created_at) if created_at else None,
+        pushed_dt=_parse_time(pushed_at) if pushed_at else None,
+    )
+
+
+class FeatureCache:
+    """按内容哈希缓存的特征 (LRU); 内容变化的仓库自然得到新条目"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or FEATURE_CACHE_CONFIG["max_entries"]
+        self.entries: "OrderedDict[str, RepoFeatures]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, repo: Any) -> RepoFeatures:
+        """获取单个仓库的特征 (已是 RepoFeatures 时原样返回)"""
+        if isinstance(repo, RepoFeatures):
+            return repo
+        key = content_key(repo)
+        features = self.entries.get(key)
+        if features is not None:
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return features
+
+        self.stats["misses"] += 1
+        features = self.entries[key] = compute_features(repo, key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return features
+
+    def get_batch(self, repos: Iterable[Any]) -> List[RepoFeatures]:
+        return [self.get(repo) for repo in repos]
+
+    def clear(self):
+        self.entries.clear()
+
+
+_shared_cache: Optional[FeatureCache] = None
+
+
+def get_feature_cache() -> FeatureCache:
+    """进程内共享的特征缓存"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = FeatureCache()
+    return _shared_cache
+
+
+def extract_features(repos: Iterable[Any]) -> List[RepoFeatures]:
+    """批量获取特征 (共享缓存)"""
+    return get_feature_cache().get_batch(repos)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+增强评分多进程回填
+功能: 调整 ENHANCED_CORE_METRICS 权重或关键词表后, 按ID键集分页流式读取 repos 表,
+      将评分与AI分类分块交给进程池并行计算, 只把有变化的行用批量语句写回;
+      评分模型 (scoring_models) 升级版本后, 可只读取 score_model_version 不是当前生效版本的行选择性重算
+更新时间: 2025-09-16
+
+用法:
+    python rescore_backfill.py                      # 进程数默认 RESCORE_WORKERS (0 为CPU核数)
+    python rescore_backfill.py --workers 8 --dry-run
+    python rescore_backfill.py --local-db local_d1.sqlite
+    python rescore_backfill.py --stale-only         # 只重算 enhanced 模型版本过期的行
+    python rescore_backfill.py --target quality     # 采集表质量分 (只重算 quality 模型版本过期的行)
+
+关键词表均为模块级只读常量 (enhanced_metrics_config / enhanced_metrics_sync),
+工作进程 fork 时直接共享, 不随任务序列化; 任务只传输行数据与结果。
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import Dict, List, Any, Optional, Iterator, Deque
+
+from config_v2 import Config, DatabaseConfig
+from enhanced_metrics_config import calculate_enhanced_score
+from scoring_models import get_model
+from repo_features import compute_features
+from enhanced_metrics_sync import (
+    analyze_ai_specific_indicators, calculate_commercial_potential,
+    get_maturity_level, get_innovation_level, get_commercial_level,
+)
+
+RESCORE_CONFIG = {
+    "table": "repos",
+    "page_size": 1000,          # 每次从存储读取的行数 (键集分页)
+    "chunk_size": 200,          # 每个进程任务的行数
+    "write_batch_size": 500,    # 每条写回语句的行数 (整批作为一个JSON参数, 不受D1单语句100参数限制)
+    "max_pending_per_worker": 2,  # 每个进程最多排队的任务数 (限制内存, 保持流式)
+}
+
+# 回填重算的列 (只依赖已入库字段的评分与分类)
+RESCORE_COLUMNS = [
+    "enhanced_score", "ai_maturity_level", "innovation_level", "commercial_potential",
+    "enterprise_adoption_score", "ai_framework", "model_type", "cutting_edge_score",
+    "research_quality_score", "practical_deployment_score", "has_model_files",
+    "has_research_paper", "has_deployment_config", "score_model_version",
+]
+
+_RESCORE_SELECT = f"""
+SELECT id, name, owner, description, stars, forks, watchers_count, open_issues_count,
+       created_at, last_commit_date, primary_language, license_type, contributors_count,
+       has_tests, has_ci_cd, code_quality_score, {", ".join(RESCORE_COLUMNS)}
+FROM {RESCORE_CONFIG["table"]}
+"""
+
+RESCORE_PAGE_SQL = _RESCORE_SELECT + """WHERE id > ?
+ORDER BY id
+LIMIT ?
+"""
+
+# 选择性重算: 只读取评分模型版本不是当前生效版本的行
+RESCORE_STALE_PAGE_SQL = _RESCORE_SELECT + """WHERE id > ? AND COALESCE(score_model_version, '') != ?
+ORDER BY id
+LIMIT ?
+"""
+
+# 批量写回: 一条语句更新整批, 行数据为 JSON 数组 [[id, 列1, 列2, ...], ...]
+# 同时推进 sync_time, 看板按表水位线 (MAX(sync_time)) 判断缓存是否失效
+RESCORE_UPDATE_SQL = (
+    f"UPDATE {RESCORE_CONFIG['table']} SET "
+    + ", ".join(f"{column} = json_extract(v.value, '$[{i}]')" for i, column in enumerate(RESCORE_COLUMNS, 1))
+    + ", sync_time = CURRENT_TIMESTAMP"
+    + f" FROM json_each(?) AS v WHERE {RESCORE_CONFIG['table']}.id = json_extract(v.value, '$[0]')"
+)
+
+# 采集表 (github_ai_post_attr) 质量分重算的列
+QUALITY_RESCORE_COLUMNS = ["quality_score", "score_model_version"]
+
+# 回填目标: 评分模型、重算列、分页/写回SQL 与ID游标起点 (page_sql 为 None 时只支持按版本选择性重算)
+RESCORE_TARGETS = {
+    "repos": {
+        "model": "enhanced",
+        "columns": RESCORE_COLUMNS,
+        "page_sql": RESCORE_PAGE_SQL,
+        "stale_page_sql": RESCORE_STALE_PAGE_SQL,
+        "update_sql": RESCORE_UPDATE_SQL,
+        "start_id": "",
+    },
+    "quality": {
+        "model": "quality",
+        "columns": QUALITY_RESCORE_COLUMNS,
+        "page_sql": None,
+        "stale_page_sql": DatabaseConfig.SELECT_STALE_SCORES_PAGE_SQL,
+        "update_sql": DatabaseConfig.UPDATE_SCORES_BATCH_SQL,
+        "start_id": 0,
+    },
+}
+
+logger = logging.getLogger('ai_collector_v2.rescore')
+
+
+# ----------------------------------------------------------------------
+# 工作进程: 评分与分类 (顶层函数, 可被进程池序列化)
+# ----------------------------------------------------------------------
+
+def score_row(row: Dict[str, Any]) -> List[Any]:
+    """repos 行 → 重算后的列值 (顺序同 RESCORE_COLUMNS)"""
+    tests_and_ci = (5 if row.get('has_tests') else 0) + (5 if row.get('has_ci_cd') else 0)
+    repo_data = {
+        'id': row['id'],
+        'name': row.get('name') or '',
+        'full_name': f"{row.get('owner') or ''}/{row.get('name') or ''}",
+        'description': row.get('description'),
+        'stargazers_count': row.get('stars') or 0,
+        'forks_count': row.get('forks') or 0,
+        'watchers_count': row.get('watchers_count') or 0,
+        'open_issues_count': row.get('open_issues_count') or 0,
+        'created_at': row.get('created_at') or '',
+        'pushed_at': row.get('last_commit_date') or '',
+        'language': row.get('primary_language') or '',
+        'license': {'key': row['license_type']} if row.get('license_type') else None,
+    }
+    enhanced_data = {'basic_info': repo_data, 'content_analysis': {}}
+
+    features = compute_features(repo_data)
+    ai_analysis = analyze_ai_specific_indicators(enhanced_data, features)
+    commercial_score = calculate_commercial_potential(enhanced_data, features)
+    enhanced_score = calculate_enhanced_score(repo_data, {
+        'contributors': row.get('contributors_count') or 0,
+        # README 未单独入库: code_quality_score 超出测试/CI 部分即说明有 README 评分
+        'has_readme': (row.get('code_quality_score') or 0) > tests_and_ci,
+        'has_tests': bool(row.get('has_tests')),
+        'has_ci': bool(row.get('has_ci_cd')),
+    }, features)
+
+    return [
+        enhanced_score,
+        get_maturity_level(enhanced_score),
+        get_innovation_level(ai_analysis['cutting_edge_score'] + ai_analysis['research_quality_score']),
+        get_commercial_level(commercial_score),
+        commercial_score,
+        ai_analysis['ai_framework'],
+        ai_analysis['model_type'],
+        ai_analysis['cutting_edge_score'],
+        ai_analysis['research_quality_score'],
+        ai_analysis['practical_deployment_score'],
+        int(ai_analysis['has_model_files']),
+        int(ai_analysis['has_research_paper']),
+        int(ai_analysis['has_deployment_config']),
+        get_model("enhanced").id,
+    ]
+
+
+def score_quality_row(row: Dict[str, Any]) -> List[Any]:
+    """github_ai_post_attr 行 → [quality_score, score_model_version]"""
+    model = get_model("quality")
+    return [model.score(row), model.id]
+
+
+ROW_SCORERS = {"repos": score_row, "quality": score_quality_row}
+
+
+def score_chunk(rows: List[Dict[str, Any]], target: str = "repos") -> List[List[Any]]:
+    """对一块行评分, 只返回与库中值不同的行 [id, 列1, ...]"""
+    scorer, columns = ROW_SCORERS[target], RESCORE_TARGETS[target]["columns"]
+    changed = []
+    for row in rows:
+        values = scorer(row)
+        if values != [row.get(column) for column in columns]:
+            changed.append([row['id']] + values)
+    return changed
+
+
+# ----------------------------------------------------------------------
+# 主进程: 流式读取 + 批量写回
+# ----------------------------------------------------------------------
+
+class BatchedScoreWriter:
+    """累积评分结果, 满批后用一条 UPDATE ... FROM json_each(?) 写回"""
+
+    def __init__(self, client: Any, account_id: str, database_id: str,
+                 batch_size: Optional[int] = None, dry_run: bool = False, sql: str = RESCORE_UPDATE_SQL):
+        self.client = client
+        self.account_id = account_id
+        self.database_id = database_id
+        self.batch_size = batch_size or RESCORE_CONFIG["write_batch_size"]
+        self.dry_run = dry_run
+        self.sql = sql
+        self.pending: List[List[Any]] = []
+        self.stats = {"written": 0, "statements": 0, "failed": 0}
+
+    def add(self, rows: List[List[Any]]):
+        self.pending.extend(rows)
+        while len(self.pending) >= self.batch_size:
+            self._write(self.pending[:self.batch_size])
+            del self.pending[:self.batch_size]
+
+    def flush(self):
+        if self.pending:
+            self._write(self.pending)
+            self.pending = []
+
+    def _write(self, rows: List[List[Any]]):
+        if self.dry_run:
+            self.stats["written"] += len(rows)
+            return
+        response = self.client.d1.database.query(
+            database_id=self.database_id, account_id=self.account_id,
+            sql=self.sql, params=[json.dumps(rows, ensure_ascii=False)]
+        )
+        self.stats["statements"] += 1
+        if response.success:
+            self.stats["written"] += len(rows)
+        else:
+            self.stats["failed"] += len(rows)
+            logger.error(f"❌ 批量写回失败 ({len(rows)} 行): {getattr(response, 'errors', 'Unknown error')}")
+
+
+def iter_pages(client: Any, account_id: str, database_id: str, page_size: Optional[int] = None,
+               target: str = "repos", stale_version: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+    """按ID键集分页流式读取待重算行 (指定 stale_version 时只读取评分模型版本与之不同的行)"""
+    spec = RESCORE_TARGETS[target]
+    page_size = page_size or RESCORE_CONFIG["page_size"]
+    sql = spec["stale_page_sql"] if stale_version else spec["page_sql"]
+    last_id = spec["start_id"]
+    while True:
+        params = [last_id, stale_version, page_size] if stale_version else [last_id, page_size]
+        response = client.d1.database.query(database_id=database_id, account_id=account_id,
+                                            sql=sql, params=params)
+        if not response.success:
+            raise RuntimeError(f"D1 查询失败: {getattr(response, 'errors', 'Unknown error')}")
+        rows = response.result[0].results if response.result else []
+        if rows:
+            yield rows
+            last_id = rows[-1]["id"]
+        if len(rows) < page_size:
+            return
+
+
+def run_backfill(client: Any, account_id: str, database_id: str, workers: Optional[int] = None,
+                 page_size: Optional[int] = None, chunk_size: Optional[int] = None,
+                 write_batch_size: Optional[int] = None, dry_run: bool = False,
+                 target: str = "repos", stale_only: bool = False) -> Dict[str, Any]:
+    """
+    回填评分, 返回统计 (扫描行数、变化行数、写回语句数、耗时、吞吐)
+    workers 为 1 时在当前进程内计算 (小表或调试), 否则使用进程池;
+    stale_only 时只读取评分模型版本不是当前生效版本的行 (target 为 quality 时总是如此)
+    """
+    config = Config()
+    spec = RESCORE_TARGETS[target]
+    workers = workers if workers is not None else config.RESCORE_WORKERS
+    workers = workers or os.cpu_count() or 1
+    chunk_size = chunk_size or RESCORE_CONFIG["chunk_size"]
+    stale_version = get_model(spec["model"]).id if stale_only or spec["page_sql"] is None else None
+    writer = BatchedScoreWriter(client, account_id, database_id, write_batch_size, dry_run, spec["update_sql"])
+    stats: Dict[str, Any] = {"scanned": 0, "changed": 0, "chunks": 0, "workers": workers,
+                             "target": target, "model": get_model(spec["model"]).id}
+    started = time.perf_counter()
+
+    def collect(changed: List[List[Any]]):
+        stats["changed"] += len(changed)
+        writer.add(changed)
+
+    chunks = (page[i:i + chunk_size]
+              for page in iter_pages(client, account_id, database_id, page_size, target, stale_version)
+              for i in range(0, len(page), chunk_size))
+
+    if workers <= 1:
+        for chunk in chunks:
+            stats["scanned"] += len(chunk)
+            stats["chunks"] += 1
+            collect(score_chunk(chunk, target))
+    else:
+        max_pending = workers * RESCORE_CONFIG["max_pending_per_worker"]
+        pending: Deque[Future] = deque()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in chunks:
+                stats["scanned"] += len(chunk)
+                stats["chunks"] += 1
+                pending.append(pool.submit(score_chunk, chunk, target))
+                # 按提交顺序收取结果, 写回与后续读取/计算重叠
+                while len(pending) >= max_pending or (pending and pending[0].done()):
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+    writer.flush()
+    elapsed = time.perf_counter() - started
+    stats.update(writer.stats)
+    stats["elapsed"] = round(elapsed, 3)
+    stats["rows_per_second"] = round(stats["scanned"] / elapsed, 1) if elapsed > 0 else 0.0
+    logger.info(f"🧮 评分回填完成 ({target}, {stats['model']}): 扫描 {stats['scanned']} 行, 变化 {stats['changed']} 行, "
+                f"写回 {stats['written']} 行 / {stats['statements']} 条语句, 失败 {stats['failed']} 行, "
+                f"{workers} 进程, 耗时 {stats['elapsed']}s ({stats['rows_per_second']} 行/秒)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="评分多进程回填 (repos 增强评分 / 采集表质量分)")
+    parser.add_argument("--target", choices=sorted(RESCORE_TARGETS), default="repos")
+    parser.add_argument("--stale-only", action="store_true", help="只重算评分模型版本不是当前生效版本的行")
+    parser.add_argument("--workers", type=int, default=None, help="进程数 (默认 RESCORE_WORKERS, 0 为CPU核数)")
+    parser.add_argument("--page-size", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    parser.add_argument("--write-batch-size", type=int, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="只计算不写回")
+    parser.add_argument("--local-db", default=None, help="使用本地 SQLite 数据库 (local_d1_server 格式) 代替 D1")
+    args = parser.parse_args()
+
+    from lazy_clients import load_env
+    load_env()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    config = Config()
+
+    if args.local_db:
+        from local_d1_server import LocalD1Client, LocalD1Database, LOCAL_D1_CONFIG
+        client = LocalD1Client(database=LocalD1Database(args.local_db, LOCAL_D1_CONFIG["schema_files"]))
+    else:
+        from lazy_clients import get_cloudflare_client
+        client = get_cloudflare_client(config.CLOUDFLARE_API_TOKEN)
+
+    stats = run_backfill(client, config.CLOUDFLARE_ACCOUNT_ID, config.D1_DATABASE_ID, workers=args.workers,
+                         page_size=args.page_size, chunk_size=args.chunk_size,
+                         write_batch_size=args.write_batch_size, dry_run=args.dry_run,
+                         target=args.target, stale_only=args.stale_only)
+    print(f"✅ 回填完成: 扫描 {stats['scanned']} 行, 变化 {stats['changed']} 行, 写回 {stats['written']} 行, "
+          f"{stats['rows_per_second']} 行/秒")
+
+
+if __name__ == "__main__":
+    main()
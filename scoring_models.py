@@ -0,0 +1,525 @@
+# -*- coding: utf-8 -*-
+"""
+统一评分模型注册表
+功能: 各评分模型声明为 分档表 + 关键词权重 + 查表, 按 名称@版本 注册; 首次使用时编译为求值器 (分档用二分查找),
+      批量评分按列求值 (先按特征抽取整列, 再逐组件计算), 行上记录所用模型版本以便按版本选择性重算
+更新时间: 2025-09-16
+
+用法:
+    from scoring_models import get_model
+    model = get_model("quality")                 # 当前生效版本 (SCORING_MODEL_VERSIONS 可覆盖, 默认最新)
+    model.score(repo)                            # 总分
+    model.evaluate(repo, extra).sections         # 分项得分
+    model.evaluate_batch(repos)                  # 批量 (按列)
+    python scoring_models.py list                # 查看已注册模型
+"""
+
+import logging
+import argparse
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Optional, Callable, Tuple, Iterable
+
+from config_v2 import Config
+from repo_features import RepoFeatures, get_feature_cache, _parse_time
+
+logger = logging.getLogger('ai_collector_v2.scoring')
+
+_NAN = float("nan")
+
+
+# ----------------------------------------------------------------------
+# 特征抽取 (特征名 → (RepoFeatures, 原始仓库, 附加数据, 批次参考时间) → 值)
+# 返回 None 表示缺失 (按组件的 missing 计分), NaN 表示无法解析 (按 invalid 计分)
+# 参考时间每批取一次 (无时区, UTC时区); 无时区的时间按 UTC 计算天数, 与 RepoFeatures.days_since 一致
+# ----------------------------------------------------------------------
+
+def _raw(repo: Any, key: str) -> Any:
+    if isinstance(repo, dict):
+        return repo.get(key)
+    return getattr(repo, key, None)
+
+
+def _elapsed_days(moment: Optional[datetime], now: Tuple[datetime, datetime]) -> float:
+    if moment is None:
+        return _NAN
+    return ((now[1] if moment.tzinfo else now[0]) - moment).days
+
+
+def _days(features: RepoFeatures, kind: str, now: Tuple[datetime, datetime]) -> Optional[float]:
+    if kind == "pushed":
+        return _elapsed_days(features.pushed_dt, now) if features.pushed_at else None
+    return _elapsed_days(features.created_dt, now) if features.created_at else None
+
+
+def _extra_days(extra: Dict[str, Any], key: str, now: Tuple[datetime, datetime]) -> Optional[float]:
+    value = extra.get(key)
+    return _elapsed_days(_parse_time(value), now) if value else None
+
+
+def _license_key(repo: Any) -> Optional[str]:
+    license_info = _raw(repo, 'license')
+    if isinstance(license_info, dict):
+        return (license_info.get('key') or '').lower() or None
+    return None
+
+
+def _fork_ratio(features: RepoFeatures) -> Optional[float]:
+    if features.stars > 0 and features.forks > 0:
+        return features.forks / features.stars
+    return None
+
+
+FEATURE_EXTRACTORS: Dict[str, Callable[[RepoFeatures, Any, Dict[str, Any], Tuple[datetime, datetime]], Any]] = {
+    "stars": lambda f, repo, extra, now: f.stars,
+    "forks": lambda f, repo, extra, now: f.forks,
+    "watchers": lambda f, repo, extra, now: f.watchers,
+    "engagement": lambda f, repo, extra, now: f.forks * 2 + f.watchers,
+    "fork_ratio": lambda f, repo, extra, now: _fork_ratio(f),
+    "open_issues": lambda f, repo, extra, now: _raw(repo, 'open_issues_count') or 0,
+    "days_since_push": lambda f, repo, extra, now: _days(f, "pushed", now),
+    "days_since_created": lambda f, repo, extra, now: _days(f, "created", now),
+    "days_since_commit": lambda f, repo, extra, now: _extra_days(extra, 'last_commit_date', now),
+    "description_length": lambda f, repo, extra, now: len(f.description),
+    "topics_count": lambda f, repo, extra, now: len(f.topics),
+    "language": lambda f, repo, extra, now: f.language or None,
+    "language_key": lambda f, repo, extra, now: f.language.lower() or None,
+    "license_key": lambda f, repo, extra, now: _license_key(repo),
+    "has_license": lambda f, repo, extra, now: 1 if _raw(repo, 'license') else 0,
+    "contributors": lambda f, repo, extra, now: extra.get('contributors'),
+    "documentation_score": lambda f, repo, extra, now: extra.get('documentation_score'),
+    "has_readme": lambda f, repo, extra, now: 1 if extra.get('has_readme') else 0,
+    "has_wiki": lambda f, repo, extra, now: 1 if extra.get('has_wiki') else 0,
+    # 测试/CI 与 README 同批探测, 未探测 (无 has_readme) 时不计分
+    "has_tests": lambda f, repo, extra, now: 1 if 'has_readme' in extra and extra.get('has_tests') else 0,
+    "has_ci": lambda f, repo, extra, now: 1 if 'has_readme' in extra and extra.get('has_ci') else 0,
+}
+
+
+# ----------------------------------------------------------------------
+# 模型声明
+# ----------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class Tier:
+    """分档: 值落在 [low, high] (含边界, None 为不限) 时得 points, 设置 span 时在 low 之上按每 span 加 gain 分线性插值"""
+
+    points: float
+    low: Optional[float] = None
+    high: Optional[float] = None
+    span: float = 0.0
+    gain: float = 0.0
+
+
+@dataclass(frozen=True)
+class Component:
+    """评分组件: tiers (数值分档) / keywords (关键词权重) / lookup (类别查表)"""
+
+    kind: str
+    feature: str = ""
+    tiers: Tuple[Tier, ...] = ()
+    weights: Tuple[Tuple[str, float], ...] = ()     # keywords: (关键词, 分值); lookup: (类别, 分值)
+    field: str = "name_description"                 # keywords 匹配的小写文本字段
+    any_points: Optional[float] = None              # keywords: 命中任一即得固定分 (不累加)
+    default: float = 0                              # 未落入任何分档 / 查表未命中
+    missing: float = 0                              # 特征缺失
+    invalid: float = 0                              # 特征无法解析 (如时间格式错误)
+
+
+def tiers(feature: str, *levels: Tier, default: float = 0, missing: float = 0, invalid: float = 0) -> Component:
+    """数值分档, 按声明顺序取首个命中的分档"""
+    return Component("tiers", feature, tiers=tuple(levels), default=default, missing=missing, invalid=invalid)
+
+
+def flag(feature: str, points: float) -> Component:
+    """0/1 特征为真时得分"""
+    return tiers(feature, Tier(points, low=1))
+
+
+def keywords(weights: Dict[str, float], field: str = "name_description") -> Component:
+    """关键词命中累加分值"""
+    return Component("keywords", weights=tuple(weights.items()), field=field)
+
+
+def any_keyword(words: Iterable[str], points: float, field: str = "name_description") -> Component:
+    """命中任一关键词得固定分"""
+    return Component("keywords", weights=tuple((word, points) for word in words), field=field, any_points=points)
+
+
+def lookup(feature: str, table: Dict[str, float], default: float = 0, missing: float = 0) -> Component:
+    """类别查表 (值为空时按 missing, 未列出的类别按 default)"""
+    return Component("lookup", feature, weights=tuple(table.items()), default=default, missing=missing)
+
+
+@dataclass(frozen=True)
+class Section:
+    """分项: 组件得分求和后按 cap 封顶"""
+
+    name: str
+    components: Tuple[Component, ...]
+    cap: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class ScoringModel:
+    """评分模型声明 (名称 + 版本唯一)"""
+
+    name: str
+    version: int
+    sections: Tuple[Section, ...]
+    max_score: Optional[float] = None
+    min_score: Optional[float] = None
+    truncate: bool = False          # 总分先取整再限幅
+    description: str = ""
+
+    @property
+    def id(self) -> str:
+        return f"{self.name}@{self.version}"
+
+
+@dataclass
+class ScoreResult:
+    """单个仓库的评分结果"""
+
+    total: float
+    sections: Dict[str, float]
+    model_id: str
+
+
+# ----------------------------------------------------------------------
+# 编译
+# ----------------------------------------------------------------------
+
+def _tier_value(tier: Tier, value: float) -> float:
+    return tier.points + (value - tier.low) / tier.span * tier.gain if tier.span else tier.points
+
+
+def _compile_tiers(component: Component) -> Callable[[Any], float]:
+    levels, default = component.tiers, component.default
+    missing, invalid = component.missing, component.invalid
+    lows = [level.low for level in levels]
+    highs = [level.high for level in levels]
+
+    if all(high is None for high in highs) and None not in lows and lows == sorted(lows, reverse=True):
+        # 下界阶梯 (≥): 二分查找最大的不超过值的下界
+        ascending, ordered = lows[::-1], levels[::-1]
+
+        def evaluate(value):
+            if value is None:
+                return missing
+            if value != value:
+                return invalid
+            i = bisect_right(ascending, value) - 1
+            return _tier_value(ordered[i], value) if i >= 0 else default
+    elif all(low is None for low in lows) and None not in highs and highs == sorted(highs):
+        # 上界阶梯 (≤): 二分查找首个不小于值的上界
+        def evaluate(value):
+            if value is None:
+                return missing
+            if value != value:
+                return invalid
+            i = bisect_left(highs, value)
+            return levels[i].points if i < len(levels) else default
+    else:
+        # 任意区间: 顺序匹配
+        def evaluate(value):
+            if value is None:
+                return missing
+            if value != value:
+                return invalid
+            for level in levels:
+                if (level.low is None or value >= level.low) and (level.high is None or value <= level.high):
+                    return _tier_value(level, value)
+            return default
+    return evaluate
+
+
+def _compile_keywords(component: Component) -> Callable[[RepoFeatures], float]:
+    words = [word for word, _ in component.weights]
+    text_field, any_points = component.field, component.any_points
+    if any_points is not None:
+        return lambda features: any_points if features.any(words, text_field) else 0
+    weights = component.weights
+
+    def evaluate(features):
+        text = features.texts[text_field]
+        return sum(points for word, points in weights if word in text)
+    return evaluate
+
+
+def _compile_lookup(component: Component) -> Callable[[Any], float]:
+    table, default, missing = dict(component.weights), component.default, component.missing
+    return lambda value: missing if not value else table.get(value, default)
+
+
+_COMPILERS = {"tiers": _compile_tiers, "keywords": _compile_keywords, "lookup": _compile_lookup}
+
+
+class CompiledModel:
+    """编译后的评分模型: 组件求值器 + 所需特征列"""
+
+    def __init__(self, model: ScoringModel):
+        self.model = model
+        self.id = model.id
+        self.sections: List[Tuple[str, Optional[float], List[Tuple[Optional[str], Callable]]]] = []
+        features = set()
+        for section in model.sections:
+            evaluators = []
+            for component in section.components:
+                # keywords 组件直接作用于 RepoFeatures (列名 None)
+                column = None if component.kind == "keywords" else component.feature
+                if column is not None:
+                    if column not in FEATURE_EXTRACTORS:
+                        raise ValueError(f"未知特征: {column} ({model.id})")
+                    features.add(column)
+                evaluators.append((column, _COMPILERS[component.kind](component)))
+            self.sections.append((section.name, section.cap, evaluators))
+        self.features = sorted(features)
+        # 逐行求值用: 列名换成抽取函数 (None 表示直接作用于 RepoFeatures)
+        self.row_sections = [
+            (name, cap, [(FEATURE_EXTRACTORS[column] if column else None, evaluate) for column, evaluate in evaluators])
+            for name, cap, evaluators in self.sections
+        ]
+
+    def _finish(self, total: float) -> float:
+        model = self.model
+        if model.truncate:
+            total = int(total)
+        if model.max_score is not None:
+            total = min(total, model.max_score)
+        if model.min_score is not None:
+            total = max(total, model.min_score)
+        return total
+
+    def evaluate_batch(self, repos: List[Any], extras: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[ScoreResult]:
+        """
+        批量评分 (按列): 每个特征整列抽取一次, 每个组件对整列求值, 再按分项求和封顶
+        repos 可为 RepositoryData / 字典 / RepoFeatures (不含许可证与 issue 数); extras 为逐仓库的附加数据 (贡献者数、README 等)
+        """
+        repos = list(repos)
+        cache = get_feature_cache()
+        features = cache.get_batch(repos)
+        extras = [extra or {} for extra in extras] if extras is not None else [{}] * len(repos)
+        now = datetime.utcnow()
+        now = (now, now.replace(tzinfo=timezone.utc))
+        columns: Dict[Optional[str], List[Any]] = {None: features}
+        for name in self.features:
+            extractor = FEATURE_EXTRACTORS[name]
+            columns[name] = [extractor(f, repo, extra, now) for f, repo, extra in zip(features, repos, extras)]
+
+        section_columns: Dict[str, List[float]] = {}
+        totals = [0] * len(repos)
+        for name, cap, evaluators in self.sections:
+            sums = [0] * len(repos)
+            for column, evaluate in evaluators:
+                sums = [s + v for s, v in zip(sums, map(evaluate, columns[column]))]
+            if cap is not None:
+                sums = [min(cap, s) for s in sums]
+            section_columns[name] = sums
+            totals = [t + s for t, s in zip(totals, sums)]
+
+        return [
+            ScoreResult(self._finish(total), {name: values[i] for name, values in section_columns.items()}, self.id)
+            for i, total in enumerate(totals)
+        ]
+
+    def evaluate(self, repo: Any, extra: Optional[Dict[str, Any]] = None,
+                 features: Optional[RepoFeatures] = None) -> ScoreResult:
+        """
+        单个仓库评分 (逐行求值, 不构建整列); 结果与 evaluate_batch 一致
+        调用方已持有该仓库的 RepoFeatures 时传入 features, 免去内容哈希与缓存查找
+        """
+        if features is None:
+            features = repo if isinstance(repo, RepoFeatures) else get_feature_cache().get(repo)
+        extra = extra or {}
+        now = datetime.utcnow()
+        now = (now, now.replace(tzinfo=timezone.utc))
+        sections: Dict[str, float] = {}
+        total = 0
+        for name, cap, evaluators in self.row_sections:
+            subtotal = 0
+            for extractor, evaluate in evaluators:
+                subtotal += evaluate(features if extractor is None else extractor(features, repo, extra, now))
+            if cap is not None:
+                subtotal = min(cap, subtotal)
+            sections[name] = subtotal
+            total += subtotal
+        return ScoreResult(self._finish(total), sections, self.id)
+
+    def score(self, repo: Any, extra: Optional[Dict[str, Any]] = None,
+              features: Optional[RepoFeatures] = None) -> float:
+        return self.evaluate(repo, extra, features).total
+
+    def score_batch(self, repos: List[Any], extras: Optional[List[Optional[Dict[str, Any]]]] = None) -> List[float]:
+        return [result.total for result in self.evaluate_batch(repos, extras)]
+
+    def section_score(self, section: str, repo: Any, extra: Optional[Dict[str, Any]] = None,
+                      features: Optional[RepoFeatures] = None) -> float:
+        return self.evaluate(repo, extra, features).sections[section]
+
+
+# ----------------------------------------------------------------------
+# 注册表
+# ----------------------------------------------------------------------
+
+SCORING_MODELS: Dict[str, Dict[int, ScoringModel]] = {}
+_compiled: Dict[str, CompiledModel] = {}
+
+
+def register_model(model: ScoringModel) -> ScoringModel:
+    """注册模型; 同名同版本重复注册视为错误 (已发布版本不可修改, 请递增版本号)"""
+    versions = SCORING_MODELS.setdefault(model.name, {})
+    if model.version in versions and versions[model.version] != model:
+        raise ValueError(f"评分模型 {model.id} 已注册, 修改评分请递增版本号")
+    versions[model.version] = model
+    return model
+
+
+@lru_cache(maxsize=8)
+def _parse_overrides(spec: str) -> Dict[str, int]:
+    overrides = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, version = item.partition("=")
+        overrides[name.strip()] = int(version)
+    return overrides
+
+
+def active_versions() -> Dict[str, int]:
+    """各模型当前生效版本: SCORING_MODEL_VERSIONS (如 quality=1,enhanced=2) 覆盖, 否则取最新版本"""
+    overrides = _parse_overrides(Config.SCORING_MODEL_VERSIONS)
+    return {name: overrides.get(name, max(versions)) for name, versions in SCORING_MODELS.items()}
+
+
+def get_model(name: str, version: Optional[int] = None) -> CompiledModel:
+    """获取编译后的模型 (默认当前生效版本), 编译结果按 名称@版本 缓存"""
+    versions = SCORING_MODELS.get(name)
+    if not versions:
+        raise KeyError(f"未注册的评分模型: {name}")
+    if version is None:
+        version = _parse_overrides(Config.SCORING_MODEL_VERSIONS).get(name, max(versions))
+    model = versions[version]
+    compiled = _compiled.get(model.id)
+    if compiled is None or compiled.model is not model:
+        compiled = _compiled[model.id] = CompiledModel(model)
+    return compiled
+
+
+# ----------------------------------------------------------------------
+# 模型声明
+# v1 原样保留五处旧实现各自的计分规则 (星标/分叉分档与满分都不相同), 只统一了声明方式与求值;
+# 完全相同的部分声明一次后共用 (comprehensive 分项、贡献者分档)。
+# 合并为一个共享质量基础模型会改变已入库的分数, 须作为新版本发布, 见 PROJECT_ROADMAP.md "评分模型统一"
+# ----------------------------------------------------------------------
+
+def _declare_models():
+    from enhanced_metrics_config import AI_CUTTING_EDGE_WEIGHTS, AI_MATURITY_WEIGHTS, MODERN_LANGUAGE_WEIGHTS
+    from github_metrics_config import AI_SPECIFIC_METRICS
+
+    # enhanced 与 collector_quality 共用的贡献者分档
+    contributors = tiers("contributors", Tier(5, low=50), Tier(3, low=10), Tier(2, low=3))
+
+    # 采集入库质量分 (原 DataProcessor.calculate_quality_score, 0-100)
+    register_model(ScoringModel("quality", 1, (
+        Section("stars", (tiers("stars",
+                                Tier(40, low=10000), Tier(30, low=1000, span=9000, gain=10),
+                                Tier(20, low=100, span=900, gain=10), Tier(10, low=10, span=90, gain=10),
+                                Tier(0, low=0, span=1, gain=1)),)),
+        Section("activity", (tiers("days_since_push",
+                                   Tier(25, high=7), Tier(20, high=30), Tier(15, high=90),
+                                   Tier(10, high=180), Tier(5, high=365), invalid=5),)),
+        Section("community", (tiers("engagement",
+                                    Tier(20, low=1000), Tier(15, low=100, span=900, gain=5),
+                                    Tier(10, low=10, span=90, gain=5), Tier(0, low=0, span=10, gain=10)),)),
+        Section("maturity", (tiers("days_since_created",
+                                   Tier(10, low=30, high=365), Tier(8, low=7, high=1095), Tier(5, high=7),
+                                   default=3, invalid=5),)),
+        Section("technical", (
+            tiers("description_length", Tier(1, low=51)),
+            tiers("topics_count", Tier(1, low=1)),
+            lookup("language", {"Python": 1}),
+            any_keyword(["readme"], 1, field="description"),
+            any_keyword(["documentation", "docs", "tutorial", "example"], 1, field="description"),
+        )),
+    ), max_score=100, truncate=True, description="采集入库质量分"))
+
+    # GitHub 指标综合分 (原 github_metrics_config.calculate_comprehensive_score, 0-50)
+    comprehensive = Section("comprehensive", (
+        tiers("stars", Tier(10, low=1000), Tier(8, low=500), Tier(6, low=100), Tier(4, low=20)),
+        tiers("forks", Tier(8, low=200), Tier(6, low=50), Tier(4, low=10), Tier(2, low=2)),
+        tiers("days_since_push", Tier(10, high=7), Tier(8, high=30), Tier(6, high=90), Tier(2, high=365)),
+        tiers("days_since_created", Tier(8, high=30), Tier(6, high=90), Tier(4, high=365), default=2),
+        lookup("license_key", {"mit": 5, "apache-2.0": 5, "gpl-3.0": 5, "bsd-3-clause": 5}, default=3),
+        tiers("description_length", Tier(4, low=100), Tier(3, low=50), Tier(2, low=20)),
+        tiers("fork_ratio", Tier(5, low=0.1), Tier(3, low=0.05), Tier(2, low=0.02)),
+    ), cap=50)
+    register_model(ScoringModel("comprehensive", 1, (comprehensive,), max_score=50,
+                                description="GitHub 指标综合分"))
+
+    # 指标采集最终分 (原 metrics_based_sync.enhance_repo_with_metrics: 综合分 + AI特定分, 0-50)
+    indicators = AI_SPECIFIC_METRICS["ai_indicators"]
+    register_model(ScoringModel("metrics", 1, (
+        comprehensive,
+        Section("ai_specific", tuple(
+            any_keyword(config["keywords"], config["weight"]) for config in indicators.values()
+        ) + (keywords(AI_SPECIFIC_METRICS["tech_stack_bonus"]),), cap=15),
+    ), max_score=50, description="指标采集最终分"))
+
+    # 增强评分 (原 enhanced_metrics_config.calculate_enhanced_score, 0-100)
+    register_model(ScoringModel("enhanced", 1, (
+        Section("basic_impact", (
+            tiers("stars", Tier(15, low=10000), Tier(12, low=5000), Tier(10, low=1000), Tier(8, low=500),
+                  Tier(6, low=100), Tier(4, low=20)),
+            tiers("forks", Tier(10, low=2000), Tier(8, low=500), Tier(6, low=200), Tier(4, low=50), Tier(2, low=10)),
+            tiers("watchers", Tier(5, low=1000), Tier(3, low=200), Tier(2, low=50)),
+        )),
+        Section("ai_specific", (keywords(AI_CUTTING_EDGE_WEIGHTS), keywords(AI_MATURITY_WEIGHTS)), cap=25),
+        Section("community", (
+            tiers("days_since_push", Tier(10, high=7), Tier(8, high=30), Tier(6, high=90), Tier(3, high=365)),
+            tiers("open_issues", Tier(5, low=5, high=50), Tier(3, high=4), Tier(-2, low=101)),
+            contributors,
+        ), cap=20),
+        Section("health", (
+            flag("has_license", 5),
+            tiers("description_length", Tier(5, low=100), Tier(3, low=50), Tier(2, low=20)),
+            flag("has_readme", 2), flag("has_tests", 2), flag("has_ci", 1),
+        )),
+        Section("innovation", (
+            tiers("days_since_created", Tier(5, high=90), Tier(3, high=365)),
+            lookup("language_key", MODERN_LANGUAGE_WEIGHTS),
+        ), cap=10),
+    ), max_score=100, min_score=0, description="增强评分"))
+
+    # 全量采集质量分 (原 enhanced_data_collector.calculate_comprehensive_scores 中的质量分, 0-50)
+    register_model(ScoringModel("collector_quality", 1, (
+        Section("quality", (
+            tiers("stars", Tier(15, low=10000), Tier(12, low=5000), Tier(10, low=1000), Tier(8, low=500),
+                  Tier(6, low=100), Tier(3, low=20)),
+            tiers("forks", Tier(10, low=2000), Tier(8, low=500), Tier(6, low=100), Tier(4, low=20), Tier(2, low=5)),
+            contributors,
+            tiers("documentation_score", Tier(0, low=0, span=3, gain=2)),
+            flag("has_readme", 2), flag("has_wiki", 1),
+            tiers("days_since_commit", Tier(5, high=7), Tier(4, high=30), Tier(3, high=90), Tier(1, high=365)),
+        ), cap=50),
+    ), max_score=50, description="全量采集质量分"))
+
+
+_declare_models()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="统一评分模型注册表")
+    parser.add_argument("command", choices=["list"])
+    parser.parse_args()
+
+    active = active_versions()
+    for name, versions in sorted(SCORING_MODELS.items()):
+        for version, model in sorted(versions.items()):
+            marker = "✅" if active[name] == version else "  "
+            sections = ", ".join(section.name for section in model.sections)
+            print(f"{marker} {model.id:<22} {model.description} [{sections}]")
+
+
+if __name__ == "__main__":
+    main()
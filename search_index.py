@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+仓库全文检索 - 本地 SQLite FTS5 倒排索引
+功能: 对名称/所有者/描述/topics/ai_tags 建立倒排索引, 存储阶段增量写入; BM25 排序, 支持分类/语言/评分/星标过滤
+更新时间: 2025-09-16
+
+用法:
+    python search_index.py search "llm agent" --category "LLM应用" --min-quality 60
+    python search_index.py build        # 从 D1 全量回填 (按ID键集分页)
+    python search_index.py stats
+    python search_index.py optimize     # 合并 FTS5 段, 大批量写入后执行
+"""
+
+import os
+import re
+import sys
+import json
+import sqlite3
+import hashlib
+import logging
+import argparse
+from typing import Dict, List, Any, Optional, Iterable
+
+from config_v2 import Config, DatabaseConfig
+
+# 索引列 -> BM25 权重 (顺序即 FTS5 列顺序)
+SEARCH_COLUMNS = {
+    "name": 8.0,
+    "owner": 3.0,
+    "description": 1.0,
+    "topics": 4.0,
+    "ai_tags": 4.0,
+}
+
+SEARCH_INDEX_CONFIG = {
+    "tokenize": "unicode61 remove_diacritics 2",
+    "prefix": "2 3",                # 前缀索引 (支持 "trans*" 查询)
+    "snippet_tokens": 12,
+    "default_limit": 20,
+    "backfill_page_size": 1000,
+}
+
+SEARCH_PAGE_FIELDS = [
+    "id", "full_name", "name", "owner", "description", "url", "stargazers_count",
+    "language", "topics", "ai_category", "ai_tags", "quality_score", "trending_score",
+]
+
+SEARCH_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS repo_search USING fts5(
+        {", ".join(SEARCH_COLUMNS)},
+        tokenize = '{SEARCH_INDEX_CONFIG["tokenize"]}',
+        prefix = '{SEARCH_INDEX_CONFIG["prefix"]}'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS repo_search_docs (
+        id INTEGER PRIMARY KEY,
+        full_name TEXT, url TEXT, ai_category TEXT, language TEXT,
+        quality_score REAL DEFAULT 0, trending_score REAL DEFAULT 0, stars INTEGER DEFAULT 0,
+        doc_hash TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_repo_search_docs_category ON repo_search_docs(ai_category)",
+    "CREATE INDEX IF NOT EXISTS idx_repo_search_docs_language ON repo_search_docs(language COLLATE NOCASE)",
+]
+
+TOKEN_PATTERN = re.compile(r'[\w][\w\-.+#]*\*?', re.UNICODE)
+
+logger = logging.getLogger('ai_collector_v2.search_index')
+
+
+def build_match_query(query: str, match_any: bool = False) -> str:
+    """
+    用户输入 → FTS5 MATCH 表达式
+    每个词按短语引用 (避免 "-"、":" 等被解析为语法), 保留结尾 * 前缀匹配; 默认所有词都需命中
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(query or ""):
+        prefix = token.endswith("*")
+        word = token.rstrip("*").replace('"', '')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return (" OR " if match_any else " ").join(terms)
+
+
+def _field(repo: Any, key: str, default: Any = None) -> Any:
+    if isinstance(repo, dict):
+        return repo.get(key, default)
+    return getattr(repo, key, default)
+
+
+def _tag_text(value: Any) -> str:
+    """topics/ai_tags: 列表或逗号分隔字符串 → 空格分隔文本"""
+    if not value:
+        return ""
+    if isinstance(value, str):
+        value = value.split(",")
+    return " ".join(str(item).strip() for item in value if str(item).strip())
+
+
+class SearchIndex:
+    """本地全文索引 - 首次使用时打开 (创建) SQLite 文件"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path if path is not None else Config().SEARCH_INDEX_FILE
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL" if self.path != ":memory:" else "PRAGMA journal_mode=MEMORY")
+            with self._conn:
+                for statement in SEARCH_SCHEMA:
+                    self._conn.execute(statement)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ------------------------------------------------------------------
+    # 写入
+    # ------------------------------------------------------------------
+
+    def add_batch(self, repos: Iterable[Any]) -> Dict[str, int]:
+        """
+        增量写入一批仓库 (RepositoryData、GitHub API 字典或 D1 行字典)
+        文本未变化的仓库只更新过滤字段, 不重写倒排索引
+        返回: {"indexed": 新增/文本变化数, "unchanged": 仅更新过滤字段数}
+        """
+        stats = {"indexed": 0, "unchanged": 0}
+        conn = self.conn
+        with conn:
+            for repo in repos:
+                repo_id = _field(repo, "id")
+                if not repo_id:
+                    continue
+                owner = _field(repo, "owner", "")
+                texts = [
+                    _field(repo, "name", "") or "",
+                    (owner.get("login", "") if isinstance(owner, dict) else owner) or "",
+                    _field(repo, "description", "") or "",
+                    _tag_text(_field(repo, "topics")),
+                    _tag_text(_field(repo, "ai_tags")),
+                ]
+                doc_hash = hashlib.sha1("\x1f".join(texts).encode("utf-8")).hexdigest()
+                existing = conn.execute("SELECT doc_hash FROM repo_search_docs WHERE id = ?", (repo_id,)).fetchone()
+
+                if existing is None or existing["doc_hash"] != doc_hash:
+                    if existing is not None:
+                        conn.execute("DELETE FROM repo_search WHERE rowid = ?", (repo_id,))
+                    conn.execute(f"INSERT INTO repo_search (rowid, {', '.join(SEARCH_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                                 [repo_id] + texts)
+                    stats["indexed"] += 1
+                else:
+                    stats["unchanged"] += 1
+
+                conn.execute(
+                    """
+                    INSERT INTO repo_search_docs (id, full_name, url, ai_category, language, quality_score, trending_score, stars, doc_hash)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        full_name = excluded.full_name, url = excluded.url, ai_category = excluded.ai_category,
+                        language = excluded.language, quality_score = excluded.quality_score,
+                        trending_score = excluded.trending_score, stars = excluded.stars, doc_hash = excluded.doc_hash
+                    """,
+                    (repo_id, _field(repo, "full_name", ""), _field(repo, "url") or _field(repo, "html_url", ""),
+                     _field(repo, "ai_category", "") or "", _field(repo, "language", "") or "",
+                     float(_field(repo, "quality_score", 0) or 0), float(_field(repo, "trending_score", 0) or 0),
+                     int(_field(repo, "stargazers_count", 0) or 0), doc_hash)
+                )
+        return stats
+
+    def remove(self, repo_ids: Iterable[int]) -> int:
+        """从索引中删除仓库"""
+        removed = 0
+        with self.conn:
+            for repo_id in repo_ids:
+                self.conn.execute("DELETE FROM repo_search WHERE rowid = ?", (repo_id,))
+                removed += self.conn.execute("DELETE FROM repo_search_docs WHERE id = ?", (repo_id,)).rowcount
+        return removed
+
+    def build_from_d1(self, client: Any, account_id: str, database_id: str,
+                      page_size: Optional[int] = None) -> int:
+        """从 D1 全量回填索引 (按ID键集分页), 返回扫描的仓库数"""
+        page_size = page_size or SEARCH_INDEX_CONFIG["backfill_page_size"]
+        last_id, total = 0, 0
+        while True:
+            response = client.d1.database.query(database_id=database_id, account_id=account_id,
+                                                sql=DatabaseConfig.SELECT_SEARCH_PAGE_SQL, params=[last_id, page_size])
+            if not response.success:
+                raise RuntimeError(f"D1 查询失败: {getattr(response, 'errors', 'Unknown error')}")
+            rows = response.result[0].results if response.result else []
+            records = [dict(zip(SEARCH_PAGE_FIELDS, row)) if isinstance(row, list) else dict(row) for row in rows or []]
+            if records:
+                self.add_batch(records)
+                total += len(records)
+                last_id = records[-1]["id"]
+                logger.info(f"🔎 全文索引回填: 已扫描 {total} 个仓库")
+            if len(records) < page_size:
+                return total
+
+    def optimize(self):
+        """合并 FTS5 索引段"""
+        with self.conn:
+            self.conn.execute("INSERT INTO repo_search(repo_search) VALUES ('optimize')")
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, category: Optional[str] = None, language: Optional[str] = None,
+               min_quality: Optional[float] = None, min_stars: Optional[int] = None,
+               limit: Optional[int] = None, match_any: bool = False, raw: bool = False) -> List[Dict[str, Any]]:
+        """
+        BM25 排序检索; 查询为空时只按过滤条件返回 (按质量分降序)
+        raw=True 时 query 直接作为 FTS5 MATCH 表达式
+        """
+        match = query if raw else build_match_query(query, match_any)
+        filters, params = [], []
+        if category:
+            filters.append("d.ai_category = ?")
+            params.append(category)
+        if language:
+            filters.append("d.language = ? COLLATE NOCASE")
+            params.append(language)
+        if min_quality is not None:
+            filters.append("d.quality_score >= ?")
+            params.append(min_quality)
+        if min_stars is not None:
+            filters.append("d.stars >= ?")
+            params.append(min_stars)
+        limit = limit or SEARCH_INDEX_CONFIG["default_limit"]
+
+        columns = "d.id, d.full_name, d.url, d.ai_category, d.language, d.quality_score, d.trending_score, d.stars"
+        if match:
+            weights = ", ".join(str(weight) for weight in SEARCH_COLUMNS.values())
+            description_column = list(SEARCH_COLUMNS).index("description")
+            sql = f"""
+            SELECT {columns}, bm25(repo_search, {weights}) AS rank,
+                   snippet(repo_search, {description_column}, '[', ']', '…', {SEARCH_INDEX_CONFIG["snippet_tokens"]}) AS snippet
+            FROM repo_search JOIN repo_search_docs d ON d.id = repo_search.rowid
+            WHERE repo_search MATCH ? {"".join(" AND " + f for f in filters)}
+            ORDER BY rank LIMIT ?
+            """
+            params = [match] + params
+        else:
+            sql = f"""
+            SELECT {columns}, NULL AS rank, NULL AS snippet FROM repo_search_docs d
+            {"WHERE " + " AND ".join(filters) if filters else ""}
+            ORDER BY d.quality_score DESC LIMIT ?
+            """
+        rows = self.conn.execute(sql, params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self.conn
+        return {
+            "path": self.path,
+            "documents": conn.execute("SELECT COUNT(*) FROM repo_search_docs").fetchone()[0],
+            "categories": conn.execute("SELECT COUNT(DISTINCT ai_category) FROM repo_search_docs").fetchone()[0],
+            "bytes": os.path.getsize(self.path) if self.path != ":memory:" and os.path.exists(self.path) else 0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="仓库全文检索 (SQLite FTS5)")
+    parser.add_argument("command", choices=["search", "build", "stats", "optimize"])
+    parser.add_argument("query", nargs="?", default="", help="检索词, 结尾 * 表示前缀匹配")
+    parser.add_argument("--index", default=None, help="索引文件 (默认 SEARCH_INDEX_FILE)")
+    parser.add_argument("--category", default=None, help="AI分类")
+    parser.add_argument("--language", default=None, help="编程语言 (不区分大小写)")
+    parser.add_argument("--min-quality", type=float, default=None, help="最低质量分")
+    parser.add_argument("--min-stars", type=int, default=None, help="最低星标数")
+    parser.add_argument("--limit", type=int, default=SEARCH_INDEX_CONFIG["default_limit"])
+    parser.add_argument("--any", action="store_true", help="任一词命中即可 (默认需全部命中)")
+    parser.add_argument("--raw", action="store_true", help="直接使用 FTS5 查询语法")
+    parser.add_argument("--json", action="store_true", help="以JSON输出")
+    args = parser.parse_args()
+
+    from lazy_clients import load_env
+    load_env()
+    index = SearchIndex(args.index)
+
+    if args.command == "build":
+        from lazy_clients import get_cloudflare_client
+        config = Config()
+        total = index.build_from_d1(get_cloudflare_client(config.CLOUDFLARE_API_TOKEN),
+                                    config.CLOUDFLARE_ACCOUNT_ID, config.D1_DATABASE_ID)
+        index.optimize()
+        print(f"✅ 全文索引回填完成: {total} 个仓库")
+    elif args.command == "optimize":
+        index.optimize()
+        print("✅ 全文索引已合并")
+    elif args.command == "stats":
+        stats = index.stats()
+        print(f"📊 {stats['path']}: {stats['documents']} 个仓库, {stats['categories']} 个分类, {stats['bytes'] / 1024:.1f}KB")
+    else:
+        try:
+            results = index.search(args.query, category=args.category, language=args.language,
+                                   min_quality=args.min_quality, min_stars=args.min_stars,
+                                   limit=args.limit, match_any=args.any, raw=args.raw)
+        except sqlite3.OperationalError as e:
+            print(f"❌ 查询语法错误: {e}")
+            sys.exit(2)
+        if args.json:
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+            return
+        if not results:
+            print("🔍 无匹配结果")
+        for i, hit in enumerate(results, 1):
+            print(f"{i:>3}. {hit['full_name']}  ⭐{hit['stars']}  质量 {hit['quality_score']:.1f}  "
+                  f"[{hit['ai_category'] or '-'} / {hit['language'] or '-'}]")
+            if hit["snippet"]:
+                print(f"     {hit['snippet']}")
+
+
+if __name__ == "__main__":
+    main()
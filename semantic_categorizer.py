@@ -0,0 +1,498 @@
+# -*- coding: utf-8 -*-
+"""
+语义分类引擎 - 哈希TF-IDF向量 + 标注质心分类 + 本地倒排向量索引
+功能: 统一替代各处关键词 if/elif 分类; 仓库文本嵌入为稀疏向量, 按最近标注质心批量分类, 支持"相似仓库"查询
+更新时间: 2025-09-16
+
+用法:
+    python semantic_categorizer.py classify "A chatbot UI for local llama models"
+    python semantic_categorizer.py similar langchain-ai/langchain --limit 10
+    python semantic_categorizer.py build      # 从 D1 回填向量索引 (按ID键集分页)
+    python semantic_categorizer.py relabel    # 将库中旧分类规则遗留的标签改写为统一分类 (--dry-run 只统计)
+    python semantic_categorizer.py stats
+"""
+
+import os
+import re
+import json
+import math
+import zlib
+import heapq
+import logging
+import argparse
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+from config_v2 import Config, DatabaseConfig
+
+SEMANTIC_CONFIG = {
+    "dim": 1 << 18,                 # 哈希特征空间大小
+    "field_weights": {"name": 2.0, "topics": 1.5, "description": 1.0, "ai_tags": 1.0},
+    "min_similarity": 0.06,         # 低于该相似度时归入默认分类
+    "prototype_weight": 5.0,        # 每条原型描述折合的标注样本数
+    "query_terms": 48,              # 相似查询只使用权重最高的前N个特征 (倒排剪枝)
+    "backfill_page_size": 1000,
+}
+
+DEFAULT_CATEGORY = "通用AI工具"
+
+# 统一分类体系: 分类 → 原型描述 (合并原各处关键词规则)
+CATEGORY_PROTOTYPES = {
+    "LLM研究": [
+        "large language model research pretraining fine-tuning transformer architecture",
+        "llama gpt bert t5 language model training instruction tuning rlhf",
+        "llm benchmark evaluation paper implementation tokenizer scaling",
+    ],
+    "LLM应用": [
+        "chatbot chat assistant conversation ui chatgpt client",
+        "ai assistant copilot writing assistant prompt templates",
+        "customer support bot conversational ai app built on llm",
+    ],
+    "LLM服务与工具": [
+        "llm inference server serving engine openai compatible api",
+        "vllm model deployment gateway proxy sdk llmops",
+        "fast inference quantized llm serving on gpu api server",
+    ],
+    "RAG技术": [
+        "retrieval augmented generation rag pipeline",
+        "vector database embeddings semantic search knowledge base",
+        "document question answering chunking reranker langchain llamaindex",
+    ],
+    "AI智能体": [
+        "autonomous ai agent multi-agent framework",
+        "tool calling function calling planning agent workflow automation",
+        "autogen crewai langgraph browser agent",
+    ],
+    "生成式AI": [
+        "diffusion model stable diffusion text-to-image image generation",
+        "video generation sora comfyui lora controlnet",
+        "generative art gan image synthesis",
+    ],
+    "多模态AI": [
+        "multimodal vision-language model image captioning",
+        "visual question answering clip blip llava gpt-4v",
+        "cross-modal image text understanding visual instruction tuning vision assistant",
+    ],
+    "计算机视觉": [
+        "computer vision object detection yolo image segmentation",
+        "opencv face recognition pose estimation tracking",
+        "ocr image classification image processing",
+    ],
+    "语音AI": [
+        "speech recognition asr whisper transcription",
+        "text to speech tts voice cloning speech synthesis",
+        "audio voice ai speaker diarization",
+    ],
+    "机器学习框架": [
+        "machine learning framework deep learning library",
+        "pytorch tensorflow jax scikit-learn neural network training",
+        "automl distributed training ml framework",
+    ],
+    "数据科学": [
+        "data science data analysis pandas jupyter notebook",
+        "data visualization analytics dashboard data mining",
+        "time series forecasting statistics",
+    ],
+    "AI安全": [
+        "ai safety alignment interpretability explainable ai",
+        "fairness responsible ai red teaming jailbreak",
+        "guardrails prompt injection detection llm security",
+    ],
+    "边缘AI": [
+        "edge ai on-device mobile inference tinyml",
+        "model compression quantization pruning lightweight",
+        "onnx tensorrt microcontroller embedded deployment",
+    ],
+}
+
+# 旧关键词分类规则遗留的标签 → 统一分类体系 (库中已有行、标注样本与旧索引文件按此改写)
+LEGACY_CATEGORY_MAP = {
+    "AI代理系统": "AI智能体",
+    "其他AI技术": DEFAULT_CATEGORY,
+    "通用AI": DEFAULT_CATEGORY,
+    "LLM服务": "LLM服务与工具",
+    "机器学习": "机器学习框架",
+}
+
+# 存有分类标签的 D1 表: 表 → (分类列, 是否推进 sync_time)
+# repos.category 可能带 " - 项目层级" 后缀 (metrics_based_sync), 只改写前缀
+RELABEL_TARGETS = {
+    DatabaseConfig.TABLE_NAME: ("ai_category", False),
+    "repos": ("category", True),
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[一-鿿]")
+CAMEL_PATTERN = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+STOP_WORDS = frozenset([
+    "a", "an", "the", "and", "or", "for", "of", "in", "on", "with", "to", "by", "is", "are", "your", "you",
+    "that", "this", "from", "as", "at", "it", "ai", "based", "using", "use", "built",
+])
+
+logger = logging.getLogger('ai_collector_v2.semantic')
+
+SparseVector = Dict[int, float]
+
+
+def canonical_category(label: Optional[str]) -> Optional[str]:
+    """旧分类标签 → 统一分类 (保留 " - " 后缀; 非旧标签原样返回)"""
+    if not label:
+        return label
+    head, sep, tail = label.partition(" - ")
+    return LEGACY_CATEGORY_MAP.get(head, head) + sep + tail
+
+
+def _field(repo: Any, key: str, default: Any = None) -> Any:
+    if isinstance(repo, dict):
+        return repo.get(key, default)
+    return getattr(repo, key, default)
+
+
+def _stem(word: str) -> str:
+    """复数归一 (agents → agent, llms → llm)"""
+    return word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+def tokenize(text: str) -> List[str]:
+    """小写分词 (驼峰拆分, 中文按字, 去停用词, 复数归一), 附加相邻二元组"""
+    words = [_stem(word) for word in TOKEN_PATTERN.findall(CAMEL_PATTERN.sub(" ", text or "").lower())
+             if word not in STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _normalize(vector: SparseVector) -> SparseVector:
+    norm = math.sqrt(sum(w * w for w in vector.values()))
+    return {f: w / norm for f, w in vector.items()} if norm else {}
+
+
+class SemanticCategorizer:
+    """语义分类引擎 (文档频率、标注样本与向量索引持久化到同一文件)"""
+
+    def __init__(self, index_file: Optional[str] = None):
+        self.index_file = index_file if index_file is not None else Config().SEMANTIC_INDEX_FILE
+        self.dim = SEMANTIC_CONFIG["dim"]
+        self._reset()
+
+    def _reset(self):
+        self.doc_count = 0
+        self.doc_freq: Dict[int, int] = {}
+        self.labeled: Dict[str, Dict[str, Any]] = {}            # 分类 → {"count", "sum": 稀疏向量和}
+        self.vectors: Dict[int, SparseVector] = {}               # 仓库ID → 归一化向量
+        self.meta: Dict[int, Tuple[str, str]] = {}               # 仓库ID → (full_name, 分类)
+        self.postings: Dict[int, Dict[int, float]] = {}          # 特征 → {仓库ID: 权重}
+        self._centroids: Optional[Tuple[List[str], Dict[int, List[Tuple[int, float]]]]] = None
+
+    # ------------------------------------------------------------------
+    # 嵌入
+    # ------------------------------------------------------------------
+
+    def _term_counts(self, repo: Any) -> Dict[int, float]:
+        if isinstance(repo, str):
+            repo = {"description": repo}
+        counts: Dict[int, float] = {}
+        for field, weight in SEMANTIC_CONFIG["field_weights"].items():
+            value = _field(repo, field)
+            if isinstance(value, (list, tuple)):
+                value = " ".join(value)
+            for token in tokenize(str(value or "").replace(",", " ")):
+                feature = zlib.crc32(token.encode("utf-8")) % self.dim
+                counts[feature] = counts.get(feature, 0.0) + weight
+        return counts
+
+    def _idf(self, feature: int) -> float:
+        return math.log((self.doc_count + 1) / (self.doc_freq.get(feature, 0) + 1)) + 1.0
+
+    def embed(self, repo: Any) -> SparseVector:
+        """仓库 (RepositoryData / 字典 / 纯文本) → 归一化 TF-IDF 稀疏向量"""
+        counts = self._term_counts(repo)
+        return _normalize({f: (1.0 + math.log(c)) * self._idf(f) for f, c in counts.items()})
+
+    def fit(self, repos: Iterable[Any]) -> int:
+        """用语料更新文档频率 (IDF), 返回累计文档数"""
+        for repo in repos:
+            for feature in self._term_counts(repo):
+                self.doc_freq[feature] = self.doc_freq.get(feature, 0) + 1
+            self.doc_count += 1
+        self._centroids = None
+        return self.doc_count
+
+    # ------------------------------------------------------------------
+    # 分类
+    # ------------------------------------------------------------------
+
+    def add_labeled(self, repos: Iterable[Any], labels: Iterable[str]) -> int:
+        """加入人工标注样本, 修正对应分类的质心"""
+        added = 0
+        for repo, label in zip(repos, labels):
+            entry = self.labeled.setdefault(canonical_category(label), {"count": 0, "sum": {}})
+            for feature, weight in self.embed(repo).items():
+                entry["sum"][feature] = entry["sum"].get(feature, 0.0) + weight
+            entry["count"] += 1
+            added += 1
+        self._centroids = None
+        return added
+
+    def _centroid_index(self) -> Tuple[List[str], Dict[int, List[Tuple[int, float]]]]:
+        """分类质心 (原型描述 + 标注样本) → 特征倒排表"""
+        if self._centroids is None:
+            categories = sorted(set(CATEGORY_PROTOTYPES) | set(self.labeled))
+            postings: Dict[int, List[Tuple[int, float]]] = {}
+            for ci, category in enumerate(categories):
+                total: SparseVector = {}
+                scale = SEMANTIC_CONFIG["prototype_weight"]
+                for text in CATEGORY_PROTOTYPES.get(category, []):
+                    for feature, weight in self.embed(text).items():
+                        total[feature] = total.get(feature, 0.0) + weight * scale
+                for feature, weight in self.labeled.get(category, {}).get("sum", {}).items():
+                    total[feature] = total.get(feature, 0.0) + weight
+                for feature, weight in _normalize(total).items():
+                    postings.setdefault(feature, []).append((ci, weight))
+            self._centroids = (categories, postings)
+        return self._centroids
+
+    def _classify_vector(self, vector: SparseVector) -> Tuple[str, float]:
+        categories, postings = self._centroid_index()
+        scores = [0.0] * len(categories)
+        for feature, weight in vector.items():
+            for ci, centroid_weight in postings.get(feature, ()):
+                scores[ci] += weight * centroid_weight
+        best = max(range(len(scores)), key=scores.__getitem__) if scores else -1
+        if best < 0 or scores[best] < SEMANTIC_CONFIG["min_similarity"]:
+            return DEFAULT_CATEGORY, scores[best] if best >= 0 else 0.0
+        return categories[best], scores[best]
+
+    def classify(self, repo: Any) -> Tuple[str, float]:
+        """返回 (分类, 与质心的余弦相似度)"""
+        return self._classify_vector(self.embed(repo))
+
+    def classify_batch(self, repos: Iterable[Any]) -> List[Tuple[str, float]]:
+        """批量分类 (质心倒排表只构建一次)"""
+        self._centroid_index()
+        return [self._classify_vector(self.embed(repo)) for repo in repos]
+
+    # ------------------------------------------------------------------
+    # 向量索引 / 相似仓库
+    # ------------------------------------------------------------------
+
+    def index_batch(self, repos: Iterable[Any]) -> int:
+        """写入向量索引 (同一仓库重复写入时替换), 返回写入数"""
+        repos = [repo for repo in repos if _field(repo, "id")]
+        self.fit(repo for repo in repos if int(_field(repo, "id")) not in self.vectors)
+        for repo in repos:
+            repo_id = int(_field(repo, "id"))
+            self._remove(repo_id)
+            vector = self.embed(repo)
+            category = canonical_category(_field(repo, "ai_category")) or self._classify_vector(vector)[0]
+            self.vectors[repo_id] = vector
+            self.meta[repo_id] = (_field(repo, "full_name", "") or "", category)
+            for feature, weight in vector.items():
+                self.postings.setdefault(feature, {})[repo_id] = weight
+        return len(repos)
+
+    def _remove(self, repo_id: int):
+        for feature in self.vectors.pop(repo_id, {}):
+            self.postings.get(feature, {}).pop(repo_id, None)
+        self.meta.pop(repo_id, None)
+
+    def find_similar(self, query: Any, limit: int = 10, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        相似仓库查询: query 为已索引的仓库ID / full_name、仓库对象或纯文本
+        只遍历查询权重最高的若干特征的倒排表 (近似), 再按累积余弦排序
+        """
+        exclude = None
+        if isinstance(query, int) and query in self.vectors:
+            exclude, vector = query, self.vectors[query]
+        elif isinstance(query, str) and "/" in query and " " not in query:
+            exclude = next((rid for rid, (name, _) in self.meta.items() if name == query), None)
+            vector = self.vectors[exclude] if exclude is not None else self.embed(query.replace("/", " "))
+        else:
+            vector = self.embed(query)
+
+        top_terms = heapq.nlargest(SEMANTIC_CONFIG["query_terms"], vector.items(), key=lambda item: item[1])
+        scores: Dict[int, float] = {}
+        for feature, weight in top_terms:
+            for repo_id, doc_weight in self.postings.get(feature, {}).items():
+                scores[repo_id] = scores.get(repo_id, 0.0) + weight * doc_weight
+
+        candidates = ((rid, score) for rid, score in scores.items()
+                      if rid != exclude and (category is None or self.meta[rid][1] == category))
+        return [{"id": rid, "full_name": self.meta[rid][0], "category": self.meta[rid][1], "similarity": round(score, 4)}
+                for rid, score in heapq.nlargest(limit, candidates, key=lambda item: item[1])]
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def save(self) -> bool:
+        """原子写入索引文件"""
+        if not self.index_file:
+            return False
+        tmp_file = f"{self.index_file}.tmp"
+        try:
+            payload = {
+                "version": 1,
+                "dim": self.dim,
+                "doc_count": self.doc_count,
+                "doc_freq": self.doc_freq,
+                "labeled": self.labeled,
+                "repos": [[rid, name, category, [[f, round(w, 5)] for f, w in self.vectors[rid].items()]]
+                          for rid, (name, category) in self.meta.items()],
+            }
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_file, self.index_file)
+            return True
+        except Exception as e:
+            logger.error(f"保存语义索引失败: {self.index_file} | {e}")
+            return False
+
+    def load(self) -> int:
+        """从索引文件加载, 返回已索引的仓库数"""
+        if not self.index_file or not os.path.exists(self.index_file):
+            return 0
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            if payload.get("dim") != self.dim:
+                raise ValueError("特征维度不一致")
+            self.doc_count = payload["doc_count"]
+            self.doc_freq = {int(f): n for f, n in payload["doc_freq"].items()}
+            # 旧索引文件中的遗留标签合并到统一分类
+            for label, entry in payload["labeled"].items():
+                merged = self.labeled.setdefault(canonical_category(label), {"count": 0, "sum": {}})
+                merged["count"] += entry["count"]
+                for f, w in entry["sum"].items():
+                    merged["sum"][int(f)] = merged["sum"].get(int(f), 0.0) + w
+            for rid, name, category, vector in payload["repos"]:
+                self.vectors[rid] = {f: w for f, w in vector}
+                self.meta[rid] = (name, canonical_category(category))
+                for f, w in vector:
+                    self.postings.setdefault(f, {})[rid] = w
+            self._centroids = None
+            logger.info(f"📂 已加载语义索引: {len(self.vectors)} 个仓库")
+        except Exception as e:
+            logger.warning(f"加载语义索引失败: {self.index_file} | {e}")
+            self._reset()
+        return len(self.vectors)
+
+    def build_from_d1(self, client: Any, account_id: str, database_id: str,
+                      page_size: Optional[int] = None) -> int:
+        """从 D1 回填向量索引 (按ID键集分页), 返回扫描的仓库数"""
+        from search_index import SEARCH_PAGE_FIELDS
+
+        page_size = page_size or SEMANTIC_CONFIG["backfill_page_size"]
+        last_id, total = 0, 0
+        while True:
+            response = client.d1.database.query(database_id=database_id, account_id=account_id,
+                                                sql=DatabaseConfig.SELECT_SEARCH_PAGE_SQL, params=[last_id, page_size])
+            if not response.success:
+                raise RuntimeError(f"D1 查询失败: {getattr(response, 'errors', 'Unknown error')}")
+            rows = response.result[0].results if response.result else []
+            records = [dict(zip(SEARCH_PAGE_FIELDS, row)) if isinstance(row, list) else dict(row) for row in rows or []]
+            if records:
+                # 回填时统一按当前引擎重新分类, 不沿用库中旧规则的分类
+                self.index_batch(dict(record, ai_category=None) for record in records)
+                total += len(records)
+                last_id = records[-1]["id"]
+                logger.info(f"🧭 语义索引回填: 已扫描 {total} 个仓库")
+            if len(records) < page_size:
+                return total
+
+
+def relabel_legacy_categories(client: Any, account_id: str, database_id: str,
+                              dry_run: bool = False) -> Dict[str, int]:
+    """
+    将 D1 中旧分类规则遗留的标签改写为统一分类 (每个旧标签每张表一条 UPDATE)
+    返回: 表 → 改写 (dry_run 时为待改写) 的行数; 查询失败 (如表不存在) 时跳过该表
+    """
+    counts: Dict[str, int] = {}
+
+    def query(sql: str, params: List[Any]):
+        response = client.d1.database.query(database_id=database_id, account_id=account_id, sql=sql, params=params)
+        if not response.success:
+            raise RuntimeError(f"D1 查询失败: {getattr(response, 'errors', 'Unknown error')}")
+        return response.result[0].results if response.result else []
+
+    for table, (column, touch) in RELABEL_TARGETS.items():
+        where = f"{column} = ? OR {column} LIKE ?"
+        counts[table] = 0
+        try:
+            for old, new in LEGACY_CATEGORY_MAP.items():
+                rows = query(f"SELECT COUNT(*) AS n FROM {table} WHERE {where}", [old, f"{old} - %"])
+                matched = (rows[0]["n"] if isinstance(rows[0], dict) else rows[0][0]) if rows else 0
+                if matched and not dry_run:
+                    query(f"UPDATE {table} SET {column} = ? || substr({column}, ?)"
+                          + (", sync_time = CURRENT_TIMESTAMP" if touch else "") + f" WHERE {where}",
+                          [new, len(old) + 1, old, f"{old} - %"])
+                counts[table] += matched
+        except RuntimeError as e:
+            logger.warning(f"⚠️ 分类改写跳过 {table}: {e}")
+            continue
+        logger.info(f"🏷️ {table}.{column}: {'待改写' if dry_run else '已改写'} {counts[table]} 行遗留分类")
+    return counts
+
+
+_shared_categorizer: Optional[SemanticCategorizer] = None
+
+
+def get_categorizer() -> SemanticCategorizer:
+    """进程内共享的分类引擎 (首次使用时加载索引文件中的文档频率与标注样本)"""
+    global _shared_categorizer
+    if _shared_categorizer is None:
+        _shared_categorizer = SemanticCategorizer()
+        _shared_categorizer.load()
+    return _shared_categorizer
+
+
+def classify_text(name: str, description: str = "", topics: Any = None) -> str:
+    """按名称/描述/topics 分类 (供脚本中原关键词分类函数调用)"""
+    return get_categorizer().classify({"name": name, "description": description, "topics": topics or []})[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="语义分类引擎 (哈希TF-IDF)")
+    parser.add_argument("command", choices=["classify", "similar", "build", "relabel", "stats"])
+    parser.add_argument("query", nargs="?", default="", help="待分类文本 / 仓库 full_name 或检索文本")
+    parser.add_argument("--index", default=None, help="索引文件 (默认 SEMANTIC_INDEX_FILE)")
+    parser.add_argument("--category", default=None, help="相似查询只返回该分类")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--dry-run", action="store_true", help="relabel 只统计待改写行数")
+    args = parser.parse_args()
+
+    from lazy_clients import load_env
+    load_env()
+    categorizer = SemanticCategorizer(args.index)
+    categorizer.load()
+
+    if args.command == "classify":
+        category, similarity = categorizer.classify(args.query)
+        print(f"🏷️ {category} (相似度 {similarity:.3f})")
+    elif args.command == "similar":
+        results = categorizer.find_similar(args.query, limit=args.limit, category=args.category)
+        if not results:
+            print("🔍 无相似仓库")
+        for i, hit in enumerate(results, 1):
+            print(f"{i:>3}. {hit['full_name']}  {hit['similarity']:.3f}  [{hit['category']}]")
+    elif args.command == "build":
+        from lazy_clients import get_cloudflare_client
+        config = Config()
+        total = categorizer.build_from_d1(get_cloudflare_client(config.CLOUDFLARE_API_TOKEN),
+                                          config.CLOUDFLARE_ACCOUNT_ID, config.D1_DATABASE_ID)
+        categorizer.save()
+        print(f"✅ 语义索引回填完成: {total} 个仓库")
+    elif args.command == "relabel":
+        from lazy_clients import get_cloudflare_client
+        config = Config()
+        counts = relabel_legacy_categories(get_cloudflare_client(config.CLOUDFLARE_API_TOKEN),
+                                           config.CLOUDFLARE_ACCOUNT_ID, config.D1_DATABASE_ID, args.dry_run)
+        for table, count in counts.items():
+            print(f"{'🔍 待改写' if args.dry_run else '✅ 已改写'} {table}: {count} 行")
+    else:
+        counts: Dict[str, int] = {}
+        for _, category in categorizer.meta.values():
+            counts[category] = counts.get(category, 0) + 1
+        print(f"📊 {categorizer.index_file}: {len(categorizer.vectors)} 个仓库, 文档频率基于 {categorizer.doc_count} 篇")
+        for category, count in sorted(counts.items(), key=lambda item: -item[1]):
+            print(f"   {category}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+静态仪表板导出 - 按区块输出带版本号的紧凑JSON数据文件 + 静态HTML外壳
+功能: 页面只下载可见区块的数据, 区块按内容摘要命名可长期缓存, 数据未变化的区块不重写; 预压缩 gzip/brotli
+更新时间: 2025-09-16
+
+输出目录结构:
+    index.html / dashboard.js / charts.js / dashboard.css   外壳与内置图表 (不依赖CDN)
+    data/manifest.json                                      区块 → 当前数据文件 (每次导出更新, 不应长期缓存)
+    data/<区块>.<摘要>.json[.gz|.br]                        区块数据 (内容不变则文件名不变, 可设为 immutable)
+
+静态服务器可直接返回预压缩文件 (如 nginx gzip_static / brotli_static)
+"""
+
+import os
+import json
+import gzip
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+STATIC_ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dashboard_static")
+
+STATIC_DASHBOARD_CONFIG = {
+    "output_dir": os.environ.get("DASHBOARD_STATIC_OUTPUT", "dashboard_site"),
+    "assets": ["index.html", "dashboard.js", "charts.js", "dashboard.css"],
+    "compress": ["gzip", "br"],     # br 需要可选依赖 brotli, 未安装时跳过
+    "keep_versions": 2,             # 每个区块保留的数据文件版本数 (仍持有旧清单的页面可继续读取)
+    "float_digits": 2,              # 浮点数保留的小数位
+}
+
+MANIFEST_FILE = "manifest.json"
+
+logger = logging.getLogger('ai_collector_v2.static_dashboard')
+
+
+def read_static_asset(name: str) -> str:
+    """读取 dashboard_static 下的静态资源"""
+    with open(os.path.join(STATIC_ASSET_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _atomic_write_bytes(path: str, payload: bytes):
+    tmp_file = f"{path}.tmp"
+    with open(tmp_file, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_file, path)
+
+
+def encode_section(rows: List[Dict[str, Any]], float_digits: Optional[int] = None) -> bytes:
+    """区块数据 → 列式紧凑JSON {"columns": [...], "rows": [[...], ...]}"""
+    digits = STATIC_DASHBOARD_CONFIG["float_digits"] if float_digits is None else float_digits
+    columns: List[str] = []
+    for row in rows:
+        columns.extend(key for key in row if key not in columns)
+
+    def compact(value):
+        return round(value, digits) if isinstance(value, float) else value
+
+    payload = {"columns": columns, "rows": [[compact(row.get(c)) for c in columns] for row in rows]}
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def precompress(path: str, payload: bytes, encodings: Optional[List[str]] = None) -> List[str]:
+    """写出预压缩副本, 返回写出的文件路径"""
+    written = []
+    for encoding in encodings if encodings is not None else STATIC_DASHBOARD_CONFIG["compress"]:
+        if encoding == "gzip":
+            compressed = gzip.compress(payload, compresslevel=9, mtime=0)
+            suffix = ".gz"
+        elif encoding == "br":
+            try:
+                import brotli
+            except ImportError:
+                continue
+            compressed = brotli.compress(payload, quality=11)
+            suffix = ".br"
+        else:
+            continue
+        if len(compressed) >= len(payload):
+            continue  # 小文件压缩后反而更大
+        _atomic_write_bytes(path + suffix, compressed)
+        written.append(path + suffix)
+    return written
+
+
+def _load_manifest(data_dir: str) -> Dict[str, Any]:
+    path = os.path.join(data_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"读取静态仪表板清单失败: {path} | {e}")
+        return {}
+
+
+def _write_assets(output_dir: str) -> str:
+    """复制外壳与内置图表脚本 (内容不变时不重写), 返回资源版本号"""
+    assets = {name: read_static_asset(name) for name in STATIC_DASHBOARD_CONFIG["assets"]}
+    version = hashlib.sha256("".join(assets[n] for n in sorted(assets) if n != "index.html").encode("utf-8")).hexdigest()[:10]
+    assets["index.html"] = assets["index.html"].replace("{asset_version}", version)
+    for name, content in assets.items():
+        path = os.path.join(output_dir, name)
+        payload = content.encode("utf-8")
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                if f.read() == payload:
+                    continue
+        _atomic_write_bytes(path, payload)
+        precompress(path, payload)
+    return version
+
+
+def _prune_versions(data_dir: str, name: str, keep: List[str]):
+    prefix = f"{name}."
+    for filename in os.listdir(data_dir):
+        base = filename[:-3] if filename.endswith((".gz", ".br")) else filename
+        if filename.startswith(prefix) and base.endswith(".json") and base not in keep \
+                and base.count(".") == name.count(".") + 2:
+            os.remove(os.path.join(data_dir, filename))
+
+
+def export_static_dashboard(data: Dict[str, List[Dict[str, Any]]], output_dir: Optional[str] = None,
+                            watermark: Optional[str] = None,
+                            charts: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    导出静态仪表板: 只写出内容有变化的区块文件, 最后原子替换清单
+    返回 {"output_dir", "written": [区块名], "unchanged": [区块名], "bytes": 数据文件总字节数}
+    """
+    output_dir = output_dir or STATIC_DASHBOARD_CONFIG["output_dir"]
+    data_dir = os.path.join(output_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+
+    previous = _load_manifest(data_dir).get("sections", {})
+    asset_version = _write_assets(output_dir)
+
+    sections, written, unchanged, total_bytes = {}, [], [], 0
+    for name, rows in data.items():
+        payload = encode_section(rows)
+        digest = hashlib.sha256(payload).hexdigest()[:12]
+        filename = f"{name}.{digest}.json"
+        path = os.path.join(data_dir, filename)
+        if os.path.exists(path):
+            unchanged.append(name)
+        else:
+            _atomic_write_bytes(path, payload)
+            precompress(path, payload)
+            written.append(name)
+        sections[name] = {"file": filename, "digest": digest, "bytes": len(payload), "rows": len(rows)}
+        total_bytes += len(payload)
+
+        history = [filename] + [previous[name]["file"]] if name in previous else [filename]
+        _prune_versions(data_dir, name, history[:STATIC_DASHBOARD_CONFIG["keep_versions"]])
+
+    manifest = {
+        "version": 1,
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "watermark": watermark,
+        "asset_version": asset_version,
+        "sections": sections,
+        "charts": {spec["canvas"]: {key: spec[key] for key in ("title", "type", "query", "label_field", "dataset")}
+                   for spec in charts or []},
+    }
+    _atomic_write_bytes(os.path.join(data_dir, MANIFEST_FILE),
+                        json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+    logger.info(f"📦 静态仪表板已导出: {output_dir} | 更新区块 {len(written)}/{len(sections)} | 数据 {total_bytes / 1024:.1f}KB")
+    return {"output_dir": output_dir, "written": written, "unchanged": unchanged, "bytes": total_bytes}
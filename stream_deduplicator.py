@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+流式搜索结果去重器 - 跨轮次实时去重与关键词重叠统计
+功能: 搜索结果到达时立即按仓库ID去重, 只保留ID不保留重复载荷, 并统计关键词×关键词重叠矩阵
+更新时间: 2025-09-16
+"""
+
+import logging
+from typing import Dict, List, Any, Iterable, Tuple
+
+
+class StreamingDeduplicator:
+    """流式去重器"""
+
+    def __init__(self):
+        self.keywords: List[str] = []               # 关键词表 (索引即编号)
+        self.keyword_index: Dict[str, int] = {}
+        self.sources: Dict[int, List[int]] = {}     # repo_id -> 返回过该仓库的关键词编号
+        self.returned: List[int] = []               # 每个关键词返回的结果数 (含重复)
+        self.accepted: List[int] = []               # 每个关键词首次发现的仓库数
+        self.total_seen = 0
+        self.logger = logging.getLogger('ai_collector_v2.stream_dedup')
+
+    def _keyword_id(self, keyword: str) -> int:
+        index = self.keyword_index.get(keyword)
+        if index is None:
+            index = len(self.keywords)
+            self.keywords.append(keyword)
+            self.keyword_index[keyword] = index
+            self.returned.append(0)
+            self.accepted.append(0)
+        return index
+
+    def add(self, repo_id: Any, keyword: str) -> bool:
+        """登记一个搜索结果, 返回是否为首次出现"""
+        if not repo_id:
+            return False
+        kid = self._keyword_id(keyword)
+        self.returned[kid] += 1
+        self.total_seen += 1
+
+        sources = self.sources.get(repo_id)
+        if sources is None:
+            self.sources[repo_id] = [kid]
+            self.accepted[kid] += 1
+            return True
+
+        if kid not in sources:
+            sources.append(kid)
+        return False
+
+    def filter(self, items: Iterable[Dict[str, Any]], keyword: str) -> List[Dict[str, Any]]:
+        """过滤一批搜索结果, 只返回首次出现的仓库 (重复载荷立即丢弃)"""
+        return [item for item in items if self.add(item.get('id'), keyword)]
+
+    def __contains__(self, repo_id: Any) -> bool:
+        return repo_id in self.sources
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    # ------------------------------------------------------------------
+    # 重叠统计
+    # ------------------------------------------------------------------
+
+    def overlap_matrix(self) -> Dict[str, Dict[str, int]]:
+        """关键词×关键词重叠矩阵: 同时被两个关键词返回的仓库数 (对角线为各关键词返回的唯一仓库数)"""
+        size = len(self.keywords)
+        counts = [[0] * size for _ in range(size)]
+        for sources in self.sources.values():
+            for i in sources:
+                counts[i][i] += 1
+            if len(sources) > 1:
+                for a in range(len(sources)):
+                    for b in range(a + 1, len(sources)):
+                        i, j = sources[a], sources[b]
+                        counts[i][j] += 1
+                        counts[j][i] += 1
+
+        return {
+            self.keywords[i]: {self.keywords[j]: counts[i][j] for j in range(size)}
+            for i in range(size)
+        }
+
+    def redundant_pairs(self, min_overlap: float = 0.5) -> List[Tuple[str, str, float]]:
+        """
+        找出高度重叠的关键词对
+        重叠率 = 共同仓库数 / 较小关键词的唯一仓库数, 按重叠率降序返回
+        """
+        matrix = self.overlap_matrix()
+        pairs = []
+        for i, a in enumerate(self.keywords):
+            for b in self.keywords[i + 1:]:
+                shared = matrix[a][b]
+                smaller = min(matrix[a][a], matrix[b][b])
+                if shared and smaller:
+                    ratio = shared / smaller
+                    if ratio >= min_overlap:
+                        pairs.append((a, b, round(ratio, 3)))
+        pairs.sort(key=lambda item: item[2], reverse=True)
+        return pairs
+
+    def get_stats(self) -> Dict[str, Any]:
+        """去重统计"""
+        duplicates = self.total_seen - len(self.sources)
+        return {
+            "total_seen": self.total_seen,
+            "unique": len(self.sources),
+            "duplicates": duplicates,
+            "duplicate_rate": round(duplicates / self.total_seen * 100, 1) if self.total_seen else 0.0,
+            "per_keyword": {
+                keyword: {"returned": self.returned[i], "new": self.accepted[i]}
+                for i, keyword in enumerate(self.keywords)
+            },
+        }
+
+    def log_summary(self, min_overlap: float = 0.5):
+        """输出去重与冗余关键词摘要"""
+        stats = self.get_stats()
+        self.logger.info(
+            f"🧹 流式去重: 结果 {stats['total_seen']} 个, 唯一 {stats['unique']} 个, "
+            f"重复 {stats['duplicates']} 个 ({stats['duplicate_rate']}%)"
+        )
+        for a, b, ratio in self.redundant_pairs(min_overlap)[:10]:
+            self.logger.info(f"🔁 关键词高度重叠: {a} ↔ {b} ({ratio:.0%})")
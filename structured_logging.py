@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+结构化日志 - JSON输出、按阶段采样与队列异步写出
+功能: 热循环中的逐仓库日志改为惰性格式化 + 采样, 格式化与IO在后台线程完成
+更新时间: 2025-09-16
+"""
+
+import sys
+import json
+import atexit
+import logging
+import logging.handlers
+import queue
+from datetime import datetime, timezone
+from typing import Dict, Optional, Any
+
+from config_v2 import Config
+
+# 文本模式沿用原有格式
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecord 自带属性, 其余属性视为 extra 结构化字段
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """解析采样配置 'store=0.05,sync=0.1' → {'store': 0.05, 'sync': 0.1}"""
+    rates = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        stage, rate = item.split("=", 1)
+        try:
+            rates[stage.strip()] = min(1.0, max(0.0, float(rate)))
+        except ValueError:
+            continue
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录输出一行JSON, extra 字段原样并入"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class StageSampler(logging.Filter):
+    """
+    按 stage 字段确定性采样: 速率 r 表示每 round(1/r) 条保留1条
+    WARNING 及以上、无 stage 字段或未配置速率的记录全部保留
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.seen: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        stage = getattr(record, "stage", None)
+        rate = self.rates.get(stage) if stage else None
+        if rate is None or rate >= 1.0 or record.levelno >= logging.WARNING:
+            return True
+        count = self.seen.get(stage, 0)
+        self.seen[stage] = count + 1
+        if rate > 0 and count % max(1, round(1 / rate)) == 0:
+            return True
+        self.dropped[stage] = self.dropped.get(stage, 0) + 1
+        return False
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    入队时不格式化消息 (标准 QueueHandler 会在调用线程中格式化),
+    由 QueueListener 线程完成格式化与写出; 日志参数应为不可变的标量
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class StageLogger(logging.LoggerAdapter):
+    """为每条记录附加 stage 字段, 并与调用时的 extra 合并"""
+
+    def process(self, msg: Any, kwargs: Dict[str, Any]):
+        kwargs["extra"] = dict(self.extra, **(kwargs.get("extra") or {}))
+        return msg, kwargs
+
+
+def get_stage_logger(name: str, stage: str) -> StageLogger:
+    """获取带 stage 字段的日志器 (采样按 stage 生效)"""
+    return StageLogger(logging.getLogger(name), {"stage": stage})
+
+
+def setup_logging(log_format: Optional[str] = None, level: Optional[str] = None,
+                  sampling: Optional[str] = None, log_file: Optional[str] = None) -> logging.handlers.QueueListener:
+    """
+    配置根日志器: 采样过滤 → 队列 → 后台线程格式化并写出到终端/文件
+    参数缺省时读取 Config.LOG_FORMAT / LOG_LEVEL / LOG_SAMPLING; 重复调用返回已有监听器
+    """
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    log_format = (log_format or Config.LOG_FORMAT).lower()
+    formatter = JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT)
+
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.addFilter(StageSampler(parse_sampling(Config.LOG_SAMPLING if sampling is None else sampling)))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    _queue_handler = queue_handler
+    root.setLevel((level or Config.LOG_LEVEL).upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """停止后台线程并写出队列中剩余的日志"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -5,22 +5,31 @@
 """
 
 import os
-import requests
 import json
 import time
 from datetime import datetime, timedelta
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, lazy_import, LazyCloudflareClient
+from config_v2 import APIConfig
+from structured_logging import setup_logging, get_stage_logger
+from profiling import parse_profile_args, run_profiled
 from time_based_dedup_config import (
-    TIME_DEDUP_CONFIG, get_time_dedup_sql, should_reentry_repo,
-    get_time_dedup_stats_sql
+    TIME_DEDUP_CONFIG, get_time_dedup_sql, fetch_existing_records,
+    evaluate_reentry_batch, get_time_dedup_stats_sql
 )
 from github_metrics_config import (
     build_enhanced_search_queries, calculate_comprehensive_score
 )
+from query_planner import AdaptiveQueryPlanner
+from stream_deduplicator import StreamingDeduplicator
+
+# 延迟导入 (首次发起请求时才加载)
+requests = lazy_import("requests")
 
 # 加载环境变量
-load_dotenv()
+load_env()
+
+# 逐仓库处理日志 (按阶段采样)
+sync_logger = get_stage_logger('ai_collector_v2.sync_d1', 'sync')
 
 # === 配置 ===
 GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
@@ -32,7 +41,7 @@ if not all([GITHUB_TOKEN, CLOUDFLARE_API_TOKEN, CLOUDFLARE_ACCOUNT_ID, D1_DATABA
     raise ValueError("环境变量未设置。请确保所有必要的环境变量都已正确配置。")
 
 # 初始化客户端
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
 
 github_headers = {
     "Authorization": f"token {GITHUB_TOKEN}",
@@ -43,40 +52,11 @@ github_headers = {
 # 📅 时间去重核心函数
 # ================================
 
-def check_existing_record(repo_id):
-    """检查30天内是否已存在记录"""
-    
-    sql_queries = get_time_dedup_sql()
-    
-    try:
-        response = cloudflare_client.d1.database.query(
-            database_id=D1_DATABASE_ID,
-            account_id=CLOUDFLARE_ACCOUNT_ID,
-            sql=sql_queries["check_existing"],
-            params=[repo_id]
-        )
-        
-        if response.success and hasattr(response, 'result') and response.result:
-            results = response.result[0].results
-            if results:
-                return results[0]
-        
-        return None
-        
-    except Exception as e:
-        print(f"❌ 检查现有记录失败: {e}")
-        return None
-
-def process_repo_with_time_dedup(repo):
-    """基于时间去重处理单个项目"""
+def process_repo_with_time_dedup(repo, decision):
+    """基于时间去重处理单个项目 (decision 为 evaluate_reentry_batch 给出的处理策略)"""
     
     repo_id = str(repo.get("id"))
-    
-    # 检查30天内是否已存在
-    existing_record = check_existing_record(repo_id)
-    
-    # 判断处理策略
-    should_process, reason, action = should_reentry_repo(existing_record, repo)
+    should_process, reason, action = decision
     
     result = {
         "repo_id": repo_id,
@@ -266,10 +246,22 @@ def execute_time_based_search():
     
     all_repos = []
     search_count = 0
+    deduplicator = StreamingDeduplicator()
+    
+    # 按历史产出为 策略×关键词 组合分配10次搜索配额 (查询构建目前覆盖前2种策略)
+    planner = AdaptiveQueryPlanner()
+    planner.load()
+    strategies = {strategy["name"]: strategy for strategy in search_strategies[:2]}
+    query_plan = planner.plan(
+        {name: [f"{name}|{keyword}" for keyword in ai_keywords] for name in strategies},
+        quota=10
+    )
     
     # 执行搜索
-    for strategy in search_strategies[:2]:  # 使用前2种策略
-        for keyword in ai_keywords[:5]:  # 使用前5个关键词
+    for strategy_name, planned_queries in query_plan.items():
+        strategy = strategies[strategy_name]
+        for planned_query in planned_queries:
+            keyword = planned_query.split("|", 1)[1]
             
             # 构建查询
             if strategy["name"] == "star_projects":
@@ -288,7 +280,7 @@ def execute_time_based_search():
                 }
                 
                 response = requests.get(
-                    "https://api.github.com/search/repositories",
+                    f"{APIConfig.GITHUB_API_BASE}/search/repositories",
                     headers=github_headers,
                     params=params
                 )
@@ -297,8 +289,13 @@ def execute_time_based_search():
                 data = response.json()
                 repos = data.get("items", [])
                 
-                print(f"   📊 找到 {len(repos)} 个项目")
-                all_repos.extend(repos)
+                # 到达即去重, 重复项目不进入后续处理
+                new_repos = deduplicator.filter(repos, planned_query)
+                print(f"   📊 找到 {len(repos)} 个项目, 新项目 {len(new_repos)} 个")
+                all_repos.extend(new_repos)
+                
+                # 记录该查询带来的新项目数
+                planner.record(planned_query, 1, len(new_repos))
                 
                 search_count += 1
                 time.sleep(2)  # API限制
@@ -313,6 +310,14 @@ def execute_time_based_search():
         if len(all_repos) >= 200:
             break
     
+    planner.end_run()
+    planner.save()
+    
+    stats = deduplicator.get_stats()
+    print(f"🧹 重复结果: {stats['duplicates']} 个 ({stats['duplicate_rate']}%)")
+    for a, b, ratio in deduplicator.redundant_pairs()[:5]:
+        print(f"   🔁 查询高度重叠: {a} ↔ {b} ({ratio:.0%})")
+    
     print(f"\n📦 搜索完成，收集到 {len(all_repos)} 个候选项目")
     return all_repos
 
@@ -332,38 +337,48 @@ def process_repos_with_time_dedup(repos):
     
     processed_repos = []
     
-    for i, repo in enumerate(repos):
+    # 基础过滤
+    candidates = [
+        repo for repo in repos
+        if not repo.get("fork", False) and not repo.get("archived", False)
+        and len(repo.get("description") or "") >= 20
+    ]
+    
+    # 30天内已存在的记录整批查询, 规则引擎一次评估全部候选
+    existing_records = fetch_existing_records(
+        cloudflare_client, CLOUDFLARE_ACCOUNT_ID, D1_DATABASE_ID,
+        [repo.get("id") for repo in candidates]
+    )
+    decisions = evaluate_reentry_batch(candidates, existing_records)
+    
+    for repo, decision in zip(candidates, decisions):
         try:
-            # 基础过滤
-            if repo.get("fork", False) or repo.get("archived", False):
-                continue
-                
-            if not repo.get("description") or len(repo.get("description", "")) < 20:
-                continue
-            
             # 时间去重处理
-            result = process_repo_with_time_dedup(repo)
+            result = process_repo_with_time_dedup(repo, decision)
             
             if result["should_process"]:
                 processed_repos.append(result)
                 
                 if result["action"] == "insert":
                     results["inserted"] += 1
-                    print(f"✅ 插入: {result['name']} - {result['reason']}")
+                    sync_logger.info("✅ 插入: %s - %s", result['name'], result['reason'],
+                                     extra={"repo": result['name'], "action": "insert"})
                 elif result["action"] == "update":
                     results["updated"] += 1
-                    print(f"🔄 更新: {result['name']} - {result['reason']}")
+                    sync_logger.info("🔄 更新: %s - %s", result['name'], result['reason'],
+                                     extra={"repo": result['name'], "action": "update"})
                 elif result["action"] == "reinsert":
                     results["reinserted"] += 1
-                    print(f"🔄 重新收录: {result['name']} - {result['reason']}")
+                    sync_logger.info("🔄 重新收录: %s - %s", result['name'], result['reason'],
+                                     extra={"repo": result['name'], "action": "reinsert"})
             else:
                 results["skipped"] += 1
-                if i % 10 == 0:  # 每10个显示一次跳过信息
-                    print(f"⏭️ 跳过: {result['name']} - {result['reason']}")
+                sync_logger.debug("⏭️ 跳过: %s - %s", result['name'], result['reason'],
+                                  extra={"repo": result['name'], "action": "skip"})
                     
         except Exception as e:
             results["errors"] += 1
-            print(f"❌ 处理出错: {e}")
+            sync_logger.error("❌ 处理出错: %s", e)
             continue
     
     return results, processed_repos
@@ -417,12 +432,11 @@ def main_time_based_collection():
         print("❌ 没有找到候选项目")
         return
     
-    # 去重处理
-    unique_repos = {str(repo.get("id")): repo for repo in all_repos}.values()
-    print(f"🔄 去重后候选项目: {len(list(unique_repos))} 个")
+    # 搜索结果已流式去重
+    print(f"🔄 去重后候选项目: {len(all_repos)} 个")
     
     # 时间去重处理
-    results, processed_repos = process_repos_with_time_dedup(list(unique_repos))
+    results, processed_repos = process_repos_with_time_dedup(all_repos)
     
     # 结果统计
     end_time = datetime.now()
@@ -452,4 +466,6 @@ def main_time_based_collection():
     show_time_dedup_stats()
 
 if __name__ == "__main__":
-    main_time_based_collection()
+    setup_logging()
+    args = parse_profile_args()
+    run_profiled(main_time_based_collection, args.profile, "sync_d1", args.profile_output)
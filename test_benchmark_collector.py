@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+采集流水线基准测试脚本
+验证语料回放不读写工作目录中的生产状态文件
+"""
+
+import os
+import asyncio
+import tempfile
+
+from benchmark_collector import BENCHMARK_STATE_FILES, generate_corpus, save_corpus, run_scale
+
+def test_run_scale_leaves_working_directory_untouched():
+    """测试回放运行的全部状态文件写入临时目录, 工作目录不变"""
+    print("🔍 测试基准运行状态隔离")
+
+    workdir, state_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    fixture = os.path.join(tempfile.mkdtemp(), "corpus.json.gz")
+    save_corpus(generate_corpus(40), fixture)
+
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        result = asyncio.run(run_scale(fixture, state_dir=state_dir))
+    finally:
+        os.chdir(cwd)
+
+    assert result["repos_found"] > 0
+    assert os.listdir(workdir) == []
+    written = os.listdir(state_dir)
+    # SQLite 的 -wal/-shm 附属文件与索引文件同名前缀
+    assert written and all(name.startswith(tuple(BENCHMARK_STATE_FILES.values())) for name in written)
+
+    print("✅ 基准运行状态隔离正确")
+
+if __name__ == "__main__":
+    test_run_scale_leaves_working_directory_untouched()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+仓库ID布隆过滤器测试脚本
+验证误判率、持久化往返, 以及扫描失败时旧过滤器不作为"肯定是新项目"的依据
+"""
+
+import os
+import asyncio
+import tempfile
+from types import SimpleNamespace
+from unittest import mock
+
+from bloom_filter import BloomFilter
+from config_v2 import Config, DatabaseConfig
+from deduplication_manager import DeduplicationManager
+from high_frequency_collector import RepositoryData
+from local_d1_server import LocalD1Client
+
+def test_false_positive_rate():
+    """测试已加入元素必定命中, 未加入元素误判率接近目标"""
+    print("🔍 测试布隆过滤器误判率")
+
+    bloom = BloomFilter(10000, 0.01)
+    bloom.update(range(10000))
+    assert len(bloom) == 10000
+    assert all(i in bloom for i in range(10000))
+
+    false_positives = sum(1 for i in range(10000, 60000) if i in bloom)
+    assert false_positives / 50000 < 0.02
+    assert 0.005 < bloom.estimated_error_rate() < 0.02
+
+    print("✅ 布隆过滤器误判率正确")
+
+def test_save_load_round_trip():
+    """测试保存后加载得到相同的位数组与参数, 损坏文件返回None"""
+    print("🔍 测试布隆过滤器持久化")
+
+    bloom = BloomFilter(5000, 0.001)
+    bloom.update(range(0, 20000, 7))
+    path = os.path.join(tempfile.mkdtemp(), "repo_ids.bloom")
+    assert bloom.save(path) and not os.path.exists(path + ".tmp")
+
+    loaded = BloomFilter.load(path)
+    assert (loaded.num_bits, loaded.num_hashes, loaded.count) == (bloom.num_bits, bloom.num_hashes, bloom.count)
+    assert loaded.bits == bloom.bits
+    assert all(i in loaded for i in range(0, 20000, 7))
+
+    with open(path, "r+b") as f:
+        f.write(b"XXXX")
+    assert BloomFilter.load(path) is None
+    assert BloomFilter.load(path + ".missing") is None
+
+    print("✅ 布隆过滤器持久化正确")
+
+def test_stale_filter_does_not_skip_lookups():
+    """测试ID扫描失败时载入的持久化过滤器不跳过查询, 之后入库的ID仍被识别为已存在"""
+    print("🔍 测试过期过滤器回退")
+
+    path = os.path.join(tempfile.mkdtemp(), "repo_ids.bloom")
+    stale = BloomFilter(1000, 0.01)
+    stale.add(1)
+    assert stale.save(path)
+
+    client = LocalD1Client()
+    client.seed([{"id": 1, "full_name": "org/a", "name": "a", "forks_count": 1},
+                 {"id": 2, "full_name": "org/b", "name": "b", "forks_count": 2}])
+    query = client.query
+
+    def fail_id_scan(sql="", **kwargs):
+        if sql == DatabaseConfig.SELECT_IDS_PAGE_SQL:
+            return SimpleNamespace(success=False, errors=["timeout"], result=[])
+        return query(sql=sql, **kwargs)
+
+    client.query = fail_id_scan
+    repos = [RepositoryData(id=i, full_name=f"org/{i}", name=str(i), owner="org") for i in (1, 2, 3)]
+    with mock.patch.object(Config, "BLOOM_FILTER_FILE", path):
+        manager = DeduplicationManager(client, Config())
+        assert asyncio.run(manager.load_id_filter()) is False
+        assert manager.id_filter is not None and not manager.id_filter_fresh
+
+        # 仓库2在过滤器保存后由其他写入方入库: 必须查询到, 不能被当作新项目
+        existing = asyncio.run(manager._lookup_existing(repos))
+        assert sorted(existing) == [1, 2]
+        assert manager.filter_stats["skipped_lookups"] == 0
+
+        client.query = query
+        assert asyncio.run(manager.load_id_filter()) is True and manager.id_filter_fresh
+        existing = asyncio.run(manager._lookup_existing(repos))
+        assert sorted(existing) == [1, 2] and manager.filter_stats["skipped_lookups"] == 1
+
+    print("✅ 过期过滤器回退正确")
+
+if __name__ == "__main__":
+    test_false_positive_rate()
+    test_save_load_round_trip()
+    test_stale_filter_does_not_skip_lookups()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+内容指纹测试脚本
+验证同一行指纹稳定、任一持久化列变化都会改变指纹, 以及指纹一致时跳过写入
+"""
+
+import asyncio
+import dataclasses
+
+from config_v2 import Config
+from deduplication_manager import DeduplicationManager
+from high_frequency_collector import RepositoryData
+from local_d1_server import LocalD1Client
+
+# 不参与指纹的采集元数据字段
+NON_PERSISTED = {"collection_round", "collection_hash"}
+
+def _repo(**overrides) -> RepositoryData:
+    fields = dict(id=42, full_name="org/llm-agent", name="llm-agent", owner="org",
+                  description="LLM agent", url="https://github.com/org/llm-agent",
+                  stargazers_count=150, forks_count=12, watchers_count=7,
+                  created_at="2025-01-01T00:00:00Z", updated_at="2025-09-01T00:00:00Z",
+                  pushed_at="2025-09-01T00:00:00Z", language="Python", topics=["llm", "agent"],
+                  ai_category="AI智能体", ai_tags=["agent"], quality_score=61.2, trending_score=8.4,
+                  score_model_version="quality@1", collection_round=1, last_fork_count=10,
+                  fork_growth=2, collection_hash="")
+    fields.update(overrides)
+    return RepositoryData(**fields)
+
+def _changed(value):
+    if isinstance(value, list):
+        return value + ["extra"]
+    if isinstance(value, (int, float)):
+        return value + 5
+    return f"{value}-changed"
+
+def test_fingerprint_is_stable():
+    """测试同一行的指纹在不同实例间一致, 采集元数据与评分微小波动不影响指纹"""
+    print("🔍 测试指纹稳定性")
+
+    fingerprint = _repo().calculate_fingerprint()
+    assert len(fingerprint) == 32
+    assert _repo().calculate_fingerprint() == fingerprint
+    assert _repo(topics=list(["llm", "agent"])).calculate_fingerprint() == fingerprint
+    assert _repo(collection_round=9, collection_hash="old").calculate_fingerprint() == fingerprint
+    assert _repo(quality_score=61.4, trending_score=8.1).calculate_fingerprint() == fingerprint
+    # 空值与缺省值等价
+    assert _repo(description=None).calculate_fingerprint() == _repo(description="").calculate_fingerprint()
+
+    print("✅ 指纹稳定")
+
+def test_every_persisted_column_changes_fingerprint():
+    """测试任一持久化列变化 (含 score_model_version) 都会改变指纹"""
+    print("🔍 测试持久化列覆盖")
+
+    base = _repo()
+    fingerprint = base.calculate_fingerprint()
+    persisted = [f.name for f in dataclasses.fields(RepositoryData) if f.name not in NON_PERSISTED]
+    assert "score_model_version" in persisted
+    for name in persisted:
+        changed = dataclasses.replace(base, **{name: _changed(getattr(base, name))})
+        assert changed.calculate_fingerprint() != fingerprint, f"{name} 变化未改变指纹"
+
+    assert _repo(score_model_version="quality@2").calculate_fingerprint() != fingerprint
+
+    print("✅ 持久化列全部覆盖")
+
+def test_unchanged_row_is_skipped():
+    """测试已存储哈希与指纹一致时决策为跳过, 模型版本升级后重新写入"""
+    print("🔍 测试指纹一致跳过写入")
+
+    client = LocalD1Client()
+    stored = _repo()
+    client.seed([dict(stored.to_dict(), collection_hash=stored.calculate_fingerprint(),
+                      collection_time="2025-09-16 10:00:00")])
+    manager = DeduplicationManager(client, Config())
+
+    decision = asyncio.run(manager.decide_batch([_repo()]))[0]
+    assert decision.rule == "content_unchanged" and not decision.should_store
+    assert manager.write_stats["unchanged_skipped"] == 1
+
+    decision = asyncio.run(manager.decide_batch([_repo(score_model_version="quality@2")]))[0]
+    assert decision.rule != "content_unchanged"
+
+    print("✅ 指纹一致跳过写入正确")
+
+if __name__ == "__main__":
+    test_fingerprint_is_stable()
+    test_every_persisted_column_changes_fingerprint()
+    test_unchanged_row_is_skipped()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+去重规则引擎测试脚本
+验证声明式规则的决策、与原时间去重逻辑的一致性和批量评估性能
+"""
+
+import os
+import time
+from datetime import datetime, timezone, timedelta
+from unittest import mock
+
+from dedup_rule_engine import DedupRuleEngine
+from dedup_rules_config import DEDUP_RULE_SETS, TIME_DEDUP_CONFIG, build_time_based_rules
+from config_v2 import Config
+from local_d1_server import LocalD1Client, LocalD1Database, LOCAL_D1_CONFIG
+from time_based_dedup_config import should_reentry_repo, fetch_existing_records, evaluate_reentry_batch
+
+NOW = datetime(2025, 9, 16, 12, 0, 0, tzinfo=timezone.utc)
+
+def beijing(days_ago):
+    """返回N天前的北京时间字符串 (collection_time格式)"""
+    return (NOW - timedelta(days=days_ago) + timedelta(hours=8)).strftime('%Y-%m-%d %H:%M:%S')
+
+def test_collector_rules():
+    """测试采集器规则集的决策与原因"""
+    print("🔍 测试采集器去重规则")
+
+    engine = DedupRuleEngine("collector")
+    candidate = {"id": 1, "stargazers_count": 120, "forks_count": 10,
+                 "description": "LLM toolkit", "collection_hash": "new"}
+    existing = {"id": 1, "stargazers_count": 114, "forks_count": 10, "description": "LLM toolkit",
+                "collection_time": beijing(2), "collection_hash": "old"}
+
+    decisions = engine.evaluate([
+        (candidate, None),
+        (candidate, dict(existing, collection_hash="new")),
+        (candidate, existing),
+        (dict(candidate, stargazers_count=50), dict(existing, stargazers_count=48)),
+    ], now=NOW)
+
+    assert [d.action for d in decisions] == ["insert", "skip", "update", "skip"]
+    assert [d.rule for d in decisions] == ["new_repo", "content_unchanged", "popular_star_growth", "default"]
+    assert decisions[2].reason == "仓库有重要更新: 星标 +6"
+    assert decisions[0].should_store and not decisions[1].should_store
+
+    stats = engine.get_stats()
+    assert stats["evaluated"] == 4 and stats["actions"]["skip"] == 2
+
+    print("✅ 采集器去重规则正确")
+
+def test_time_based_rules():
+    """测试30天窗口内只在星标显著增长时更新, 窗口外按新活动重新收录"""
+    print("🔍 测试30天窗口规则")
+
+    now_text = datetime.now().isoformat()
+    old_text = (datetime.now() - timedelta(days=45)).isoformat()
+    cases = [
+        ({"stargazers_count": 180, "pushed_at": "2025-09-10"}, {"sync_time": now_text, "stars": 100},
+         (True, "星标显著增长", "update")),
+        ({"stargazers_count": 120, "pushed_at": "2025-09-10"}, {"sync_time": now_text, "stars": 100},
+         (False, "30天内无显著变化", "skip")),
+        ({"stargazers_count": 130, "pushed_at": "2025-09-10"}, {"sync_time": old_text, "stars": 100, "updated_at": "2025-08-01"},
+         (True, "重新收录: 项目有新活动, 星标增长30个", "reinsert")),
+        ({"stargazers_count": 101, "pushed_at": "2025-09-10"}, {"sync_time": old_text, "stars": 100, "updated_at": "2025-08-01"},
+         (True, "重新收录: 项目有新活动", "reinsert")),
+        ({"stargazers_count": 500, "pushed_at": "2025-07-01"}, {"sync_time": old_text, "stars": 100, "updated_at": "2025-08-01"},
+         (False, "项目无新活动", "skip")),
+        # 已存储 pushed_at 时优先与其比较 (updated_at 会随星标变化刷新)
+        ({"stargazers_count": 101, "pushed_at": "2025-09-10"},
+         {"sync_time": old_text, "stars": 100, "pushed_at": "2025-09-10", "updated_at": "2025-08-01"},
+         (False, "项目无新活动", "skip")),
+    ]
+
+    for repo, existing, expected in cases:
+        assert should_reentry_repo(existing, dict(repo, id=1)) == expected, (repo, existing, expected)
+
+    assert should_reentry_repo(None, {"id": 1}) == (True, "新项目", "insert")
+
+    print("✅ 30天窗口规则正确")
+
+def test_time_based_batch_lookup():
+    """测试30天窗口内的记录按批 IN 查询, 批量决策与逐个判断一致"""
+    print("🔍 测试时间去重批量查询")
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    client = LocalD1Client(database=LocalD1Database(
+        schema_files=[os.path.join(root, name) for name in LOCAL_D1_CONFIG["schema_files"]]))
+    utc_now = datetime.now(timezone.utc)
+    synced = lambda days: (utc_now - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+    client.seed([{"id": str(repo_id), "name": f"repo-{repo_id}", "owner": "org", "url": f"https://github.com/org/repo-{repo_id}",
+                  "stars": 100, "sync_time": synced(days)} for repo_id, days in ((1, 2), (2, 40), (3, 10))],
+                table="repos")
+
+    repos = [{"id": repo_id, "stargazers_count": stars, "pushed_at": synced(0)}
+             for repo_id, stars in ((1, 105), (2, 500), (3, 400), (4, 50))]
+    query = client.query
+    calls = []
+
+    def counting_query(**kwargs):
+        calls.append(kwargs["params"])
+        return query(**kwargs)
+
+    client.query = counting_query
+    with mock.patch.object(Config, "DEDUP_LOOKUP_BATCH_SIZE", 3):
+        existing = fetch_existing_records(client, "account", "db", [repo["id"] for repo in repos] + [1])
+    assert calls == [["1", "2", "3"], ["4"]]
+    assert sorted(existing) == ["1", "3"]
+
+    decisions = evaluate_reentry_batch(repos, existing)
+    assert decisions == [should_reentry_repo(existing.get(str(repo["id"])), repo) for repo in repos]
+    assert [action for _, _, action in decisions][1:] == ["insert", "update", "insert"]
+
+    print("✅ 时间去重批量查询正确")
+
+def test_time_based_rules_follow_config():
+    """测试时间去重规则的窗口与阈值由 TIME_DEDUP_CONFIG 派生"""
+    print("🔍 测试时间去重配置派生")
+
+    assert DEDUP_RULE_SETS["time_based"] == build_time_based_rules(TIME_DEDUP_CONFIG)
+
+    config = dict(TIME_DEDUP_CONFIG, dedup_window_days=7, recent_update_star_growth=20,
+                  reentry_conditions=dict(TIME_DEDUP_CONFIG["reentry_conditions"],
+                                          activity_required=False, star_growth_threshold=5))
+    DEDUP_RULE_SETS["custom_time_based"] = build_time_based_rules(config)
+    try:
+        engine = DedupRuleEngine("custom_time_based")
+        existing = {"stars": 100, "pushed_at": "2025-09-10"}
+        decisions = engine.evaluate([
+            ({"id": 1, "stargazers_count": 125}, dict(existing, sync_time=(NOW - timedelta(days=3)).isoformat())),
+            ({"id": 1, "stargazers_count": 110}, dict(existing, sync_time=(NOW - timedelta(days=3)).isoformat())),
+            ({"id": 1, "stargazers_count": 106, "pushed_at": "2025-09-01"},
+             dict(existing, sync_time=(NOW - timedelta(days=10)).isoformat())),
+            ({"id": 1, "stargazers_count": 102, "pushed_at": "2025-09-20"},
+             dict(existing, sync_time=(NOW - timedelta(days=10)).isoformat())),
+        ], now=NOW)
+        assert [d.action for d in decisions] == ["update", "skip", "reinsert", "skip"]
+        assert decisions[1].reason == "7天内无显著变化"
+        assert decisions[3].reason == "不满足重新收录条件"
+    finally:
+        del DEDUP_RULE_SETS["custom_time_based"]
+
+    print("✅ 时间去重配置派生正确")
+
+def test_bulk_performance():
+    """测试一万个候选的批量评估耗时"""
+    print("🔍 测试批量评估性能")
+
+    engine = DedupRuleEngine("collector")
+    pairs = []
+    for i in range(1, 10_001):
+        candidate = {"id": i, "stargazers_count": 100 + i % 50, "forks_count": i % 20,
+                     "description": "repo", "collection_hash": f"h{i % 3}"}
+        existing = None if i % 4 == 0 else {
+            "id": i, "stargazers_count": 100, "forks_count": 0, "description": "repo",
+            "collection_time": beijing(i % 30), "collection_hash": "h0"
+        }
+        pairs.append((candidate, existing))
+
+    start = time.perf_counter()
+    decisions = engine.evaluate(pairs, now=NOW)
+    elapsed = time.perf_counter() - start
+
+    print(f"   ⏱️ 10,000个候选评估耗时: {elapsed * 1000:.1f}ms")
+    assert len(decisions) == 10_000
+    assert elapsed < 1
+
+    print("✅ 批量评估性能达标")
+
+if __name__ == "__main__":
+    test_collector_rules()
+    test_time_based_rules()
+    test_time_based_batch_lookup()
+    test_time_based_rules_follow_config()
+    test_bulk_performance()
@@ -5,19 +5,20 @@
 """
 
 import os
-import requests
 from datetime import datetime
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, lazy_import, LazyCloudflareClient
 
-load_dotenv()
+# 延迟导入 (首次发起请求时才加载)
+requests = lazy_import("requests")
+
+load_env()
 
 # 配置
 CLOUDFLARE_API_TOKEN = os.environ.get("CLOUDFLARE_API_TOKEN")
 CLOUDFLARE_ACCOUNT_ID = os.environ.get("CLOUDFLARE_ACCOUNT_ID")
 D1_DATABASE_ID = os.environ.get("D1_DATABASE_ID")
 
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
 
 def test_duplicate_handling():
     """测试重复数据处理机制"""
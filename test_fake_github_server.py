@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+模拟 GitHub API 服务测试脚本
+验证大小写不敏感的搜索匹配、404 响应与 X-RateLimit-* 限频响应头
+"""
+
+import asyncio
+
+import aiohttp
+
+from fake_github_server import start_fake_github_server
+
+def _repo(repo_id, name, description, topics):
+    return {"id": repo_id, "name": name, "full_name": f"org/{name}", "owner": {"login": "org"},
+            "description": description, "topics": topics, "stargazers_count": repo_id * 10}
+
+CORPUS = {
+    "search": {"LLM agent": [_repo(1, "recorded-only", "no matching words", [])]},
+    "repos": {
+        "org/agent-kit": _repo(2, "agent-kit", "Autonomous LLM Agent toolkit", ["llm"]),
+        "org/vision": _repo(3, "vision", "Image models", ["Computer-Vision"]),
+        "org/rag": _repo(4, "rag", "Retrieval pipeline", ["LLM", "agents"]),
+    },
+}
+
+async def _run(check, **options):
+    options = dict(search_latency="none", core_latency="none", **options)
+    runner, server, base_url = await start_fake_github_server(CORPUS, **options)
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await check(session, base_url, server)
+    finally:
+        await runner.cleanup()
+
+async def _search(session, base_url, query, **params):
+    async with session.get(f"{base_url}/search/repositories", params=dict(params, q=query)) as response:
+        return response.status, await response.json(), response.headers
+
+def test_search_matches_case_insensitively():
+    """测试搜索对名称/描述/topics 大小写不敏感匹配, 录制结果排在前面"""
+    print("🔍 测试模拟搜索匹配")
+
+    async def check(session, base_url, server):
+        status, body, _ = await _search(session, base_url, "llm AGENT stars:>=10")
+        assert status == 200
+        assert [item["id"] for item in body["items"]] == [1, 2, 4] and body["total_count"] == 3
+
+        _, body, _ = await _search(session, base_url, "computer-vision", sort="stars", order="asc")
+        assert [item["id"] for item in body["items"]] == [3]
+
+        _, body, _ = await _search(session, base_url, "llm", sort="stars", order="desc", per_page=1)
+        assert [item["id"] for item in body["items"]] == [4] and body["total_count"] == 2
+
+        status, _, _ = await _search(session, base_url, "")
+        assert status == 422
+
+    asyncio.run(_run(check))
+
+    print("✅ 模拟搜索匹配正确")
+
+def test_not_found_and_rate_limit_headers():
+    """测试未知仓库/子资源返回404, 限频响应头随请求递减并在耗尽后返回403"""
+    print("🔍 测试404与限频响应头")
+
+    async def check(session, base_url, server):
+        async with session.get(f"{base_url}/repos/org/missing") as response:
+            assert response.status == 404 and (await response.json())["message"] == "Not Found"
+        async with session.get(f"{base_url}/repos/org/rag/unknown") as response:
+            assert response.status == 404
+        async with session.get(f"{base_url}/repos/org/rag") as response:
+            assert response.status == 200 and response.headers["X-RateLimit-Resource"] == "core"
+            assert response.headers["X-RateLimit-Remaining"] == "2"
+
+        statuses = []
+        for _ in range(3):
+            status, _, headers = await _search(session, base_url, "llm")
+            statuses.append((status, headers["X-RateLimit-Remaining"], headers["X-RateLimit-Resource"]))
+        assert statuses == [(200, "1", "search"), (200, "0", "search"), (403, "0", "search")]
+        assert int(headers["X-RateLimit-Reset"]) > 0 and headers["X-RateLimit-Limit"] == "2"
+
+    asyncio.run(_run(check, core_limit=5, search_limit=2))
+
+    print("✅ 404与限频响应头正确")
+
+if __name__ == "__main__":
+    test_search_matches_case_insensitively()
+    test_not_found_and_rate_limit_headers()
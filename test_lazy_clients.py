@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+延迟初始化测试脚本
+验证客户端代理首次使用时才初始化, 入口脚本导入时不加载重量级依赖
+"""
+
+import sys
+
+from lazy_clients import LazyCloudflareClient, lazy_import
+from benchmark_imports import measure_module
+
+def test_lazy_client_and_import():
+    """测试代理在访问属性前不构建客户端, lazy_import 返回可用模块"""
+    print("🔍 测试延迟客户端")
+
+    client = LazyCloudflareClient("token")
+    assert client._client is None and "未初始化" in repr(client)
+
+    json_module = lazy_import("json")
+    assert json_module is sys.modules["json"]
+    assert json_module.dumps({"a": 1}) == '{"a": 1}'
+
+    print("✅ 延迟客户端正确")
+
+def test_entry_imports_skip_heavy_modules():
+    """测试入口脚本导入时未加载 Cloudflare SDK / requests / aiohttp"""
+    print("🔍 测试入口脚本导入")
+
+    for module in ("sync_d1", "metrics_dashboard", "optimized_fast_collector"):
+        result = measure_module(module, 1)
+        assert "error" not in result, result
+        assert result["heavy_loaded"] == [], result
+
+    # 采集器的数据处理器/进度条/指标导出/邮件模块在首次使用时才加载
+    deferred = ["enhanced_data_processor_v2", "data_processor", "tqdm", "metrics_exporter", "email_notifier"]
+    result = measure_module("optimized_fast_collector", 1, heavy=deferred)
+    assert result["heavy_loaded"] == [], result
+
+    print("✅ 入口脚本导入未加载重量级依赖")
+
+if __name__ == "__main__":
+    test_lazy_client_and_import()
+    test_entry_imports_skip_heavy_modules()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+排行榜索引测试脚本
+验证有界Top-K的替换/淘汰、多榜单增量维护与快照持久化
+"""
+
+import os
+import random
+import tempfile
+
+from leaderboards import TopK, LeaderboardTracker, load_latest_snapshot
+from trending_engine import TrendingEngine
+from email_notifier import EmailNotifier
+
+def test_topk_matches_full_sort():
+    """测试有界堆结果与全量排序一致, 重复提交替换旧分数"""
+    print("🔍 测试有界Top-K")
+
+    rng = random.Random(7)
+    topk = TopK(10)
+    latest = {}
+    for _ in range(2000):
+        key, score = rng.randrange(300), rng.random()
+        # 同一运行中仓库分数只会上调时, 有界堆结果与全量排序完全一致
+        score = max(score, latest.get(key, 0.0))
+        latest[key] = score
+        topk.push(key, score, {"id": key})
+
+    expected = sorted(latest.items(), key=lambda item: -item[1])[:10]
+    assert [(key, score) for key, score, _ in topk.items()] == expected
+    assert len(topk) == 10 and topk.threshold() == expected[-1][1]
+
+    print("✅ 有界Top-K正确")
+
+def test_tracker_boards_and_snapshot():
+    """测试质量/趋势/星标速度/分类榜单与快照、邮件摘要"""
+    print("🔍 测试排行榜跟踪器")
+
+    engine = TrendingEngine(state_file="")
+    t0 = 1_700_000_000
+    repos = [{"id": i, "full_name": f"org/repo{i}", "stargazers_count": 100, "forks_count": 0,
+              "quality_score": i, "ai_category": "llm" if i % 2 else "cv"} for i in range(1, 21)]
+    engine.update_batch(repos, observed_at=t0)
+    for repo in repos:
+        repo["stargazers_count"] += repo["id"] * 10
+        repo["trending_score"] = 100 - repo["id"]
+    engine.update_batch(repos, observed_at=t0 + 86400)
+
+    directory = tempfile.mkdtemp()
+    tracker = LeaderboardTracker(size=5, directory=directory)
+    assert tracker.update_batch(repos, engine) == 20
+
+    assert [e["id"] for e in tracker.top("quality")] == [20, 19, 18, 17, 16]
+    assert [e["id"] for e in tracker.top("trending", 2)] == [1, 2]
+    assert [e["id"] for e in tracker.top("stars_velocity", 1)] == [20]
+    assert tracker.categories() == ["cv", "llm"]
+    assert tracker.digest()["categories"]["llm"]["id"] == 19
+
+    path = tracker.save()
+    assert os.path.exists(path)
+    snapshot = load_latest_snapshot(directory)
+    assert snapshot["run_id"] == tracker.run_id and snapshot["boards"]["category:cv"][0]["id"] == 20
+
+    html = EmailNotifier()._format_leaderboards(tracker.digest(3))
+    assert "org/repo20" in html and "分类榜首" in html
+
+    print("✅ 排行榜跟踪器正确")
+
+if __name__ == "__main__":
+    test_topk_matches_full_sort()
+    test_tracker_boards_and_snapshot()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+本地D1替身测试脚本
+验证 D1 响应结构、多语句/批量执行和失败回滚
+"""
+
+from config_v2 import DatabaseConfig
+from local_d1_server import LocalD1Database, LocalD1Client, D1Error, split_statements
+
+def test_query_response_shape():
+    """测试 client.d1.database.query 返回 result[0].results"""
+    print("🔍 测试D1响应结构")
+
+    client = LocalD1Client()
+    params = [1, "org/repo", "repo", "org", "desc", "https://github.com/org/repo", 120, 10, 5,
+              "", "", "", "Python", "", "LLM", "", 60, 10, 1, 0, 0, "hash", "2025-09-16 10:00:00",
+              "quality@1"]
+    response = client.d1.database.query(database_id="db", account_id="acc",
+                                        sql=DatabaseConfig.UPSERT_SQL, params=params)
+    assert response.success and response.result[0].meta["changes"] == 1
+
+    response = client.d1.database.query(sql=DatabaseConfig.SELECT_EXISTING_SQL, params=[1])
+    assert response.result[0].results == [
+        {"id": 1, "forks_count": 10, "collection_time": "2025-09-16 10:00:00", "collection_hash": "hash"}
+    ]
+
+    response = client.d1.database.query(sql="SELECT missing_column FROM github_ai_post_attr")
+    assert not response.success and response.errors[0]["code"] == 7500
+
+    print("✅ D1响应结构正确")
+
+def test_statements_and_batch():
+    """测试多语句拆分、批量执行与失败回滚"""
+    print("🔍 测试多语句与批量执行")
+
+    assert split_statements("SELECT 1; SELECT ';' AS s;\n-- 注释\n") == ["SELECT 1", "SELECT ';' AS s"]
+
+    db = LocalD1Database()
+    results = db.execute("SELECT 1 AS a; SELECT 2 AS b")
+    assert [r["results"] for r in results] == [[{"a": 1}], [{"b": 2}]]
+
+    insert = f"INSERT INTO {DatabaseConfig.TABLE_NAME} (id) VALUES (?)"
+    db.execute_batch([{"sql": insert, "params": [1]}, {"sql": insert, "params": [2]}])
+    try:
+        db.execute_batch([{"sql": insert, "params": [3]}, {"sql": "SELECT broken"}])
+        assert False, "批量语句失败时应抛出D1Error"
+    except D1Error:
+        pass
+
+    ids = [row["id"] for row in db.execute(f"SELECT id FROM {DatabaseConfig.TABLE_NAME} ORDER BY id")[0]["results"]]
+    assert ids == [1, 2]
+
+    print("✅ 多语句与批量执行正确")
+
+if __name__ == "__main__":
+    test_query_response_shape()
+    test_statements_and_batch()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+物化聚合表测试脚本
+验证 upsert / REPLACE / UPDATE / DELETE 后汇总表与全表扫描结果一致
+"""
+
+import random
+
+from local_d1_server import LocalD1Client, LocalD1Database, LOCAL_D1_CONFIG
+from materialized_aggregates import MaterializedAggregates, STATS_TABLE, BOARDS_TABLE
+
+LEVELS = ["production", "mature", "developing", None]
+LANGUAGES = ["Python", "Rust", "Unknown", None]
+
+def _repo(rng, i):
+    return {
+        "id": str(i), "name": f"repo{i}", "owner": "org", "url": f"https://github.com/org/repo{i}",
+        "stars": rng.randint(0, 5000), "forks": rng.randint(0, 500),
+        "enhanced_score": rng.randint(0, 100), "cutting_edge_score": rng.randint(0, 30),
+        "ai_maturity_level": rng.choice(LEVELS), "primary_language": rng.choice(LANGUAGES),
+        "contributors_count": rng.choice([rng.randint(0, 50), None]),
+    }
+
+def _upsert(client, repo):
+    columns = ", ".join(repo)
+    updates = ", ".join(f"{c}=excluded.{c}" for c in repo if c != "id")
+    client.query(sql=f"INSERT INTO repos ({columns}) VALUES ({', '.join('?' * len(repo))}) "
+                     f"ON CONFLICT(id) DO UPDATE SET {updates}", params=list(repo.values()))
+
+def test_aggregates_follow_writes():
+    """测试各种写入方式后汇总表/榜单与全表扫描一致"""
+    print("🔍 测试物化聚合表增量维护")
+
+    rng = random.Random(7)
+    client = LocalD1Client(database=LocalD1Database(":memory:", LOCAL_D1_CONFIG["schema_files"]))
+    client.seed([_repo(rng, i) for i in range(40)], table="repos")
+
+    aggregates = MaterializedAggregates(client, "acc", "db")
+    assert not aggregates.is_ready()
+    assert aggregates.install() == 40
+    assert aggregates.is_ready() and aggregates.check() == []
+
+    for i in range(30, 70):
+        _upsert(client, _repo(rng, i))                    # 新增 + ON CONFLICT 更新
+    client.seed([_repo(rng, i) for i in range(0, 10)], table="repos")  # INSERT OR REPLACE
+    client.query(sql="UPDATE repos SET enhanced_score = 100, cutting_edge_score = 29 WHERE id = '12'")
+    client.query(sql="UPDATE repos SET description = 'x'")  # 不影响汇总的列
+    client.query(sql="DELETE FROM repos WHERE CAST(id AS INTEGER) % 7 = 0")
+
+    assert aggregates.check() == []
+    total = client.query(sql=f"SELECT repo_count FROM {STATS_TABLE} WHERE dimension = '_all'").result[0].results
+    assert total[0]["repo_count"] == client.query(sql="SELECT COUNT(*) AS n FROM repos").result[0].results[0]["n"]
+    board = client.query(sql=f"SELECT id FROM {BOARDS_TABLE} WHERE board = 'top_projects'").result[0].results
+    assert len(board) == 20 and {"id": "12"} in board
+
+    print("✅ 物化聚合表与全表扫描一致")
+
+if __name__ == "__main__":
+    test_aggregates_follow_writes()
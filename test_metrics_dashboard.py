@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+仪表板增量生成测试脚本
+验证水位线缓存命中、按区块增量渲染与原子写出
+"""
+
+import os
+import tempfile
+from types import SimpleNamespace
+
+import metrics_dashboard
+from local_d1_server import LocalD1Client, LocalD1Database, LOCAL_D1_CONFIG
+
+def _repo(i, sync_time, stars=100):
+    return {
+        "id": i, "name": f"repo{i}", "owner": "org", "url": f"https://github.com/org/repo{i}",
+        "stars": stars, "forks": 10, "enhanced_score": 50 + i, "cutting_edge_score": 20 + i,
+        "ai_maturity_level": "mature", "innovation_level": "high", "sync_time": sync_time,
+    }
+
+def test_dashboard_cache_and_incremental_render():
+    """测试水位线未变化时只执行一次查询, 变化时只重绘受影响区块"""
+    print("🔍 测试仪表板增量生成")
+
+    stats = SimpleNamespace(requests=0, bytes_in=0, bytes_out=0)
+    client = LocalD1Client(stats=stats, database=LocalD1Database(":memory:", LOCAL_D1_CONFIG["schema_files"]))
+    client.seed([_repo(i, "2025-09-16 00:00:00") for i in range(5)], table="repos")
+    original_client = metrics_dashboard.cloudflare_client
+    metrics_dashboard.cloudflare_client = client
+
+    workdir = tempfile.mkdtemp()
+    output = os.path.join(workdir, "dashboard.html")
+    cache = os.path.join(workdir, "cache.json")
+    try:
+        first = metrics_dashboard.main_generate_dashboard(output_file=output, cache_file=cache)
+        assert len(first) == len(metrics_dashboard.SECTIONS)
+        assert stats.requests == 2 + len(metrics_dashboard.DASHBOARD_QUERIES)  # 水位线 + 物化表就绪检查
+        with open(output, encoding="utf-8") as f:
+            html = f.read()
+        assert "org/repo4" in html and "maturityChart" in html and html.rstrip().endswith("</html>")
+        # 样式在拼接时读取内联
+        assert "{css}" in metrics_dashboard.HTML_HEAD and "{css}" not in html
+        assert metrics_dashboard.read_static_asset("dashboard.css") in html
+
+        stats.requests = 0
+        assert metrics_dashboard.main_generate_dashboard(output_file=output, cache_file=cache) == []
+        assert stats.requests == 1
+        assert not os.path.exists(output + ".tmp")
+
+        # 只有星标变化: 图表区块不重绘
+        client.seed([_repo(4, "2025-09-17 00:00:00", stars=999)], table="repos")
+        rendered = metrics_dashboard.main_generate_dashboard(output_file=output, cache_file=cache)
+        assert "top_projects" in rendered and "overview" in rendered
+        assert not any(name.startswith("chart") for name in rendered)
+    finally:
+        metrics_dashboard.cloudflare_client = original_client
+
+    print("✅ 仪表板增量生成正确")
+
+if __name__ == "__main__":
+    test_dashboard_cache_and_incremental_render()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+指标导出器测试脚本
+验证 OpenMetrics / 0.0.4 文本格式、HTTP端点、textfile快照和Pushgateway推送
+"""
+
+import os
+import tempfile
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from monitoring_system import MonitoringSystem
+from metrics_exporter import (
+    render_openmetrics, render_text_format, write_textfile, push_to_gateway, MetricsHTTPServer,
+)
+
+def build_monitoring() -> MonitoringSystem:
+    monitoring = MonitoringSystem()
+    monitoring.start_collection()
+    for i in range(1, 101):
+        monitoring.record_request("github_search", i / 1000, bytes_in=100, status=200 if i % 10 else 403)
+    monitoring.record_storage(3, 2, 5)
+    with monitoring.stage("store"):
+        pass
+    monitoring.end_collection()
+    return monitoring
+
+def test_openmetrics_format():
+    """测试计数器、直方图桶和EOF结尾"""
+    print("🔍 测试OpenMetrics文本格式")
+
+    text = render_openmetrics(build_monitoring())
+    lines = text.splitlines()
+    assert lines[-1] == "# EOF"
+    assert 'ai_collector_stored_repositories_total{result="new"} 3' in lines
+    assert 'ai_collector_rate_limited_total{endpoint="github_search"} 10' in lines
+    assert "# UNIT ai_collector_request_duration_seconds seconds" in lines
+
+    buckets = [int(line.rsplit(" ", 1)[1]) for line in lines
+               if line.startswith('ai_collector_request_duration_seconds_bucket{endpoint="github_search"')]
+    assert buckets == sorted(buckets) and buckets[-1] == 100
+    assert 'ai_collector_request_duration_seconds_count{endpoint="github_search"} 100' in lines
+    assert "d1_write" not in text
+
+    print("✅ OpenMetrics格式正确")
+
+def test_text_format_004():
+    """测试 0.0.4 格式: 无 UNIT/EOF, 计数器 TYPE 行与样本名一致"""
+    print("🔍 测试0.0.4文本格式")
+
+    text = render_text_format(build_monitoring())
+    lines = text.splitlines()
+    assert "# EOF" not in lines and not any(line.startswith("# UNIT") for line in lines)
+    assert "# TYPE ai_collector_stored_repositories_total counter" in lines
+    assert 'ai_collector_stored_repositories_total{result="new"} 3' in lines
+    assert "# TYPE ai_collector_request_duration_seconds histogram" in lines
+
+    print("✅ 0.0.4文本格式正确")
+
+def test_http_endpoint_and_textfile():
+    """测试 /metrics 端点与原子写入的快照文件"""
+    print("🔍 测试指标端点与快照")
+
+    monitoring = build_monitoring()
+    server = MetricsHTTPServer(monitoring, port=0)
+    port = server.start()
+    try:
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/metrics",
+                                         headers={"Accept": "application/openmetrics-text; version=1.0.0"})
+        with urllib.request.urlopen(request) as response:
+            assert response.status == 200
+            assert response.headers["Content-Type"].startswith("application/openmetrics-text")
+            assert response.read().decode("utf-8").endswith("# EOF\n")
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "# EOF" not in response.read().decode("utf-8")
+    finally:
+        server.stop()
+
+    path = os.path.join(tempfile.mkdtemp(), "metrics", "collector.prom")
+    assert write_textfile(monitoring, path)
+    assert not os.path.exists(path + ".tmp")
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+        assert "ai_collector_run_duration_seconds" in content and "# EOF" not in content
+
+    print("✅ 指标端点与快照正确")
+
+def test_push_to_gateway_uses_text_format():
+    """测试推送以 0.0.4 内容类型 PUT 到分组路径"""
+    print("🔍 测试Pushgateway推送")
+
+    received = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_PUT(self):
+            received["path"] = self.path
+            received["content_type"] = self.headers["Content-Type"]
+            received["body"] = self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8")
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    gateway = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=gateway.handle_request, daemon=True)
+    thread.start()
+    try:
+        assert push_to_gateway(build_monitoring(), f"http://127.0.0.1:{gateway.server_address[1]}/",
+                               job="collector", grouping={"run": "daily"})
+        thread.join(5)
+    finally:
+        gateway.server_close()
+
+    assert received["path"] == "/metrics/job/collector/run/daily"
+    assert received["content_type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE ai_collector_stored_repositories_total counter" in received["body"]
+    assert "# EOF" not in received["body"]
+
+    print("✅ Pushgateway推送正确")
+
+if __name__ == "__main__":
+    test_openmetrics_format()
+    test_text_format_004()
+    test_http_endpoint_and_textfile()
+    test_push_to_gateway_uses_text_format()
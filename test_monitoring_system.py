@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+监控系统测试脚本
+验证延迟直方图分位数精度、请求跟踪的并发仪表和流量统计, 以及 GitHub 请求重试计数
+"""
+
+import time
+import random
+import asyncio
+from unittest import mock
+
+from config_v2 import Config, APIConfig
+from fake_github_server import start_fake_github_server
+from monitoring_system import LatencyHistogram, MonitoringSystem, retry_delay
+
+def test_histogram_percentiles():
+    """测试直方图分位数相对误差在3%以内"""
+    print("🔍 测试延迟直方图分位数")
+
+    rng = random.Random(7)
+    values = sorted(rng.lognormvariate(-4, 1) for _ in range(20_000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    for p in (50, 95, 99):
+        exact = values[int(p / 100 * len(values)) - 1]
+        assert abs(histogram.percentile(p) - exact) / exact < 0.03, (p, histogram.percentile(p), exact)
+
+    other = LatencyHistogram()
+    other.record(5.0)
+    histogram.merge(other)
+    assert histogram.count == 20_001 and histogram.percentile(100) == 5.0
+    assert histogram.buckets()[-1][1] == histogram.count
+
+    print("✅ 直方图分位数精度达标")
+
+def test_request_tracking():
+    """测试请求跟踪的并发峰值、错误、限频与流量"""
+    print("🔍 测试请求跟踪")
+
+    monitoring = MonitoringSystem()
+    with monitoring.track("github_search") as outer:
+        outer.status, outer.bytes_in = 200, 2048
+        with monitoring.track("github_search") as inner:
+            inner.status = 403
+        assert monitoring.endpoint("github_search").in_flight == 1
+    try:
+        with monitoring.track("d1_write"):
+            raise RuntimeError("D1不可用")
+    except RuntimeError:
+        pass
+    monitoring.record_retry("d1_write")
+    with monitoring.stage("store"):
+        pass
+
+    report = monitoring.get_latency_report()
+    search = report["github_search"]
+    assert search["count"] == 2 and search["in_flight_peak"] == 2
+    assert search["rate_limited"] == 1 and search["errors"] == 1 and search["bytes_in"] == 2048
+    assert report["d1_write"]["errors"] == 1 and report["d1_write"]["retries"] == 1
+    assert "github_repo" not in report
+    assert monitoring.metrics.api_calls_made == 2
+    assert "📶 请求延迟" in monitoring.get_summary_report()
+    assert "store" in monitoring.metrics.stage_durations
+
+    print("✅ 请求跟踪正确")
+
+def test_retry_delay():
+    """测试重试等待: Retry-After 优先, 配额耗尽等到重置, 否则指数退避, 超过上限不再重试"""
+    print("🔍 测试重试等待")
+
+    assert retry_delay(1, {"Retry-After": "3"}, 2.0, 30) == 3.0
+    assert retry_delay(1, {"Retry-After": "60"}, 2.0, 30) is None
+    reset = str(int(time.time()) + 10)
+    assert 8 <= retry_delay(1, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": reset}, 2.0, 30) <= 10
+    assert retry_delay(1, {}, 2.0, 30) == 2.0 and retry_delay(3, None, 2.0, 30) == 8.0
+    assert retry_delay(5, {}, 2.0, 30) is None
+
+    print("✅ 重试等待正确")
+
+def test_github_requests_record_retries():
+    """测试 GitHub 仓库请求遇到 5xx/二级限频时按配置重试并计入 retries"""
+    print("🔍 测试请求重试计数")
+    from enhanced_data_processor_v2 import EnhancedDataProcessorV2
+
+    corpus = {"search": {}, "repos": {"org/llm": {"id": 1, "full_name": "org/llm", "subscribers_count": 5}}}
+
+    async def fetch(**options):
+        import aiohttp
+        runner, server, base_url = await start_fake_github_server(
+            corpus, search_latency="none", core_latency="none", **options)
+        processor = EnhancedDataProcessorV2(MonitoringSystem())
+        try:
+            with mock.patch.object(APIConfig, "GITHUB_API_BASE", base_url):
+                async with aiohttp.ClientSession() as processor.session:
+                    result = await processor.get_real_watchers_count("org/llm")
+            return result, processor.monitoring.endpoint("github_repo"), server.stats["status"]
+        finally:
+            await runner.cleanup()
+
+    with mock.patch.object(Config, "REQUEST_MAX_RETRIES", 2), \
+         mock.patch.object(Config, "REQUEST_RETRY_BACKOFF", 0.01), \
+         mock.patch.object(Config, "REQUEST_RETRY_MAX_DELAY", 1.0):
+        result, metrics, statuses = asyncio.run(fetch(error_rate=1.0))
+        assert result is None and metrics.requests == 3 and metrics.retries == 2
+        assert sum(count for status, count in statuses.items() if int(status) >= 500) == 3
+
+        result, metrics, _ = asyncio.run(fetch(secondary_limit_rate=1.0, retry_after=0))
+        assert result is None and metrics.requests == 3 and metrics.retries == 2
+
+        # Retry-After 超过上限时不重试
+        result, metrics, _ = asyncio.run(fetch(secondary_limit_rate=1.0, retry_after=60))
+        assert metrics.requests == 1 and metrics.retries == 0
+
+        result, metrics, _ = asyncio.run(fetch())
+        assert result == 5 and metrics.retries == 0
+
+    print("✅ 请求重试计数正确")
+
+if __name__ == "__main__":
+    test_histogram_percentiles()
+    test_request_tracking()
+    test_retry_delay()
+    test_github_requests_record_retries()
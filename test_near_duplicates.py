@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+近重复检测测试脚本
+验证克隆识别、规范代表选择 (星标优先)、内容变化后签名刷新、分桶容量上限与索引持久化
+"""
+
+import os
+import tempfile
+
+from high_frequency_collector import RepositoryData
+from unittest import mock
+
+from near_duplicates import NearDuplicateIndex, NEAR_DUPLICATE_CONFIG
+
+DESCRIPTION = "A production ready framework for building autonomous LLM agents with tool use, memory and planning"
+
+def _repo(repo_id, name, description, stars, topics=("llm", "agents")):
+    return {"id": repo_id, "full_name": f"user{repo_id}/{name}", "name": name, "description": description,
+            "topics": list(topics), "stargazers_count": stars, "created_at": "2024-01-01T00:00:00Z"}
+
+def test_clones_are_dropped_and_original_is_canonical():
+    """测试镜像/改名克隆被丢弃, 同批次中星标最多的仓库为代表, 不相关仓库保留"""
+    print("🔍 测试近重复识别")
+
+    index = NearDuplicateIndex(threshold=0.8)
+    repos = [
+        _repo(2, "agent-kit", DESCRIPTION + ".", 5),                      # 改名克隆 (先到达)
+        _repo(1, "agent-kit", DESCRIPTION, 5000),                         # 原仓库
+        _repo(3, "agent-kit-mirror", DESCRIPTION, 0),                     # 镜像
+        _repo(4, "vision-toolbox", "Object detection and segmentation models for edge devices", 800, ("cv",)),
+        _repo(5, "short", "", 10),                                        # 文本过短, 不参与检测
+    ]
+    kept = index.filter(repos)
+    assert [repo["id"] for repo in kept] == [1, 4, 5]
+    assert index.canonical_of(2) == index.canonical_of(3) == 1
+    assert index.clusters() == {1: [1, 2, 3]}
+    assert index.stats["too_short"] == 1
+
+    # 原仓库晚于克隆到达时成为新代表
+    late = NearDuplicateIndex(threshold=0.8)
+    assert late.check_and_add(_repo(3, "agent-kit-mirror", DESCRIPTION, 0)) is None
+    assert late.check_and_add(_repo(1, "agent-kit", DESCRIPTION, 5000)) is None
+    assert late.canonical_of(3) == 1
+    assert late.check_and_add(_repo(3, "agent-kit-mirror", DESCRIPTION, 0)).canonical_id == 1
+
+    print("✅ 近重复识别正确")
+
+def test_changed_content_refreshes_signature():
+    """测试已收录仓库的描述变化后按新内容重新检测, 代表改写后由剩余成员中最优者接任"""
+    print("🔍 测试签名刷新")
+
+    other = "Realtime speech recognition and voice cloning toolkit with streaming inference servers"
+    index = NearDuplicateIndex(threshold=0.8)
+    index.filter([_repo(1, "agent-kit", DESCRIPTION, 5000), _repo(2, "agent-kit-copy", DESCRIPTION, 30),
+                  _repo(3, "agent-kit-mirror", DESCRIPTION, 10)])
+    assert index.clusters() == {1: [1, 2, 3]}
+
+    # 克隆改写为不相关项目: 不再被丢弃, 移出原簇
+    assert index.check_and_add(_repo(3, "agent-kit-mirror", other, 10)) is None
+    assert index.canonical_of(3) == 3 and index.clusters() == {1: [1, 2]}
+
+    # 代表改写: 剩余成员中星标最多的接任, 不再被当作克隆丢弃
+    assert index.check_and_add(_repo(1, "agent-kit", "Gradient boosting library for tabular data with GPU training", 5000)) is None
+    assert index.canonical_of(2) == 2
+    assert index.check_and_add(_repo(2, "agent-kit-copy", DESCRIPTION, 30)) is None
+    assert index.stats["refreshed"] == 2
+
+    # 未变化的仓库直接复用已有签名判定
+    assert index.check_and_add(_repo(3, "agent-kit-mirror", other, 10)) is None
+    assert index.stats["refreshed"] == 2
+
+    print("✅ 签名刷新正确")
+
+def test_filter_accepts_processed_repositories():
+    """测试对已通过基础处理的 RepositoryData 过滤 (采集器先过滤再聚类)"""
+    print("🔍 测试RepositoryData过滤")
+
+    repos = [RepositoryData(id=i, full_name=f"user{i}/agent-kit", name="agent-kit", owner=f"user{i}",
+                            description=DESCRIPTION, stargazers_count=stars, topics=["llm", "agents"])
+             for i, stars in ((1, 3), (2, 900))]
+    kept = NearDuplicateIndex(threshold=0.8).filter(repos)
+    assert [repo.id for repo in kept] == [2]
+
+    print("✅ RepositoryData过滤正确")
+
+def test_large_cluster_keeps_buckets_bounded():
+    """测试大簇只有有限成员进入分桶, 单桶条目有上限, 成员列表与并查集无关"""
+    print("🔍 测试分桶容量上限")
+
+    index = NearDuplicateIndex(threshold=0.8)
+    repos = [_repo(i, f"agent-kit-{i % 7}", DESCRIPTION, i % 40) for i in range(1, 1501)]
+    kept = index.filter(repos)
+    assert len(kept) <= 5
+    largest = max(index.members.values(), key=len)
+    assert len(largest) >= 1400
+    assert all(len(sample) <= NEAR_DUPLICATE_CONFIG["bucket_sample"] for sample in index.samples.values())
+    bucket_sizes = [len(bucket) for band in index.buckets for bucket in band.values()]
+    assert max(bucket_sizes) <= NEAR_DUPLICATE_CONFIG["max_bucket_size"]
+    assert sum(len(members) for members in index.members.values()) == len(index.signatures) == 1500
+
+    # 删除成员只改动所在簇
+    removed, size = largest[-1], len(largest)
+    root = index.canonical_of(removed)
+    index._remove(removed)
+    assert removed not in index.root and len(index.members[root]) == size - 1
+
+    print("✅ 分桶容量上限正确")
+
+def test_index_persistence():
+    """测试签名与代表关系持久化后, 下次运行仍能识别克隆"""
+    print("🔍 测试索引持久化")
+
+    path = os.path.join(tempfile.mkdtemp(), "near_duplicates.idx")
+    index = NearDuplicateIndex(threshold=0.8)
+    index.filter([_repo(1, "agent-kit", DESCRIPTION, 5000), _repo(2, "agent-kit-copy", DESCRIPTION, 1)])
+    assert index.save(path)
+
+    restored = NearDuplicateIndex(threshold=0.8)
+    assert restored.load(path) == 2
+    assert restored.canonical_of(2) == 1
+    duplicate = restored.check_and_add(_repo(9, "my-agent-kit", DESCRIPTION, 3))
+    assert duplicate is not None and duplicate.canonical_id == 1 and duplicate.similarity >= 0.8
+
+    # 超出上限时淘汰星标最少的单成员簇, 簇成员保留
+    other = "Realtime speech recognition and voice cloning toolkit with streaming inference servers"
+    restored.check_and_add(_repo(20, "speech-kit", other, 50))
+    restored.check_and_add(_repo(21, "tiny-speech", other.replace("Realtime", "Offline") + " for phones", 1))
+    with mock.patch.dict(NEAR_DUPLICATE_CONFIG, max_entries=4):
+        assert restored.save(path)
+    bounded = NearDuplicateIndex(threshold=0.8)
+    assert bounded.load(path) == 4
+    assert set(bounded.signatures) == {1, 2, 9, 20} and bounded.canonical_of(9) == 1
+
+    print("✅ 索引持久化正确")
+
+if __name__ == "__main__":
+    test_clones_are_dropped_and_original_is_canonical()
+    test_changed_content_refreshes_signature()
+    test_filter_accepts_processed_repositories()
+    test_large_cluster_keeps_buckets_bounded()
+    test_index_persistence()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+性能分析模式测试脚本
+验证 --profile 参数解析、CPU/等待时间拆分和 speedscope 输出
+"""
+
+import os
+import json
+import asyncio
+import tempfile
+
+from profiling import parse_profile_args, run_profiled
+
+async def _busy_then_wait():
+    total = sum(i * i for i in range(300_000))
+    await asyncio.sleep(0.3)
+    return total
+
+def test_parse_profile_args():
+    """测试与入口脚本原有参数共存"""
+    print("🔍 测试--profile参数解析")
+
+    assert parse_profile_args(["--test", "--limit", "10"]).profile is None
+    assert parse_profile_args(["--profile"]).profile == "cprofile"
+    args = parse_profile_args(["--profile=sampling", "--profile-output", "out"])
+    assert args.profile == "sampling" and args.profile_output == "out"
+
+    print("✅ 参数解析正确")
+
+def test_cprofile_and_sampling_outputs():
+    """测试pstats与speedscope文件生成, 等待时间计入await"""
+    print("🔍 测试性能分析输出")
+
+    output_dir = tempfile.mkdtemp()
+    assert run_profiled(lambda: asyncio.run(_busy_then_wait()), "cprofile", "demo", output_dir) > 0
+    assert run_profiled(lambda: asyncio.run(_busy_then_wait()), "sampling", "demo", output_dir) > 0
+
+    files = sorted(os.listdir(output_dir))
+    assert any(name.endswith(".pstats") for name in files)
+    speedscope = next(name for name in files if name.endswith(".speedscope.json"))
+    with open(os.path.join(output_dir, speedscope), encoding="utf-8") as f:
+        data = json.load(f)
+
+    cpu, wait = data["profiles"]
+    assert cpu["name"].endswith("(CPU)") and wait["name"].endswith("(await)")
+    assert wait["endValue"] >= 0.2
+    frames = data["shared"]["frames"]
+    assert any(frames[i]["name"] == "_busy_then_wait" for stack in wait["samples"] for i in stack)
+
+    print("✅ 性能分析输出正确")
+
+if __name__ == "__main__":
+    test_parse_profile_args()
+    test_cprofile_and_sampling_outputs()
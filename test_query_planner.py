@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+自适应查询规划器测试脚本
+验证UCB配额分配、低产出查询淘汰与重新启用, 以及状态持久化
+"""
+
+import os
+import tempfile
+
+from query_planner import AdaptiveQueryPlanner, QUERY_PLANNER_CONFIG
+
+GROUPS = {
+    "round_a": ["llm agent", "rag pipeline", "vector db"],
+    "round_b": ["diffusion", "tts"],
+}
+
+def test_plan_prefers_high_yield_queries():
+    """测试配额优先分配给高产出查询, 且每个轮次保留最少查询"""
+    print("🔍 测试查询配额分配")
+
+    planner = AdaptiveQueryPlanner(state_file="", seed=1)
+    # 未探索过的查询优先: 首轮按声明顺序分满配额
+    assert planner.plan(GROUPS, quota=10) == GROUPS
+
+    for _ in range(3):
+        planner.record("llm agent", 1, 40)
+        planner.record("rag pipeline", 1, 2)
+        planner.record("vector db", 1, 1)
+        planner.record("diffusion", 1, 1)
+        planner.record("tts", 1, 30)
+        planner.end_run()
+
+    plan = planner.plan(GROUPS, quota=3)
+    assert plan["round_a"][0] == "llm agent" and plan["round_b"] == ["tts"]
+    assert sum(len(queries) for queries in plan.values()) == 3
+    assert planner.get_report(1)[0]["query"] == "llm agent"
+
+    print("✅ 查询配额分配正确")
+
+def test_retire_and_revive():
+    """测试持续低产出的查询被淘汰, 重新探索后产出回升即重新启用"""
+    print("🔍 测试查询淘汰与重新启用")
+
+    planner = AdaptiveQueryPlanner(state_file="", seed=1)
+    planner.record("tts", QUERY_PLANNER_CONFIG["retire_min_calls"], 0)
+    planner.record("diffusion", QUERY_PLANNER_CONFIG["retire_min_calls"], 20)
+    planner.end_run()
+    assert planner.stats["tts"].retired and not planner.stats["diffusion"].retired
+
+    original = QUERY_PLANNER_CONFIG["revive_probability"]
+    try:
+        QUERY_PLANNER_CONFIG["revive_probability"] = 0.0
+        assert planner.plan({"round_b": ["diffusion", "tts"]}, quota=5) == {"round_b": ["diffusion"]}
+        QUERY_PLANNER_CONFIG["revive_probability"] = 1.0
+        assert "tts" in planner.plan({"round_b": ["diffusion", "tts"]}, quota=5)["round_b"]
+    finally:
+        QUERY_PLANNER_CONFIG["revive_probability"] = original
+
+    planner.record("tts", 1, 10)
+    assert not planner.stats["tts"].retired
+
+    print("✅ 查询淘汰与重新启用正确")
+
+def test_state_persistence():
+    """测试产出统计保存后可恢复, 下次运行延续历史排序"""
+    print("🔍 测试查询规划状态持久化")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_file = os.path.join(tmp_dir, "query_planner_state.json")
+        planner = AdaptiveQueryPlanner(state_file=state_file, seed=1)
+        planner.record("vector db", 2, 30)
+        planner.record("llm agent", 2, 1)
+        planner.end_run()
+        assert planner.save()
+
+        restored = AdaptiveQueryPlanner(state_file=state_file, seed=1)
+        assert restored.load() == 2
+        assert restored.stats == planner.stats
+        assert restored.plan({"round_a": ["llm agent", "vector db"]}, quota=1) == {"round_a": ["vector db"]}
+
+    print("✅ 查询规划状态持久化正确")
+
+if __name__ == "__main__":
+    test_plan_prefers_high_yield_queries()
+    test_retire_and_revive()
+    test_state_persistence()
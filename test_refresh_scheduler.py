@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+刷新调度器测试脚本
+验证按预期变化量分配API预算, 以及活跃度刷新回写星标/同步时间并更新趋势状态
+"""
+
+import os
+import tempfile
+from unittest import mock
+
+import update_activity_data
+from config_v2 import Config
+from local_d1_server import LocalD1Client, LocalD1Database, LOCAL_D1_CONFIG
+from refresh_scheduler import RefreshScheduler
+from trending_engine import TrendingEngine
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DAY = 86400
+T0 = 1_700_000_000
+
+def test_plan_cycle_prefers_expected_change():
+    """测试预算优先分配给久未刷新、星标速度高的仓库"""
+    print("🔍 测试刷新调度")
+
+    engine = TrendingEngine(state_file="")
+    engine.update_batch([{"id": 1, "stargazers_count": 100}, {"id": 2, "stargazers_count": 100}], observed_at=T0)
+    engine.update_batch([{"id": 1, "stargazers_count": 600}, {"id": 2, "stargazers_count": 101}], observed_at=T0 + DAY)
+
+    scheduler = RefreshScheduler(engine)
+    assert scheduler.add_repos([
+        {"id": 1, "full_name": "org/fast", "sync_time": T0 + DAY},
+        {"id": 2, "full_name": "org/slow", "sync_time": T0 + DAY},
+        {"id": 3, "owner": "org", "name": "never"},
+    ]) == 3
+
+    selected = scheduler.plan_cycle(budget=2, now=T0 + 2 * DAY)
+    # 高速仓库刷新一天即预期变化最大; 从未刷新的仓库按一年未刷新排在慢速仓库之前
+    assert [c.full_name for c in selected] == ["org/fast", "org/never"]
+
+    scheduler.record_result(3, changed=True, refreshed_at=T0 + 2 * DAY)
+    assert [c.repo_id for c in scheduler.plan_cycle(budget=3, now=T0 + 2 * DAY)] == [1, 2, 3]
+    report = scheduler.get_report()
+    assert report["refreshed"] == 1 and report["changed"] == 1 and report["change_hit_rate"] == 100.0
+
+    print("✅ 刷新调度正确")
+
+def test_activity_refresh_persists_stars_and_trending():
+    """测试活跃度刷新回写星标与同步时间, 并把观测写入趋势状态"""
+    print("🔍 测试活跃度刷新回写")
+
+    database = LocalD1Database(schema_files=[os.path.join(ROOT, name) for name in LOCAL_D1_CONFIG["schema_files"]])
+    database.seed([
+        {"id": "1", "name": "agent", "owner": "org", "url": "", "stars": 100, "forks": 10,
+         "sync_time": "2000-01-01 00:00:00"},
+    ], table="repos")
+    client = LocalD1Client(database=database)
+    fetched = {"pushed_at": "2025-09-01T00:00:00Z", "watchers": 7, "stars": 180, "forks": 12}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_file = os.path.join(tmp_dir, "trending_state.json")
+        with mock.patch.object(update_activity_data, "cloudflare_client", client), \
+                mock.patch.object(update_activity_data, "fetch_repo_activity_data", return_value=fetched), \
+                mock.patch.object(Config, "TRENDING_STATE_FILE", state_file), \
+                mock.patch("time.sleep"):
+            update_activity_data.batch_update_activity_data(limit=1)
+
+        row = database.execute("SELECT stars, forks, watchers, sync_time FROM repos")[0]["results"][0]
+        assert row["stars"] == 180 and row["forks"] == 12 and row["watchers"] == 7
+        assert row["sync_time"] > "2000-01-01 00:00:00"
+
+        # 基线来自上次同步写入的星标数, 本次观测据此得到正速度
+        engine = TrendingEngine(state_file=state_file)
+        assert engine.load() == 1
+        assert engine.states[1].observations == 2 and engine.states[1].last_stars == 180
+        assert engine.get_velocity(1)["30d"]["stars_per_day"] > 0
+
+    print("✅ 活跃度刷新回写正确")
+
+if __name__ == "__main__":
+    test_plan_cycle_prefers_expected_change()
+    test_activity_refresh_persists_stars_and_trending()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+仓库特征缓存测试脚本
+验证按内容哈希缓存、关键词命中与批量评分/处理接口
+"""
+
+from unittest import mock
+
+from repo_features import FeatureCache, compute_features
+from data_processor import DataProcessor
+from high_frequency_collector import RepositoryData
+
+def _repo(**overrides):
+    fields = dict(id=1, full_name="org/llm-agent", name="llm-agent", owner="org",
+                  description="An autonomous GPT agent with RAG and docs", url="", stargazers_count=1500,
+                  forks_count=120, watchers_count=30, created_at="2024-01-01 08:00:00",
+                  updated_at="2024-01-02 08:00:00", pushed_at="not-a-date", language="Python",
+                  topics=["llm", "machine-learning"])
+    fields.update(overrides)
+    return RepositoryData(**fields)
+
+def test_cache_keyed_by_content():
+    """测试同内容命中缓存, 内容变化 (如星标更新) 生成新特征"""
+    print("🔍 测试特征缓存")
+
+    cache = FeatureCache(max_entries=2)
+    first = cache.get(_repo())
+    assert cache.get(_repo()) is first
+    assert cache.stats == {"hits": 1, "misses": 1}
+    assert cache.get(_repo(stargazers_count=1600)) is not first
+
+    cache.get(_repo(id=2))
+    assert len(cache.entries) == 2       # LRU 淘汰最旧条目
+
+    features = compute_features({"name": "Whisper-UI", "description": None, "topics": "asr,speech"})
+    assert features.texts["full"] == "whisper-ui  asr speech"
+    assert features.has("whisper") and not features.has("whisper", "description")
+    assert features.hits(["speech", "gpt", "asr"], "topics") == ["speech", "asr"]
+
+    print("✅ 特征缓存正确")
+
+def test_score_batch_matches_single_scorers():
+    """测试批量评分与逐项评分结果一致, 无法解析的时间按原规则计分"""
+    print("🔍 测试批量评分")
+
+    processor = DataProcessor()
+    repos = [_repo(), _repo(id=3, name="tiny", description="", topics=[], stargazers_count=3, pushed_at="")]
+    results = processor.score_batch(repos)
+
+    for repo, result in zip(repos, results):
+        assert result["ai_category"] == processor.categorize_ai_project(repo)
+        assert sorted(result["ai_tags"]) == sorted(processor.extract_ai_tags(repo))
+        assert result["quality_score"] == processor.calculate_quality_score(repo)
+        assert result["trending_score"] == processor.calculate_trending_score(repo)
+        assert result["ai_relevance"] == processor.calculate_ai_relevance(repo)
+
+    assert sorted(results[0]["ai_tags"]) == ["GPT", "LLM", "machine-learning", "rag"]
+    assert results[0]["ai_relevance"] == 5
+    assert results[1]["ai_relevance"] == 0
+
+    print("✅ 批量评分正确")
+
+def test_process_repositories_scores_once():
+    """测试批量处理整批只评分一次, 结果与逐个处理一致, 异常仓库只丢弃自身"""
+    print("🔍 测试批量处理")
+
+    def raw(repo_id, name, description, stars):
+        return {"id": repo_id, "full_name": f"org/{name}", "name": name, "owner": {"login": "org"},
+                "description": description, "html_url": f"https://github.com/org/{name}",
+                "stargazers_count": stars, "forks_count": 40, "language": "Python",
+                "topics": ["llm", "machine-learning"], "created_at": "2024-01-01T00:00:00Z",
+                "updated_at": "2025-09-01T00:00:00Z", "pushed_at": "2025-09-01T00:00:00Z"}
+
+    repos_raw = [raw(1, "llm-agent", "An autonomous GPT agent with RAG", 1500),
+                 raw(2, "tiny", "", 1),
+                 raw(3, "rag-kit", "Retrieval augmented generation toolkit for LLM apps", 800)]
+    processor = DataProcessor()
+    single = [repo for repo in map(processor.process_repository, repos_raw) if repo]
+
+    with mock.patch.object(processor, "score_batch", wraps=processor.score_batch) as score_batch:
+        batch = processor.process_repositories(repos_raw + [{"full_name": "org/broken", "owner": None}])
+    assert score_batch.call_count == 1
+    assert [repo.id for repo in batch] == [repo.id for repo in single] == [1, 3]
+    assert [repo.to_dict() for repo in batch] == [repo.to_dict() for repo in single]
+
+    print("✅ 批量处理正确")
+
+if __name__ == "__main__":
+    test_cache_keyed_by_content()
+    test_score_batch_matches_single_scorers()
+    test_process_repositories_scores_once()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+增强评分回填测试脚本
+验证进程池与单进程结果一致、批量写回、未变化行跳过与 dry-run
+"""
+
+import os
+
+from local_d1_server import LocalD1Client, LocalD1Database, LOCAL_D1_CONFIG
+from rescore_backfill import run_backfill, score_row, RESCORE_COLUMNS
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+def _client(count):
+    database = LocalD1Database(schema_files=[os.path.join(ROOT, name) for name in LOCAL_D1_CONFIG["schema_files"]])
+    database.seed([
+        {"id": f"{i:04d}", "name": f"agent-{i}", "owner": "google" if i % 2 else "acme", "url": "",
+         "description": "Autonomous LLM agent with RAG, paper and production API" if i % 3 else None,
+         "stars": i * 300, "forks": i * 20, "watchers_count": i, "open_issues_count": i % 60,
+         "created_at": "2024-05-01T00:00:00Z", "last_commit_date": "2025-09-01T00:00:00Z",
+         "primary_language": "Python", "license_type": "mit" if i % 2 else None, "contributors_count": i,
+         "has_tests": 1, "has_ci_cd": i % 2, "code_quality_score": 12, "sync_time": "2000-01-01 00:00:00"}
+        for i in range(count)
+    ], table="repos")
+    return LocalD1Client(database=database)
+
+def _scores(client):
+    rows = client.db.execute(f"SELECT id, {', '.join(RESCORE_COLUMNS)} FROM repos ORDER BY id")[0]["results"]
+    return [[row[column] for column in ["id"] + RESCORE_COLUMNS] for row in rows]
+
+def test_process_pool_matches_inline_and_skips_unchanged():
+    """测试进程池回填与单进程结果一致, 重跑时无变化行不再写回"""
+    print("🔍 测试多进程回填")
+
+    pooled, inline = _client(45), _client(45)
+    stats = run_backfill(pooled, "account", "db", workers=2, page_size=20, chunk_size=7, write_batch_size=16)
+    assert stats["scanned"] == 45 and stats["changed"] == 45
+    assert stats["written"] == 45 and stats["statements"] == 3 and stats["failed"] == 0
+    run_backfill(inline, "account", "db", workers=1, page_size=20, chunk_size=7)
+    assert _scores(pooled) == _scores(inline)
+
+    row = pooled.db.execute("SELECT * FROM repos WHERE id = '0007'")[0]["results"][0]
+    assert [row[column] for column in RESCORE_COLUMNS] == score_row(row)
+    assert row["model_type"] == "llm" and row["has_research_paper"] == 1
+
+    # 写回推进同步时间, 看板水位线随之变化
+    assert row["sync_time"] > "2000-01-01 00:00:00"
+
+    rerun = run_backfill(pooled, "account", "db", workers=2, page_size=20)
+    assert rerun["scanned"] == 45 and rerun["changed"] == 0 and rerun["statements"] == 0
+
+    print("✅ 多进程回填正确")
+
+def test_dry_run_does_not_write():
+    """测试 dry-run 只计算不写回"""
+    print("🔍 测试 dry-run")
+
+    client = _client(5)
+    before = _scores(client)
+    stats = run_backfill(client, "account", "db", workers=1, dry_run=True)
+    assert stats["changed"] == 5 and stats["statements"] == 0
+    assert _scores(client) == before
+
+    print("✅ dry-run 正确")
+
+if __name__ == "__main__":
+    test_process_pool_matches_inline_and_skips_unchanged()
+    test_dry_run_does_not_write()
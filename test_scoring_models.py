@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+统一评分模型注册表测试脚本
+验证各模型分档计分、批量与逐个求值一致、版本覆盖与按版本选择性重算
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from config_v2 import Config, DatabaseConfig
+from deduplication_manager import DeduplicationManager
+from local_d1_server import LocalD1Client
+from repo_features import FeatureCache, compute_features
+from rescore_backfill import run_backfill
+from scoring_models import (
+    SCORING_MODELS, ScoringModel, Section, Tier, tiers, get_model, register_model, active_versions,
+)
+
+NOW = datetime.now(timezone.utc)
+
+def _ago(days):
+    return (NOW - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _repo(**overrides):
+    repo = dict(id=1, name="llm-agent", full_name="org/llm-agent",
+                description="An autonomous GPT agent with RAG, paper and production API for LLM research",
+                stargazers_count=1500, forks_count=120, watchers_count=30, open_issues_count=10,
+                language="Python", topics=["llm"], license={"key": "mit"},
+                created_at=_ago(200), pushed_at=_ago(3))
+    repo.update(overrides)
+    return repo
+
+def test_models_score_declared_tiers():
+    """测试各模型按声明的分档/关键词/查表计分"""
+    print("🔍 测试评分模型计分")
+
+    extra = {"contributors": 12, "has_readme": True, "has_tests": True}
+
+    quality = get_model("quality").evaluate(_repo())
+    assert quality.total == 84 and quality.model_id == "quality@1"
+    assert quality.sections["activity"] == 25 and quality.sections["technical"] == 3
+
+    assert get_model("comprehensive").score(_repo()) == 41
+    metrics = get_model("metrics").evaluate(_repo())
+    assert metrics.sections == {"comprehensive": 41, "ai_specific": 7} and metrics.total == 48
+
+    enhanced = get_model("enhanced").evaluate(_repo(), extra)
+    assert enhanced.sections["community"] == 18 and enhanced.sections["health"] == 12
+    assert enhanced.total == 66
+    # 未探测项目结构 (无 has_readme) 时测试/CI 不计分
+    assert get_model("enhanced").section_score("health", _repo(), {"has_tests": True}) == 8
+
+    # 无法解析的时间: quality 给少量分数, comprehensive 不计分
+    broken = _repo(pushed_at="not-a-date", created_at="")
+    assert get_model("quality").evaluate(broken).sections["activity"] == 5
+    assert get_model("quality").evaluate(broken).sections["maturity"] == 0
+    assert get_model("comprehensive").score(broken) == 41 - 10 - 4
+
+    collector = get_model("collector_quality").score(_repo(), {
+        "contributors": 12, "documentation_score": 6, "has_readme": True, "has_wiki": False,
+        "last_commit_date": _ago(20),
+    })
+    assert collector == 10 + 6 + 3 + 4 + 2 + 4
+
+    print("✅ 评分模型计分正确")
+
+def test_batch_matches_single_and_version_override():
+    """测试按列批量求值与逐个求值一致, 版本覆盖与已发布版本不可修改"""
+    print("🔍 测试批量求值与版本")
+
+    repos = [_repo(id=i, stargazers_count=i * 97, forks_count=i * 3, pushed_at=_ago(i * 11)) for i in range(30)]
+    extras = [{"contributors": i, "has_readme": i % 2, "last_commit_date": _ago(i)} for i in range(30)]
+    for name in ("quality", "comprehensive", "metrics", "enhanced", "collector_quality"):
+        model = get_model(name)
+        assert model.evaluate_batch(repos, extras) == [model.evaluate(r, e) for r, e in zip(repos, extras)]
+
+    # 逐行求值直接使用调用方传入的特征, 不再查缓存
+    features = compute_features(_repo())
+    expected = get_model("enhanced").evaluate_batch([_repo()], [{}])[0]
+    with mock.patch.object(FeatureCache, "get", side_effect=AssertionError("不应查缓存")):
+        assert get_model("enhanced").evaluate(_repo(), {}, features) == expected
+        assert get_model("quality").score(features) == 84
+
+    register_model(ScoringModel("quality", 2, (Section("stars", (tiers("stars", Tier(50, low=1000)),)),)))
+    try:
+        assert get_model("quality").id == "quality@2" and get_model("quality").score(_repo()) == 50
+        Config.SCORING_MODEL_VERSIONS = "quality=1"
+        try:
+            assert active_versions()["quality"] == 1 and get_model("quality").score(_repo()) == 84
+        finally:
+            Config.SCORING_MODEL_VERSIONS = ""
+        try:
+            register_model(ScoringModel("quality", 2, ()))
+            assert False, "同名同版本重复注册应报错"
+        except ValueError:
+            pass
+    finally:
+        del SCORING_MODELS["quality"][2]
+
+    print("✅ 批量求值与版本正确")
+
+def test_stale_rescore_only_touches_old_versions():
+    """测试质量分只重算版本过期的行, 升级版本后全部重算"""
+    print("🔍 测试按版本选择性重算")
+
+    client = LocalD1Client()
+    client.seed([
+        {"id": i, "full_name": f"org/repo-{i}", "name": f"repo-{i}", "description": "LLM agent",
+         "stargazers_count": 100 * i, "forks_count": i, "watchers_count": i, "created_at": _ago(100),
+         "pushed_at": _ago(i), "language": "Python", "topics": "llm,agent",
+         # 偶数行已是当前版本 (分数故意填错, 以验证不会被读取)
+         "quality_score": -1, "score_model_version": "quality@1" if i % 2 == 0 else ""}
+        for i in range(1, 11)
+    ])
+
+    def rows():
+        sql = f"SELECT id, quality_score, score_model_version FROM {DatabaseConfig.TABLE_NAME} ORDER BY id"
+        return client.db.execute(sql)[0]["results"]
+
+    stats = run_backfill(client, "account", "db", workers=1, page_size=3, target="quality")
+    assert stats["scanned"] == 5 and stats["written"] == 5 and stats["statements"] == 1
+    for row in rows():
+        if row["id"] % 2 == 0:
+            assert row["quality_score"] == -1
+        else:
+            assert row["score_model_version"] == "quality@1" and row["quality_score"] > 0
+
+    register_model(ScoringModel("quality", 2, (Section("stars", (tiers("stars", Tier(7, low=0)),)),)))
+    try:
+        stats = run_backfill(client, "account", "db", workers=1, page_size=3, target="quality")
+        assert stats["scanned"] == 10 and stats["model"] == "quality@2"
+        assert {(row["quality_score"], row["score_model_version"]) for row in rows()} == {(7, "quality@2")}
+        assert run_backfill(client, "account", "db", workers=1, target="quality")["scanned"] == 0
+    finally:
+        del SCORING_MODELS["quality"][2]
+
+    print("✅ 按版本选择性重算正确")
+
+def test_collector_adds_missing_version_column():
+    """测试未执行升级脚本的库在采集器启动时补齐 score_model_version 列, 补齐失败则中止"""
+    print("🔍 测试模型版本列检测")
+
+    client = LocalD1Client()
+    client.db.execute(f"ALTER TABLE {DatabaseConfig.TABLE_NAME} DROP COLUMN score_model_version")
+    manager = DeduplicationManager(client, Config())
+    assert asyncio.run(manager.ensure_schema()) == ["score_model_version"]
+    assert asyncio.run(manager.ensure_schema()) == []
+    response = client.query(sql=DatabaseConfig.UPSERT_SQL, params=[1] + [""] * 22 + ["quality@1"])
+    assert response.success
+
+    legacy = LocalD1Client()
+    legacy.db.execute(f"ALTER TABLE {DatabaseConfig.TABLE_NAME} DROP COLUMN score_model_version")
+    query = legacy.query
+
+    def deny_ddl(sql="", **kwargs):
+        if sql.startswith("ALTER"):
+            return SimpleNamespace(success=False, errors=["not authorized"], result=[])
+        return query(sql=sql, **kwargs)
+
+    legacy.query = deny_ddl
+    try:
+        asyncio.run(DeduplicationManager(legacy, Config()).ensure_schema())
+        assert False, "无法补齐列时应中止"
+    except RuntimeError:
+        pass
+
+    print("✅ 模型版本列检测正确")
+
+if __name__ == "__main__":
+    test_models_score_declared_tiers()
+    test_batch_matches_single_and_version_override()
+    test_stale_rescore_only_touches_old_versions()
+    test_collector_adds_missing_version_column()
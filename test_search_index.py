@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+全文检索测试脚本
+验证BM25排序、过滤条件、增量更新与从D1分页回填
+"""
+
+from search_index import SearchIndex, build_match_query
+from local_d1_server import LocalD1Client
+
+REPOS = [
+    {"id": 1, "name": "llm-agent", "owner": "org", "full_name": "org/llm-agent", "description": "Autonomous agent framework",
+     "topics": ["llm", "agents"], "ai_tags": "agent", "ai_category": "LLM应用", "language": "Python",
+     "quality_score": 80, "stargazers_count": 900},
+    {"id": 2, "name": "vision-kit", "owner": "lab", "full_name": "lab/vision-kit", "description": "Image models and an agent demo",
+     "topics": "computer-vision,transformers", "ai_tags": "", "ai_category": "计算机视觉", "language": "python",
+     "quality_score": 60, "stargazers_count": 300},
+    {"id": 3, "name": "rag-server", "owner": "org", "full_name": "org/rag-server", "description": "Retrieval augmented generation",
+     "topics": ["rag", "llm"], "ai_tags": ["retrieval"], "ai_category": "RAG技术", "language": "Go",
+     "quality_score": 40, "stargazers_count": 50},
+]
+
+def test_match_query_escapes_syntax():
+    """测试用户输入不会被解析为FTS5语法"""
+    print("🔍 测试查询构造")
+
+    assert build_match_query('large-language-model trans* "x') == '"large-language-model" "trans"* "x"'
+    assert build_match_query("a b", match_any=True) == '"a" OR "b"'
+
+    print("✅ 查询构造正确")
+
+def test_search_ranking_filters_and_updates():
+    """测试BM25排序 (名称权重高于描述)、过滤、文本未变化时不重建"""
+    print("🔍 测试全文检索")
+
+    index = SearchIndex(":memory:")
+    assert index.add_batch(REPOS) == {"indexed": 3, "unchanged": 0}
+
+    assert [hit["id"] for hit in index.search("agent")] == [1, 2]
+    assert [hit["id"] for hit in index.search("llm", language="PYTHON")] == [1]
+    assert [hit["id"] for hit in index.search("agent", min_quality=70)] == [1]
+    assert [hit["id"] for hit in index.search("computer-vision")] == [2]
+    assert [hit["id"] for hit in index.search("retriev*")] == [3]
+    assert [hit["id"] for hit in index.search("", category="RAG技术")] == [3]
+    assert "[agent]" in index.search("agent", category="计算机视觉")[0]["snippet"]
+
+    updated = dict(REPOS[2], quality_score=95, description="Retrieval augmented generation with agent tools")
+    assert index.add_batch([dict(REPOS[0], quality_score=85), updated]) == {"indexed": 1, "unchanged": 1}
+    assert {hit["id"] for hit in index.search("agent")} == {1, 2, 3}
+    assert index.search("llm", min_quality=90)[0]["id"] == 3
+    assert index.remove([2]) == 1 and index.stats()["documents"] == 2
+
+    print("✅ 全文检索正确")
+
+def test_build_from_d1_pages():
+    """测试从D1按ID键集分页回填 (topics/ai_tags 为逗号分隔字符串)"""
+    print("🔍 测试D1回填")
+
+    client = LocalD1Client()
+    client.seed([dict(repo, topics=",".join(repo["topics"]) if isinstance(repo["topics"], list) else repo["topics"],
+                      ai_tags=",".join(repo["ai_tags"]) if isinstance(repo["ai_tags"], list) else repo["ai_tags"])
+                 for repo in REPOS])
+
+    index = SearchIndex(":memory:")
+    assert index.build_from_d1(client, "account", "database", page_size=2) == 3
+    assert [hit["id"] for hit in index.search("rag")] == [3]
+
+    print("✅ D1回填正确")
+
+if __name__ == "__main__":
+    test_match_query_escapes_syntax()
+    test_search_ranking_filters_and_updates()
+    test_build_from_d1_pages()
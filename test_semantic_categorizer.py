@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+语义分类引擎测试脚本
+验证质心分类、标注样本修正、相似仓库查询、索引持久化与遗留分类改写
+"""
+
+import os
+import tempfile
+
+from config_v2 import DatabaseConfig
+from local_d1_server import LocalD1Client, LocalD1Database, LOCAL_D1_CONFIG
+from semantic_categorizer import (
+    SemanticCategorizer, DEFAULT_CATEGORY, canonical_category, relabel_legacy_categories,
+)
+
+REPOS = [
+    {"id": 1, "full_name": "vllm-project/vllm", "name": "vllm",
+     "description": "A high-throughput and memory-efficient inference and serving engine for LLMs", "topics": ["inference"]},
+    {"id": 2, "full_name": "ultralytics/ultralytics", "name": "ultralytics",
+     "description": "YOLO for object detection, segmentation and pose estimation", "topics": ["computer-vision"]},
+    {"id": 3, "full_name": "crewAIInc/crewAI", "name": "crewAI",
+     "description": "Framework for orchestrating role-playing, autonomous AI agents", "topics": ["agents"]},
+    {"id": 4, "full_name": "ggml-org/whisper.cpp", "name": "whisper.cpp",
+     "description": "Port of Whisper speech recognition model in C/C++", "topics": ["asr"]},
+    {"id": 5, "full_name": "org/sglang", "name": "sglang",
+     "description": "Fast serving framework for large language models with an openai compatible api server", "topics": []},
+]
+
+def test_classify_batch_uses_unified_categories():
+    """测试批量分类结果与单条一致, 无关文本归入默认分类"""
+    print("🔍 测试语义分类")
+
+    categorizer = SemanticCategorizer(index_file="")
+    labels = [category for category, _ in categorizer.classify_batch(REPOS)]
+    assert labels == ["LLM服务与工具", "计算机视觉", "AI智能体", "语音AI", "LLM服务与工具"]
+    assert categorizer.classify(REPOS[2]) == categorizer.classify_batch([REPOS[2]])[0]
+    assert categorizer.classify("misc utilities")[0] == DEFAULT_CATEGORY
+
+    # 标注样本修正质心: 新分类只靠标注样本即可命中
+    categorizer.add_labeled([{"name": "geo-tiles", "description": "satellite imagery tiling for remote sensing"}], ["遥感AI"])
+    assert categorizer.classify("remote sensing satellite imagery tiles")[0] == "遥感AI"
+
+    print("✅ 语义分类正确")
+
+def test_find_similar_and_persistence():
+    """测试相似仓库查询 (排除自身、分类过滤) 与索引持久化"""
+    print("🔍 测试相似仓库查询")
+
+    path = os.path.join(tempfile.mkdtemp(), "semantic_index.json")
+    categorizer = SemanticCategorizer(index_file=path)
+    assert categorizer.index_batch(REPOS) == 5
+
+    similar = categorizer.find_similar("vllm-project/vllm", limit=2)
+    assert similar[0]["id"] == 5 and all(hit["id"] != 1 for hit in similar)
+    assert [hit["id"] for hit in categorizer.find_similar("autonomous agents", limit=1)] == [3]
+    assert all(hit["category"] == "LLM服务与工具" for hit in categorizer.find_similar("fast inference", category="LLM服务与工具"))
+    assert categorizer.save()
+
+    restored = SemanticCategorizer(index_file=path)
+    assert restored.load() == 5
+    assert restored.doc_count == 5
+    assert [hit["id"] for hit in restored.find_similar(1, limit=1)] == [5]
+
+    print("✅ 相似仓库查询正确")
+
+def test_relabel_legacy_categories():
+    """测试旧规则遗留标签映射到统一分类, 库中已有行改写 (保留项目层级后缀), 当前分类不受影响"""
+    print("🔍 测试遗留分类改写")
+
+    assert canonical_category("AI代理系统") == "AI智能体"
+    assert canonical_category("其他AI技术") == DEFAULT_CATEGORY
+    assert canonical_category("通用AI - 明星项目") == f"{DEFAULT_CATEGORY} - 明星项目"
+    assert canonical_category("LLM服务与工具") == "LLM服务与工具" and canonical_category("") == ""
+
+    root = os.path.dirname(os.path.abspath(__file__))
+    client = LocalD1Client(database=LocalD1Database(
+        schema_files=[os.path.join(root, name) for name in LOCAL_D1_CONFIG["schema_files"]]))
+    client.seed([{"id": 1, "full_name": "a/agent", "ai_category": "AI代理系统"},
+                 {"id": 2, "full_name": "b/misc", "ai_category": "其他AI技术"},
+                 {"id": 3, "full_name": "c/serve", "ai_category": "LLM服务与工具"}])
+    client.seed([{"id": str(10 + i), "name": f"repo-{i}", "owner": "org", "url": f"https://github.com/org/repo-{i}",
+                  "category": category, "sync_time": "2000-01-01 00:00:00"}
+                 for i, category in enumerate(["AI代理系统", "LLM服务 - 明星项目", "LLM服务与工具 - 优秀项目"])],
+                table="repos")
+
+    assert relabel_legacy_categories(client, "account", "db", dry_run=True) == {DatabaseConfig.TABLE_NAME: 2, "repos": 2}
+    assert relabel_legacy_categories(client, "account", "db") == {DatabaseConfig.TABLE_NAME: 2, "repos": 2}
+    assert relabel_legacy_categories(client, "account", "db") == {DatabaseConfig.TABLE_NAME: 0, "repos": 0}
+
+    attr = client.db.execute(f"SELECT ai_category FROM {DatabaseConfig.TABLE_NAME} ORDER BY id")[0]["results"]
+    assert [row["ai_category"] for row in attr] == ["AI智能体", DEFAULT_CATEGORY, "LLM服务与工具"]
+    repos = client.db.execute("SELECT category, sync_time FROM repos ORDER BY id")[0]["results"]
+    assert [row["category"] for row in repos] == ["AI智能体", "LLM服务与工具 - 明星项目", "LLM服务与工具 - 优秀项目"]
+    assert [row["sync_time"] > "2000-01-01 00:00:00" for row in repos] == [True, True, False]
+
+    # 标注样本中的遗留标签并入统一分类
+    categorizer = SemanticCategorizer(index_file="")
+    categorizer.add_labeled([{"name": "swarm", "description": "agent swarm orchestration"}], ["AI代理系统"])
+    assert "AI代理系统" not in categorizer.labeled and categorizer.labeled["AI智能体"]["count"] == 1
+
+    print("✅ 遗留分类改写正确")
+
+if __name__ == "__main__":
+    test_classify_batch_uses_unified_categories()
+    test_find_similar_and_persistence()
+    test_relabel_legacy_categories()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+静态仪表板导出测试脚本
+验证区块JSON版本化命名、只重写变化区块、旧版本清理与预压缩
+"""
+
+import os
+import json
+import gzip
+import tempfile
+
+from static_dashboard import export_static_dashboard, encode_section
+from metrics_dashboard import CHART_SPECS
+
+def _data(top_stars):
+    return {
+        "overview": [{"total_projects": 3, "avg_score": 61.23456}],
+        "top_projects": [{"name": f"repo{i}", "owner": "org", "stars": top_stars + i, "description": "x" * 200}
+                         for i in range(3)],
+        "ai_maturity_distribution": [{"ai_maturity_level": "mature", "count": 3, "avg_score": 61.0}],
+    }
+
+def test_encode_section_is_compact():
+    """测试列式编码与浮点数截断"""
+    print("🔍 测试区块编码")
+
+    payload = json.loads(encode_section([{"a": 1, "b": 1.23456}, {"a": 2, "c": None}]))
+    assert payload == {"columns": ["a", "b", "c"], "rows": [[1, 1.23, None], [2, None, None]]}
+
+    print("✅ 区块编码正确")
+
+def test_export_rewrites_only_changed_sections():
+    """测试未变化区块不重写, 旧版本按保留数清理, 外壳不依赖CDN"""
+    print("🔍 测试静态仪表板导出")
+
+    output_dir = tempfile.mkdtemp()
+    data_dir = os.path.join(output_dir, "data")
+    first = export_static_dashboard(_data(100), output_dir, "w1", CHART_SPECS)
+    assert sorted(first["written"]) == sorted(_data(100))
+
+    with open(os.path.join(data_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    top_file = manifest["sections"]["top_projects"]["file"]
+    assert top_file.startswith("top_projects.") and manifest["charts"]["maturityChart"]["query"] == "ai_maturity_distribution"
+    with gzip.open(os.path.join(data_dir, top_file + ".gz")) as f, open(os.path.join(data_dir, top_file), "rb") as raw:
+        assert f.read() == raw.read()
+
+    with open(os.path.join(output_dir, "index.html"), encoding="utf-8") as f:
+        shell = f.read()
+    assert "{asset_version}" not in shell and "cdn." not in shell and "charts.js?v=" in shell
+
+    assert export_static_dashboard(_data(100), output_dir, "w1", CHART_SPECS)["written"] == []
+    assert export_static_dashboard(_data(200), output_dir, "w2", CHART_SPECS)["written"] == ["top_projects"]
+    export_static_dashboard(_data(300), output_dir, "w3", CHART_SPECS)
+
+    versions = [name for name in os.listdir(data_dir) if name.startswith("top_projects.") and name.endswith(".json")]
+    assert len(versions) == 2 and top_file not in versions
+
+    print("✅ 静态仪表板导出正确")
+
+if __name__ == "__main__":
+    test_encode_section_is_compact()
+    test_export_rewrites_only_changed_sections()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+流式去重器测试脚本
+验证跨轮次按ID去重、关键词重叠矩阵与冗余关键词对
+"""
+
+from stream_deduplicator import StreamingDeduplicator
+
+def build_dedup() -> StreamingDeduplicator:
+    dedup = StreamingDeduplicator()
+    dedup.filter([{"id": i} for i in range(1, 11)], "llm")          # 1-10
+    dedup.filter([{"id": i} for i in range(6, 16)], "gpt")          # 6-15, 与 llm 重叠 5 个
+    dedup.filter([{"id": i} for i in (1, 2, 3, 20)], "agent")       # 与 llm 重叠 3 个
+    dedup.filter([{"id": 1}, {"id": 1}, {"id": None}], "llm")       # 同一关键词重复返回
+    return dedup
+
+def test_filter_keeps_first_occurrence():
+    """测试只保留首次出现的仓库, 统计每个关键词的返回数与新增数"""
+    print("🔍 测试流式去重")
+
+    dedup = StreamingDeduplicator()
+    assert [item["id"] for item in dedup.filter([{"id": 1}, {"id": 2}, {"id": 1}], "llm")] == [1, 2]
+    assert dedup.filter([{"id": 2}, {"id": 3}], "gpt") == [{"id": 3}]
+    assert 2 in dedup and 4 not in dedup and len(dedup) == 3
+
+    stats = build_dedup().get_stats()
+    assert stats["total_seen"] == 26 and stats["unique"] == 16 and stats["duplicates"] == 10
+    assert stats["per_keyword"] == {
+        "llm": {"returned": 12, "new": 10},
+        "gpt": {"returned": 10, "new": 5},
+        "agent": {"returned": 4, "new": 1},
+    }
+
+    print("✅ 流式去重正确")
+
+def test_overlap_matrix():
+    """测试重叠矩阵对称, 对角线为各关键词的唯一仓库数 (同一关键词重复返回不重复计数)"""
+    print("🔍 测试关键词重叠矩阵")
+
+    matrix = build_dedup().overlap_matrix()
+    assert matrix == {
+        "llm": {"llm": 10, "gpt": 5, "agent": 3},
+        "gpt": {"llm": 5, "gpt": 10, "agent": 0},
+        "agent": {"llm": 3, "gpt": 0, "agent": 4},
+    }
+
+    print("✅ 关键词重叠矩阵正确")
+
+def test_redundant_pairs():
+    """测试重叠率按较小关键词计算, 按重叠率降序并按阈值过滤"""
+    print("🔍 测试冗余关键词对")
+
+    dedup = build_dedup()
+    assert dedup.redundant_pairs(0.5) == [("llm", "agent", 0.75), ("llm", "gpt", 0.5)]
+    assert dedup.redundant_pairs(0.6) == [("llm", "agent", 0.75)]
+    assert dedup.redundant_pairs(0.0) == [("llm", "agent", 0.75), ("llm", "gpt", 0.5)]
+
+    print("✅ 冗余关键词对正确")
+
+if __name__ == "__main__":
+    test_filter_keeps_first_occurrence()
+    test_overlap_matrix()
+    test_redundant_pairs()
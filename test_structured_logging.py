@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+结构化日志测试脚本
+验证JSON字段、按阶段采样和 extra 合并
+"""
+
+import json
+import logging
+
+from structured_logging import JsonFormatter, StageSampler, get_stage_logger, parse_sampling
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+def test_json_formatter_and_stage_logger():
+    """测试JSON输出包含 stage 与调用方 extra 字段"""
+    print("🔍 测试JSON日志格式")
+
+    handler = _Collect()
+    base = logging.getLogger("test_structured_logging.json")
+    base.addHandler(handler)
+    base.setLevel(logging.INFO)
+    base.propagate = False
+
+    logger = get_stage_logger("test_structured_logging.json", "store")
+    logger.info("✅ 新增仓库: %s", "org/repo", extra={"repo": "org/repo", "action": "insert"})
+
+    entry = json.loads(JsonFormatter().format(handler.records[0]))
+    assert entry["msg"] == "✅ 新增仓库: org/repo"
+    assert entry["stage"] == "store" and entry["repo"] == "org/repo" and entry["action"] == "insert"
+    assert entry["level"] == "INFO" and "args" not in entry
+
+    print("✅ JSON日志格式正确")
+
+def test_stage_sampling():
+    """测试按阶段确定性采样, 警告不被采样丢弃"""
+    print("🔍 测试按阶段采样")
+
+    assert parse_sampling("store=0.05, sync=0.1,bad,x=abc") == {"store": 0.05, "sync": 0.1}
+
+    sampler = StageSampler({"store": 0.1})
+
+    def record(stage, level=logging.INFO):
+        rec = logging.LogRecord("t", level, __file__, 1, "msg", (), None)
+        if stage:
+            rec.stage = stage
+        return rec
+
+    kept = sum(sampler.filter(record("store")) for _ in range(100))
+    assert kept == 10 and sampler.dropped["store"] == 90
+    assert sampler.filter(record("store", logging.WARNING))
+    assert all(sampler.filter(record("process")) for _ in range(5))
+    assert sampler.filter(record(None))
+
+    print("✅ 按阶段采样正确")
+
+if __name__ == "__main__":
+    test_json_formatter_and_stage_logger()
+    test_stage_sampling()
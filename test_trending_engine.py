@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+趋势引擎测试脚本
+验证星标速度、加速度的增量计算和状态持久化
+"""
+
+import os
+import time
+import tempfile
+
+from trending_engine import TrendingEngine, TRENDING_WINDOWS
+
+DAY = 86400
+
+def test_velocity_tracking():
+    """测试速度随观测增量更新"""
+    print("🔍 测试星标速度计算")
+
+    engine = TrendingEngine(state_file="")
+    t0 = 1_700_000_000
+    engine.update_batch([{"id": 1, "stargazers_count": 100, "forks_count": 10}], observed_at=t0)
+    engine.update_batch([{"id": 1, "stargazers_count": 200, "forks_count": 20}], observed_at=t0 + DAY)
+
+    velocity = engine.get_velocity(1)
+    assert set(velocity) == set(TRENDING_WINDOWS)
+    # 短窗口对最新速度 (100 stars/day) 更敏感
+    assert velocity["1d"]["stars_per_day"] > velocity["7d"]["stars_per_day"] > velocity["30d"]["stars_per_day"] > 0
+    assert velocity["1d"]["stars_acceleration"] > 0
+
+    print("✅ 星标速度计算正确")
+
+def test_incremental_scoring():
+    """测试只返回本次观测到的仓库, 且快速增长的仓库评分更高"""
+    print("🔍 测试增量趋势评分")
+
+    engine = TrendingEngine(state_file="")
+    t0 = 1_700_000_000
+    engine.update_batch([
+        {"id": 1, "stargazers_count": 1000, "forks_count": 100},
+        {"id": 2, "stargazers_count": 1000, "forks_count": 100},
+    ], observed_at=t0)
+
+    scores = engine.update_batch([
+        {"id": 1, "stargazers_count": 1500, "forks_count": 150},
+        {"id": 2, "stargazers_count": 1001, "forks_count": 100},
+    ], observed_at=t0 + DAY)
+    assert scores[1] > scores[2]
+
+    scores = engine.update_batch([{"id": 1, "stargazers_count": 1600, "forks_count": 160}], observed_at=t0 + 2 * DAY)
+    assert list(scores) == [1]
+    assert engine.score_batch([1, 2, 3]).keys() == {1, 2}
+
+    print("✅ 增量趋势评分正确")
+
+def test_state_persistence():
+    """测试状态文件的保存与加载"""
+    print("🔍 测试趋势状态持久化")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        state_file = os.path.join(tmp_dir, "trending_state.json")
+        engine = TrendingEngine(state_file=state_file)
+        engine.update_batch([{"id": 7, "stargazers_count": 50, "forks_count": 5,
+                              "created_at": "2025-01-01T00:00:00Z"}])
+        assert engine.save()
+
+        restored = TrendingEngine(state_file=state_file)
+        assert restored.load() == 1
+        assert restored.get_velocity(7) == engine.get_velocity(7)
+
+    print("✅ 趋势状态持久化正确")
+
+def test_out_of_order_observation_keeps_baseline():
+    """测试乱序/同一时刻观测不改动基线, 增量在下一次观测时按完整间隔计入速度"""
+    print("🔍 测试乱序观测")
+
+    engine = TrendingEngine(state_file="")
+    t0 = 1_700_000_000
+    engine.update_batch([{"id": 1, "stargazers_count": 100, "forks_count": 10}], observed_at=t0 + DAY)
+    engine.update_batch([{"id": 1, "stargazers_count": 150, "forks_count": 15}], observed_at=t0)
+    assert engine.states[1].last_stars == 100 and engine.states[1].observations == 1
+
+    reference = TrendingEngine(state_file="")
+    reference.update_batch([{"id": 1, "stargazers_count": 100, "forks_count": 10}], observed_at=t0 + DAY)
+    for target in (engine, reference):
+        target.update_batch([{"id": 1, "stargazers_count": 300, "forks_count": 30}], observed_at=t0 + 2 * DAY)
+    assert engine.get_velocity(1) == reference.get_velocity(1)
+
+    print("✅ 乱序观测处理正确")
+
+def test_bootstrap_from_stored_records():
+    """测试用已存储的星标与采集时间回放基线, 首次运行即可得到速度"""
+    print("🔍 测试历史记录回放")
+
+    engine = TrendingEngine(state_file="")
+    replayed = engine.bootstrap_from_records([
+        {"id": 1, "stargazers_count": 100, "forks_count": 10, "collection_time": "2025-09-01 10:00:00"},
+        {"id": 2, "stargazers_count": 50, "forks_count": 5, "collection_time": None},
+    ])
+    assert replayed == 1 and list(engine.states) == [1]
+
+    scores = engine.update_batch([{"id": 1, "stargazers_count": 300, "forks_count": 10}],
+                                 observed_at="2025-09-03 10:00:00")
+    assert engine.states[1].observations == 2 and scores[1] > 0
+    assert engine.get_velocity(1)["1d"]["stars_per_day"] > 80
+
+    print("✅ 历史记录回放正确")
+
+def test_large_batch_performance():
+    """测试大批量仓库的更新耗时"""
+    print("🔍 测试大批量更新性能")
+
+    engine = TrendingEngine(state_file="")
+    batch = [{"id": i, "stargazers_count": i % 5000, "forks_count": i % 500} for i in range(1, 200_001)]
+    engine.update_batch(batch, observed_at=1_700_000_000)
+
+    start = time.perf_counter()
+    for repo in batch:
+        repo["stargazers_count"] += 3
+    engine.update_batch(batch, observed_at=1_700_000_000 + DAY)
+    elapsed = time.perf_counter() - start
+
+    print(f"   ⏱️ 200,000个仓库增量更新耗时: {elapsed:.2f}s")
+    assert elapsed < 10
+
+    print("✅ 大批量更新性能达标")
+
+if __name__ == "__main__":
+    test_velocity_tracking()
+    test_incremental_scoring()
+    test_state_persistence()
+    test_out_of_order_observation_keeps_baseline()
+    test_bootstrap_from_stored_records()
+    test_large_batch_performance()
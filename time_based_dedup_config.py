@@ -4,31 +4,12 @@
 实现30天内不重复，30天后可重新收录的逻辑
 """
 
-from datetime import datetime, timedelta
+from dedup_rule_engine import DedupRuleEngine
+from config_v2 import Config
+from dedup_rules_config import TIME_DEDUP_CONFIG  # 时间去重配置 (time_based 规则阈值由此派生)
 
-# ================================
-# 📅 时间去重配置
-# ================================
-
-TIME_DEDUP_CONFIG = {
-    # 去重时间窗口
-    "dedup_window_days": 30,        # 30天内不重复
-    
-    # 重新收录条件
-    "reentry_conditions": {
-        "min_days_since_last": 30,  # 距离上次收录至少30天
-        "activity_required": True,   # 需要有新的活动
-        "star_growth_threshold": 10, # 星标增长至少10个
-        "update_time_check": True    # 检查是否有新的推送
-    },
-    
-    # 质量提升门槛 (重新收录时的更高要求)
-    "reentry_quality_boost": {
-        "min_score_increase": 5,     # 评分至少提升5分
-        "category_change_bonus": 3,  # 分类变化额外加分
-        "new_tech_tags_bonus": 2     # 新技术标签加分
-    }
-}
+# 30天窗口/重新收录规则引擎 (sync_d1 / time_based_sync 共用)
+TIME_BASED_RULE_ENGINE = DedupRuleEngine("time_based")
 
 # ================================
 # 🔄 时间去重SQL语句
@@ -47,6 +28,15 @@ def get_time_dedup_sql():
     LIMIT 1
     """
     
+    # 批量检查30天内已存在记录的SQL ({placeholders} 为 ?,?,... 占位符; 每个ID取最新一条由调用方完成)
+    check_existing_batch_sql = """
+    SELECT id, sync_time, stars, relevance_score, category
+    FROM repos 
+    WHERE id IN ({placeholders}) 
+      AND sync_time >= datetime('now', '-30 days')
+    ORDER BY sync_time DESC
+    """
+    
     # 插入新记录的SQL (带时间标识)
     insert_with_time_sql = """
     INSERT INTO repos (
@@ -71,6 +61,7 @@ def get_time_dedup_sql():
     
     return {
         "check_existing": check_existing_sql,
+        "check_existing_batch": check_existing_batch_sql,
         "insert_new": insert_with_time_sql,
         "update_existing": update_existing_sql
     }
@@ -91,69 +82,57 @@ def should_reentry_repo(existing_record, new_data):
         tuple: (should_reentry, reason, action)
     """
     
-    if not existing_record:
-        return True, "新项目", "insert"
-    
-    # 检查时间间隔
-    last_sync = datetime.fromisoformat(existing_record['sync_time'])
-    days_since_last = (datetime.now() - last_sync).days
-    
-    if days_since_last < TIME_DEDUP_CONFIG["dedup_window_days"]:
-        # 30天内，检查是否需要更新
-        return should_update_recent_record(existing_record, new_data)
-    
-    # 超过30天，检查重新收录条件
-    return evaluate_reentry_conditions(existing_record, new_data)
-
-def should_update_recent_record(existing_record, new_data):
-    """检查是否需要更新30天内的记录"""
-    
-    old_stars = existing_record.get('stars', 0)
-    new_stars = new_data.get('stargazers_count', 0)
-    
-    # 显著的星标增长
-    if new_stars - old_stars >= 50:
-        return True, "星标显著增长", "update"
-    
-    # 分类发生变化
-    # (这里需要重新计算新数据的分类)
-    
-    # 评分显著提升
-    # (这里需要重新计算新数据的评分)
-    
-    return False, "30天内无显著变化", "skip"
+    # 规则见 dedup_rules_config.DEDUP_RULE_SETS["time_based"]
+    decision = TIME_BASED_RULE_ENGINE.evaluate_one(new_data, existing_record)
+    return decision.should_store, decision.reason, decision.action
 
-def evaluate_reentry_conditions(existing_record, new_data):
-    """评估30天后的重新收录条件"""
-    
-    conditions = TIME_DEDUP_CONFIG["reentry_conditions"]
-    reasons = []
-    
-    # 1. 检查活跃度
-    if conditions["activity_required"]:
-        last_update = existing_record.get('updated_at', '')
-        new_update = new_data.get('pushed_at', '')
-        
-        if new_update and new_update > last_update:
-            reasons.append("项目有新活动")
-        elif conditions["activity_required"]:
-            return False, "项目无新活动", "skip"
+def fetch_existing_records(client, account_id, database_id, repo_ids):
+    """
+    批量查询30天内已存在的记录 (按 DEDUP_LOOKUP_BATCH_SIZE 分批 IN 查询)
     
-    # 2. 检查星标增长
-    old_stars = existing_record.get('stars', 0)
-    new_stars = new_data.get('stargazers_count', 0)
-    star_growth = new_stars - old_stars
+    Returns:
+        dict: {仓库ID字符串: 最新一条记录}; 查询失败的批次按无记录处理
+    """
     
-    if star_growth >= conditions["star_growth_threshold"]:
-        reasons.append(f"星标增长{star_growth}个")
+    sql_template = get_time_dedup_sql()["check_existing_batch"]
+    batch_size = Config.DEDUP_LOOKUP_BATCH_SIZE
+    repo_ids = list(dict.fromkeys(str(repo_id) for repo_id in repo_ids))
+    existing = {}
+    
+    for start in range(0, len(repo_ids), batch_size):
+        chunk = repo_ids[start:start + batch_size]
+        try:
+            response = client.d1.database.query(
+                database_id=database_id,
+                account_id=account_id,
+                sql=sql_template.format(placeholders=",".join("?" * len(chunk))),
+                params=chunk
+            )
+            if response.success and response.result:
+                for record in response.result[0].results:
+                    # 按 sync_time 降序返回, 每个ID保留第一条
+                    existing.setdefault(str(record["id"]), record)
+        except Exception as e:
+            print(f"❌ 批量检查现有记录失败: {e}")
+    
+    return existing
+
+def evaluate_reentry_batch(repos, existing_records):
+    """
+    批量判断是否应该收录 (规则引擎一次评估全部仓库)
     
-    # 3. 检查质量提升
-    # (这里需要重新计算评分)
+    Args:
+        repos: 新获取的项目数据列表
+        existing_records: fetch_existing_records 的结果
     
-    if len(reasons) >= 1:  # 至少满足一个条件
-        return True, f"重新收录: {', '.join(reasons)}", "reinsert"
+    Returns:
+        list: 与 repos 顺序一致的 (should_reentry, reason, action)
+    """
     
-    return False, "不满足重新收录条件", "skip"
+    decisions = TIME_BASED_RULE_ENGINE.evaluate(
+        (repo, existing_records.get(str(repo.get("id")))) for repo in repos
+    )
+    return [(decision.should_store, decision.reason, decision.action) for decision in decisions]
 
 # ================================
 # 📊 时间去重统计
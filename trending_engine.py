@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+星标速度趋势引擎 - 基于历史观测的增量趋势评分
+功能: 按1天/7天/30天滑动窗口计算 stars/day、forks/day 的指数衰减速度与加速度
+更新时间: 2025-09-16
+"""
+
+import os
+import json
+import math
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Any, Optional, Iterable
+from dataclasses import dataclass, field
+
+from config_v2 import Config
+
+# 滑动窗口 (名称 -> 时间常数, 单位: 天)
+TRENDING_WINDOWS = {
+    "1d": 1.0,
+    "7d": 7.0,
+    "30d": 30.0,
+}
+
+# 评分参考值: 达到参考值即获得该项满分 (对数缩放)
+TRENDING_SCORE_CONFIG = {
+    "star_velocity_ref": 100.0,     # stars/day
+    "fork_velocity_ref": 20.0,      # forks/day
+    "acceleration_ref": 10.0,       # stars/day²
+    "weights": {
+        "stars_7d": 40,
+        "stars_1d": 20,
+        "stars_30d": 15,
+        "forks_7d": 15,
+        "acceleration": 10,
+    },
+}
+
+SECONDS_PER_DAY = 86400.0
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+
+@dataclass
+class RepoVelocityState:
+    """单个仓库的速度状态 (速度/加速度列表与 TRENDING_WINDOWS 顺序一致)"""
+
+    repo_id: int
+    last_stars: int = 0
+    last_forks: int = 0
+    last_seen: float = 0.0          # 最近一次观测时间 (epoch秒)
+    observations: int = 0
+    star_velocity: List[float] = field(default_factory=lambda: [0.0] * len(TRENDING_WINDOWS))
+    fork_velocity: List[float] = field(default_factory=lambda: [0.0] * len(TRENDING_WINDOWS))
+    star_acceleration: List[float] = field(default_factory=lambda: [0.0] * len(TRENDING_WINDOWS))
+    score: float = 0.0
+
+    def to_row(self) -> List[Any]:
+        """序列化为紧凑数组 (持久化用)"""
+        return [
+            self.repo_id, self.last_stars, self.last_forks, self.last_seen,
+            self.observations, self.star_velocity, self.fork_velocity,
+            self.star_acceleration, self.score
+        ]
+
+    @classmethod
+    def from_row(cls, row: List[Any]) -> 'RepoVelocityState':
+        """从紧凑数组恢复"""
+        return cls(
+            repo_id=row[0], last_stars=row[1], last_forks=row[2], last_seen=row[3],
+            observations=row[4], star_velocity=list(row[5]), fork_velocity=list(row[6]),
+            star_acceleration=list(row[7]), score=row[8]
+        )
+
+
+def parse_observation_time(value: Any) -> Optional[float]:
+    """解析观测时间为epoch秒 (支持ISO格式和北京时间 'YYYY-MM-DD HH:MM:SS')"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        text = str(value)
+        try:
+            dt = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                dt = datetime.strptime(text, "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                return None
+    if dt.tzinfo is None:
+        # 项目内无时区的时间字符串统一为北京时间
+        dt = dt.replace(tzinfo=BEIJING_TZ)
+    return dt.timestamp()
+
+
+class TrendingEngine:
+    """趋势引擎 - 增量维护每个仓库的速度状态并批量输出趋势评分"""
+
+    def __init__(self, state_file: Optional[str] = None):
+        self.config = Config()
+        self.state_file = state_file if state_file is not None else self.config.TRENDING_STATE_FILE
+        self.states: Dict[int, RepoVelocityState] = {}
+        self.taus = list(TRENDING_WINDOWS.values())
+        self.logger = logging.getLogger('ai_collector_v2.trending')
+
+    # ------------------------------------------------------------------
+    # 批量 API
+    # ------------------------------------------------------------------
+
+    def update_batch(self, repos: Iterable[Any], observed_at: Any = None) -> Dict[int, float]:
+        """
+        用本次运行观测到的仓库增量更新状态
+        repos: RepositoryData 或 GitHub API 字典
+        返回: {repo_id: trending_score}, 只包含本次观测到的仓库
+        """
+        default_ts = parse_observation_time(observed_at) or datetime.now(timezone.utc).timestamp()
+        scores = {}
+
+        for repo in repos:
+            if isinstance(repo, dict):
+                repo_id = repo.get('id')
+                stars = repo.get('stargazers_count', 0)
+                forks = repo.get('forks_count', 0)
+                created_at = repo.get('created_at')
+                ts = parse_observation_time(repo.get('observed_at')) or default_ts
+            else:
+                repo_id = repo.id
+                stars = repo.stargazers_count
+                forks = repo.forks_count
+                created_at = repo.created_at
+                ts = default_ts
+
+            if not repo_id:
+                continue
+
+            state = self._observe(int(repo_id), int(stars or 0), int(forks or 0), ts, created_at)
+            scores[state.repo_id] = state.score
+
+        return scores
+
+    def score_batch(self, repo_ids: Iterable[int]) -> Dict[int, float]:
+        """批量获取已有趋势评分 (未观测过的仓库不返回)"""
+        states = self.states
+        return {rid: states[rid].score for rid in repo_ids if rid in states}
+
+    def get_velocity(self, repo_id: int) -> Optional[Dict[str, Dict[str, float]]]:
+        """获取单个仓库各窗口的速度与加速度"""
+        state = self.states.get(repo_id)
+        if not state:
+            return None
+        return {
+            name: {
+                "stars_per_day": state.star_velocity[i],
+                "forks_per_day": state.fork_velocity[i],
+                "stars_acceleration": state.star_acceleration[i],
+            }
+            for i, name in enumerate(TRENDING_WINDOWS)
+        }
+
+    def bootstrap_from_records(self, records: Iterable[Dict[str, Any]],
+                               time_field: str = 'collection_time') -> int:
+        """
+        从已存储的历史观测记录 (D1 行) 回放构建状态
+        记录需包含 id/stargazers_count/forks_count 与时间字段, 会按时间排序后依次回放
+        """
+        timed = []
+        for record in records:
+            ts = parse_observation_time(record.get(time_field))
+            if ts is not None and record.get('id'):
+                timed.append((ts, record))
+        timed.sort(key=lambda item: item[0])
+
+        for ts, record in timed:
+            self._observe(
+                int(record['id']),
+                int(record.get('stargazers_count') or 0),
+                int(record.get('forks_count') or 0),
+                ts,
+                record.get('created_at')
+            )
+
+        self.logger.info(f"📈 趋势引擎回放 {len(timed)} 条历史观测, 覆盖 {len(self.states)} 个仓库")
+        return len(timed)
+
+    # ------------------------------------------------------------------
+    # 增量计算
+    # ------------------------------------------------------------------
+
+    def _observe(self, repo_id: int, stars: int, forks: int, ts: float,
+                 created_at: Any = None) -> RepoVelocityState:
+        """记录一次观测并更新速度、加速度和评分"""
+        state = self.states.get(repo_id)
+
+        if state is None:
+            # 首次观测: 以生命周期平均速度作为先验
+            state = RepoVelocityState(repo_id=repo_id, last_stars=stars,
+                                      last_forks=forks, last_seen=ts, observations=1)
+            created_ts = parse_observation_time(created_at)
+            if created_ts is not None and created_ts < ts:
+                age_days = max(1.0, (ts - created_ts) / SECONDS_PER_DAY)
+                state.star_velocity = [stars / age_days] * len(self.taus)
+                state.fork_velocity = [forks / age_days] * len(self.taus)
+            state.score = self._score(state)
+            self.states[repo_id] = state
+            return state
+
+        dt_days = (ts - state.last_seen) / SECONDS_PER_DAY
+        if dt_days <= 0:
+            # 同一时刻或乱序观测: 不改动基线, 增量留给下一次有时间间隔的观测按完整间隔计入速度
+            return state
+
+        star_rate = (stars - state.last_stars) / dt_days
+        fork_rate = (forks - state.last_forks) / dt_days
+
+        for i, tau in enumerate(self.taus):
+            # 不规则采样间隔下的指数衰减: alpha = 1 - e^(-dt/tau)
+            alpha = 1.0 - math.exp(-dt_days / tau)
+            old_velocity = state.star_velocity[i]
+            new_velocity = old_velocity + alpha * (star_rate - old_velocity)
+            state.star_velocity[i] = new_velocity
+            state.fork_velocity[i] += alpha * (fork_rate - state.fork_velocity[i])
+            acceleration = (new_velocity - old_velocity) / dt_days
+            state.star_acceleration[i] += alpha * (acceleration - state.star_acceleration[i])
+
+        state.last_stars = stars
+        state.last_forks = forks
+        state.last_seen = ts
+        state.observations += 1
+        state.score = self._score(state)
+        return state
+
+    def _score(self, state: RepoVelocityState) -> float:
+        """基于速度和加速度计算趋势评分 (0-100分)"""
+        cfg = TRENDING_SCORE_CONFIG
+        weights = cfg["weights"]
+        star_ref = math.log1p(cfg["star_velocity_ref"])
+        fork_ref = math.log1p(cfg["fork_velocity_ref"])
+
+        def scaled(value: float, ref: float) -> float:
+            if value <= 0:
+                return 0.0
+            return min(1.0, math.log1p(value) / ref)
+
+        score = (
+            weights["stars_1d"] * scaled(state.star_velocity[0], star_ref) +
+            weights["stars_7d"] * scaled(state.star_velocity[1], star_ref) +
+            weights["stars_30d"] * scaled(state.star_velocity[2], star_ref) +
+            weights["forks_7d"] * scaled(state.fork_velocity[1], fork_ref) +
+            weights["acceleration"] * min(1.0, max(0.0, state.star_acceleration[1]) / cfg["acceleration_ref"])
+        )
+        return round(min(score, 100.0), 2)
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def load(self) -> int:
+        """从状态文件加载, 返回加载的仓库数"""
+        if not self.state_file or not os.path.exists(self.state_file):
+            return 0
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.states = {row[0]: RepoVelocityState.from_row(row) for row in data.get("states", [])}
+            self.logger.info(f"📂 已加载趋势状态: {len(self.states)} 个仓库")
+        except Exception as e:
+            self.logger.warning(f"加载趋势状态失败: {self.state_file} | {e}")
+            self.states = {}
+        return len(self.states)
+
+    def save(self) -> bool:
+        """原子写入状态文件"""
+        if not self.state_file:
+            return False
+        tmp_file = f"{self.state_file}.tmp"
+        try:
+            payload = {
+                "windows": list(TRENDING_WINDOWS),
+                "saved_at": datetime.now(timezone.utc).isoformat(),
+                "states": [state.to_row() for state in self.states.values()],
+            }
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, separators=(',', ':'))
+            os.replace(tmp_file, self.state_file)
+            return True
+        except Exception as e:
+            self.logger.error(f"保存趋势状态失败: {self.state_file} | {e}")
+            return False
@@ -5,13 +5,18 @@
 """
 
 import os
-import requests
 from datetime import datetime, timedelta
-from cloudflare import Cloudflare
-from dotenv import load_dotenv
+from lazy_clients import load_env, lazy_import, LazyCloudflareClient
+from config_v2 import APIConfig
+from refresh_scheduler import RefreshScheduler
+from trending_engine import TrendingEngine, parse_observation_time
+from structured_logging import setup_logging, get_stage_logger
+
+# 延迟导入 (首次发起请求时才加载)
+requests = lazy_import("requests")
 
 # 加载环境变量
-load_dotenv()
+load_env()
 
 # API配置
 GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
@@ -27,7 +32,10 @@ GITHUB_HEADERS = {
 }
 
 # Cloudflare客户端
-cloudflare_client = Cloudflare(api_token=CLOUDFLARE_API_TOKEN)
+cloudflare_client = LazyCloudflareClient(CLOUDFLARE_API_TOKEN)  # 首次使用时初始化
+
+# 逐仓库更新日志 (按阶段采样)
+sync_logger = get_stage_logger('ai_collector_v2.activity_updater', 'sync')
 
 def fetch_repo_activity_data(owner, repo_name):
     """获取仓库的活跃度数据"""
@@ -36,7 +44,7 @@ def fetch_repo_activity_data(owner, repo_name):
         print(f"📊 正在获取 {owner}/{repo_name} 的活跃度数据...")
         
         # 获取仓库基础信息 (包含 pushed_at 和 watchers_count)
-        repo_url = f"https://api.github.com/repos/{owner}/{repo_name}"
+        repo_url = f"{APIConfig.GITHUB_API_BASE}/repos/{owner}/{repo_name}"
         response = requests.get(repo_url, headers=GITHUB_HEADERS)
         
         if response.status_code != 200:
@@ -105,14 +113,19 @@ def update_repo_activity_in_database(repo_id, activity_data):
         UPDATE repos SET
             pushed_at = ?,
             watchers = ?,
+            stars = ?,
+            forks = ?,
             activity_score = ?,
-            days_since_pushed = ?
+            days_since_pushed = ?,
+            sync_time = CURRENT_TIMESTAMP
         WHERE id = ?
         """
         
         params = [
             activity_data['pushed_at'],
             activity_data['watchers'],
+            activity_data['stars'],
+            activity_data['forks'],
             activity_score,
             days_since_pushed,
             repo_id
@@ -127,25 +140,32 @@ def update_repo_activity_in_database(repo_id, activity_data):
         )
         
         if response.success:
-            print(f"✅ 更新成功")
-            print(f"   📅 最后推送: {activity_data['pushed_at']}")
-            print(f"   👀 关注者: {activity_data['watchers']}")
-            print(f"   ⚡ 活跃度评分: {activity_score}/10")
-            print(f"   📊 距今天数: {days_since_pushed} 天")
+            sync_logger.info(
+                "✅ 更新成功 %s | 最后推送 %s | 关注者 %s | 活跃度 %s/10 | 距今 %s 天",
+                repo_id, activity_data['pushed_at'], activity_data['watchers'], activity_score, days_since_pushed,
+                extra={"repo_id": repo_id, "watchers": activity_data['watchers'],
+                       "activity_score": activity_score, "days_since_pushed": days_since_pushed}
+            )
             return True
         else:
-            print(f"❌ 更新失败: {response}")
+            sync_logger.error("❌ 更新失败: %s", response)
             return False
             
     except Exception as e:
-        print(f"❌ 数据库更新错误: {e}")
+        sync_logger.error("❌ 数据库更新错误: %s", e)
         return False
 
+def parse_sync_time(value):
+    """解析 repos.sync_time (SQLite CURRENT_TIMESTAMP, 无时区后缀的UTC时间) 为epoch秒"""
+    if isinstance(value, str) and len(value) == 19:
+        value = f"{value}+00:00"
+    return parse_observation_time(value)
+
 def get_all_repos_from_database():
     """从数据库获取所有仓库信息"""
     
     try:
-        sql = "SELECT id, name, owner FROM repos ORDER BY stars DESC"
+        sql = "SELECT id, name, owner, stars, forks, sync_time FROM repos ORDER BY stars DESC"
         
         response = cloudflare_client.d1.database.query(
             database_id=D1_DATABASE_ID,
@@ -165,8 +185,14 @@ def get_all_repos_from_database():
         print(f"❌ 数据库查询错误: {e}")
         return []
 
-def batch_update_activity_data(limit=10):
-    """批量更新活跃度数据"""
+def batch_update_activity_data(limit=10, prioritize=True):
+    """
+    批量更新活跃度数据
+    
+    Args:
+        limit: 本轮API预算 (每个仓库消耗1次调用)
+        prioritize: 按预期变化量调度 (否则按星标数取前limit个)
+    """
     
     print("🚀 开始批量更新活跃度数据")
     print("=" * 50)
@@ -178,8 +204,27 @@ def batch_update_activity_data(limit=10):
         print("❌ 没有找到仓库数据")
         return
     
-    # 限制更新数量 (避免API限制)
-    repos_to_update = repos[:limit]
+    # 按刷新间隔 × 星标速度 × 趋势评分调度, 预算优先给最可能变化的仓库
+    trending_engine = TrendingEngine()
+    trending_engine.load()
+    for repo in repos:
+        repo['refreshed_at'] = parse_sync_time(repo.get('sync_time'))
+    # 趋势状态中没有的仓库: 以上次同步写入的星标数作为速度基线
+    trending_engine.bootstrap_from_records(
+        ({'id': int(repo['id']), 'stargazers_count': repo.get('stars'), 'forks_count': repo.get('forks'),
+          'refreshed_at': repo['refreshed_at']}
+         for repo in repos if int(repo['id']) not in trending_engine.states),
+        time_field='refreshed_at'
+    )
+    scheduler = RefreshScheduler(trending_engine)
+    scheduler.add_repos(repos, time_field='refreshed_at')
+    
+    if prioritize:
+        repos_by_id = {int(repo['id']): repo for repo in repos}
+        repos_to_update = [repos_by_id[c.repo_id] for c in scheduler.plan_cycle(budget=limit)]
+    else:
+        # 限制更新数量 (避免API限制)
+        repos_to_update = repos[:limit]
     
     successful_updates = 0
     
@@ -191,17 +236,32 @@ def batch_update_activity_data(limit=10):
         activity_data = fetch_repo_activity_data(repo['owner'], repo['name'])
         
         if activity_data:
+            changed = activity_data['stars'] != (repo.get('stars') or 0)
+            scheduler.record_result(int(repo['id']), changed)
+            trending_engine.update_batch([{
+                'id': int(repo['id']),
+                'stargazers_count': activity_data['stars'],
+                'forks_count': activity_data['forks'],
+            }])
+            
             # 更新数据库
             if update_repo_activity_in_database(repo['id'], activity_data):
                 successful_updates += 1
+        else:
+            scheduler.record_result(int(repo['id']), False)
         
         # API限制延迟 (每分钟最多30次请求)
         import time
         time.sleep(2)  # 2秒延迟
     
+    trending_engine.save()
+    report = scheduler.get_report()
+    
     print(f"\n🎉 批量更新完成!")
     print("=" * 50)
     print(f"✅ 成功更新: {successful_updates}/{len(repos_to_update)} 个仓库")
+    print(f"📈 发生变化: {report['changed']}/{report['refreshed']} 个仓库 ({report['change_hit_rate']}%)")
+    print(f"⚡ 每次API调用的有效刷新: {report['changes_per_call']}")
 
 def test_activity_scoring():
     """测试活跃度评分算法"""
@@ -323,4 +383,5 @@ def main():
             print("❌ 无效选择，请重试")
 
 if __name__ == "__main__":
+    setup_logging()
     main()